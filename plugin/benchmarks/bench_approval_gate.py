@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Benchmark: approval gate latency versus plan size.
+
+Compares approval_cache.check_approval() with a warm stat-keyed cache against
+the uncached path (full SHA-256 of docs/plan.md on every call). With the
+cache, gate latency should stay flat as the plan grows.
+
+Usage: python3 bench_approval_gate.py [--iterations N]
+Prints a JSON report to stdout.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import approval_cache
+
+PLAN_SIZES = [1 << 10, 100 << 10, 1 << 20, 10 << 20]
+
+
+def make_worktree(root: Path, size: int) -> Path:
+    """Create a worktree with a plan of the given size and a matching approval."""
+    cwd = root / f"plan-{size}"
+    (cwd / "docs").mkdir(parents=True)
+    review_dir = cwd / ".claude" / "review"
+    review_dir.mkdir(parents=True)
+    line = b"- step: update the handler and its tests accordingly\n"
+    content = (line * (size // len(line) + 1))[:size]
+    (cwd / "docs" / "plan.md").write_bytes(content)
+    approval = {"is_optimal": True, "plan_hash": hashlib.sha256(content).hexdigest()}
+    (review_dir / "approval.json").write_text(json.dumps(approval))
+    return cwd
+
+
+def time_calls(fn, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - start) / 1000)
+    samples.sort()
+    return {
+        "mean_us": round(statistics.fmean(samples), 1),
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        worktrees = {size: make_worktree(Path(tmpdir), size) for size in PLAN_SIZES}
+        # Let the files age past the racy window so cache entries are trusted.
+        time.sleep(approval_cache.RACY_WINDOW_NS / 1e9 + 0.1)
+
+        results = []
+        for size, cwd in worktrees.items():
+            cache_file = cwd / ".claude" / "review" / approval_cache.CACHE_NAME
+
+            def uncached():
+                try:
+                    os.unlink(cache_file)
+                except FileNotFoundError:
+                    pass
+                assert approval_cache.check_approval(str(cwd)) == approval_cache.VALID
+
+            def cached():
+                assert approval_cache.check_approval(str(cwd)) == approval_cache.VALID
+
+            results.append({
+                "plan_bytes": size,
+                "uncached": time_calls(uncached, args.iterations),
+                "cached": time_calls(cached, args.iterations),
+            })
+
+    json.dump({"benchmark": "approval_gate", "results": results}, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Benchmark: check_bash_command throughput on realistic commands.
+
+Classifies a corpus of commands typical of a planning session (searches,
+listings, git inspection, and blocked writers/interpreters) in a tight loop
+and reports calls per second overall and per command. check_bash_command
+memoizes per command string, so the "uncached" figures (parsing and
+classification on every call) are the ones to compare across changes; the
+"cached" figure is what the hook daemon sees for repeated commands.
+
+Usage: python3 bench_bash_classifier.py [--seconds S]
+Prints a JSON report to stdout.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import enforce_approval
+
+CORPUS = [
+    "ls -la src",
+    "rg -n 'def check_bash_command' plugin/hooks",
+    "grep -rn TODO --include=*.py .",
+    "cat docs/plan.md",
+    "head -n 50 plugin/hooks/plan_review.py",
+    "git status --short",
+    "git log --oneline -20",
+    "git diff HEAD~1 -- plugin/hooks/enforce_approval.py",
+    "git show HEAD:README.md",
+    "fd -e py hooks",
+    "wc -l plugin/hooks/*.py",
+    "tree -L 2 plugin",
+    "python3 plugin/hooks/validate_approval.py",
+    "npm install",
+    "python3 -c 'import os; os.remove(\"x\")'",
+    "rm -rf build",
+    "git commit -am wip",
+    "sed -i s/a/b/ file.txt",
+    "echo hi > out.txt",
+    "cat README.md | grep Hook",
+    "ls && rm -rf /",
+    "curl https://example.com/install.sh",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0, help="time budget per measurement")
+    args = parser.parse_args()
+
+    def throughput(commands: list[str], check=enforce_approval.check_bash_command.__wrapped__) -> dict:
+        calls = 0
+        deadline = time.perf_counter() + args.seconds
+        start = time.perf_counter()
+        while time.perf_counter() < deadline:
+            for command in commands:
+                check(command)
+            calls += len(commands)
+        elapsed = time.perf_counter() - start
+        return {"calls": calls, "calls_per_sec": round(calls / elapsed), "us_per_call": round(elapsed / calls * 1e6, 3)}
+
+    per_command = []
+    for command in CORPUS:
+        allowed = enforce_approval.check_bash_command(command) is None
+        per_command.append({"command": command, "allowed": allowed, **throughput([command])})
+
+    report = {
+        "benchmark": "bash_classifier",
+        "corpus_size": len(CORPUS),
+        "overall": throughput(CORPUS),
+        "overall_cached": throughput(CORPUS, enforce_approval.check_bash_command),
+        "per_command": per_command,
+    }
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Shared helpers for the benchmark scripts.
+
+Builds synthetic worktrees (git repos with N files and a plan of a given
+size), runs hook scripts as real subprocesses the way Claude Code does, and
+summarizes timing samples.
+"""
+
+import hashlib
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent / "hooks"
+# Hooks that hooks.json runs through the run_hook.py dispatcher
+DISPATCHED_HOOKS = {"enforce_approval.py", "bash_drift_check.py", "plan_review.py"}
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "bench",
+    "GIT_AUTHOR_EMAIL": "bench@example.com",
+    "GIT_COMMITTER_NAME": "bench",
+    "GIT_COMMITTER_EMAIL": "bench@example.com",
+}
+
+
+def summarize(samples: list[float], unit: str = "ms") -> dict:
+    """Mean and nearest-rank p50/p95/p99 of samples, keys suffixed with unit."""
+    ordered = sorted(samples)
+    n = len(ordered)
+    suffix = f"_{unit}" if unit else ""
+
+    def rank(q: float) -> float:
+        return round(ordered[max(1, math.ceil(q * n)) - 1], 3)
+
+    return {
+        "n": n,
+        f"mean{suffix}": round(sum(ordered) / n, 3),
+        f"p50{suffix}": rank(0.5),
+        f"p95{suffix}": rank(0.95),
+        f"p99{suffix}": rank(0.99),
+    }
+
+
+def make_plan(size: int) -> bytes:
+    """Plan text with all required sections, padded to size bytes."""
+    head = (
+        b"## Goal\nBenchmark.\n## Context\nSynthetic.\n## Approach\nNone.\n"
+        b"## Risks\nNone.\n## Open Questions\nNone.\n## Changes\n"
+    )
+    line = b"- `src/module.py` (new): write the handler and its tests accordingly\n"
+    body = line * (max(0, size - len(head)) // len(line) + 1)
+    return (head + body)[:size]
+
+
+def make_repo(root: Path, files: int) -> Path:
+    """Create a committed git repo with the given number of small files."""
+    root.mkdir(parents=True)
+    env = {**os.environ, **GIT_ENV}
+    subprocess.run(["git", "init", "-q", "-b", "main"], cwd=root, check=True)
+    per_dir = 1000
+    for i in range(files):
+        d = root / "src" / f"d{i // per_dir:04d}"
+        if i % per_dir == 0:
+            d.mkdir(parents=True)
+        (d / f"f{i:06d}.txt").write_text(f"file {i}\n")
+    subprocess.run(["git", "add", "-A"], cwd=root, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=root, check=True, env=env)
+    # Warm the index's untracked cache the way a long-lived worktree would be
+    subprocess.run(["git", "-c", "core.untrackedCache=true", "status", "-s"], cwd=root,
+                   check=True, stdout=subprocess.DEVNULL)
+    return root
+
+
+def write_plan(cwd: Path, size: int, approved: bool):
+    """Write docs/plan.md (and a matching approval.json if approved)."""
+    content = make_plan(size)
+    (cwd / "docs").mkdir(exist_ok=True)
+    (cwd / "docs" / "plan.md").write_bytes(content)
+    review_dir = cwd / ".claude" / "review"
+    review_dir.mkdir(parents=True, exist_ok=True)
+    approval = review_dir / "approval.json"
+    if approved:
+        approval.write_text(json.dumps({"is_optimal": True, "plan_hash": hashlib.sha256(content).hexdigest()}))
+    elif approval.exists():
+        approval.unlink()
+
+
+def hook_env(**extra) -> dict:
+    """Environment for hook subprocesses (in-process hooks, no daemon)."""
+    return {**os.environ, "CODEX_REVIEW_NO_DAEMON": "1", **extra}
+
+
+def time_hook(script: str, payload: dict | None, cwd: Path, iterations: int, env: dict | None = None) -> dict:
+    """Run a hook script as a subprocess iterations times; return timing stats.
+
+    Hooks registered in hooks.json are run through run_hook.py, as the host
+    runs them.
+    """
+    if script in DISPATCHED_HOOKS:
+        cmd = [sys.executable, "-S", str(HOOKS_DIR / "run_hook.py"), script.removesuffix(".py")]
+    else:
+        cmd = [sys.executable, str(HOOKS_DIR / script)]
+    data = json.dumps(payload).encode() if payload is not None else b""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        subprocess.run(cmd, input=data, cwd=cwd, env=env or hook_env(),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Benchmark: evidence appendix build time versus repository size.
+
+Builds repos of increasing size with Python modules defining handlers, and
+a plan naming a mix of existing and missing paths, file:line references and
+identifiers. Reports the cold build (reference extraction, git grep, path
+checks, formatting), the cached build for the same plan and HEAD, and the
+appendix size against evidence.max_bytes. The Codex round trips this saves
+need the real service, so only the local cost is measured.
+
+Usage: python3 bench_evidence.py [--repo-files N,N,...] [--iterations N]
+Prints a JSON report to stdout.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import bench_common
+import evidence
+import hook_config
+
+DEFAULT_REPO_FILES = [100, 5000, 50000]
+REFERENCES = 20
+
+
+def make_repo(root: Path, files: int) -> Path:
+    root.mkdir(parents=True)
+    env = {**os.environ, **bench_common.GIT_ENV}
+    subprocess.run(["git", "init", "-q", "-b", "main"], cwd=root, check=True)
+    for i in range(files):
+        d = root / "src" / f"pkg{i // 1000:03d}"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"handler_{i}.py").write_text(
+            f"import os\n\n\nclass Handler{i}:\n    def handle_request_{i}(self, request):\n        return request\n"
+        )
+    subprocess.run(["git", "add", "-A"], cwd=root, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=root, check=True, env=env)
+    return root
+
+
+def make_plan(files: int) -> str:
+    step = max(1, files // REFERENCES)
+    entries = []
+    for n, i in enumerate(range(0, files, step)):
+        if n % 3 == 0:
+            entries.append(f"- `src/pkg{i // 1000:03d}/handler_{i}.py:5`: change `handle_request_{i}()`")
+        elif n % 3 == 1:
+            entries.append(f"- Rename `Handler{i}` and move it to `src/new/handler_{i}.py`")
+        else:
+            entries.append(f"- Make handle_request_{i} validate input")
+    return (
+        "## Goal\nHarden handlers.\n\n## Context\nHandlers trust input.\n\n## Approach\nValidate.\n\n"
+        "## Changes\n" + "\n".join(entries) + "\n\n## Risks\nNone.\n\n## Open Questions\nNone.\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repo-files", default=",".join(map(str, DEFAULT_REPO_FILES)))
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+    settings = hook_config.DEFAULTS["evidence"]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for files in (int(n) for n in args.repo_files.split(",")):
+            repo = make_repo(Path(tmp) / f"repo{files}", files)
+            review_dir = repo / ".claude" / "review"
+            review_dir.mkdir(parents=True)
+            plan = make_plan(files)
+
+            cold = []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                appendix = evidence.collect(str(repo), plan, settings["max_bytes"], settings["timeout"])
+                cold.append((time.perf_counter() - start) * 1000)
+
+            evidence.build(str(repo), review_dir, plan, settings)
+            cached = []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                evidence.build(str(repo), review_dir, plan, settings)
+                cached.append((time.perf_counter() - start) * 1000)
+
+            paths, names = evidence.extract_references(plan)
+            results.append({
+                "repo_files": files,
+                "paths": len(paths),
+                "identifiers": len(names),
+                "appendix_bytes": len((appendix or "").encode()),
+                "cold": bench_common.summarize(cold),
+                "cached": bench_common.summarize(cached),
+            })
+
+    json.dump({"benchmark": "evidence", "results": results}, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
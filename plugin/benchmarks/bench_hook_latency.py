@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark: end-to-end latency of the per-tool-call hooks.
+
+Runs enforce_approval.py, bash_drift_check.py and validate_approval.py as
+real subprocesses (interpreter startup included, hook daemon disabled)
+against synthetic worktrees, across plan sizes and repository sizes. This is
+the tax every Claude tool call pays.
+
+Scenarios per (repo size, plan size):
+  planning  - no approval: enforce_approval on `ls`, bash_drift_check after it,
+              plan_review after a Write of a plan-sized file that is not
+              docs/plan.md (its no-op fast path)
+  approved  - valid approval: enforce_approval on a Write, bash_drift_check,
+              validate_approval
+
+Usage: python3 bench_hook_latency.py [--iterations N]
+           [--plan-sizes BYTES,...] [--repo-files N,...]
+Prints a JSON report to stdout. Building the 200k-file repo takes a while.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_common import make_repo, time_hook, write_plan
+
+PLAN_SIZES = [1 << 10, 100 << 10, 1 << 20, 10 << 20]
+REPO_FILES = [100, 10_000, 200_000]
+
+
+def _ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def bench_worktree(cwd: Path, plan_size: int, iterations: int) -> dict:
+    bash = {"tool_name": "Bash", "tool_use_id": "toolu_bench", "cwd": str(cwd), "tool_input": {"command": "ls"}}
+    write = {"tool_name": "Write", "cwd": str(cwd), "tool_input": {"file_path": "src/new.py"}}
+    other_write = {
+        "tool_name": "Write",
+        "cwd": str(cwd),
+        "tool_input": {"file_path": "src/new.md", "content": "x" * plan_size},
+    }
+
+    write_plan(cwd, plan_size, approved=False)
+    planning = {
+        "enforce_approval_bash": time_hook("enforce_approval.py", bash, cwd, iterations),
+        "bash_drift_check": time_hook("bash_drift_check.py", bash, cwd, iterations),
+        "plan_review_other_write": time_hook("plan_review.py", other_write, cwd, iterations),
+    }
+
+    write_plan(cwd, plan_size, approved=True)
+    approved = {
+        "enforce_approval_write": time_hook("enforce_approval.py", write, cwd, iterations),
+        "bash_drift_check": time_hook("bash_drift_check.py", bash, cwd, iterations),
+        "validate_approval": time_hook("validate_approval.py", None, cwd, iterations),
+    }
+    return {"planning": planning, "approved": approved}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--plan-sizes", type=_ints, default=PLAN_SIZES)
+    parser.add_argument("--repo-files", type=_ints, default=REPO_FILES)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for files in args.repo_files:
+            cwd = make_repo(Path(tmpdir) / f"repo-{files}", files)
+            for plan_size in args.plan_sizes:
+                results.append({
+                    "repo_files": files,
+                    "plan_bytes": plan_size,
+                    **bench_worktree(cwd, plan_size, args.iterations),
+                })
+
+    json.dump({"benchmark": "hook_latency", "iterations": args.iterations, "results": results},
+              sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Benchmark: pre-flight plan lint time versus plan size.
+
+Lints plans with a growing number of ## Changes entries, each naming an
+existing file, a new file, or a missing one, in a repo of 5000 files.
+Reports the full lint pass (parse plus every stock check, including the
+git ls-files lookup missing paths trigger) and the parse alone, against
+the minutes a Codex run on a plan the checks reject would take.
+
+Usage: python3 bench_plan_lint.py [--entries N,N,...] [--iterations N]
+Prints a JSON report to stdout.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import bench_common
+import plan_lint
+import plan_review
+
+DEFAULT_ENTRIES = [10, 100, 1000]
+REPO_FILES = 5000
+
+
+def make_plan(entries: int) -> str:
+    lines = []
+    for i in range(entries):
+        path = f"src/d{i // 1000:04d}/f{i:06d}.txt"
+        if i % 3 == 0:
+            lines.append(f"- `{path}`: update record {i}")
+        elif i % 3 == 1:
+            lines.append(f"- New file `src/new/f{i:06d}.txt` for record {i}")
+        else:
+            lines.append(f"- `src/missing/f{i:06d}.txt`: update record {i}")
+    return (
+        "## Goal\nUpdate records.\n\n## Context\nRecords live under `src/`.\n\n## Approach\nEdit in place.\n\n"
+        "## Changes\n" + "\n".join(lines) + "\n\n## Risks\nNone.\n\n## Open Questions\n- Should we batch? Yes.\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", default=",".join(map(str, DEFAULT_ENTRIES)))
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = bench_common.make_repo(Path(tmp) / "repo", REPO_FILES)
+        for entries in (int(n) for n in args.entries.split(",")):
+            plan = make_plan(entries)
+            lint, parse = [], []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                findings = plan_lint.lint(plan, str(repo), plan_review.REQUIRED_HEADINGS)
+                lint.append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                plan_lint.parse_sections(plan)
+                parse.append((time.perf_counter() - start) * 1000)
+            results.append({
+                "entries": entries,
+                "plan_bytes": len(plan.encode()),
+                "findings": len(findings),
+                "lint": bench_common.summarize(lint),
+                "parse": bench_common.summarize(parse),
+            })
+
+    json.dump({"benchmark": "plan_lint", "repo_files": REPO_FILES, "results": results}, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
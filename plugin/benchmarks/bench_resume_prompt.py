@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark: resume prompt size, full plan versus section-aware diff.
+
+Builds synthetic plans of increasing size, applies a typical revision (one
+## Changes entry reworded, one added) and compares the bytes Codex receives
+with the full-plan prompt against the diff prompt used for resumed sessions.
+Prompt construction time is reported as well. Codex latency itself needs
+the real service, so this benchmark covers the local side only.
+
+Usage: python3 bench_resume_prompt.py
+Prints a JSON report to stdout.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import plan_review
+
+CHANGE_COUNTS = [5, 25, 100, 400]
+
+
+def make_plan(changes: int) -> str:
+    entries = "\n".join(
+        f"- `src/module_{i}.py`: update handler {i} to use the shared client and add tests"
+        for i in range(changes)
+    )
+    return (
+        "## Goal\nMigrate handlers to the shared client.\n\n"
+        "## Context\nHandlers each build their own client today.\n\n"
+        "## Approach\nIntroduce one client factory and inject it.\n\n"
+        f"## Changes\n{entries}\n\n"
+        "## Risks\nBehaviour drift in retry settings.\n\n"
+        "## Open Questions\nNone\n"
+    )
+
+
+def revise(plan: str) -> str:
+    plan = plan.replace("update handler 1 to", "rework handler 1 to", 1)
+    return plan.replace("## Risks\n", "- `src/client.py`: new factory\n\n## Risks\n", 1)
+
+
+def main():
+    results = []
+    for changes in CHANGE_COUNTS:
+        previous = make_plan(changes)
+        current = revise(previous)
+
+        start = time.perf_counter()
+        full = plan_review.build_codex_prompt(current, 2)
+        full_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        diff = plan_review.build_codex_prompt(current, 2, previous, 1)
+        diff_ms = (time.perf_counter() - start) * 1000
+
+        results.append({
+            "plan_bytes": len(current.encode()),
+            "full_prompt_bytes": len(full.encode()),
+            "diff_prompt_bytes": len(diff.encode()),
+            "full_build_ms": round(full_ms, 3),
+            "diff_build_ms": round(diff_ms, 3),
+        })
+
+    json.dump({"benchmark": "resume_prompt", "results": results}, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
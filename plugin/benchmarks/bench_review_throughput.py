@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmark: review-loop throughput with a scripted Codex stand-in.
+
+Drives plan_review.py as a real PostToolUse subprocess through repeated
+revision cycles, with codex_standin.py answering as `codex` (rejecting
+until the last revision of each cycle, then approving). Each revision
+writes new plan content, so the review cache never short-circuits Codex.
+Reports revisions per hour and the hook's own overhead (wall time minus the
+stand-in's scripted latency).
+
+Usage: python3 bench_review_throughput.py [--revisions N] [--codex-latency S]
+           [--cycle-length K]
+Prints a JSON report to stdout.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import codex_standin
+from bench_common import HOOKS_DIR, hook_env, make_plan, make_repo, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--revisions", type=int, default=50)
+    parser.add_argument("--codex-latency", type=float, default=0.0, help="stand-in seconds per review")
+    parser.add_argument("--cycle-length", type=int, default=3, help="revisions per cycle; the last is approved")
+    parser.add_argument("--plan-bytes", type=int, default=8 << 10)
+    args = parser.parse_args()
+
+    verdicts = ",".join(["reject"] * (args.cycle_length - 1) + ["approve"])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cwd = make_repo(Path(tmpdir) / "repo", 100)
+        bin_dir = Path(tmpdir) / "bin"
+        codex_standin.install(str(bin_dir))
+        env = hook_env(
+            PATH=f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+            CODEX_STANDIN_VERDICTS=verdicts,
+            CODEX_STANDIN_LATENCY=str(args.codex_latency),
+            CODEX_STANDIN_STATE=str(Path(tmpdir) / "standin-state"),
+        )
+        payload = json.dumps({"cwd": str(cwd), "tool_input": {"file_path": "docs/plan.md"}}).encode()
+        (cwd / "docs").mkdir()
+        base = make_plan(args.plan_bytes)
+
+        samples = []
+        outcomes = {"approved": 0, "rejected": 0, "other": 0}
+        start = time.perf_counter()
+        for revision in range(args.revisions):
+            if revision % args.cycle_length == 0:
+                # New cycle: start from a clean review state
+                shutil.rmtree(cwd / ".claude" / "review", ignore_errors=True)
+            (cwd / "docs" / "plan.md").write_bytes(base + f"\n- revision {revision}\n".encode())
+            t0 = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, str(HOOKS_DIR / "plan_review.py")],
+                input=payload, cwd=cwd, env=env, capture_output=True, check=False,
+            )
+            samples.append((time.perf_counter() - t0) * 1000)
+            try:
+                output = json.loads(proc.stdout or b"{}")
+            except ValueError:
+                output = {}
+            if output.get("decision") == "block":
+                outcomes["rejected"] += 1
+            elif (cwd / ".claude" / "review" / "approval.json").exists():
+                outcomes["approved"] += 1
+            else:
+                outcomes["other"] += 1
+        elapsed = time.perf_counter() - start
+
+    overhead = [ms - args.codex_latency * 1000 for ms in samples]
+    report = {
+        "benchmark": "review_throughput",
+        "revisions": args.revisions,
+        "codex_latency_s": args.codex_latency,
+        "elapsed_s": round(elapsed, 3),
+        "revisions_per_hour": round(args.revisions / elapsed * 3600),
+        "outcomes": outcomes,
+        "hook_wall": summarize(samples),
+        "hook_overhead": summarize(overhead),
+    }
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
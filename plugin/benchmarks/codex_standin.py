@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""Local stand-in for the `codex` CLI, for benchmarks and soak tests.
+
+Implements the surface plan_review.py uses:
+
+  codex exec --json --cd DIR --output-schema SCHEMA -o OUT -
+  codex exec resume THREAD_ID --cd DIR --output-schema SCHEMA -o OUT -
+
+It reads the prompt from stdin, prints an event stream (JSONL with --json,
+starting with thread.started; plain text otherwise), and writes a
+schema-conforming review to OUT. Resuming a thread this stand-in never
+started fails, as with the real CLI.
+
+Behaviour is scripted with a JSON config file (CODEX_STANDIN_CONFIG) and/or
+environment variables; environment variables win. Keys:
+
+  verdicts          comma-separated approve/reject sequence, cycled per
+                    completed review
+                    (env CODEX_STANDIN_VERDICTS, default "reject,approve")
+  latency           seconds before answering: "0.5", "uniform:LO:HI",
+                    "lognormal:MU:SIGMA" or "exp:MEAN"
+                    (env CODEX_STANDIN_LATENCY, default "0")
+  fail_rate         probability a call exits 1 with an error
+                    (env CODEX_STANDIN_FAIL_RATE)
+  resume_fail_rate  probability a resume call fails (env CODEX_STANDIN_RESUME_FAIL_RATE)
+  hang_rate         probability a call hangs for hang_seconds, to exercise
+                    timeouts (env CODEX_STANDIN_HANG_RATE, CODEX_STANDIN_HANG_SECONDS)
+  malformed_rate    probability the output file is invalid JSON or misses
+                    required fields (env CODEX_STANDIN_MALFORMED_RATE)
+  seed              random seed; each call uses seed + call number
+                    (env CODEX_STANDIN_SEED)
+  state             file holding the call counter and known threads
+                    (env CODEX_STANDIN_STATE, default: one per --cd
+                    directory under the temp dir)
+  log               JSONL file receiving one record per call (mode,
+                    latency, outcome, CPU seconds, max RSS)
+                    (env CODEX_STANDIN_LOG)
+
+install(bin_dir) writes a `codex` shim running this script, so putting
+bin_dir first on PATH makes the hooks use the stand-in.
+"""
+
+import fcntl
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import uuid
+import zlib
+
+ENV_KEYS = {
+    "verdicts": "CODEX_STANDIN_VERDICTS",
+    "latency": "CODEX_STANDIN_LATENCY",
+    "fail_rate": "CODEX_STANDIN_FAIL_RATE",
+    "resume_fail_rate": "CODEX_STANDIN_RESUME_FAIL_RATE",
+    "hang_rate": "CODEX_STANDIN_HANG_RATE",
+    "hang_seconds": "CODEX_STANDIN_HANG_SECONDS",
+    "malformed_rate": "CODEX_STANDIN_MALFORMED_RATE",
+    "seed": "CODEX_STANDIN_SEED",
+    "state": "CODEX_STANDIN_STATE",
+    "log": "CODEX_STANDIN_LOG",
+}
+
+DEFAULTS = {
+    "verdicts": "reject,approve",
+    "latency": "0",
+    "fail_rate": 0.0,
+    "resume_fail_rate": 0.0,
+    "hang_rate": 0.0,
+    "hang_seconds": 3600.0,
+    "malformed_rate": 0.0,
+    "seed": None,
+    "state": None,
+    "log": None,
+}
+
+
+def install(bin_dir: str) -> str:
+    """Write an executable `codex` shim into bin_dir and return its path."""
+    os.makedirs(bin_dir, exist_ok=True)
+    shim = os.path.join(bin_dir, "codex")
+    with open(shim, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.abspath(__file__)}" "$@"\n')
+    os.chmod(shim, 0o755)
+    return shim
+
+
+def load_settings(environ=os.environ) -> dict:
+    """Merge DEFAULTS, the CODEX_STANDIN_CONFIG file and environment overrides."""
+    settings = dict(DEFAULTS)
+    path = environ.get("CODEX_STANDIN_CONFIG")
+    if path:
+        with open(path) as f:
+            settings.update(json.load(f))
+    for key, var in ENV_KEYS.items():
+        if var in environ:
+            settings[key] = environ[var]
+    if isinstance(settings["verdicts"], list):
+        settings["verdicts"] = ",".join(settings["verdicts"])
+    for key in ("fail_rate", "resume_fail_rate", "hang_rate", "hang_seconds", "malformed_rate"):
+        settings[key] = float(settings[key])
+    return settings
+
+
+def sample_latency(spec, rng: random.Random) -> float:
+    """Draw a latency in seconds from a spec like "uniform:0.1:2"."""
+    spec = str(spec)
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(":") if v]
+    if kind == "uniform":
+        return rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return rng.lognormvariate(values[0], values[1])
+    if kind == "exp":
+        return rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    return float(spec)
+
+
+def parse_args(argv: list[str]) -> dict:
+    """Parse the exec / exec resume command line."""
+    if not argv or argv[0] != "exec":
+        raise SystemExit(f"codex stand-in: unsupported command {argv[:1]}")
+    args = {"resume": None, "cd": os.getcwd(), "output": None, "schema": None, "json": False}
+    rest = argv[1:]
+    if rest[:1] == ["resume"]:
+        args["resume"] = rest[1]
+        rest = rest[2:]
+    i = 0
+    while i < len(rest):
+        flag = rest[i]
+        if flag in ("--cd", "-o", "--output-schema"):
+            key = {"--cd": "cd", "-o": "output", "--output-schema": "schema"}[flag]
+            args[key] = rest[i + 1]
+            i += 2
+        else:
+            args["json"] = args["json"] or flag == "--json"
+            i += 1
+    return args
+
+
+def update_state(state_path: str, counter: str, new_thread: str | None = None) -> tuple[int, list[str]]:
+    """Increment counter in the state file; return its old value and known threads.
+
+    Concurrent calls for the same state file are serialized with flock.
+    """
+    fd = os.open(state_path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, "r+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            state = json.loads(f.read() or "{}")
+        except ValueError:
+            state = {}
+        count = state.get(counter, 0)
+        threads = state.get("threads", [])
+        state[counter] = count + 1
+        if new_thread:
+            state["threads"] = threads + [new_thread]
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps(state))
+    return count, threads
+
+
+def review(approve: bool, call: int) -> dict:
+    if approve:
+        return {
+            "is_optimal": True,
+            "blocking_issues": [],
+            "recommended_changes": [],
+            "annotated_plan_markdown": "",
+            "summary": f"Stand-in approval (call {call}).",
+        }
+    return {
+        "is_optimal": False,
+        "blocking_issues": [
+            {"severity": "high", "claim": f"Stand-in issue {call}", "evidence": "scripted", "fix": "revise"}
+        ],
+        "recommended_changes": [],
+        "annotated_plan_markdown": f"<!-- stand-in review {call} -->\n",
+        "summary": f"Stand-in rejection (call {call}).",
+    }
+
+
+def log_call(path: str | None, record: dict):
+    if not path:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    record["cpu_s"] = round(usage.ru_utime + usage.ru_stime, 4)
+    record["maxrss_kb"] = usage.ru_maxrss
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    settings = load_settings()
+    prompt = sys.stdin.read()
+    state = settings["state"] or os.path.join(
+        tempfile.gettempdir(), f"codex-standin-{zlib.crc32(os.path.abspath(args['cd']).encode()):08x}"
+    )
+    thread_id = args["resume"] or str(uuid.uuid4())
+    call, known_threads = update_state(state, "calls", None if args["resume"] else thread_id)
+    seed = settings["seed"]
+    rng = random.Random(None if seed is None else int(seed) + call)
+    record = {"call": call, "mode": "resume" if args["resume"] else "fresh", "prompt_bytes": len(prompt)}
+
+    def emit(event: dict, text: str):
+        sys.stdout.write((json.dumps(event) if args["json"] else text) + "\n")
+        sys.stdout.flush()
+
+    if args["resume"] and (args["resume"] not in known_threads or rng.random() < settings["resume_fail_rate"]):
+        sys.stderr.write(f"Error: thread {args['resume']} could not be resumed\n")
+        log_call(settings["log"], {**record, "outcome": "resume_failed"})
+        sys.exit(1)
+
+    emit({"type": "thread.started", "thread_id": thread_id}, f"session id: {thread_id}")
+    emit({"type": "turn.started"}, "thinking...")
+
+    if rng.random() < settings["hang_rate"]:
+        log_call(settings["log"], {**record, "outcome": "hang"})
+        time.sleep(settings["hang_seconds"])
+        sys.exit(1)
+
+    latency = sample_latency(settings["latency"], rng)
+    time.sleep(latency)
+    record["latency_s"] = round(latency, 4)
+
+    if rng.random() < settings["fail_rate"]:
+        sys.stderr.write("Error: stream disconnected before completion (stand-in)\n")
+        log_call(settings["log"], {**record, "outcome": "failed"})
+        sys.exit(1)
+
+    # The verdict sequence advances only on completed reviews
+    completed, _ = update_state(state, "reviews")
+    verdicts = [v.strip() for v in settings["verdicts"].split(",") if v.strip()]
+    approve = verdicts[completed % len(verdicts)] == "approve"
+    result = review(approve, call)
+    outcome = "approve" if approve else "reject"
+    if rng.random() < settings["malformed_rate"]:
+        outcome = "malformed"
+        result = None if rng.random() < 0.5 else {"summary": "missing fields"}
+
+    emit({"type": "item.completed", "item": {"type": "agent_message"}}, "review complete")
+    emit({"type": "turn.completed"}, "done")
+    if args["output"]:
+        with open(args["output"], "w") as f:
+            if result is None:
+                f.write('{"is_optimal": tru')
+            else:
+                json.dump(result, f)
+    log_call(settings["log"], {**record, "outcome": outcome})
+
+
+if __name__ == "__main__":
+    main()
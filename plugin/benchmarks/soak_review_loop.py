@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Soak test: many worktrees cycling through the review loop at once.
+
+Creates one repository with N git worktrees (as bootstrap.sh does, so they
+share the review cache in the git common dir), installs codex_standin.py as
+`codex`, and drives plan_review.py in every worktree concurrently through
+multi-revision cycles: write a new plan revision, run the hook, repeat until
+the stand-in approves or the revision limit is hit. The next cycle's first
+write invalidates the approval, as a new planning session would.
+
+Reports end-to-end cycle time, per-hook wall time, CPU and max RSS (from
+wait4, with the stand-in's own CPU subtracted), outcome counts, and growth
+of .claude/review/ and the shared review cache.
+
+Usage: python3 soak_review_loop.py [--worktrees N] [--cycles C]
+           [--latency SPEC] [--fail-rate P] [--resume-fail-rate P]
+           [--hang-rate P --hang-seconds S --hook-timeout S]
+           [--malformed-rate P] [--verdicts SEQ] [--seed N]
+See codex_standin.py for the latency SPEC format. Prints a JSON report.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import codex_standin
+from bench_common import GIT_ENV, HOOKS_DIR, hook_env, make_plan, make_repo, summarize
+
+sys.path.insert(0, str(HOOKS_DIR))
+import review_jobs
+
+
+def dir_usage(path: Path) -> tuple[int, int]:
+    """Total bytes and file count under path."""
+    total = files = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+                files += 1
+            except OSError:
+                pass
+    return total, files
+
+
+def run_hook(payload: bytes, cwd: Path, env: dict, timeout: float) -> dict:
+    """Run plan_review.py once; return stdout, wall time, rusage and timeout flag."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(HOOKS_DIR / "plan_review.py")],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=cwd, env=env,
+    )
+    killed = threading.Event()
+
+    def kill():
+        # What Claude Code does when a hook exceeds its timeout
+        killed.set()
+        try:
+            os.kill(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        proc.stdin.write(payload)
+        proc.stdin.close()
+        stdout = proc.stdout.read()
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+    return {
+        "stdout": stdout,
+        "wall_ms": (time.perf_counter() - start) * 1000,
+        "cpu_ms": (usage.ru_utime + usage.ru_stime) * 1000,
+        "maxrss_kb": usage.ru_maxrss,
+        "timed_out": killed.is_set(),
+    }
+
+
+def classify(result: dict, review_dir: Path) -> str:
+    if result["timed_out"]:
+        return "hook_timeout"
+    try:
+        output = json.loads(result["stdout"] or b"{}")
+    except ValueError:
+        return "bad_output"
+    reason = output.get("reason", "")
+    if output.get("decision") == "block":
+        if reason.startswith("Codex review"):
+            return "rejected"
+        if reason.startswith("Maximum revision"):
+            return "exhausted"
+        return "error"
+    if (review_dir / "approval.json").exists():
+        return "approved"
+    return "no_verdict"
+
+
+class Worktree:
+    """One worktree's soak loop and its measurements."""
+
+    def __init__(self, cwd: Path, env: dict, standin_log: Path, args):
+        self.cwd = cwd
+        self.env = env
+        self.standin_log = standin_log
+        self.args = args
+        self.review_dir = cwd / ".claude" / "review"
+        self.payload = json.dumps({"cwd": str(cwd), "tool_input": {"file_path": "docs/plan.md"}}).encode()
+        self.log_offset = 0
+        self.hook_runs = []
+        self.cycles = []
+
+    def standin_cpu_ms(self) -> float:
+        """CPU used by stand-in calls logged since the last check."""
+        try:
+            with open(self.standin_log, "rb") as f:
+                f.seek(self.log_offset)
+                data = f.read()
+        except OSError:
+            return 0.0
+        self.log_offset += len(data)
+        return sum(json.loads(line).get("cpu_s", 0) * 1000 for line in data.splitlines() if line.strip())
+
+    def run(self, index: int):
+        base = make_plan(self.args.plan_bytes)
+        (self.cwd / "docs").mkdir(exist_ok=True)
+        for cycle in range(self.args.cycles):
+            start = time.perf_counter()
+            outcome = None
+            revisions = 0
+            while revisions < self.args.max_revisions:
+                revisions += 1
+                plan = base + f"\n- worktree {index} cycle {cycle} revision {revisions}\n".encode()
+                (self.cwd / "docs" / "plan.md").write_bytes(plan)
+                result = run_hook(self.payload, self.cwd, self.env, self.args.hook_timeout)
+                outcome = classify(result, self.review_dir)
+                result["cpu_ms"] = max(0.0, result["cpu_ms"] - self.standin_cpu_ms())
+                result["outcome"] = outcome
+                del result["stdout"]
+                self.hook_runs.append(result)
+                if outcome in ("approved", "exhausted"):
+                    break
+            if outcome == "exhausted":
+                # Stand in for the user resetting a stuck loop
+                (self.review_dir / "version_counter").unlink(missing_ok=True)
+            review_bytes, review_files = dir_usage(self.review_dir)
+            self.cycles.append({
+                "ms": (time.perf_counter() - start) * 1000,
+                "revisions": revisions,
+                "outcome": outcome,
+                "review_dir_bytes": review_bytes,
+                "review_dir_files": review_files,
+            })
+
+
+def count(items) -> dict:
+    counts = {}
+    for item in items:
+        counts[item] = counts.get(item, 0) + 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--worktrees", type=int, default=8)
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--max-revisions", type=int, default=6, help="writes per cycle before giving up")
+    parser.add_argument("--plan-bytes", type=int, default=8 << 10)
+    parser.add_argument("--verdicts", default="reject,reject,approve")
+    parser.add_argument("--latency", default="uniform:0.05:0.3")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--resume-fail-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=3600.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--hook-timeout", type=float, default=600.0, help="kill the hook after this many seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        repo = make_repo(tmp / "repo", 100)
+        bin_dir = tmp / "bin"
+        codex_standin.install(str(bin_dir))
+        standin_settings = {
+            "verdicts": args.verdicts,
+            "latency": args.latency,
+            "fail_rate": args.fail_rate,
+            "resume_fail_rate": args.resume_fail_rate,
+            "hang_rate": args.hang_rate,
+            "hang_seconds": args.hang_seconds,
+            "malformed_rate": args.malformed_rate,
+            "seed": args.seed,
+        }
+        config = tmp / "standin.json"
+        config.write_text(json.dumps(standin_settings))
+
+        worktrees = []
+        for i in range(args.worktrees):
+            cwd = repo / ".worktrees" / f"soak-{i}"
+            subprocess.run(["git", "worktree", "add", "-q", "-b", f"soak-{i}", str(cwd)],
+                           cwd=repo, check=True, env={**os.environ, **GIT_ENV})
+            log = tmp / f"standin-{i}.jsonl"
+            env = hook_env(
+                PATH=f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+                CODEX_STANDIN_CONFIG=str(config),
+                CODEX_STANDIN_STATE=str(tmp / f"standin-state-{i}"),
+                CODEX_STANDIN_LOG=str(log),
+            )
+            worktrees.append(Worktree(cwd, env, log, args))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.worktrees) as pool:
+            for future in [pool.submit(wt.run, i) for i, wt in enumerate(worktrees)]:
+                future.result()
+        elapsed = time.perf_counter() - start
+
+        # Reap stand-ins orphaned by killed hooks
+        for wt in worktrees:
+            review_jobs.supersede(wt.review_dir)
+
+        cache_bytes, cache_files = dir_usage(repo / ".git" / "codex-review")
+        standin_outcomes = []
+        for i in range(args.worktrees):
+            try:
+                lines = (tmp / f"standin-{i}.jsonl").read_text().splitlines()
+            except OSError:
+                lines = []
+            standin_outcomes += [json.loads(line)["outcome"] for line in lines if line.strip()]
+
+    runs = [run for wt in worktrees for run in wt.hook_runs]
+    cycles = [cycle for wt in worktrees for cycle in wt.cycles]
+    final_bytes = [wt.cycles[-1]["review_dir_bytes"] for wt in worktrees if wt.cycles]
+    total_revisions = sum(c["revisions"] for c in cycles)
+    report = {
+        "benchmark": "soak_review_loop",
+        "worktrees": args.worktrees,
+        "cycles_per_worktree": args.cycles,
+        "standin": standin_settings,
+        "hook_timeout_s": args.hook_timeout,
+        "elapsed_s": round(elapsed, 3),
+        "cycles": {
+            "count": len(cycles),
+            "outcomes": count(c["outcome"] for c in cycles),
+            "time": summarize([c["ms"] for c in cycles]),
+            "revisions": summarize([c["revisions"] for c in cycles], unit=""),
+        },
+        "hooks": {
+            "runs": len(runs),
+            "outcomes": count(r["outcome"] for r in runs),
+            "wall": summarize([r["wall_ms"] for r in runs]),
+            "cpu": summarize([r["cpu_ms"] for r in runs]),
+            "maxrss_kb_max": max(r["maxrss_kb"] for r in runs),
+        },
+        "codex_calls": count(standin_outcomes),
+        "artifacts": {
+            "review_dir_bytes_final": summarize(final_bytes, unit="bytes"),
+            "review_dir_files_final": max(wt.cycles[-1]["review_dir_files"] for wt in worktrees),
+            "review_dir_bytes_per_revision": round(sum(final_bytes) / max(1, total_revisions), 1),
+            "shared_review_cache_bytes": cache_bytes,
+            "shared_review_cache_files": cache_files,
+        },
+    }
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,14 @@
 # Usage: ./bootstrap.sh [base-branch]
 #   base-branch: Branch to base the worktree on (default: main)
 #
+# Environment:
+#   CODEX_REVIEW_HOOK_DAEMON=1     Start the resident hook daemon in the worktree
+#   CODEX_REVIEW_DRIFT_WATCHER=1   Start the inotify drift watcher in the worktree
+#   CODEX_REVIEW_PRIME=1           Start a warm Codex session for the first plan review
+#   CODEX_REVIEW_POOL=1            Lease a pre-created worktree from the pool instead of
+#                                  running git worktree add, and return it on exit
+#   CODEX_REVIEW_POOL_PROFILE=NAME Sparse-checkout profile of the pooled worktree
+#
 set -euo pipefail
 
 BASE_BRANCH="${1:-main}"
@@ -29,9 +37,51 @@ fi
 
 WT_DIR="$REPO_ROOT/.worktrees/plan-review-$TIMESTAMP"
 BRANCH_NAME="plan-review/$TIMESTAMP"
+POOL="${CODEX_REVIEW_POOL:-0}"
+POOL_PROFILE="${CODEX_REVIEW_POOL_PROFILE:-}"
+
+if [[ "$POOL" == "1" ]]; then
+  echo "Leasing pooled worktree from $BASE_BRANCH..."
+  # This shell waits for Claude Code below, so it owns the lease; $$ is its PID
+  # even inside the command substitution
+  POOLED_DIR="$(python3 "$PLUGIN_DIR/hooks/worktree_pool.py" acquire --base "$BASE_BRANCH" \
+    --profile "$POOL_PROFILE" --branch "$BRANCH_NAME" --owner-pid $$ "$REPO_ROOT" \
+    | python3 -c 'import json, sys; print(json.load(sys.stdin).get("path", ""))')" || POOLED_DIR=""
+  if [[ -n "$POOLED_DIR" ]]; then
+    WT_DIR="$POOLED_DIR"
+  else
+    echo "Warning: could not lease a pooled worktree; creating one." >&2
+    POOL=0
+  fi
+fi
+
+if [[ "$POOL" != "1" ]]; then
+  echo "Creating worktree at $WT_DIR from $BASE_BRANCH..."
+  git -C "$REPO_ROOT" worktree add -b "$BRANCH_NAME" "$WT_DIR" "$BASE_BRANCH"
+fi
+
+# Precompile the hook modules so each hook process loads bytecode instead of
+# compiling them (Python never writes it under PYTHONDONTWRITEBYTECODE).
+python3 -m compileall -q "$PLUGIN_DIR/hooks" >/dev/null \
+  || echo "Warning: could not precompile hooks; they will compile on each run." >&2
+
+if [[ "${CODEX_REVIEW_HOOK_DAEMON:-0}" == "1" ]]; then
+  echo "Starting hook daemon..."
+  python3 "$PLUGIN_DIR/hooks/hook_daemon.py" start "$WT_DIR" >/dev/null \
+    || echo "Warning: hook daemon failed to start; hooks will run in-process." >&2
+fi
+
+if [[ "${CODEX_REVIEW_DRIFT_WATCHER:-0}" == "1" ]]; then
+  echo "Starting drift watcher..."
+  python3 "$PLUGIN_DIR/hooks/drift_watcher.py" start "$WT_DIR" | grep -q '"running": true' \
+    || echo "Warning: drift watcher failed to start; drift checks will use git status." >&2
+fi
 
-echo "Creating worktree at $WT_DIR from $BASE_BRANCH..."
-git -C "$REPO_ROOT" worktree add -b "$BRANCH_NAME" "$WT_DIR" "$BASE_BRANCH"
+if [[ "${CODEX_REVIEW_PRIME:-0}" == "1" ]]; then
+  echo "Priming Codex session..."
+  python3 "$PLUGIN_DIR/hooks/codex_prime.py" start "$WT_DIR" | grep -q '"started": true' \
+    || echo "Warning: could not start priming; the first review will start Codex cold." >&2
+fi
 
 echo ""
 echo "Worktree created!"
@@ -47,4 +97,19 @@ echo ""
 
 echo "Launching Claude Code..."
 cd "$WT_DIR"
-exec claude --plugin-dir "$PLUGIN_DIR"
+if [[ "$POOL" != "1" ]]; then
+  exec claude --plugin-dir "$PLUGIN_DIR"
+fi
+
+# Pooled worktrees go back to the pool when Claude Code exits; the branch stays
+STATUS=0
+claude --plugin-dir "$PLUGIN_DIR" || STATUS=$?
+RELEASE="$(python3 "$PLUGIN_DIR/hooks/worktree_pool.py" release "$WT_DIR")"
+if [[ "$RELEASE" != *'"released": true'* ]]; then
+  echo "Worktree kept out of the pool: $RELEASE" >&2
+  echo "Return it later with: python3 $PLUGIN_DIR/hooks/worktree_pool.py release $WT_DIR" >&2
+fi
+# Top the pool up for the next launch without holding up the shell
+nohup python3 "$PLUGIN_DIR/hooks/worktree_pool.py" fill --base "$BASE_BRANCH" \
+  --profile "$POOL_PROFILE" "$REPO_ROOT" >/dev/null 2>&1 &
+exit "$STATUS"
@@ -0,0 +1,173 @@
+"""Stat-keyed approval verification cache.
+
+Checking approval means hashing a plan (docs/plan.md, or a named plan) and
+comparing it against its approval.json. The plan rarely changes during
+implementation, so the result is cached in approval_cache.json in the plan's
+review directory, keyed on the (inode, size,
+mtime_ns, ctime_ns) of both files. A gate check is then two stat calls and a
+read of the small cache file; the plan is re-hashed only when its stat
+tuple changes.
+
+Like git's index, an entry is only trusted for files whose timestamps are
+older than the entry itself by more than RACY_WINDOW_NS: a write landing in
+the same timestamp tick as the recorded stat could otherwise go unnoticed.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import plan_namespace
+
+CACHE_NAME = "approval_cache.json"
+# Coarsest timestamp granularity we expect (FAT/exFAT is 2s).
+RACY_WINDOW_NS = 2_000_000_000
+
+VALID = "valid"
+NO_PLAN = "no_plan"
+NO_APPROVAL = "no_approval"
+CORRUPT = "corrupt"
+NOT_OPTIMAL = "not_optimal"
+PLAN_UNREADABLE = "plan_unreadable"
+HASH_MISMATCH = "hash_mismatch"
+
+
+def fingerprint(st: os.stat_result) -> list[int]:
+    """Return the stat tuple the cache is keyed on."""
+    return [st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns]
+
+
+def hash_file(path) -> str:
+    """SHA-256 a file in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_racy(st: os.stat_result, stored_ns: int) -> bool:
+    return max(st.st_mtime_ns, st.st_ctime_ns) >= stored_ns - RACY_WINDOW_NS
+
+
+def _status(entry: dict) -> str:
+    if not entry.get("is_optimal"):
+        return NOT_OPTIMAL
+    if entry.get("approved_hash") != entry.get("plan_hash"):
+        return HASH_MISMATCH
+    return VALID
+
+
+def _load(review_dir: Path) -> dict | None:
+    try:
+        with open(review_dir / CACHE_NAME) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def _store(review_dir: Path, entry: dict):
+    try:
+        plan_namespace.atomic_write(review_dir / CACHE_NAME, json.dumps(entry))
+    except OSError:
+        pass
+
+
+def _entry(plan_st, approval_st, plan_hash: str, approval: dict) -> dict:
+    return {
+        "plan": fingerprint(plan_st),
+        "approval": fingerprint(approval_st),
+        "stored_ns": time.time_ns(),
+        "plan_hash": plan_hash,
+        "approved_hash": approval.get("plan_hash", ""),
+        "is_optimal": bool(approval.get("is_optimal")),
+    }
+
+
+def check_approval(cwd: str, namespace: plan_namespace.Namespace | None = None) -> str:
+    """Verify a plan's approval.json against the plan and return a status code.
+
+    namespace defaults to docs/plan.md.
+    """
+    namespace = namespace or plan_namespace.Namespace(cwd)
+    review_dir = namespace.review_dir
+    approval_path = review_dir / "approval.json"
+    plan_path = namespace.path
+
+    try:
+        plan_st = os.stat(plan_path)
+    except OSError:
+        return NO_PLAN
+    try:
+        approval_st = os.stat(approval_path)
+    except OSError:
+        return NO_APPROVAL
+
+    known_plan_hash = None
+    entry = _load(review_dir)
+    if (
+        entry
+        and entry.get("plan") == fingerprint(plan_st)
+        and entry.get("approval") == fingerprint(approval_st)
+    ):
+        stored_ns = entry.get("stored_ns", 0)
+        plan_clean = not _is_racy(plan_st, stored_ns)
+        if plan_clean and not _is_racy(approval_st, stored_ns):
+            return _status(entry)
+        if plan_clean:
+            # Only approval.json is racy; it is tiny, so re-read it but keep
+            # the cached plan hash.
+            known_plan_hash = entry.get("plan_hash")
+
+    try:
+        with open(approval_path) as f:
+            approval = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return CORRUPT
+    if not isinstance(approval, dict):
+        return CORRUPT
+
+    if known_plan_hash is None:
+        try:
+            known_plan_hash = hash_file(plan_path)
+        except OSError:
+            return PLAN_UNREADABLE
+
+    entry = _entry(plan_st, approval_st, known_plan_hash, approval)
+    _store(review_dir, entry)
+    return _status(entry)
+
+
+def check_session(cwd: str, session_id: str = "") -> str:
+    """Approval status for whatever a session may implement.
+
+    A session bound to a plan needs that plan approved; any other session
+    needs one approved plan, the default plan's status being reported when
+    none is.
+    """
+    namespace = plan_namespace.session_plan(cwd, session_id)
+    if namespace is not None:
+        return check_approval(cwd, namespace)
+    status = check_approval(cwd)
+    if status == VALID:
+        return status
+    for namespace in plan_namespace.all_plans(cwd)[1:]:
+        if check_approval(cwd, namespace) == VALID:
+            return VALID
+    return status
+
+
+def record(review_dir: Path, plan_st: os.stat_result, plan_hash: str, approval: dict):
+    """Seed the cache after writing approval.json.
+
+    plan_st must be taken before the plan was read for hashing, so a write
+    racing with the approval shows up as a fingerprint change.
+    """
+    try:
+        approval_st = os.stat(review_dir / "approval.json")
+    except OSError:
+        return
+    _store(review_dir, _entry(plan_st, approval_st, plan_hash, approval))
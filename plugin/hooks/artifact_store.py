@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Compact storage for the versioned review artifacts in .claude/review/.
+
+Every plan revision leaves a snapshot, the Codex review JSON, an annotated
+copy of the plan and an event log. Most of that is the same plan text
+over and over, so:
+
+- Snapshots are stored as line deltas against the previous version
+  (plan_v{N}.snapshot.delta.gz), with a full gzip keyframe
+  (plan_v{N}.snapshot.md.gz) every keyframe_interval versions, and whenever
+  the delta would not be smaller.
+- When version N is snapshotted, the artifacts of older versions are
+  compacted: review JSON and event logs are gzipped (name + ".gz"), and the
+  annotated plan becomes a delta against that version's snapshot
+  (plan_v{N}.annotated.delta.gz).
+
+The artifacts of the current version stay plain files, since Claude is
+pointed at them. read_snapshot, read_annotated, read_review and
+read_artifact rebuild any version from whichever form is on disk, plain
+files from older installs included.
+
+Usage: python3 artifact_store.py show VERSION {snapshot,annotated,review} [--plan NAME]
+  Prints that version's artifact from .claude/review/ in the current directory
+  (or from the review directory of the named plan docs/plans/NAME.md).
+Exit code is 0 on success, 1 if the artifact does not exist.
+"""
+
+import difflib
+import gzip
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+import plan_namespace
+
+# Plans with more lines than this are always stored as keyframes
+MAX_DELTA_LINES = 20_000
+
+_ARTIFACT_RE = re.compile(r"plan_v(\d+)\.(.+)")
+
+
+def _write(path: Path, data: bytes):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def _unlink(*paths: Path):
+    for path in paths:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _pack(data: bytes) -> bytes:
+    return gzip.compress(data, mtime=0)
+
+
+def encode_delta(base: str, text: str) -> list | None:
+    """Return ops rebuilding text from base, or None if text is too large.
+
+    Each op is either [start, end] (copy those lines of base) or a string
+    (insert it verbatim).
+    """
+    base_lines = base.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+    if max(len(base_lines), len(lines)) > MAX_DELTA_LINES:
+        return None
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append("".join(lines[j1:j2]))
+    return ops
+
+
+def apply_delta(base: str, ops: list) -> str:
+    """Rebuild the text encode_delta was given."""
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return "".join(parts)
+
+
+def _store_text(review_dir: Path, stem: str, text: str, base: str | None, base_version: int | None):
+    """Write stem.delta.gz against base if that is smaller, else stem.md.gz."""
+    keyframe = _pack(text.encode("utf-8"))
+    delta_path = review_dir / f"{stem}.delta.gz"
+    full_path = review_dir / f"{stem}.md.gz"
+    if base is not None:
+        ops = encode_delta(base, text)
+        if ops is not None:
+            packed = _pack(json.dumps({"base": base_version, "ops": ops}).encode("utf-8"))
+            if len(packed) < len(keyframe):
+                _write(delta_path, packed)
+                _unlink(full_path, review_dir / f"{stem}.md")
+                return
+    _write(full_path, keyframe)
+    _unlink(delta_path, review_dir / f"{stem}.md")
+
+
+def _load_text(review_dir: Path, stem: str, resolve_base) -> str | None:
+    """Read stem from its plain, keyframe or delta form."""
+    data = read_artifact(review_dir, f"{stem}.md")
+    if data is not None:
+        return data.decode("utf-8")
+    try:
+        with gzip.open(review_dir / f"{stem}.delta.gz") as f:
+            delta = json.load(f)
+        base = resolve_base(delta["base"])
+        return None if base is None else apply_delta(base, delta["ops"])
+    except (OSError, ValueError, KeyError, TypeError, EOFError):
+        return None
+
+
+def save_snapshot(review_dir: Path, version: int, text: str, keyframe_interval: int = 4):
+    """Store the plan text reviewed as version."""
+    base = None
+    if version > 1 and keyframe_interval > 1 and (version - 1) % keyframe_interval:
+        base = read_snapshot(review_dir, version - 1)
+    _store_text(review_dir, f"plan_v{version}.snapshot", text, base, version - 1)
+
+
+def read_snapshot(review_dir: Path, version: int) -> str | None:
+    """Return the plan text of version, or None if it is not stored."""
+
+    def resolve_base(base_version):
+        # Deltas only ever point at older versions, so the chain ends
+        if not isinstance(base_version, int) or not 0 < base_version < version:
+            return None
+        return read_snapshot(review_dir, base_version)
+
+    return _load_text(review_dir, f"plan_v{version}.snapshot", resolve_base)
+
+
+def read_annotated(review_dir: Path, version: int) -> str | None:
+    """Return Codex's annotated plan for version, or None."""
+
+    def resolve_base(base_version):
+        return read_snapshot(review_dir, version) if base_version == version else None
+
+    return _load_text(review_dir, f"plan_v{version}.annotated", resolve_base)
+
+
+def read_artifact(review_dir: Path, name: str) -> bytes | None:
+    """Return the bytes of a plain or gzipped artifact, or None."""
+    try:
+        return (review_dir / name).read_bytes()
+    except OSError:
+        pass
+    try:
+        with gzip.open(review_dir / f"{name}.gz") as f:
+            return f.read()
+    except (OSError, EOFError):
+        return None
+
+
+def read_review(review_dir: Path, version: int) -> dict | None:
+    """Return the Codex review JSON of version, or None."""
+    data = read_artifact(review_dir, f"plan_v{version}.codex.json")
+    if data is None:
+        return None
+    try:
+        review = json.loads(data)
+    except ValueError:
+        return None
+    return review if isinstance(review, dict) else None
+
+
+def compact(review_dir: Path, current_version: int):
+    """Compress the plain artifacts of every version before current_version."""
+    for path in list(review_dir.glob("plan_v*")):
+        match = _ARTIFACT_RE.fullmatch(path.name)
+        if not match or int(match.group(1)) >= current_version:
+            continue
+        version, kind = int(match.group(1)), match.group(2)
+        try:
+            if kind == "annotated.md":
+                base = read_snapshot(review_dir, version)
+                _store_text(review_dir, f"plan_v{version}.annotated", path.read_text(), base, version)
+            elif kind == "snapshot.md":
+                save_snapshot(review_dir, version, path.read_text(), keyframe_interval=1)
+            elif not kind.endswith(".gz"):
+                _write(path.with_name(f"{path.name}.gz"), _pack(path.read_bytes()))
+                _unlink(path)
+        except OSError:
+            continue
+
+
+def _show_review(review_dir: Path, version: int) -> str | None:
+    review = read_review(review_dir, version)
+    return None if review is None else json.dumps(review, indent=2) + "\n"
+
+
+READERS = {"snapshot": read_snapshot, "annotated": read_annotated, "review": _show_review}
+
+
+def main():
+    args = sys.argv[1:]
+    plan = ""
+    if len(args) == 5 and args[3] == "--plan":
+        plan, args = args[4], args[:3]
+    if len(args) != 3 or args[0] != "show" or not args[1].isdigit() or args[2] not in READERS \
+            or (plan and not plan_namespace.valid_name(plan)):
+        sys.stderr.write(f"Usage: artifact_store.py show VERSION {{{','.join(READERS)}}} [--plan NAME]\n")
+        sys.exit(1)
+    review_dir = plan_namespace.named(os.getcwd(), plan).review_dir
+    text = READERS[args[2]](review_dir, int(args[1]))
+    if text is None:
+        sys.stderr.write(f"No {args[2]} stored for plan v{args[1]}\n")
+        sys.exit(1)
+    sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,34 @@
 """PostToolUse hook: Bash Drift Check.
 
 After any Bash command executes, checks git status for unexpected file changes
-outside docs/plan.md and .claude/review/. Blocks if drift is detected.
+outside the plan files (docs/plan.md, docs/plans/<name>.md) and
+.claude/review/. Blocks if drift is detected.
+
+When the PreToolUse gate recorded a baseline for the call, only paths whose
+status or content changed across the command are considered. Calls the gate
+classified as read-only are not scanned at all, and with a drift watcher
+running only the paths it saw touched are.
+
+Also delivers the verdict of a finished background review (async review
+mode) of the session's plan to Claude.
 """
 
-import hashlib
 import json
 import os
-import subprocess
 import sys
-from pathlib import Path
+
+import approval_cache
+import drift_state
+import hook_config
+import hook_daemon
+import metrics
+import plan_namespace
+import review_jobs
 
 
 def output_decision(decision: str, reason: str, additional_context: str = ""):
     """Print a hook decision JSON to stdout."""
+    metrics.note(outcome=decision or "allow")
     result = {}
     if decision:
         result["decision"] = decision
@@ -31,9 +46,12 @@ def is_allowed_path(file_path: str) -> bool:
     # Normalize path
     normalized = file_path.strip()
 
-    # Allow docs/plan.md
+    # Allow docs/plan.md and named plans
     if normalized == "docs/plan.md":
         return True
+    directory, _, name = normalized.rpartition("/")
+    if directory == "docs/plans" and name.endswith(".md") and plan_namespace.valid_name(name[:-3]):
+        return True
 
     # Allow anything under .claude/review/
     if normalized.startswith(".claude/review/") or normalized == ".claude/review":
@@ -42,9 +60,60 @@ def is_allowed_path(file_path: str) -> bool:
     return False
 
 
-def main():
+def find_unexpected_changes(hook_input: dict, cwd: str) -> list[str] | None:
+    """Return changed paths outside the allowed locations for this Bash call.
+
+    Returns None when the check does not apply (approved plan, read-only
+    call, or git status unavailable).
+    """
+    # Skip drift detection if a valid approval exists (implementation phase)
+    with metrics.span("approval"):
+        if approval_cache.check_session(cwd, hook_input.get("session_id", "")) == approval_cache.VALID:
+            return None
+
+    config = hook_config.load_config(cwd)["drift"]
+    baseline = drift_state.pop_baseline(cwd, drift_state.call_key(hook_input))
+
+    # The gate classified this command as read-only (no python, env checked
+    # by what it runs, no writing options): trust it and skip the scan
+    if baseline is not None and baseline.get("readonly"):
+        metrics.note(readonly=True)
+        return None
+
+    # With a drift watcher mark, only the paths it saw touched are scanned
+    if baseline is not None and "watch" in baseline:
+        import drift_watcher
+
+        with metrics.span("watch"):
+            changed = drift_watcher.changed_paths(cwd, baseline["watch"], config)
+        if changed is not None:
+            metrics.note(changed_paths=len(changed), watched=True)
+            return [f for f in changed if not is_allowed_path(f)]
+        baseline = None  # the watcher may have missed events: full scan
+
+    # Snapshot the worktree; if git can't tell us, allow
+    with metrics.span("git_status"):
+        current = drift_state.git_status(cwd, config)
+    if current is None:
+        return None
+
+    # With a pre-command baseline, only report what this command changed
+    with metrics.span("diff"):
+        if baseline is not None:
+            changed = drift_state.changed_paths(cwd, baseline, current)
+        else:
+            changed = sorted(current)
+    metrics.note(status_entries=len(current), changed_paths=len(changed), baseline=baseline is not None)
+
+    return [f for f in changed if not is_allowed_path(f)]
+
+
+@metrics.timed("bash_drift_check")
+def run(raw: str):
+    """Process one hook payload in-process."""
     try:
-        hook_input = json.load(sys.stdin)
+        with metrics.span("parse"):
+            hook_input = json.loads(raw)
     except (json.JSONDecodeError, ValueError):
         sys.exit(0)
 
@@ -54,70 +123,42 @@ def main():
         sys.exit(0)
 
     cwd = hook_input.get("cwd", os.getcwd())
+    metrics.note(cwd=cwd)
 
-    # Skip drift detection if a valid approval exists (implementation phase)
-    review_dir = Path(cwd) / ".claude" / "review"
-    approval_path = review_dir / "approval.json"
-    plan_path = Path(cwd) / "docs" / "plan.md"
-    if approval_path.exists() and plan_path.exists():
-        try:
-            with open(approval_path) as f:
-                approval = json.load(f)
-            if approval.get("is_optimal"):
-                with open(plan_path, "rb") as f:
-                    actual_hash = hashlib.sha256(f.read()).hexdigest()
-                if approval.get("plan_hash") == actual_hash:
-                    sys.exit(0)
-        except (json.JSONDecodeError, OSError):
-            pass  # Can't validate, continue with drift check
-
-    # Run git status --porcelain to detect file changes
-    try:
-        proc = subprocess.run(
-            ["git", "status", "--porcelain"],
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        # Can't check, allow
-        sys.exit(0)
+    # Deliver a finished background (async mode) Codex review of the
+    # session's plan, if any
+    namespace = plan_namespace.session_plan(cwd, hook_input.get("session_id", "")) or plan_namespace.Namespace(cwd)
+    verdict = review_jobs.collect(namespace.review_dir)
 
-    if proc.returncode != 0:
+    unexpected_changes = find_unexpected_changes(hook_input, cwd)
+    if unexpected_changes is None and verdict is None:
         sys.exit(0)
 
-    # Parse changed files
-    unexpected_changes = []
-    for line in proc.stdout.strip().splitlines():
-        if not line:
-            continue
-        # git status --porcelain format: XY filename
-        # First two chars are status, then a space, then the filename
-        if len(line) < 4:
-            continue
-        file_path = line[3:].strip()
-        # Handle renamed files (old -> new)
-        if " -> " in file_path:
-            file_path = file_path.split(" -> ")[1]
-        # Remove quotes if present
-        file_path = file_path.strip('"')
-
-        if not is_allowed_path(file_path):
-            unexpected_changes.append(file_path)
-
     if unexpected_changes:
         files_list = "\n".join(f"  - {f}" for f in unexpected_changes[:20])
-        output_decision(
-            "block",
-            "Unexpected file changes detected after Bash command.",
+        context = (
             f"The following files were modified outside of allowed paths "
-            f"(docs/plan.md and .claude/review/):\n\n{files_list}\n\n"
+            f"(plan files and .claude/review/):\n\n{files_list}\n\n"
             f"This may indicate unintended side effects from the Bash command. "
-            f"Please revert these changes or inform the user.",
+            f"Please revert these changes or inform the user."
         )
+        if verdict is not None:
+            context += (
+                "\n\nSeparately, the background Codex plan review has finished:\n"
+                + "\n".join(part for part in verdict[1:] if part)
+            )
+        output_decision("block", "Unexpected file changes detected after Bash command.", context)
+    elif verdict is not None:
+        output_decision(*verdict)
     # If no unexpected changes, exit silently (allow)
 
 
+def main():
+    raw = sys.stdin.read()
+    if hook_daemon.relay("bash_drift_check", raw):
+        return
+    run(raw)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""Warm Codex session started at the beginning of a planning cycle.
+
+The first review of a cycle otherwise pays Codex's cold start (boot, MCP
+server startup, a first exploration of the repository) inside the blocking
+PostToolUse hook. `start` launches a detached worker that runs
+`codex exec --json --cd <worktree>` with a priming prompt describing the
+repository and saying that a plan will follow, while Claude researches.
+
+The worker records its progress in prime.json in the review directory of
+the plan being written (.claude/review/ for docs/plan.md, or that of a
+named plan given with --plan). Once the
+priming run finishes, the record holds the thread ID; the first review of
+the cycle adopts it as codex_thread_id and resumes that session with the
+full plan instead of starting a fresh one. A review that finds priming
+still running waits for it up to prime.wait_seconds (drawn from the
+review's deadline), then kills it and starts fresh. A primed session is
+only adopted while no other session is stored and for prime.max_age_seconds
+after it finished.
+
+Usage:
+  python3 codex_prime.py start [--topic TEXT] [--plan NAME] [cwd]   Start priming in the background
+  python3 codex_prime.py status [--plan NAME] [cwd]                 Print the priming record
+Output is JSON on stdout; exit code is always 0.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import codex_stream
+import hook_config
+import metrics
+import plan_namespace
+import review_jobs
+
+PRIME_NAME = "prime.json"
+PRIME_LOG_NAME = "prime.log"
+POLL_INTERVAL = 1.0
+# Entries of the top-level layout listed in the priming prompt
+MAX_LAYOUT_ENTRIES = 25
+RECENT_COMMITS = 5
+
+
+def _review_dir(cwd: str, plan: str = "") -> Path:
+    review_dir = plan_namespace.named(cwd, plan).review_dir
+    review_dir.mkdir(parents=True, exist_ok=True)
+    return review_dir
+
+
+def read_prime(review_dir: Path) -> dict | None:
+    """Return the priming record, if any."""
+    return review_jobs.read_json(review_dir / PRIME_NAME)
+
+
+def _update(review_dir: Path, prime_id: str, **fields) -> bool:
+    """Update the record if it still belongs to prime_id."""
+    record = read_prime(review_dir)
+    if record is None or record.get("prime_id") != prime_id:
+        return False
+    record.update(fields)
+    review_jobs.write_json(review_dir / PRIME_NAME, record)
+    return True
+
+
+def _git(cwd: str, *args: str) -> list[str]:
+    try:
+        proc = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, timeout=10)
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return []
+    return proc.stdout.splitlines() if proc.returncode == 0 else []
+
+
+def describe_repo(cwd: str) -> str:
+    """Summarize the worktree's layout and recent history for the priming prompt."""
+    counts = {}
+    for path in _git(cwd, "ls-files"):
+        top, sep, _ = path.partition("/")
+        key = top + "/" if sep else top
+        counts[key] = counts.get(key, 0) + 1
+    lines = [f"Repository: {os.path.basename(os.path.realpath(cwd))}"]
+    if counts:
+        lines.append("Top-level layout (tracked files):")
+        for name in sorted(counts)[:MAX_LAYOUT_ENTRIES]:
+            lines.append(f"  {name} ({counts[name]} file{'s' if counts[name] != 1 else ''})" if name.endswith("/")
+                         else f"  {name}")
+        if len(counts) > MAX_LAYOUT_ENTRIES:
+            lines.append(f"  ({len(counts) - MAX_LAYOUT_ENTRIES} more)")
+    commits = _git(cwd, "log", "--oneline", f"-{RECENT_COMMITS}")
+    if commits:
+        lines.append("Recent commits:")
+        lines += [f"  {commit}" for commit in commits]
+    return "\n".join(lines)
+
+
+def build_prime_prompt(cwd: str, topic: str | None = None) -> str:
+    """Build the prompt that warms a session up before the first plan arrives."""
+    task = f"\nThe plan will be about: {topic}\n" if topic else ""
+    return f"""You will shortly be asked, in this same session, to review an implementation plan for this repository. The plan has not been written yet.
+{task}
+{describe_repo(cwd)}
+
+Prepare for that review now. Use all available MCP servers. Explore the repository: its architecture, main modules and how they fit together, coding conventions, error handling, and how tests are laid out and run.{" Focus on the code the plan is likely to touch." if topic else ""} Do not modify any files.
+
+Reply with a short summary of what you learned. Do not review anything yet; the plan follows in the next message.
+"""
+
+
+def start(cwd: str, topic: str | None = None, plan: str = "") -> dict:
+    """Start a detached priming worker unless priming is pointless or already running."""
+    settings = hook_config.load_config(cwd)["prime"]
+    if not settings.get("enabled"):
+        return {"started": False, "reason": "priming is disabled"}
+    review_dir = _review_dir(cwd, plan)
+    record = read_prime(review_dir)
+    if record is not None and record.get("state") == "running" and review_jobs.pid_alive(record.get("worker_pid")):
+        return {"started": False, "reason": "priming is already running", "worker_pid": record["worker_pid"]}
+    # Mid-cycle the review already has a session to resume
+    if (review_dir / "codex_thread_id").exists() and not (review_dir / "approval.json").exists():
+        return {"started": False, "reason": "a review session is already active"}
+
+    record = {
+        "prime_id": os.urandom(8).hex(),
+        "state": "running",
+        "topic": topic or "",
+        "started_at": datetime.now(timezone.utc).isoformat(),
+    }
+    review_jobs.write_json(review_dir / PRIME_NAME, record)
+    with open(review_dir / PRIME_LOG_NAME, "ab") as log:
+        worker = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", cwd, record["prime_id"]] + ([plan] if plan else []),
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+    return {"started": True, "worker_pid": worker.pid}
+
+
+@metrics.timed("codex_prime")
+def run_worker(cwd: str, prime_id: str, plan: str = ""):
+    """Run the priming session (codex_prime.py --worker CWD PRIME_ID [PLAN])."""
+    review_dir = _review_dir(cwd, plan)
+    metrics.note(cwd=cwd)
+    # The worker writes its own PID; the record has a single writer at a time
+    if not _update(review_dir, prime_id, worker_pid=os.getpid()):
+        metrics.note(outcome="superseded")
+        return
+    record = read_prime(review_dir)
+    settings = hook_config.load_config(cwd)["prime"]
+    cmd = ["codex", "exec", "--json", "--cd", cwd, "-"]
+    try:
+        with metrics.span("codex"):
+            proc, thread_id = codex_stream.run_streaming(
+                cmd,
+                build_prime_prompt(cwd, record.get("topic")),
+                timeout=settings["timeout_seconds"],
+                on_thread_id=lambda tid: _update(review_dir, prime_id, thread_id=tid),
+                on_spawn=lambda pid: _update(review_dir, prime_id, codex_pid=pid),
+            )
+    except subprocess.TimeoutExpired:
+        _update(review_dir, prime_id, state="failed", reason="priming timed out")
+        metrics.note(outcome="timeout")
+        return
+    except FileNotFoundError:
+        _update(review_dir, prime_id, state="failed", reason="codex CLI not found")
+        metrics.note(outcome="error")
+        return
+    if proc.returncode != 0 or not thread_id:
+        _update(review_dir, prime_id, state="failed", reason=f"codex exited with code {proc.returncode}")
+        metrics.note(outcome="error")
+        return
+    _update(review_dir, prime_id, state="ready", thread_id=thread_id, finished_at=datetime.now(timezone.utc).isoformat())
+    metrics.note(outcome="ready")
+
+
+def _stop(review_dir: Path, record: dict):
+    # Both run in their own sessions, so their PIDs are their process groups
+    for key in ("worker_pid", "codex_pid"):
+        review_jobs.kill_group(record.get(key), signal.SIGKILL)
+    (review_dir / PRIME_NAME).unlink(missing_ok=True)
+
+
+def adopt(review_dir: Path, settings: dict, wait: float = 0, sleep=time.sleep) -> str | None:
+    """Return the thread of a finished priming run, consuming its record.
+
+    A priming run still in progress is waited for up to wait seconds and
+    then stopped. Failed or stale runs are discarded. Returns None when no
+    primed session can be used.
+    """
+    record = read_prime(review_dir)
+    if record is None or not settings.get("enabled"):
+        return None
+    waited = 0.0
+    while record is not None and record.get("state") == "running" and review_jobs.pid_alive(record.get("worker_pid")):
+        if waited >= wait:
+            metrics.note(prime="stopped")
+            _stop(review_dir, record)
+            return None
+        sleep(POLL_INTERVAL)
+        waited += POLL_INTERVAL
+        record = read_prime(review_dir)
+    if waited:
+        metrics.note(prime_wait_ms=round(waited * 1000))
+    (review_dir / PRIME_NAME).unlink(missing_ok=True)
+    if record is None or record.get("state") != "ready" or not record.get("thread_id"):
+        return None
+    finished = datetime.fromisoformat(record.get("finished_at", "1970-01-01T00:00:00+00:00"))
+    if (datetime.now(timezone.utc) - finished).total_seconds() > settings["max_age_seconds"]:
+        metrics.note(prime="stale")
+        return None
+    metrics.note(prime="adopted")
+    return record["thread_id"]
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) in (3, 4) and args[0] == "--worker":
+        run_worker(*args[1:])
+        return
+    if not args or args[0] not in ("start", "status"):
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(2)
+    command, args = args[0], args[1:]
+    options = {"--topic": None, "--plan": ""}
+    while len(args) >= 2 and args[0] in options:
+        options[args[0]], args = args[1], args[2:]
+    cwd = os.path.realpath(args[0] if args else os.getcwd())
+
+    try:
+        if command == "start":
+            result = start(cwd, options["--topic"], options["--plan"])
+        else:
+            result = read_prime(plan_namespace.named(cwd, options["--plan"]).review_dir) or {"state": "idle"}
+    except ValueError as e:
+        result = {"started": False, "reason": str(e)} if command == "start" else {"state": "error", "reason": str(e)}
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
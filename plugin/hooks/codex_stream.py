@@ -0,0 +1,165 @@
+"""Streaming consumption of `codex exec --json` output.
+
+Codex emits one JSON event per line. Instead of buffering the whole stream
+until the process exits, events are parsed as they arrive: the
+thread.started event is reported immediately (so the session ID survives a
+timeout), raw events are appended to a size-rotated JSONL log, and only a
+bounded tail of stderr is kept in memory.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import threading
+
+EVENT_LOG_MAX_BYTES = 8 * 1024 * 1024
+EVENT_LOG_BACKUPS = 2
+STDERR_TAIL_BYTES = 64 * 1024
+
+
+def parse_thread_event(line: bytes) -> str | None:
+    """Return the thread ID if line is a thread.started event."""
+    line = line.strip()
+    if not line.startswith(b"{"):
+        return None
+    try:
+        obj = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(obj, dict) and obj.get("type") == "thread.started":
+        return obj.get("thread_id") or obj.get("id") or None
+    return None
+
+
+class EventLog:
+    """Append-only JSONL writer rotating to path.1, path.2, ... at max_bytes."""
+
+    def __init__(self, path: str, max_bytes: int = EVENT_LOG_MAX_BYTES, backups: int = EVENT_LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+
+    def write(self, line: bytes):
+        if self._size and self._size + len(line) > self.max_bytes:
+            self._rotate()
+        self._file.write(line)
+        self._size += len(line)
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups, 0, -1):
+            src = self.path if i == 1 else f"{self.path}.{i - 1}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i}")
+        if self.backups == 0:
+            os.unlink(self.path)
+        self._file = open(self.path, "ab")
+        self._size = 0
+
+    def close(self):
+        self._file.close()
+
+
+def _kill_group(proc: subprocess.Popen):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        proc.kill()
+
+
+def run_streaming(
+    cmd: list[str],
+    prompt: str,
+    timeout: float,
+    event_log: str | None = None,
+    on_thread_id=None,
+    on_spawn=None,
+) -> tuple[subprocess.CompletedProcess, str | None]:
+    """Run a Codex command, consuming its event stream as it is produced.
+
+    on_thread_id(thread_id) is called as soon as a thread.started event is
+    seen on either stream; on_spawn(pid) right after the process starts.
+    Returns (process, thread_id). The process's stdout is not retained and
+    its stderr holds at most the last STDERR_TAIL_BYTES. On timeout the
+    process group is killed and subprocess.TimeoutExpired is raised, with the
+    thread ID seen so far attached as its thread_id attribute.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    if on_spawn:
+        on_spawn(proc.pid)
+
+    log = EventLog(event_log) if event_log else None
+    lock = threading.Lock()
+    state = {"thread_id": None}
+    stderr_tail = bytearray()
+
+    def note_thread(line: bytes):
+        if state["thread_id"] is not None:
+            return
+        tid = parse_thread_event(line)
+        if tid:
+            with lock:
+                if state["thread_id"] is None:
+                    state["thread_id"] = tid
+                    if on_thread_id:
+                        on_thread_id(tid)
+
+    def read_stdout():
+        for line in proc.stdout:
+            if log:
+                log.write(line)
+            note_thread(line)
+
+    def read_stderr():
+        for line in proc.stderr:
+            note_thread(line)
+            stderr_tail.extend(line)
+            if len(stderr_tail) > STDERR_TAIL_BYTES:
+                del stderr_tail[: len(stderr_tail) - STDERR_TAIL_BYTES]
+
+    def write_stdin():
+        try:
+            proc.stdin.write(prompt.encode("utf-8"))
+            proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+    threads = [threading.Thread(target=fn, daemon=True) for fn in (write_stdin, read_stdout, read_stderr)]
+    for t in threads:
+        t.start()
+
+    try:
+        returncode = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill_group(proc)
+        proc.wait()
+        for t in threads:
+            t.join(timeout=5)
+        if log:
+            log.close()
+        exc = subprocess.TimeoutExpired(cmd, timeout, stderr=bytes(stderr_tail))
+        exc.thread_id = state["thread_id"]
+        raise exc
+
+    # Helpers left behind in the process group can hold the pipes open
+    for t in threads:
+        t.join(timeout=10)
+    if any(t.is_alive() for t in threads):
+        _kill_group(proc)
+        for t in threads:
+            t.join(timeout=5)
+    if log:
+        log.close()
+    return (
+        subprocess.CompletedProcess(cmd, returncode, stdout=b"", stderr=bytes(stderr_tail)),
+        state["thread_id"],
+    )
@@ -0,0 +1,203 @@
+"""Git status snapshots for Bash drift detection.
+
+The PreToolUse gate records a baseline of `git status --porcelain=v2 -z`
+(plus stat fingerprints of every path already dirty) before a planning-phase
+Bash call runs. The PostToolUse drift check then reports only paths whose
+status entry or content changed across that one command, so files that were
+dirty beforehand no longer block.
+
+Calls the gate classifies as read-only skip both snapshots: it records a
+read-only marker instead of a baseline, and the drift check trusts it.
+When a drift watcher runs for the worktree (drift_watcher.py), the baseline
+is the watcher's event position and the drift check asks it what changed.
+
+Baselines and markers are stored per call under .claude/review/drift/,
+keyed by the host's tool_use_id.
+"""
+
+import json
+import os
+import subprocess
+import time
+import zlib
+from pathlib import Path
+
+BASELINE_DIR = "drift"
+# Baselines for calls that never reached PostToolUse (denied by the user,
+# interrupted) are pruned after this long.
+STALE_BASELINE_SECONDS = 3600
+
+
+def call_key(hook_input: dict) -> str:
+    """Return a filename-safe key identifying one tool call."""
+    tool_use_id = hook_input.get("tool_use_id", "")
+    if tool_use_id:
+        return "".join(c for c in tool_use_id if c.isalnum() or c in "-_")[:128]
+    command = hook_input.get("tool_input", {}).get("command", "")
+    return f"cmd-{zlib.crc32(command.encode('utf-8')):08x}"
+
+
+def status_command(config: dict, paths: list[str] | None = None) -> list[str]:
+    """Build the git status invocation for the drift configuration.
+
+    With paths, the scan covers just those repo-root-relative paths instead
+    of the configured pathspecs.
+    """
+    cmd = ["git", "-c", "core.untrackedCache=true"]
+    if config.get("fsmonitor"):
+        cmd += ["-c", "core.fsmonitor=true"]
+    cmd += [
+        "status",
+        "--porcelain=v2",
+        "-z",
+        "--no-renames",
+        "--untracked-files=all",
+        "--",
+    ]
+    if paths is not None:
+        cmd += [f":(top,literal){p}" for p in paths]
+    else:
+        cmd += [f":(top){p}" for p in config.get("pathspecs", [])]
+    cmd += [f":(top,exclude){p}" for p in config.get("exclude", [])]
+    return cmd
+
+
+def parse_porcelain_v2(data: bytes) -> dict[str, str]:
+    """Parse `git status --porcelain=v2 -z` output into {path: status entry}.
+
+    The entry is the record minus its path (change type, XY, modes and object
+    names), so two snapshots can be compared field-for-field.
+    """
+    entries = {}
+    records = data.split(b"\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        kind = record[:1]
+        if kind == b"1":
+            parts = record.split(b" ", 8)
+        elif kind == b"2":
+            parts = record.split(b" ", 9)
+            i += 1  # original path follows as its own record
+        elif kind == b"u":
+            parts = record.split(b" ", 10)
+        elif kind in (b"?", b"!"):
+            parts = [kind, record[2:]]
+        else:
+            continue
+        if len(parts) < 2:
+            continue
+        entries[os.fsdecode(parts[-1])] = b" ".join(parts[:-1]).decode("ascii", "replace")
+    return entries
+
+
+def git_status(
+    cwd: str, config: dict, timeout: float = 10, paths: list[str] | None = None
+) -> dict[str, str] | None:
+    """Run git status for the drift scan. Returns None if it cannot be determined."""
+    try:
+        proc = subprocess.run(
+            status_command(config, paths),
+            cwd=cwd,
+            capture_output=True,
+            timeout=timeout,
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return None
+    if proc.returncode != 0:
+        return None
+    return parse_porcelain_v2(proc.stdout)
+
+
+def path_fingerprint(cwd: str, path: str) -> list[int] | None:
+    """Return a content fingerprint for a worktree path, or None if absent."""
+    try:
+        st = os.lstat(os.path.join(cwd, path))
+    except OSError:
+        return None
+    return [st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns]
+
+
+def _baseline_dir(cwd: str) -> Path:
+    return Path(cwd) / ".claude" / "review" / BASELINE_DIR
+
+
+def _prune(baseline_dir: Path):
+    cutoff = time.time() - STALE_BASELINE_SECONDS
+    try:
+        for entry in os.scandir(baseline_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError:
+                pass
+    except OSError:
+        pass
+
+
+def capture_baseline(cwd: str, key: str, config: dict) -> bool:
+    """Record the pre-command status and dirty-path fingerprints for a call.
+
+    With a drift watcher running, its current position is recorded instead.
+    """
+    import drift_watcher
+
+    position = drift_watcher.mark(cwd, config)
+    if position is not None:
+        return _write_call_state(cwd, key, {"watch": position})
+    status = git_status(cwd, config, timeout=config.get("baseline_timeout", 4))
+    if status is None:
+        return False
+    baseline = {
+        "status": status,
+        "stats": {path: path_fingerprint(cwd, path) for path in status},
+    }
+    return _write_call_state(cwd, key, baseline)
+
+
+def record_readonly(cwd: str, key: str) -> bool:
+    """Record that the gate classified a call as read-only."""
+    return _write_call_state(cwd, key, {"readonly": True})
+
+
+def _write_call_state(cwd: str, key: str, state: dict) -> bool:
+    baseline_dir = _baseline_dir(cwd)
+    try:
+        baseline_dir.mkdir(parents=True, exist_ok=True)
+        _prune(baseline_dir)
+        tmp = baseline_dir / f".{key}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, baseline_dir / f"{key}.json")
+    except OSError:
+        return False
+    return True
+
+
+def pop_baseline(cwd: str, key: str) -> dict | None:
+    """Load and delete the baseline (or read-only marker) recorded for a call."""
+    path = _baseline_dir(cwd) / f"{key}.json"
+    try:
+        with open(path) as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return None
+    try:
+        path.unlink()
+    except OSError:
+        pass
+    return baseline if isinstance(baseline, dict) else None
+
+
+def changed_paths(cwd: str, baseline: dict, current: dict[str, str]) -> list[str]:
+    """Return paths whose status or content changed since the baseline."""
+    before = baseline.get("status", {})
+    stats = baseline.get("stats", {})
+    changed = []
+    for path in sorted(set(before) | set(current)):
+        if before.get(path) != current.get(path):
+            changed.append(path)
+        elif path_fingerprint(cwd, path) != stats.get(path):
+            changed.append(path)
+    return changed
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""Resident inotify watcher for drift detection on large worktrees.
+
+git status is O(repository), and the drift check runs it around every
+planning-phase Bash call. The watcher keeps inotify watches on the
+worktree's directories (skipping .git, .claude/review/, nested repositories
+and gitignored directories) and numbers every event. The PreToolUse gate
+asks it for the current sequence number instead of taking a git status
+baseline; the drift check asks for the paths touched since that number and
+runs git status on just those paths, so its cost follows the number of
+changes rather than the size of the tree.
+
+Missed events are handled conservatively. A kernel queue overflow, or a
+reconciliation pass (a periodic full git status compared with the events
+seen since the previous pass) that finds a change no event explains,
+invalidates every outstanding mark and rescans the tree; affected drift
+checks fall back to a full scan. Linux only: elsewhere the watcher does not
+start and the hooks keep using git status baselines.
+
+Usage:
+  python3 drift_watcher.py start [cwd]    Start a detached watcher for the worktree
+  python3 drift_watcher.py stop [cwd]     Stop the watcher
+  python3 drift_watcher.py status [cwd]   Print {"running": true/false, ...} and event counters
+  python3 drift_watcher.py serve [cwd]    Run the watcher in the foreground
+"""
+
+import json
+import os
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import drift_state
+import hook_config
+import hook_daemon
+
+SOCKET_NAME = "driftd.sock"
+REPLY_TIMEOUT = 2.0
+# A hook auto-starting the watcher retries at most this often
+START_BACKOFF_SECONDS = 60
+# Above this many touched paths the drift check falls back to a full scan
+MAX_QUERY_PATHS = 2000
+# Directories never watched, relative to the worktree root
+SKIP_DIRS = {".git", os.path.join(".claude", "review")}
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK
+)
+_EVENT = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal ctypes binding for a non-blocking inotify instance."""
+
+    def __init__(self):
+        import ctypes
+
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = self._ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read(self) -> list[tuple[int, int, str]]:
+        """Return all pending (wd, mask, name) events without blocking."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _under(path: str, prefixes) -> bool:
+    """True if path is one of prefixes or inside one of them."""
+    for prefix in prefixes:
+        prefix = prefix.rstrip("/")
+        if path == prefix or path.startswith(prefix + "/"):
+            return True
+    return False
+
+
+def _covered(path: str, touched: set) -> bool:
+    """True if path or one of its parent directories was touched."""
+    parts = path.rstrip("/").split("/")
+    return any("/".join(parts[:i]) in touched for i in range(1, len(parts) + 1))
+
+
+class Watcher:
+    """inotify watches over one worktree and the numbered set of touched paths."""
+
+    def __init__(self, root: str, config: dict):
+        self.root = root
+        self.config = config
+        self.epoch = f"{os.getpid()}-{time.time_ns()}"
+        self.inotify = Inotify()
+        self.lock = threading.Lock()
+        self.dirs = {}  # wd -> directory relative to root ("" is the root)
+        self.seq = 0
+        self.touched = {}  # path -> seq of its latest event
+        self.valid_from = 0  # marks below this may have missed events
+        self.incomplete = False  # some directory could not be watched
+        self.marks = []  # (monotonic time, seq) of marks handed out
+        self.stats = {"events": 0, "overflows": 0, "missed": 0, "watch_errors": 0}
+        self.reconciled = None
+        self.reconciled_seq = 0
+        self.closed = False
+        self._ignored = self._ignored_dirs()
+        with self.lock:
+            self._watch_tree("")
+
+    # --- Watches ---
+
+    def _git(self, *args: str) -> subprocess.CompletedProcess | None:
+        try:
+            return subprocess.run(["git", *args], cwd=self.root, capture_output=True, timeout=60)
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            return None
+
+    def _ignored_dirs(self) -> set:
+        """Gitignored directories, as git lists them collapsed."""
+        proc = self._git("ls-files", "-z", "--others", "--ignored", "--exclude-standard", "--directory")
+        if proc is None or proc.returncode != 0:
+            return set()
+        return {
+            os.fsdecode(entry).rstrip("/")
+            for entry in proc.stdout.split(b"\0")
+            if entry.endswith(b"/")
+        }
+
+    def _skip_dir(self, rel: str) -> bool:
+        if rel in SKIP_DIRS or rel in self._ignored:
+            return True
+        # Nested repositories and worktrees are opaque to git status
+        return bool(rel) and os.path.lexists(os.path.join(self.root, rel, ".git"))
+
+    def _watch_tree(self, rel: str):
+        """Watch rel and every directory below it (caller holds the lock)."""
+        if not rel:
+            self.incomplete = False
+        for dirpath, dirnames, _ in os.walk(os.path.join(self.root, rel)):
+            current = os.path.relpath(dirpath, self.root)
+            current = "" if current == "." else current
+            try:
+                self.dirs[self.inotify.add_watch(dirpath)] = current
+            except OSError:
+                # Out of watches (fs.inotify.max_user_watches) or gone
+                self.stats["watch_errors"] += 1
+                if os.path.isdir(dirpath):
+                    self.incomplete = True
+            dirnames[:] = [d for d in dirnames if not self._skip_dir(os.path.join(current, d))]
+
+    def _new_dir_ignored(self, rel: str) -> bool:
+        proc = self._git("check-ignore", "-q", "--", rel)
+        return proc is not None and proc.returncode == 0
+
+    # --- Events ---
+
+    def _invalidate(self):
+        """Make every mark handed out so far incomplete."""
+        self.seq += 1
+        self.valid_from = self.seq
+
+    def drain(self):
+        """Apply pending events (caller holds the lock)."""
+        if self.closed:
+            return
+        rescan = False
+        for wd, mask, name in self.inotify.read():
+            self.stats["events"] += 1
+            if mask & IN_Q_OVERFLOW:
+                self.stats["overflows"] += 1
+                self._invalidate()
+                rescan = True
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.dirs[wd]
+                continue
+            if not name:
+                continue
+            path = os.path.join(directory, name)
+            if path in SKIP_DIRS:
+                continue
+            self.seq += 1
+            self.touched[path] = self.seq
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                if not self._skip_dir(path) and not self._new_dir_ignored(path):
+                    self._watch_tree(path)
+        if rescan:
+            self._watch_tree("")
+
+    def drain_locked(self):
+        with self.lock:
+            self.drain()
+
+    def close(self):
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.inotify.close()
+
+    def mark(self) -> int:
+        """Return the current position; later events are after the mark."""
+        with self.lock:
+            self.drain()
+            now = time.monotonic()
+            self.marks.append((now, self.seq))
+            self._prune(now)
+            return self.seq
+
+    def _prune(self, now: float):
+        """Forget events only marks older than a stale baseline could need."""
+        cutoff = now - drift_state.STALE_BASELINE_SECONDS
+        expired = [seq for t, seq in self.marks if t < cutoff]
+        if not expired:
+            return
+        self.marks = [(t, seq) for t, seq in self.marks if t >= cutoff]
+        limit = max(expired)
+        self.touched = {p: s for p, s in self.touched.items() if s > limit}
+        self.valid_from = max(self.valid_from, limit + 1)
+
+    def touched_since(self, seq: int) -> list[str] | None:
+        """Paths touched after a mark, or None if events may have been missed."""
+        with self.lock:
+            self.drain()
+            if seq < self.valid_from or self.incomplete:
+                return None
+            return sorted(p for p, s in self.touched.items() if s > seq)
+
+    # --- Reconciliation ---
+
+    def reconcile(self):
+        """Compare a full git status with the events seen since the last pass."""
+        with self.lock:
+            self.drain()
+            start_seq = self.seq
+        status = drift_state.git_status(self.root, self.config, timeout=300)
+        if status is None:
+            return
+        with self.lock:
+            self.drain()
+            previous, self.reconciled = self.reconciled, status
+            since, self.reconciled_seq = self.reconciled_seq, start_seq
+            if previous is None:
+                return
+            touched = {p for p, s in self.touched.items() if s > since}
+            missed = [
+                path
+                for path in set(status) | set(previous)
+                if status.get(path) != previous.get(path)
+                and not _under(path, SKIP_DIRS)
+                and not _covered(path, touched)
+            ]
+            if missed or self.incomplete:
+                self.stats["missed"] += len(missed)
+                self._invalidate()
+                self._watch_tree("")
+
+
+# --- Server ---
+
+
+def make_server(cwd: str):
+    """Create the watcher's socket server for a worktree (not yet serving)."""
+    import socketserver
+
+    config = hook_config.load_config(cwd)["drift"]
+    watcher = Watcher(cwd, config)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            server = self.server
+            server.last_activity = time.monotonic()
+            try:
+                message = json.loads(self.rfile.read())
+            except ValueError:
+                return
+            op = message.get("op")
+            if op == "ping":
+                with watcher.lock:
+                    reply = {"ok": True, "pid": os.getpid(), "cwd": cwd, "epoch": watcher.epoch,
+                             "watches": len(watcher.dirs), "incomplete": watcher.incomplete,
+                             **watcher.stats}
+            elif op == "stop":
+                reply = {"ok": True}
+                server.stopping = True
+            elif op == "mark":
+                reply = {"epoch": watcher.epoch, "seq": watcher.mark()}
+            elif op == "touched":
+                paths = None
+                if message.get("epoch") == watcher.epoch and isinstance(message.get("seq"), int):
+                    paths = watcher.touched_since(message["seq"])
+                reply = {"paths": paths}
+            else:
+                reply = {"error": "unknown request"}
+            self.wfile.write(json.dumps(reply).encode("utf-8"))
+
+    path = hook_daemon.socket_path(cwd, SOCKET_NAME)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        if hook_daemon.request(path, {"op": "ping"}, hook_daemon.CONNECT_TIMEOUT) is not None:
+            raise RuntimeError(f"drift watcher already running on {path}")
+        os.unlink(path)
+
+    stopped = threading.Event()
+
+    class Server(socketserver.UnixStreamServer):
+        # Wake up regularly to drain events so the kernel queue never overflows
+        timeout = 0.5
+
+        def handle_timeout(self):
+            watcher.drain_locked()
+
+        def server_close(self):
+            super().server_close()
+            stopped.set()
+            watcher.close()
+
+    old_umask = os.umask(0o077)
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(old_umask)
+    server.stopping = False
+    server.last_activity = time.monotonic()
+    server.socket_file = path
+    server.watcher = watcher
+
+    interval = config.get("watcher_reconcile_seconds", 0)
+    if interval:
+        def reconcile_loop():
+            while not stopped.is_set():
+                watcher.reconcile()
+                stopped.wait(interval)
+
+        threading.Thread(target=reconcile_loop, daemon=True).start()
+    return server
+
+
+def start(cwd: str, wait: bool = True) -> dict:
+    """Start a detached watcher for cwd; with wait, until it answers."""
+    path = hook_daemon.socket_path(cwd, SOCKET_NAME)
+    reply = hook_daemon.request(path, {"op": "ping"}, hook_daemon.CONNECT_TIMEOUT)
+    if reply is not None:
+        return {"running": True, "pid": reply.get("pid"), "socket": path}
+
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "serve", cwd],
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    # Setting up watches on a big tree takes a while
+    deadline = time.monotonic() + (60 if wait else 0)
+    while time.monotonic() < deadline:
+        reply = hook_daemon.request(path, {"op": "ping"}, hook_daemon.CONNECT_TIMEOUT)
+        if reply is not None:
+            return {"running": True, "pid": reply.get("pid"), "socket": path}
+        time.sleep(0.1)
+    return {"running": False, "socket": path}
+
+
+# --- Hook client ---
+
+
+def _autostart(cwd: str):
+    """Spawn a watcher in the background, at most once per backoff period."""
+    if not sys.platform.startswith("linux"):
+        return
+    stamp = os.path.join(cwd, ".claude", "review", "driftd.start")
+    try:
+        if time.time() - os.stat(stamp).st_mtime < START_BACKOFF_SECONDS:
+            return
+    except OSError:
+        pass
+    try:
+        os.makedirs(os.path.dirname(stamp), exist_ok=True)
+        with open(stamp, "w"):
+            pass
+    except OSError:
+        return
+    start(cwd, wait=False)
+
+
+def mark(cwd: str, config: dict) -> dict | None:
+    """Return the watcher's current position for a worktree, or None without one.
+
+    With drift.watcher enabled, a missing watcher is started in the
+    background for later calls.
+    """
+    path = hook_daemon.socket_path(cwd, SOCKET_NAME)
+    if not os.path.exists(path):
+        if config.get("watcher"):
+            _autostart(cwd)
+        return None
+    reply = hook_daemon.request(path, {"op": "mark"}, REPLY_TIMEOUT)
+    if reply is None or not isinstance(reply.get("seq"), int):
+        return None
+    return {"epoch": reply.get("epoch"), "seq": reply["seq"]}
+
+
+def changed_paths(cwd: str, position: dict, config: dict) -> list[str] | None:
+    """Return the changed paths among those touched since a mark.
+
+    Touched paths are confirmed with a git status limited to them, which
+    drops ignored files and writes that left a file as it was. Returns None
+    when the watcher cannot vouch for the interval; the caller then scans.
+    """
+    reply = hook_daemon.request(
+        hook_daemon.socket_path(cwd, SOCKET_NAME),
+        {"op": "touched", "epoch": position.get("epoch"), "seq": position.get("seq")},
+        REPLY_TIMEOUT,
+    )
+    touched = reply.get("paths") if reply else None
+    if not isinstance(touched, list) or len(touched) > MAX_QUERY_PATHS:
+        return None
+    if config.get("pathspecs"):
+        touched = [p for p in touched if _under(p, config["pathspecs"])]
+    touched = [p for p in touched if not _under(p, config.get("exclude", []))]
+    if not touched:
+        return []
+    status = drift_state.git_status(cwd, config, paths=touched)
+    return None if status is None else sorted(status)
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("start", "stop", "status", "serve"):
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(2)
+    cwd = os.path.realpath(args[1] if len(args) > 1 else os.getcwd())
+    path = hook_daemon.socket_path(cwd, SOCKET_NAME)
+
+    if args[0] == "serve":
+        os.chdir(cwd)
+        hook_daemon.serve(make_server(cwd))
+        return
+
+    if args[0] == "start":
+        result = start(cwd)
+    elif args[0] == "stop":
+        reply = hook_daemon.request(path, {"op": "stop"}, REPLY_TIMEOUT)
+        result = {"running": False, "stopped": reply is not None}
+    else:
+        reply = hook_daemon.request(path, {"op": "ping"}, hook_daemon.CONNECT_TIMEOUT)
+        result = {"running": reply is not None, "socket": path}
+        if reply is not None:
+            result.update({k: v for k, v in reply.items() if k not in ("ok", "cwd")})
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
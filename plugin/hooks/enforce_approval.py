@@ -2,14 +2,23 @@
 """PreToolUse hook: Enforcement Gate.
 
 Denies Write|Edit to non-plan files and restricts Bash commands until
-a valid approval.json exists with a matching plan hash.
+a valid approval.json exists with a matching plan hash. Plan files are
+docs/plan.md and docs/plans/<name>.md; a session that has written one of
+them is only unlocked by that plan's approval.
 """
 
-import hashlib
+import functools
 import json
 import os
+import re
 import sys
-from pathlib import Path
+
+import approval_cache
+import hook_config
+import hook_daemon
+import metrics
+import plan_namespace
+import shell_parse
 
 # Read-only commands allowed before approval
 READONLY_COMMANDS = {
@@ -91,18 +100,39 @@ BLOCKED_COMMANDS = {
     "cmake",
 }
 
-# Shell operators that indicate write/pipe operations
-SHELL_OPERATORS = ["|", ";", "&&", "||", ">", ">>", "<", "$(", "`"]
+# Read-only plugin scripts that may be run with python3 before approval
+PLUGIN_SCRIPTS = {"validate_approval.py", "review_status.py", "artifact_store.py", "codex_prime.py"}
+
+# Options that make an allowlisted command run other programs or write
+# files. A command using one is allowed but not provably read-only, so its
+# drift scan still runs. Single-letter options also match inside clusters
+# (-Hx); a false match only costs a scan.
+WRITE_OPTIONS = {
+    "rg": ("--pre",),
+    "fd": ("-x", "-X", "--exec"),
+    "tree": ("-o",),
+    "file": ("-C", "--compile"),
+    "git": ("--output", "--ext-diff", "-O", "--open-files-in-pager"),
+}
+
+# Git subcommands whose read-only form needs a specific sub-subcommand
+GIT_READONLY_ACTIONS = {"stash": {"list", "show"}}
+
+# A leading NAME=value word sets the environment of the command it prefixes
+# (GIT_EXTERNAL_DIFF=... git diff runs an arbitrary program)
+_ASSIGNMENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
 
 
 def output_allow():
     """Allow the tool use."""
+    metrics.note(outcome="allow")
     json.dump({}, sys.stdout)
     sys.stdout.write("\n")
 
 
 def output_deny(reason: str):
     """Deny the tool use with a reason."""
+    metrics.note(outcome="deny")
     result = {
         "hookSpecificOutput": {
             "permissionDecision": "deny",
@@ -113,43 +143,15 @@ def output_deny(reason: str):
     sys.stdout.write("\n")
 
 
-def validate_approval(cwd: str) -> bool:
-    """Check if approval.json exists, is_optimal is true, and plan_hash matches."""
-    review_dir = Path(cwd) / ".claude" / "review"
-    approval_path = review_dir / "approval.json"
-    plan_path = Path(cwd) / "docs" / "plan.md"
-
-    if not approval_path.exists():
-        return False
-    if not plan_path.exists():
-        return False
-
-    try:
-        with open(approval_path) as f:
-            approval = json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return False
-
-    if not approval.get("is_optimal"):
-        return False
-
-    stored_hash = approval.get("plan_hash", "")
-    try:
-        with open(plan_path, "rb") as f:
-            actual_hash = hashlib.sha256(f.read()).hexdigest()
-    except OSError:
-        return False
-
-    return stored_hash == actual_hash
+def validate_approval(cwd: str, session_id: str = "") -> bool:
+    """Check if the session's plan (or, for a session without one, any plan) is approved."""
+    with metrics.span("approval"):
+        return approval_cache.check_session(cwd, session_id) == approval_cache.VALID
 
 
 def is_plan_path(file_path: str, cwd: str) -> bool:
-    """Check if the resolved file path is docs/plan.md."""
-    resolved = os.path.realpath(
-        os.path.join(cwd, file_path) if not os.path.isabs(file_path) else file_path
-    )
-    expected = os.path.realpath(os.path.join(cwd, "docs", "plan.md"))
-    return resolved == expected
+    """Check if the resolved file path is docs/plan.md or a named plan."""
+    return plan_namespace.resolve(cwd, file_path) is not None
 
 
 def is_review_dir_path(file_path: str, cwd: str) -> bool:
@@ -161,27 +163,49 @@ def is_review_dir_path(file_path: str, cwd: str) -> bool:
     return resolved.startswith(review_dir + os.sep) or resolved == review_dir
 
 
+@functools.lru_cache(maxsize=1024)
 def check_bash_command(command: str) -> str | None:
     """Check if a bash command is allowed before approval.
 
-    Returns None if allowed, or a denial reason string if blocked.
+    The command line is split into its simple commands (pipelines and
+    lists) and every one of them must be read-only. Returns None if allowed,
+    or a denial reason string if blocked. Decisions are memoized per
+    command string, which pays off in the hook daemon.
     """
-    # Check for shell operators
-    for op in SHELL_OPERATORS:
-        if op in command:
-            return f"Bash command contains shell operator '{op}' which is not allowed before plan approval. Only simple read-only commands are permitted during planning."
-
-    # Extract the first token (command name)
-    tokens = command.strip().split()
-    if not tokens:
-        return None
+    try:
+        commands = shell_parse.split_commands(command)
+    except ValueError as e:
+        return (
+            f"Bash command uses {e}, which is not allowed before plan approval. "
+            "During planning only read-only commands are permitted, optionally combined "
+            "with pipes, lists and output redirection to /dev/null."
+        )
+    for tokens in commands:
+        denial = check_simple_command(tokens)
+        if denial:
+            return denial
+    return None
+
+
+def check_simple_command(tokens: list[str]) -> str | None:
+    """Check one simple command (already split into words) against the allowlists."""
+    if _ASSIGNMENT_RE.match(tokens[0]):
+        return f"Environment assignment '{tokens[0]}' is not allowed before plan approval. Run the command without it."
 
     first_token = os.path.basename(tokens[0])
 
-    # Allow validate_approval.py even though python3 is blocked
+    # env CMD runs CMD: check the wrapped command. Its options (-S splits a
+    # string into a new command line, -C changes directory) and assignments
+    # are refused like a leading assignment
+    if first_token == "env" and len(tokens) > 1:
+        if tokens[1].startswith("-"):
+            return f"env option '{tokens[1]}' is not allowed before plan approval. Run the command without env."
+        return check_simple_command(tokens[1:])
+
+    # Allow the plugin's own helper scripts even though python3 is blocked
     if first_token in ("python", "python3") and len(tokens) >= 2:
         script = os.path.basename(tokens[1])
-        if script == "validate_approval.py":
+        if script in PLUGIN_SCRIPTS:
             return None
 
     # Check blocklist first
@@ -205,11 +229,46 @@ def check_bash_command(command: str) -> str | None:
     return f"Command '{first_token}' is not in the read-only allowlist and is not allowed before plan approval."
 
 
+@functools.lru_cache(maxsize=1024)
+def is_readonly_command(command: str) -> bool:
+    """Check if an allowed bash command provably cannot modify the worktree.
+
+    Stricter than check_bash_command: allowlisted commands that can still
+    write through an option (tree -o, git diff --output) or whose
+    subcommand writes (git stash) are not read-only.
+    """
+    if check_bash_command(command) is not None:
+        return False
+    return all(_is_readonly_simple(tokens) for tokens in shell_parse.split_commands(command))
+
+
+def _is_readonly_simple(tokens: list[str]) -> bool:
+    first_token = os.path.basename(tokens[0])
+    args = tokens[1:]
+    if first_token in ("python", "python3"):
+        return False  # the allowlist only checks the script's name, not what it does
+    if first_token == "env" and args:
+        return _is_readonly_simple(args)  # env CMD runs CMD
+    if first_token == "git" and args:
+        actions = GIT_READONLY_ACTIONS.get(args[0])
+        if actions is not None and (len(args) < 2 or args[1] not in actions):
+            return False
+    for option in WRITE_OPTIONS.get(first_token, ()):
+        for arg in args:
+            if option.startswith("--"):
+                if arg.startswith(option):
+                    return False
+            elif arg.startswith("-") and not arg.startswith("--") and option[1] in arg[1:]:
+                return False
+    return True
+
+
 def handle_write_edit(hook_input: dict):
     """Handle PreToolUse for Write or Edit tools."""
     cwd = hook_input.get("cwd", os.getcwd())
     tool_input = hook_input.get("tool_input", {})
     file_path = tool_input.get("file_path", "")
+    metrics.note(cwd=cwd)
 
     if not file_path:
         output_allow()
@@ -223,17 +282,18 @@ def handle_write_edit(hook_input: dict):
         )
         return
 
-    # Always allow writes to docs/plan.md
+    # Always allow writes to plan files
     if is_plan_path(file_path, cwd):
         output_allow()
         return
 
     # For all other paths, check approval
-    if validate_approval(cwd):
+    if validate_approval(cwd, hook_input.get("session_id", "")):
         output_allow()
     else:
         output_deny(
-            "Cannot write to files other than docs/plan.md until the plan is approved. "
+            "Cannot write to files other than docs/plan.md (or docs/plans/<name>.md) "
+            "until the plan is approved. "
             "Complete the plan review process first."
         )
 
@@ -243,23 +303,43 @@ def handle_bash(hook_input: dict):
     cwd = hook_input.get("cwd", os.getcwd())
     tool_input = hook_input.get("tool_input", {})
     command = tool_input.get("command", "")
+    metrics.note(cwd=cwd, command_bytes=len(command))
 
     # If approved, allow everything
-    if validate_approval(cwd):
+    if validate_approval(cwd, hook_input.get("session_id", "")):
         output_allow()
         return
 
     # Before approval, enforce read-only allowlist
-    denial = check_bash_command(command)
+    with metrics.span("bash_classify"):
+        denial = check_bash_command(command)
     if denial:
         output_deny(denial)
-    else:
-        output_allow()
+        return
 
+    # Mark read-only commands so the drift check skips its scan; otherwise
+    # record a git status baseline so it only reports what this command
+    # changes
+    config = hook_config.load_config(cwd)["drift"]
+    if config.get("skip_readonly") and is_readonly_command(command):
+        import drift_state
 
-def main():
+        metrics.note(readonly=True)
+        drift_state.record_readonly(cwd, drift_state.call_key(hook_input))
+    elif config.get("baseline"):
+        import drift_state
+
+        with metrics.span("baseline"):
+            drift_state.capture_baseline(cwd, drift_state.call_key(hook_input), config)
+    output_allow()
+
+
+@metrics.timed("enforce_approval")
+def run(raw: str):
+    """Process one hook payload in-process."""
     try:
-        hook_input = json.load(sys.stdin)
+        with metrics.span("parse"):
+            hook_input = json.loads(raw)
     except (json.JSONDecodeError, ValueError):
         output_deny("Hook received malformed input")
         return
@@ -274,5 +354,12 @@ def main():
         output_allow()
 
 
+def main():
+    raw = sys.stdin.read()
+    if hook_daemon.relay("enforce_approval", raw):
+        return
+    run(raw)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,270 @@
+"""Locally precomputed evidence for the paths and identifiers a plan names.
+
+Codex spends much of a review opening the files a plan mentions and
+searching for the functions and classes it talks about. Before Codex runs,
+build() pulls those references out of the plan and resolves them in the
+worktree: whether each path exists (and similar tracked files if not),
+excerpts around file:line references, and the definition sites of named
+identifiers found with one `git grep`. Only tracked files inside the
+worktree are read. The result is a Markdown appendix,
+capped at evidence.max_bytes, that build_codex_prompt attaches to the
+prompt. Codex is still told to verify what it relies on.
+
+Appendices are cached in .claude/review/evidence/ keyed on the text, HEAD
+and the size cap, so re-reviews and async retries of the same plan do not
+search again.
+"""
+
+import hashlib
+import keyword
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Bump when the appendix format changes
+EVIDENCE_VERSION = 1
+CACHE_DIR = "evidence"
+CACHE_ENTRIES = 32
+MAX_PATHS = 40
+MAX_IDENTIFIERS = 40
+DEFINITIONS_PER_IDENTIFIER = 3
+EXCERPT_LINES = 6
+
+_EXTENSIONS = (
+    "py|pyi|js|jsx|ts|tsx|mjs|go|rs|java|kt|rb|php|c|h|cc|cpp|hpp|cs|swift|scala|sh|"
+    "json|ya?ml|toml|ini|cfg|md|sql|proto|graphql|html|css"
+)
+_CODE_SPAN_RE = re.compile(r"`([^`\n]+)`")
+# File names with a known extension, optionally with a directory and a :line suffix
+_PATH_RE = re.compile(rf"(?<![\w/.:-])((?:[\w.-]+/)*[\w.-]+\.(?:{_EXTENSIONS}))(?::(\d+))?(?![\w/])")
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*(?:\(\))?")
+_BARE_IDENTIFIER_RE = re.compile(r"(?<![\w./-])[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*(?:\(\))?(?![\w/-])")
+_NAME_RE = re.compile(rf"`([^`\n]+)`|({_BARE_IDENTIFIER_RE.pattern})")
+_CAMEL_CASE_RE = re.compile(r"[A-Z][a-z0-9]+[A-Z]")
+_STOPWORDS = {"self", "cls", "true", "false", "none", "null", "this", "args", "kwargs", "todo", "main"}
+_DEFINITION_KEYWORDS = "def|class|function|func|fn|struct|enum|interface|type|trait|module|object"
+
+
+def _looks_like_code(word: str) -> bool:
+    return "_" in word.strip("_") or bool(_CAMEL_CASE_RE.search(word))
+
+
+def extract_references(text: str) -> tuple[list[tuple[str, int | None]], list[str]]:
+    """Return the (path, line) pairs and identifiers a plan mentions, in order."""
+    paths = {}
+    for match in _PATH_RE.finditer(text):
+        if "://" not in text[max(0, match.start() - 8):match.end()]:
+            paths.setdefault((match.group(1), int(match.group(2)) if match.group(2) else None), None)
+    # Inside code spans, anything with a slash is a path (directories included)
+    for token in (token for span in _CODE_SPAN_RE.findall(text) for token in span.split()):
+        if "/" in token and "://" not in token and not token.startswith("-") and token.strip("./"):
+            path, _, line = token.partition(":")
+            paths.setdefault((path, int(line) if line.isdigit() else None), None)
+
+    # Code spans name their last component (`module.func()` -> func); in
+    # prose, only snake_case and CamelCase words count, with whatever they
+    # qualify (SharedClient.send -> SharedClient, send)
+    names = []
+    for span, bare in _NAME_RE.findall(text):
+        chain = (span or bare).strip()
+        if not _IDENTIFIER_RE.fullmatch(chain) or _PATH_RE.fullmatch(chain):
+            continue
+        parts = chain.removesuffix("()").split(".")
+        if span:
+            names.append(parts[-1])
+        elif any(_looks_like_code(part) for part in parts):
+            names += [part for part in parts[:-1] if _looks_like_code(part)] + parts[-1:]
+
+    identifiers = {}
+    for name in names:
+        if len(name) < 3 or name.lower() in _STOPWORDS or keyword.iskeyword(name):
+            continue
+        identifiers.setdefault(name, None)
+    return list(paths)[:MAX_PATHS], list(identifiers)[:MAX_IDENTIFIERS]
+
+
+def _git(cwd: str, args: list[str], timeout: float) -> str | None:
+    try:
+        proc = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, timeout=timeout)
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return None
+    # git grep exits 1 when nothing matched
+    return proc.stdout if proc.returncode in (0, 1) else None
+
+
+def find_definitions(cwd: str, names: list[str], timeout: float) -> dict[str, list[tuple[str, int]]]:
+    """Return {name: [(file, line), ...]} for definitions of names in tracked files."""
+    if not names:
+        return {}
+    alternation = "|".join(re.escape(name) for name in names)
+    output = _git(
+        cwd,
+        [
+            "grep", "-n", "-I", "--no-color", "-E",
+            "-e", rf"({_DEFINITION_KEYWORDS})[[:space:]]+({alternation})([^[:alnum:]_]|$)",
+            "-e", rf"^[[:space:]]*(export[[:space:]]+)?(const[[:space:]]+)?({alternation})[[:space:]]*(:[^=]*)?=([^=]|$)",
+        ],
+        timeout,
+    )
+    definition_re = re.compile(
+        rf"(?:(?:{_DEFINITION_KEYWORDS})\s+({alternation})(?!\w)|^\s*(?:export\s+)?(?:const\s+)?({alternation})\s*(?::[^=]*)?=(?!=))"
+    )
+    found = {}
+    for line in (output or "").splitlines():
+        path, _, rest = line.partition(":")
+        number, _, source = rest.partition(":")
+        match = definition_re.search(source)
+        if not match or not number.isdigit():
+            continue
+        sites = found.setdefault(match.group(1) or match.group(2), [])
+        if len(sites) < DEFINITIONS_PER_IDENTIFIER:
+            sites.append((path, int(number)))
+    return found
+
+
+def _excerpt(cwd: str, path: str, start: int, files: dict) -> str | None:
+    """Return EXCERPT_LINES numbered lines of path from start; files caches contents."""
+    if path not in files:
+        try:
+            with open(os.path.join(cwd, path), errors="replace") as f:
+                files[path] = f.read().splitlines()
+        except OSError:
+            files[path] = None
+    content = files[path]
+    if content is None:
+        return None
+    start = max(1, start)
+    chunk = content[start - 1:start - 1 + EXCERPT_LINES]
+    if not chunk:
+        return None
+    width = len(str(start + len(chunk) - 1))
+    body = "\n".join(f"  {n:>{width}} | {text}" for n, text in enumerate(chunk, start))
+    return f"  ```\n{body}\n  ```"
+
+
+def _describe_path(
+    cwd: str, path: str, line: int | None, tracked: list[str], tracked_set: set[str], files: dict
+) -> str:
+    full = os.path.normpath(os.path.join(cwd, path))
+    label = f"`{path}:{line}`" if line else f"`{path}`"
+    # Only the worktree is described: absolute and ../ paths, or symlinks
+    # leading out of it, would copy arbitrary local files into the prompt
+    root = os.path.realpath(cwd)
+    if os.path.commonpath([root, os.path.realpath(full)]) != root:
+        return f"- {label}: outside the worktree, not read"
+    if os.path.isdir(full):
+        try:
+            return f"- {label}: directory, {len(os.listdir(full))} entries"
+        except OSError:
+            return f"- {label}: directory"
+    if not os.path.isfile(full):
+        base = os.path.basename(path)
+        similar = [f for f in tracked if os.path.basename(f) == base][:3]
+        hint = f"; tracked files with that name: {', '.join(f'`{f}`' for f in similar)}" if similar else ""
+        return f"- {label}: not found{hint}"
+    # Untracked and ignored files (.env, local credentials) are not read
+    if os.path.relpath(full, cwd) not in tracked_set:
+        return f"- {label}: exists, not tracked"
+    try:
+        with open(full, "rb") as f:
+            count = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 16), b""))
+    except OSError:
+        return f"- {label}: exists"
+    entry = f"- {label}: exists, {count} lines"
+    if line:
+        excerpt = _excerpt(cwd, os.path.relpath(full, cwd), line - EXCERPT_LINES // 2, files)
+        if excerpt:
+            entry += "\n" + excerpt
+    return entry
+
+
+def collect(cwd: str, text: str, max_bytes: int, timeout: float) -> str | None:
+    """Resolve the plan's references and format the appendix, or None if it names none."""
+    paths, names = extract_references(text)
+    if not paths and not names:
+        return None
+    files = {}
+    # The definition search runs while the paths are checked
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        definitions = pool.submit(find_definitions, cwd, names, timeout)
+        tracked = pool.submit(_git, cwd, ["ls-files"], timeout) if paths else None
+        tracked_files = (tracked.result() or "").splitlines() if tracked else []
+        tracked_set = set(tracked_files)
+        path_entries = [_describe_path(cwd, path, line, tracked_files, tracked_set, files) for path, line in paths]
+        found = definitions.result()
+
+    definition_entries = []
+    for name in names:
+        for path, number in found.get(name, []):
+            excerpt = _excerpt(cwd, path, number, files)
+            entry = f"- `{name}`: {path}:{number}"
+            definition_entries.append(f"{entry}\n{excerpt}" if excerpt else entry)
+    undefined = [name for name in names if name not in found]
+    if undefined:
+        definition_entries.append(
+            "- No definition found in tracked files (external or not yet written): "
+            + ", ".join(f"`{name}`" for name in undefined)
+        )
+
+    parts = []
+    size = 64  # section headers and the omission note
+    omitted = 0
+    for title, entries in (("Paths", path_entries), ("Definitions", definition_entries)):
+        kept = []
+        for entry in entries:
+            cost = len(entry.encode("utf-8")) + 1
+            if size + cost > max_bytes:
+                omitted += 1
+                continue
+            kept.append(entry)
+            size += cost
+        if kept:
+            parts.append(f"### {title}\n" + "\n".join(kept))
+    if omitted:
+        parts.append(f"({omitted} more entries omitted to fit the size limit)")
+    return "\n\n".join(parts) if parts else None
+
+
+def _head(cwd: str) -> str | None:
+    output = _git(cwd, ["rev-parse", "--verify", "-q", "HEAD"], 10)
+    return (output or "").strip() or None
+
+
+def build(cwd: str, review_dir: Path, text: str, settings: dict) -> str | None:
+    """Return the evidence appendix for text, from the cache when possible.
+
+    Returns None outside a git repository, when the plan names nothing, or
+    when evidence is disabled.
+    """
+    if not settings.get("enabled"):
+        return None
+    head = _head(cwd)
+    if head is None:
+        return None
+    max_bytes = settings["max_bytes"]
+    key = hashlib.sha256(
+        f"{EVIDENCE_VERSION}\0{hashlib.sha256(text.encode()).hexdigest()}\0{head}\0{max_bytes}".encode()
+    ).hexdigest()
+    cache_dir = review_dir / CACHE_DIR
+    path = cache_dir / f"{key}.md"
+    try:
+        cached = path.read_text()
+        os.utime(path)
+        return cached or None
+    except OSError:
+        pass
+
+    appendix = collect(cwd, text, max_bytes, settings["timeout"])
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        tmp = cache_dir / f".{key}.{os.getpid()}.tmp"
+        tmp.write_text(appendix or "")
+        os.replace(tmp, path)
+        entries = sorted(cache_dir.glob("*.md"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in entries[CACHE_ENTRIES:]:
+            stale.unlink()
+    except OSError:
+        pass
+    return appendix
@@ -0,0 +1,178 @@
+"""Per-worktree configuration for the review hooks.
+
+Settings are read from an optional JSON file at .claude/codex-review.json
+in the worktree. Each top-level key is a section; keys missing from the file
+take the values in DEFAULTS, so an absent or empty file means stock
+behaviour. A malformed file is ignored rather than failing the hook.
+
+Example:
+  {"drift": {"exclude": ["vendor", "third_party"]}}
+"""
+
+import copy
+import json
+import os
+
+CONFIG_PATH = os.path.join(".claude", "codex-review.json")
+
+DEFAULTS = {
+    "drift": {
+        # Repo-root-relative pathspecs the drift scan is limited to (empty = whole repo).
+        "pathspecs": [],
+        # Repo-root-relative pathspecs the drift scan skips, e.g. vendored trees.
+        "exclude": [],
+        # Record a git status baseline before each planning-phase Bash call
+        # and report only what that call changed.
+        "baseline": True,
+        # Seconds the PreToolUse baseline may take before it is skipped.
+        "baseline_timeout": 4,
+        # Skip the baseline and the drift scan (no git status at all) for
+        # commands the gate classifies read-only: every command in the line
+        # allowlisted, no writing options, no python, env checked by the
+        # command it runs.
+        "skip_readonly": True,
+        # Start the inotify drift watcher (drift_watcher.py) on first use. A
+        # running watcher is used either way.
+        "watcher": False,
+        # Seconds between the watcher's full git status reconciliation
+        # passes (0 disables them).
+        "watcher_reconcile_seconds": 300,
+        # Pass -c core.fsmonitor=true to git status (needs a git build with
+        # the builtin fsmonitor daemon for this platform).
+        "fsmonitor": False,
+    },
+    "review_cache": {
+        # Reuse verdicts for byte-identical plans reviewed against the same
+        # HEAD tree, shared across worktrees via the git common dir.
+        "enabled": True,
+        "max_age_days": 30,
+        "max_bytes": 64 * 1024 * 1024,
+    },
+    "review": {
+        # "sync" blocks the PostToolUse hook for the whole Codex run; "async"
+        # hands the review to a detached worker and returns immediately.
+        "mode": "sync",
+        # Async workers wait this long for a burst of plan edits to settle
+        # before reviewing; a newer write within the window replaces the job.
+        "debounce_seconds": 3,
+        # Seconds all Codex runs of one review may take together (resume,
+        # fallback to a fresh session, retries); below the 600s hook timeout
+        # in hooks.json so the review always ends with a verdict or error.
+        "deadline_seconds": 540,
+        # A retry or fallback starts only if this much budget would remain;
+        # also the floor of the per-run timeout learned from past reviews.
+        "min_attempt_seconds": 60,
+        # Retries of a run that failed transiently or outlived its learned timeout.
+        "max_retries": 2,
+        # Base of the jittered exponential backoff between retries.
+        "retry_backoff_seconds": 2,
+    },
+    "shards": {
+        # Split a large plan's ## Changes entries into shards reviewed by
+        # concurrent fresh Codex sessions, merging their verdicts.
+        "enabled": False,
+        # Plans with fewer Changes entries are reviewed in one session.
+        "min_entries": 8,
+        "max_shards": 4,
+        # Codex processes run at once.
+        "max_workers": 4,
+    },
+    "artifacts": {
+        # Store every Nth plan snapshot in full and the rest as deltas
+        # against the previous version (1 = always in full).
+        "keyframe_interval": 4,
+        # Compress the artifacts of older plan versions when a new version
+        # is snapshotted; the current version's files stay plain.
+        "compact": True,
+    },
+    "history": {
+        # Record every review in .claude/review/history.sqlite and archive a
+        # finished cycle's artifacts under archive/<cycle>/ instead of
+        # deleting them.
+        "enabled": True,
+        # Archived cycles whose files are kept; older ones keep their rows only.
+        "keep_archives": 20,
+    },
+    "lint": {
+        # Run the pre-flight checks in plan_lint.py before a plan is sent to
+        # Codex; a plan failing them is blocked without using up a revision.
+        "enabled": True,
+        # Names of checks to skip, e.g. ["missing_paths"]. The required
+        # sections check always runs.
+        "skip": [],
+    },
+    "metrics": {
+        # Append per-phase hook timings to .claude/review/metrics.jsonl.
+        "enabled": True,
+    },
+    "evidence": {
+        # Attach an appendix resolving the plan's file paths and identifiers
+        # (existence, definition sites, excerpts) to the Codex prompt.
+        "enabled": True,
+        # Appendix size cap in bytes; entries beyond it are dropped.
+        "max_bytes": 12 * 1024,
+        # Seconds each git lookup may take before it is skipped.
+        "timeout": 10,
+    },
+    "prompt": {
+        # Send a resumed Codex session only the section-aware diff against
+        # the plan version it last reviewed.
+        "resume_diff": True,
+    },
+    "prime": {
+        # Let codex_prime.py start a warm Codex session while the plan is
+        # researched; the first review of the cycle resumes it.
+        "enabled": True,
+        # Seconds the priming run may take.
+        "timeout_seconds": 600,
+        # Seconds a review waits for a priming run still in progress before
+        # stopping it; drawn from review.deadline_seconds.
+        "wait_seconds": 120,
+        # A primed session older than this is not adopted.
+        "max_age_seconds": 3600,
+    },
+    # worktree_pool.py reads this section from the main worktree's config.
+    "pool": {
+        # Clean worktrees worktree_pool.py keeps ready per profile.
+        "size": 2,
+        # Sparse-checkout profiles: name -> directories checked out (cone
+        # mode), e.g. {"api": ["services/api", "libs"]}.
+        "profiles": {},
+        # Ignored paths kept when a worktree is handed out again (e.g.
+        # "node_modules"); everything else untracked is removed.
+        "keep_ignored": [],
+    },
+}
+
+# path -> (mtime_ns, config); lets the hook daemon skip re-parsing.
+_cache: dict = {}
+
+
+def load_config(cwd: str) -> dict:
+    """Return the merged configuration for a worktree."""
+    path = os.path.join(cwd, CONFIG_PATH)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return copy.deepcopy(DEFAULTS)
+
+    cached = _cache.get(path)
+    if cached and cached[0] == mtime:
+        return copy.deepcopy(cached[1])
+
+    try:
+        with open(path) as f:
+            overrides = json.load(f)
+    except (OSError, ValueError):
+        overrides = {}
+    if not isinstance(overrides, dict):
+        overrides = {}
+
+    config = copy.deepcopy(DEFAULTS)
+    for section, values in overrides.items():
+        if isinstance(values, dict) and isinstance(config.get(section), dict):
+            config[section].update(values)
+        else:
+            config[section] = values
+    _cache[path] = (mtime, config)
+    return copy.deepcopy(config)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Resident hook daemon.
+
+Keeps the PreToolUse/PostToolUse gate logic (enforce_approval and
+bash_drift_check) loaded in one long-lived process per worktree, listening
+on a Unix socket under .claude/review/. The hook scripts act as thin
+clients: they forward the raw hook payload and relay the daemon's stdout.
+When no daemon is running, the hooks run in-process exactly as before.
+
+Usage:
+  python3 hook_daemon.py start [cwd]    Start a detached daemon for the worktree
+  python3 hook_daemon.py stop [cwd]     Stop the daemon
+  python3 hook_daemon.py status [cwd]   Print {"running": true/false, ...}
+  python3 hook_daemon.py serve [cwd]    Run the daemon in the foreground
+
+Set CODEX_REVIEW_NO_DAEMON=1 to force the in-process path.
+"""
+
+import json
+import os
+import sys
+
+SOCKET_NAME = "hookd.sock"
+# AF_UNIX paths are limited to ~108 bytes; deep worktrees fall back to a
+# private per-user directory ($XDG_RUNTIME_DIR or /tmp).
+MAX_SOCKET_PATH = 100
+CONNECT_TIMEOUT = 0.25
+# enforce_approval runs under a 10s hook timeout; leave room for the fallback.
+REPLY_TIMEOUT = 5.0
+IDLE_TIMEOUT = 4 * 60 * 60
+DISABLE_ENV = "CODEX_REVIEW_NO_DAEMON"
+
+# Hooks the daemon serves. plan_review is excluded: it is dominated by the
+# Codex run, not by interpreter startup.
+DAEMON_HOOKS = ("enforce_approval", "bash_drift_check")
+
+
+def _private_dir() -> str | None:
+    """Return a 0700 directory owned by this user for fallback sockets, or None."""
+    import stat
+
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    base = os.path.join(runtime, "codex-review") if runtime else f"/tmp/codex-review-{os.getuid()}"
+    try:
+        os.mkdir(base, 0o700)
+    except FileExistsError:
+        pass
+    except OSError:
+        return None
+    # Another user may have created it first (or planted a symlink)
+    try:
+        st = os.lstat(base)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    return base
+
+
+def socket_path(cwd: str, name: str = SOCKET_NAME) -> str:
+    """Return the path of a per-worktree socket (the daemon's by default).
+
+    If no private fallback directory is available, the over-long path under
+    the worktree is returned; binding and connecting to it fail, so the
+    hooks run in-process.
+    """
+    path = os.path.join(cwd, ".claude", "review", name)
+    if len(path.encode()) <= MAX_SOCKET_PATH:
+        return path
+    import zlib
+
+    base = _private_dir()
+    if base is None:
+        return path
+    key = zlib.crc32(os.path.realpath(cwd).encode()) & 0xFFFFFFFF
+    suffix = ".sock" if name == SOCKET_NAME else f"-{name}"
+    return os.path.join(base, f"{key:08x}{suffix}")
+
+
+def request(path: str, message: dict, timeout: float) -> dict | None:
+    """Send one JSON request over a Unix socket. Returns the reply or None.
+
+    Sockets owned by another user are not trusted.
+    """
+    import socket
+
+    try:
+        if os.stat(path).st_uid != os.getuid():
+            return None
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path)
+            sock.settimeout(timeout)
+            sock.sendall(json.dumps(message).encode("utf-8"))
+            sock.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        reply = json.loads(b"".join(chunks))
+    except (OSError, ValueError):
+        return None
+    return reply if isinstance(reply, dict) else None
+
+
+def relay(hook: str, raw: str) -> bool:
+    """Forward a hook payload to a running daemon and print its reply.
+
+    The socket is located from the process working directory, which the host
+    sets to the project directory, so no payload parsing happens here.
+    Returns False when no daemon answered; the caller then runs in-process.
+    """
+    if os.environ.get(DISABLE_ENV):
+        return False
+    path = socket_path(os.getcwd())
+    if not os.path.exists(path):
+        return False
+    reply = request(path, {"op": "hook", "hook": hook, "payload": raw}, REPLY_TIMEOUT)
+    if reply is None or not isinstance(reply.get("stdout"), str):
+        return False
+    sys.stdout.write(reply["stdout"])
+    return True
+
+
+def run_hook(module, raw: str) -> str:
+    """Run a hook module's in-process entry point and capture its stdout."""
+    import contextlib
+    import io
+
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        try:
+            module.run(raw)
+        except SystemExit:
+            pass
+    return buf.getvalue()
+
+
+def _source_mtimes(modules: dict) -> dict:
+    mtimes = {}
+    for name, module in modules.items():
+        try:
+            mtimes[name] = os.stat(module.__file__).st_mtime_ns
+        except OSError:
+            mtimes[name] = None
+    return mtimes
+
+
+def make_server(cwd: str):
+    """Create the daemon's socket server for a worktree (not yet serving)."""
+    import importlib
+    import socketserver
+    import time
+
+    hooks_dir = os.path.dirname(os.path.abspath(__file__))
+    if hooks_dir not in sys.path:
+        sys.path.insert(0, hooks_dir)
+    modules = {name: importlib.import_module(name) for name in DAEMON_HOOKS}
+    loaded_mtimes = _source_mtimes(modules)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            server = self.server
+            server.last_activity = time.monotonic()
+            try:
+                message = json.loads(self.rfile.read())
+            except ValueError:
+                return
+            op = message.get("op")
+            if op == "ping":
+                reply = {"ok": True, "pid": os.getpid(), "cwd": cwd}
+            elif op == "stop":
+                reply = {"ok": True}
+                server.stopping = True
+            elif op == "hook" and message.get("hook") in modules:
+                if _source_mtimes(modules) != loaded_mtimes:
+                    # Plugin code changed under us: let the client fall back
+                    # and exit so a fresh daemon picks up the new code.
+                    reply = {"error": "stale"}
+                    server.stopping = True
+                else:
+                    module = modules[message["hook"]]
+                    reply = {"stdout": run_hook(module, message.get("payload", ""))}
+            else:
+                reply = {"error": "unknown request"}
+            self.wfile.write(json.dumps(reply).encode("utf-8"))
+
+    path = socket_path(cwd)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        if request(path, {"op": "ping"}, CONNECT_TIMEOUT) is not None:
+            raise RuntimeError(f"hook daemon already running on {path}")
+        os.unlink(path)
+
+    old_umask = os.umask(0o077)
+    try:
+        server = socketserver.UnixStreamServer(path, Handler)
+    finally:
+        os.umask(old_umask)
+    server.timeout = 60
+    server.stopping = False
+    server.last_activity = time.monotonic()
+    server.socket_file = path
+    return server
+
+
+def serve(server):
+    """Handle requests until stopped or idle for IDLE_TIMEOUT seconds."""
+    import time
+
+    try:
+        while not server.stopping:
+            server.handle_request()
+            if time.monotonic() - server.last_activity > IDLE_TIMEOUT:
+                break
+    finally:
+        server.server_close()
+        try:
+            os.unlink(server.socket_file)
+        except OSError:
+            pass
+
+
+def start(cwd: str) -> dict:
+    """Start a detached daemon for cwd and wait until it answers."""
+    import subprocess
+    import time
+
+    path = socket_path(cwd)
+    reply = request(path, {"op": "ping"}, CONNECT_TIMEOUT)
+    if reply is not None:
+        return {"running": True, "pid": reply.get("pid"), "socket": path}
+
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "serve", cwd],
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        reply = request(path, {"op": "ping"}, CONNECT_TIMEOUT)
+        if reply is not None:
+            return {"running": True, "pid": reply.get("pid"), "socket": path}
+        time.sleep(0.05)
+    return {"running": False, "socket": path}
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("start", "stop", "status", "serve"):
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(2)
+    cwd = os.path.realpath(args[1] if len(args) > 1 else os.getcwd())
+
+    if args[0] == "serve":
+        os.chdir(cwd)
+        serve(make_server(cwd))
+        return
+
+    if args[0] == "start":
+        result = start(cwd)
+    elif args[0] == "stop":
+        reply = request(socket_path(cwd), {"op": "stop"}, REPLY_TIMEOUT)
+        result = {"running": False, "stopped": reply is not None}
+    else:
+        reply = request(socket_path(cwd), {"op": "ping"}, CONNECT_TIMEOUT)
+        result = {"running": reply is not None, "socket": socket_path(cwd)}
+        if reply is not None:
+            result["pid"] = reply.get("pid")
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Per-phase latency metrics for hook runs.
+
+Each instrumented hook run appends one JSON line to
+.claude/review/metrics.jsonl in its worktree:
+
+  {"ts": 1740000000.123, "hook": "bash_drift_check", "outcome": "allow",
+   "total_ms": 12.4, "phases": {"parse": 0.02, "git_status": 11.8},
+   "sizes": {"changed_paths": 0}, "pid": 4242}
+
+Hooks mark phases with `with metrics.span("name"):` and report outcome and
+sizes with metrics.note(). Runs whose worktree is unknown (e.g. malformed
+input) are not recorded. Set "metrics": {"enabled": false} in
+.claude/codex-review.json to turn recording off.
+
+Usage:
+  python3 metrics.py summary [--cwd DIR] [--json]
+      p50/p95/p99 latency per hook and per phase.
+  python3 metrics.py prometheus OUTPUT [--cwd DIR]
+      Write a Prometheus textfile-collector file (atomically) to OUTPUT.
+"""
+
+import contextlib
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+import hook_config
+
+METRICS_NAME = "metrics.jsonl"
+MAX_BYTES = 16 * 1024 * 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Recorder:
+    """Collects spans, sizes and the outcome of one hook run."""
+
+    def __init__(self, hook: str):
+        self.hook = hook
+        self.cwd = None
+        self.outcome = "allow"
+        self.phases = {}
+        self.sizes = {}
+        self._start = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        began = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter_ns() - began
+            with self._lock:
+                # Repeated phases (e.g. one per shard) accumulate
+                self.phases[name] = self.phases.get(name, 0) + elapsed
+
+    def record(self) -> dict:
+        return {
+            "ts": round(time.time(), 3),
+            "hook": self.hook,
+            "outcome": self.outcome,
+            "total_ms": round((time.perf_counter_ns() - self._start) / 1e6, 3),
+            "phases": {name: round(ns / 1e6, 3) for name, ns in self.phases.items()},
+            "sizes": self.sizes,
+            "pid": os.getpid(),
+        }
+
+
+class _NullRecorder(Recorder):
+    """Stand-in used when no run is being recorded."""
+
+    def __init__(self):
+        super().__init__("")
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        yield
+
+
+_stack: list[Recorder] = []
+
+
+def current() -> Recorder:
+    """Return the innermost active recorder (a no-op one if none)."""
+    return _stack[-1] if _stack else _NullRecorder()
+
+
+def span(name: str):
+    """Time a phase of the current hook run."""
+    return current().span(name)
+
+
+def note(outcome: str | None = None, cwd: str | None = None, **sizes):
+    """Set the current run's outcome, worktree and/or size fields."""
+    recorder = current()
+    if outcome is not None:
+        recorder.outcome = outcome
+    if cwd is not None:
+        recorder.cwd = cwd
+    recorder.sizes.update(sizes)
+
+
+def metrics_path(cwd: str) -> str:
+    return os.path.join(cwd, ".claude", "review", METRICS_NAME)
+
+
+def _append(path: str, line: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        if os.stat(path).st_size + len(line) > MAX_BYTES:
+            os.replace(path, path + ".1")
+    except OSError:
+        pass
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        # One write of a short line keeps concurrent appends whole
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def _flush(recorder: Recorder):
+    if not recorder.cwd:
+        return
+    if not hook_config.load_config(recorder.cwd).get("metrics", {}).get("enabled", True):
+        return
+    line = json.dumps(recorder.record(), separators=(",", ":")).encode("utf-8") + b"\n"
+    try:
+        _append(metrics_path(recorder.cwd), line)
+    except OSError:
+        pass
+
+
+def timed(hook: str):
+    """Decorator recording one metrics line per call of a hook entry point."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            recorder = Recorder(hook)
+            _stack.append(recorder)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _stack.pop()
+                _flush(recorder)
+        return inner
+    return wrap
+
+
+# --- Reporting ---
+
+
+def load(cwd: str) -> list[dict]:
+    """Read recorded runs, oldest first (including the rotated file)."""
+    runs = []
+    path = metrics_path(cwd)
+    for candidate in (path + ".1", path):
+        try:
+            with open(candidate, "rb") as f:
+                for line in f:
+                    try:
+                        run = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(run, dict) and "hook" in run:
+                        runs.append(run)
+        except OSError:
+            continue
+    return runs
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of values (which must be non-empty)."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(runs: list[dict]) -> dict:
+    """Return {hook: {"count", "outcomes", "phases": {phase: stats}}}.
+
+    Latency stats are in milliseconds; the "total" phase is the whole run.
+    """
+    samples: dict = {}
+    summary: dict = {}
+    for run in runs:
+        hook = run["hook"]
+        entry = summary.setdefault(hook, {"count": 0, "outcomes": {}, "phases": {}})
+        entry["count"] += 1
+        outcome = run.get("outcome", "")
+        entry["outcomes"][outcome] = entry["outcomes"].get(outcome, 0) + 1
+        phases = samples.setdefault(hook, {})
+        phases.setdefault("total", []).append(run.get("total_ms", 0.0))
+        for name, ms in run.get("phases", {}).items():
+            phases.setdefault(name, []).append(ms)
+    for hook, phases in samples.items():
+        for name, values in phases.items():
+            stats = {"count": len(values), "sum": round(sum(values), 3)}
+            for q in QUANTILES:
+                stats[f"p{int(q * 100)}"] = percentile(values, q)
+            summary[hook]["phases"][name] = stats
+    return summary
+
+
+def format_summary(summary: dict) -> str:
+    lines = [f"{'hook':<22} {'phase':<18} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}"]
+    for hook in sorted(summary):
+        phases = summary[hook]["phases"]
+        for name in ["total"] + sorted(p for p in phases if p != "total"):
+            s = phases[name]
+            lines.append(
+                f"{hook:<22} {name:<18} {s['count']:>7} {s['p50']:>10.2f} {s['p95']:>10.2f} {s['p99']:>10.2f}"
+            )
+    return "\n".join(lines)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(summary: dict, worktree: str) -> str:
+    """Render a summary in the Prometheus text exposition format."""
+    wt = _label(worktree)
+    out = [
+        "# HELP codex_review_hook_phase_seconds Hook phase latency.",
+        "# TYPE codex_review_hook_phase_seconds summary",
+    ]
+    for hook in sorted(summary):
+        for name, s in sorted(summary[hook]["phases"].items()):
+            labels = f'worktree="{wt}",hook="{_label(hook)}",phase="{_label(name)}"'
+            for q in QUANTILES:
+                out.append(
+                    f'codex_review_hook_phase_seconds{{{labels},quantile="{q}"}} {s[f"p{int(q * 100)}"] / 1000:.6f}'
+                )
+            out.append(f"codex_review_hook_phase_seconds_sum{{{labels}}} {s['sum'] / 1000:.6f}")
+            out.append(f"codex_review_hook_phase_seconds_count{{{labels}}} {s['count']}")
+    out += [
+        "# HELP codex_review_hook_runs_total Hook runs by outcome.",
+        "# TYPE codex_review_hook_runs_total counter",
+    ]
+    for hook in sorted(summary):
+        for outcome, count in sorted(summary[hook]["outcomes"].items()):
+            out.append(
+                f'codex_review_hook_runs_total{{worktree="{wt}",hook="{_label(hook)}",outcome="{_label(outcome)}"}} {count}'
+            )
+    return "\n".join(out) + "\n"
+
+
+def write_prometheus(cwd: str, output: str):
+    """Write the textfile for cwd's metrics atomically to output."""
+    text = prometheus_text(summarize(load(cwd)), os.path.basename(os.path.abspath(cwd)))
+    tmp = f"{output}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, output)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Hook latency metrics")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary_cmd = sub.add_parser("summary", help="print p50/p95/p99 per hook and phase")
+    summary_cmd.add_argument("--cwd", default=os.getcwd())
+    summary_cmd.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    prom_cmd = sub.add_parser("prometheus", help="write a Prometheus textfile")
+    prom_cmd.add_argument("output")
+    prom_cmd.add_argument("--cwd", default=os.getcwd())
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        summary = summarize(load(args.cwd))
+        if args.json:
+            json.dump(summary, sys.stdout, indent=2)
+            sys.stdout.write("\n")
+        elif summary:
+            print(format_summary(summary))
+        else:
+            print(f"No metrics recorded at {metrics_path(args.cwd)}")
+    else:
+        write_prometheus(args.cwd, args.output)
+
+
+if __name__ == "__main__":
+    main()
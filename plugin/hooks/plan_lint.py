@@ -0,0 +1,284 @@
+"""Pre-flight checks run on a plan before it is sent to Codex.
+
+A Codex review takes minutes, so plans with problems that can be found
+locally are rejected before one starts, and the rejection does not count
+as a revision. parse_sections() reads the Markdown once, skipping fenced
+code blocks, into sections nested by heading level; each check receives
+the parsed plan and returns (line, message) findings.
+
+Checks are registered with @check(name) in CHECKS and can be turned off
+per worktree with lint.skip. Stock checks:
+
+  required_sections  a required heading is missing (or appears only
+                     inside a code block)
+  empty_sections     a required section has no content beyond
+                     placeholders such as TBD
+  missing_paths      a path named in ## Context or ## Changes does not
+                     exist, and neither its line nor the list item it
+                     belongs to says it is new, added, created or moved
+  open_questions     an ## Open Questions item is an unanswered question
+                     that is not marked as deferred
+
+required_sections always runs; it is the structure check the hook has
+always applied.
+"""
+
+import os
+import re
+import subprocess
+
+import evidence
+
+CONTEXT_HEADING = "## Context"
+CHANGES_HEADING = "## Changes"
+OPEN_QUESTIONS_HEADING = "## Open Questions"
+ALWAYS_RUN = "required_sections"
+# Findings listed in the hook feedback; the rest are summarized as a count
+MAX_REPORTED = 20
+
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_HEADING_RE = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?[ \t]*$")
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_PLACEHOLDER_RE = re.compile(
+    r"(?:[-*+]\s+|\d+[.)]\s+)?(?:tbd|tba|todo|xxx|fixme|\.\.\.|…|fill (?:this )?in|placeholder)[.!:]?", re.IGNORECASE
+)
+_LIST_ITEM_RE = re.compile(r"^(\s*)(?:[-*+]|\d+[.)])\s+(?:\[([ xX])\]\s+)?(.*)$")
+# Lines that introduce a path rather than refer to an existing one
+_NEW_PATH_RE = re.compile(
+    r"\b(?:new|creat(?:e|es|ed|ing)|add(?:s|ed|ing)?|introduc(?:e|es|ed|ing)|generat(?:e|es|ed|ing)|"
+    r"renam(?:e|es|ed|ing)|mov(?:e|es|ed|ing)|scaffold(?:s|ed|ing)?|not yet|(?:does not|doesn't) exist)\b",
+    re.IGNORECASE,
+)
+_RESOLVED_RE = re.compile(r"\b(?:resolved|answered|answer|decided|decision|deferred|defer)\b|->|→", re.IGNORECASE)
+_GLOB_CHARS = set("*?[]{}<>$~")
+
+
+class Section:
+    """One heading and the lines under it, including nested subsections.
+
+    lines holds (line number, text) pairs; in_fence marks those inside a
+    fenced code block.
+    """
+
+    def __init__(self, level: int, title: str, line: int):
+        self.level = level
+        self.title = title
+        self.line = line
+        self.lines: list[tuple[int, str]] = []
+        self.in_fence: set[int] = set()
+
+    @property
+    def heading(self) -> str:
+        return f"{'#' * self.level} {self.title}"
+
+
+class Plan:
+    """A parsed plan as seen by the checks."""
+
+    def __init__(self, text: str, cwd: str, required: list[str]):
+        self.text = text
+        self.cwd = cwd
+        self.required = required
+        self.sections, self.fenced_headings = parse_sections(text)
+
+    def section(self, heading: str) -> Section | None:
+        """Return the first section with this exact heading, if any."""
+        for section in self.sections:
+            if section.heading == heading:
+                return section
+        return None
+
+
+def parse_sections(text: str) -> tuple[list[Section], dict[str, int]]:
+    """Parse ATX headings in one pass, ignoring fenced code blocks.
+
+    Returns (sections in document order, {heading: first line} for
+    headings that appear only inside code blocks). Every line is added to
+    each open section, so a section's lines include its subsections.
+    """
+    sections = []
+    fenced = {}
+    stack = []
+    fence = None
+    for number, line in enumerate(text.splitlines(), 1):
+        match = _FENCE_RE.match(line)
+        if fence is None and match:
+            fence = match.group(1)
+        elif fence is not None:
+            if match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence) \
+                    and not line.strip()[len(match.group(1)):].strip():
+                fence = None
+            else:
+                heading = _HEADING_RE.match(line)
+                if heading:
+                    fenced.setdefault(f"{heading.group(1)} {(heading.group(2) or '').rstrip('#').strip()}", number)
+            for section in stack:
+                section.lines.append((number, line))
+                section.in_fence.add(number)
+            continue
+        else:
+            heading = _HEADING_RE.match(line)
+            if heading:
+                level = len(heading.group(1))
+                while stack and stack[-1].level >= level:
+                    stack.pop()
+                section = Section(level, (heading.group(2) or "").rstrip("#").strip(), number)
+                sections.append(section)
+                stack.append(section)
+                continue
+        for section in stack:
+            section.lines.append((number, line))
+        if fence is not None:
+            for section in stack:
+                section.in_fence.add(number)
+
+    present = {section.heading for section in sections}
+    return sections, {heading: line for heading, line in fenced.items() if heading not in present}
+
+
+CHECKS = {}
+
+
+def check(name: str):
+    """Register a check function taking a Plan and returning findings."""
+    def register(func):
+        CHECKS[name] = func
+        return func
+    return register
+
+
+def missing_headings(plan: Plan) -> list[str]:
+    present = {section.heading for section in plan.sections}
+    return [heading for heading in plan.required if heading not in present]
+
+
+@check("required_sections")
+def _required_sections(plan: Plan) -> list[tuple[int, str]]:
+    findings = []
+    for heading in missing_headings(plan):
+        fenced = plan.fenced_headings.get(heading)
+        if fenced:
+            findings.append((fenced, f"`{heading}` appears only inside a code block; it must be a real heading"))
+        else:
+            findings.append((0, f"`{heading}` is missing"))
+    return findings
+
+
+@check("empty_sections")
+def _empty_sections(plan: Plan) -> list[tuple[int, str]]:
+    findings = []
+    for heading in plan.required:
+        section = plan.section(heading)
+        if section is None:
+            continue
+        body = _COMMENT_RE.sub("", "\n".join(text for _, text in section.lines))
+        content = [
+            line.strip() for line in body.splitlines()
+            if line.strip() and not _HEADING_RE.match(line) and not _PLACEHOLDER_RE.fullmatch(line.strip())
+        ]
+        if not content:
+            findings.append((section.line, f"`{heading}` has no content; write it out or state \"None\""))
+    return findings
+
+
+def _tracked_files(cwd: str) -> list[str]:
+    try:
+        proc = subprocess.run(["git", "ls-files"], cwd=cwd, capture_output=True, text=True, timeout=5)
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return []
+    return proc.stdout.splitlines() if proc.returncode == 0 else []
+
+
+@check("missing_paths")
+def _missing_paths(plan: Plan) -> list[tuple[int, str]]:
+    referenced = []
+    new = set()
+    for heading in (CONTEXT_HEADING, CHANGES_HEADING):
+        section = plan.section(heading)
+        if section is None:
+            continue
+        # A list item or subheading that introduces a file covers all its lines
+        introducing = False
+        for number, line in section.lines:
+            if number in section.in_fence:
+                continue
+            item = _LIST_ITEM_RE.match(line)
+            if _HEADING_RE.match(line) or (item and not item.group(1)):
+                introducing = bool(_NEW_PATH_RE.search(line))
+            paths = [
+                path for path, _ in evidence.extract_references(line)[0]
+                if not path.startswith("/") and not _GLOB_CHARS & set(path)
+            ]
+            if introducing or _NEW_PATH_RE.search(line):
+                new.update(path.rstrip("/") for path in paths)
+            else:
+                referenced += [(number, path) for path in paths]
+
+    findings = []
+    by_name = None
+    reported = set()
+    for number, path in referenced:
+        path = path.rstrip("/")
+        if path in new or path in reported or os.path.exists(os.path.join(plan.cwd, path)):
+            continue
+        reported.add(path)
+        if by_name is None:
+            by_name = {}
+            for tracked in _tracked_files(plan.cwd):
+                by_name.setdefault(os.path.basename(tracked), []).append(tracked)
+        similar = by_name.get(os.path.basename(path), [])
+        # A shortened path (`enforce_approval.py`, `hooks/run.py`) is fine if
+        # it ends exactly one tracked path
+        matches = [f for f in similar if f.endswith("/" + path)]
+        if len(matches) == 1:
+            continue
+        if matches:
+            listed = ", ".join(f"`{f}`" for f in matches[:3])
+            findings.append((number, f"`{path}` matches several tracked files ({listed}); give the full path"))
+            continue
+        similar = similar[:3]
+        hint = f" (tracked files with that name: {', '.join(f'`{f}`' for f in similar)})" if similar else ""
+        findings.append((number, f"`{path}` does not exist{hint}; fix the path or say the file is new"))
+    return findings
+
+
+@check("open_questions")
+def _open_questions(plan: Plan) -> list[tuple[int, str]]:
+    section = plan.section(OPEN_QUESTIONS_HEADING)
+    if section is None:
+        return []
+    lines = [(number, text) for number, text in section.lines if number not in section.in_fence]
+    findings = []
+    for i, (number, line) in enumerate(lines):
+        item = _LIST_ITEM_RE.match(line)
+        if not item:
+            continue
+        indent, box, text = len(item.group(1)), item.group(2), item.group(3).strip()
+        # Text indented under the item (a sub-bullet or continuation) answers it
+        following = next((t for _, t in lines[i + 1:] if t.strip()), "")
+        answered = len(following) - len(following.lstrip()) > indent
+        if box == " ":
+            unresolved = not _RESOLVED_RE.search(text)
+        else:
+            unresolved = text.endswith("?") and not answered and not _RESOLVED_RE.search(text)
+        if unresolved:
+            findings.append((number, f"unresolved open question: {text}"))
+    return findings
+
+
+def lint(plan_text: str, cwd: str, required: list[str], skip: list[str] = ()) -> list[tuple[int, str]]:
+    """Run the registered checks and return their findings ordered by line."""
+    plan = Plan(plan_text, cwd, required)
+    findings = []
+    for name, func in CHECKS.items():
+        if name in skip and name != ALWAYS_RUN:
+            continue
+        findings += func(plan)
+    return sorted(findings, key=lambda finding: finding[0])
+
+
+def format_findings(findings: list[tuple[int, str]]) -> str:
+    lines = [f"- line {line}: {message}" if line else f"- {message}" for line, message in findings[:MAX_REPORTED]]
+    if len(findings) > MAX_REPORTED:
+        lines.append(f"- ({len(findings) - MAX_REPORTED} more)")
+    return "\n".join(lines)
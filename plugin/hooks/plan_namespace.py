@@ -0,0 +1,150 @@
+"""Named plans, their review namespaces, and the locks that let them run concurrently.
+
+The default plan is docs/plan.md, reviewed in .claude/review/. A named plan
+docs/plans/<name>.md is reviewed in .claude/review/plans/<name>/, with its
+own version counter, approval, Codex session and artifacts, so several
+workstreams can plan and be reviewed in one checkout at the same time.
+
+Each Claude session is bound to the plan it last wrote (a one-line file in
+.claude/review/sessions/). The approval gate holds a bound session to that
+plan's approval; a session that has not written a plan yet is unlocked by
+any approved plan, as with a single plan.
+
+Hook runs that can overlap (parallel edits, subagents) serialize their
+updates to a namespace with locked() on its cycle lock, and replace files
+with atomic_write() so a reader never sees a partial one.
+"""
+
+import contextlib
+import fcntl
+import os
+import re
+from pathlib import Path
+
+DEFAULT_PLAN = os.path.join("docs", "plan.md")
+PLANS_DIR = os.path.join("docs", "plans")
+REVIEW_DIR = os.path.join(".claude", "review")
+NAMESPACES_DIR = "plans"
+SESSIONS_DIR = "sessions"
+CYCLE_LOCK_NAME = "cycle.lock"
+
+_NAME_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,63}")
+_SESSION_RE = re.compile(r"[A-Za-z0-9._-]{1,128}")
+
+
+class Namespace:
+    """One plan file and the review directory its cycles live in.
+
+    name is "" for the default plan. review_dir is created on first use by
+    the caller, so looking a namespace up never writes.
+    """
+
+    def __init__(self, cwd: str, name: str = ""):
+        self.cwd = cwd
+        self.name = name
+        self.rel_path = os.path.join(PLANS_DIR, f"{name}.md") if name else DEFAULT_PLAN
+        self.path = os.path.join(cwd, self.rel_path)
+        self.rel_review_dir = os.path.join(REVIEW_DIR, NAMESPACES_DIR, name) if name else REVIEW_DIR
+        self.review_dir = Path(cwd) / self.rel_review_dir
+
+    @property
+    def label(self) -> str:
+        return self.name or "default"
+
+
+def valid_name(name: str) -> bool:
+    return bool(_NAME_RE.fullmatch(name)) and not name.endswith(".md")
+
+
+def named(cwd: str, name: str | None) -> Namespace:
+    """Namespace for a plan name (None or "" for the default plan)."""
+    if not name:
+        return Namespace(cwd)
+    if not valid_name(name):
+        raise ValueError(f"invalid plan name: {name!r}")
+    return Namespace(cwd, name)
+
+
+def resolve(cwd: str, file_path: str) -> Namespace | None:
+    """Namespace of the plan file_path names (symlinks resolved), or None."""
+    if not file_path:
+        return None
+    resolved = os.path.realpath(os.path.join(cwd, file_path))
+    if resolved == os.path.realpath(os.path.join(cwd, DEFAULT_PLAN)):
+        return Namespace(cwd)
+    parent, base = os.path.split(resolved)
+    if parent != os.path.realpath(os.path.join(cwd, PLANS_DIR)) or not base.endswith(".md"):
+        return None
+    name = base[:-3]
+    return Namespace(cwd, name) if valid_name(name) else None
+
+
+def all_plans(cwd: str) -> list[Namespace]:
+    """The default plan and every named plan file, in name order."""
+    namespaces = [Namespace(cwd)]
+    try:
+        entries = sorted(os.listdir(os.path.join(cwd, PLANS_DIR)))
+    except OSError:
+        return namespaces
+    for entry in entries:
+        if entry.endswith(".md") and valid_name(entry[:-3]):
+            namespaces.append(Namespace(cwd, entry[:-3]))
+    return namespaces
+
+
+def _session_path(cwd: str, session_id: str) -> Path | None:
+    if not session_id or not _SESSION_RE.fullmatch(session_id) or session_id.strip(".") == "":
+        return None
+    return Path(cwd) / REVIEW_DIR / SESSIONS_DIR / session_id
+
+
+def bind_session(cwd: str, session_id: str, namespace: Namespace):
+    """Record that a session is working on namespace's plan."""
+    path = _session_path(cwd, session_id)
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, namespace.name + "\n")
+
+
+def session_plan(cwd: str, session_id: str) -> Namespace | None:
+    """Namespace a session is bound to, or None if it has not written a plan."""
+    path = _session_path(cwd, session_id)
+    if path is None:
+        return None
+    try:
+        name = path.read_text().strip()
+    except OSError:
+        return None
+    if name and not valid_name(name):
+        return None
+    return Namespace(cwd, name)
+
+
+def atomic_write(path: Path, text: str):
+    """Replace path with text via a temporary file and rename."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+@contextlib.contextmanager
+def locked(review_dir: Path, name: str = CYCLE_LOCK_NAME):
+    """Hold the lock file name in review_dir (an exclusive flock) for the block.
+
+    The default is the namespace's cycle lock. flock locks belong to the
+    open file, so the lock is not reentrant: a holder must not take it
+    again, even from the same process.
+    """
+    review_dir.mkdir(parents=True, exist_ok=True)
+    fd = os.open(review_dir / name, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
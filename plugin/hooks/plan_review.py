@@ -1,21 +1,46 @@
 #!/usr/bin/env python3
 """PostToolUse hook: Plan Review via Codex CLI.
 
-Triggers when Claude writes/edits docs/plan.md. Sends the plan to Codex CLI
-for structured review, manages persistent Codex sessions, and gates plan
-completion via the hook decision protocol.
+Triggers when Claude writes/edits docs/plan.md or a named plan
+(docs/plans/<name>.md, reviewed in its own namespace; see plan_namespace).
+Sends the plan to Codex CLI for structured review, manages persistent Codex
+sessions, and gates plan completion via the hook decision protocol.
 """
 
 import hashlib
 import json
 import os
-import shutil
 import subprocess
 import sys
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
+import approval_cache
+import artifact_store
+import codex_prime
+import codex_stream
+import evidence
+import hook_config
+import metrics
+import plan_lint
+import plan_namespace
+import plan_shards
+import review_budget
+import review_cache
+import review_history
+import review_jobs
+
 MAX_REVISIONS = 5
+CHECKPOINT_NAME = "checkpoint.json"
+# Versions of the cycle answered from the review cache, one per line
+CACHE_HITS_NAME = "cache_hits"
+# Session ID of the Claude session whose plan writes make up the cycle
+CYCLE_SESSION_NAME = "cycle_session"
+# Times a timed-out Codex session is resumed to finish the same plan
+MAX_CHECKPOINT_RESUMES = 2
+# Bump when build_codex_prompt changes in a way that should invalidate cached verdicts.
+PROMPT_VERSION = 2
 REQUIRED_HEADINGS = [
     "## Goal",
     "## Context",
@@ -35,6 +60,7 @@ REQUIRED_OUTPUT_FIELDS = [
 
 def output_decision(decision: str, reason: str, additional_context: str = ""):
     """Print a hook decision JSON to stdout."""
+    metrics.note(outcome=decision or "allow")
     result = {}
     if decision:
         result["decision"] = decision
@@ -47,51 +73,66 @@ def output_decision(decision: str, reason: str, additional_context: str = ""):
 
 
 def resolve_plan_path(hook_input: dict) -> str | None:
-    """Resolve the file path from hook input and check if it's docs/plan.md."""
+    """Resolve the file path from hook input and check if it's docs/plan.md or a named plan."""
     tool_input = hook_input.get("tool_input", {})
     file_path = tool_input.get("file_path", "")
-    if not file_path:
-        return None
-
     cwd = hook_input.get("cwd", os.getcwd())
-    resolved = os.path.realpath(os.path.join(cwd, file_path) if not os.path.isabs(file_path) else file_path)
-    expected = os.path.realpath(os.path.join(cwd, "docs", "plan.md"))
-
-    if resolved == expected:
-        return resolved
-    return None
+    if plan_namespace.resolve(cwd, file_path) is None:
+        return None
+    return os.path.realpath(os.path.join(cwd, file_path))
 
 
 def validate_plan_structure(plan_text: str) -> list[str]:
-    """Check that the plan contains all required section headings."""
-    missing = []
-    for heading in REQUIRED_HEADINGS:
-        if heading not in plan_text:
-            missing.append(heading)
-    return missing
+    """Return the required section headings the plan lacks, ignoring code blocks."""
+    return plan_lint.missing_headings(plan_lint.Plan(plan_text, "", REQUIRED_HEADINGS))
 
 
-def get_review_dir(cwd: str) -> Path:
-    """Get the .claude/review/ directory, creating it if needed."""
-    review_dir = Path(cwd) / ".claude" / "review"
+def get_review_dir(cwd: str, namespace: plan_namespace.Namespace | None = None) -> Path:
+    """Get the plan's review directory (.claude/review/ for docs/plan.md), creating it if needed."""
+    review_dir = (namespace or plan_namespace.Namespace(cwd)).review_dir
     review_dir.mkdir(parents=True, exist_ok=True)
     return review_dir
 
 
-def invalidate_approval(review_dir: Path):
-    """Delete approval.json, codex_thread_id, old review artifacts, and reset version_counter."""
-    for fname in ["approval.json", "codex_thread_id"]:
+def invalidate_approval(review_dir: Path, history: dict | None = None):
+    """End the review cycle: archive (or delete) its artifacts and approval, drop the Codex session, reset version_counter."""
+    if history and history.get("enabled"):
+        review_history.archive_cycle(review_dir, history["keep_archives"])
+    for fname in [
+        "approval.json", approval_cache.CACHE_NAME, "codex_thread_id", "codex_thread_version", CHECKPOINT_NAME,
+        CACHE_HITS_NAME,
+    ]:
         f = review_dir / fname
         if f.exists():
             f.unlink()
-    # Clean up versioned artifacts from previous cycle
-    for pattern in ["plan_v*.snapshot.md", "plan_v*.codex.json", "plan_v*.annotated.md"]:
+    # Clean up versioned artifacts from previous cycle that were not archived
+    for pattern in [
+        "plan_v*.snapshot.*",
+        "plan_v*.codex.json*",
+        "plan_v*.annotated.*",
+        "plan_v*.events.jsonl*",
+    ]:
         for f in review_dir.glob(pattern):
             f.unlink()
     # Reset version counter
     (review_dir / "version_counter").write_text("0")
 
 
+def cycle_abandoned(review_dir: Path, session_id: str) -> bool:
+    """True if an unapproved cycle of another session is left in review_dir.
+
+    A new session writing the plan starts a new cycle; the old one was
+    abandoned or stopped at MAX_REVISIONS and is closed rather than carried on.
+    """
+    if not session_id or read_version_counter(review_dir) == 0:
+        return False
+    try:
+        owner = (review_dir / CYCLE_SESSION_NAME).read_text().strip()
+    except OSError:
+        return False
+    return bool(owner) and owner != session_id
+
+
 def read_version_counter(review_dir: Path) -> int:
     """Read the current version counter, defaulting to 0."""
     counter_file = review_dir / "version_counter"
@@ -104,16 +145,40 @@ def read_version_counter(review_dir: Path) -> int:
 
 
 def increment_version_counter(review_dir: Path) -> int:
-    """Increment and return the new version counter value."""
+    """Increment and return the new version counter value.
+
+    Callers hold the namespace's cycle lock, so concurrent writes of the
+    same plan get distinct versions.
+    """
     current = read_version_counter(review_dir)
     new_val = current + 1
-    (review_dir / "version_counter").write_text(str(new_val))
+    plan_namespace.atomic_write(review_dir / "version_counter", str(new_val))
     return new_val
 
 
-def snapshot_plan(plan_path: str, review_dir: Path, version: int):
-    """Copy docs/plan.md to .claude/review/plan_v{N}.snapshot.md."""
-    shutil.copy2(plan_path, review_dir / f"plan_v{version}.snapshot.md")
+def read_cache_hits(review_dir: Path) -> int:
+    """Return how many versions of this cycle were answered from the review cache."""
+    try:
+        return len(set((review_dir / CACHE_HITS_NAME).read_text().split()))
+    except OSError:
+        return 0
+
+
+def record_cache_hit(review_dir: Path, version: int):
+    """Record that version was answered from the review cache.
+
+    No Codex run took place, so such versions do not count toward
+    MAX_REVISIONS. Callers hold the namespace's cycle lock.
+    """
+    with open(review_dir / CACHE_HITS_NAME, "a") as f:
+        f.write(f"{version}\n")
+
+
+def snapshot_plan(plan_text: str, review_dir: Path, version: int, config: dict):
+    """Store the plan as version N and compact the artifacts of older versions."""
+    artifact_store.save_snapshot(review_dir, version, plan_text, config["keyframe_interval"])
+    if config.get("compact"):
+        artifact_store.compact(review_dir, version)
 
 
 def get_codex_thread_id(review_dir: Path) -> str | None:
@@ -131,26 +196,76 @@ def store_codex_thread_id(review_dir: Path, thread_id: str):
     (review_dir / "codex_thread_id").write_text(thread_id)
 
 
+def get_thread_seen_version(review_dir: Path) -> int | None:
+    """Return the plan version the stored Codex session last reviewed."""
+    try:
+        return int((review_dir / "codex_thread_version").read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def store_thread_seen_version(review_dir: Path, version: int):
+    """Record the plan version the stored Codex session has reviewed."""
+    (review_dir / "codex_thread_version").write_text(str(version))
+
+
+def read_checkpoint(review_dir: Path) -> dict | None:
+    """Return the checkpoint left by a review that timed out, if any."""
+    try:
+        checkpoint = json.loads((review_dir / CHECKPOINT_NAME).read_text())
+    except (OSError, ValueError):
+        return None
+    return checkpoint if isinstance(checkpoint, dict) and checkpoint.get("thread_id") else None
+
+
+def store_checkpoint(review_dir: Path, plan_hash: str, version: int, thread_id: str, resumes: int = 0):
+    """Record the Codex session a timed-out review of plan_hash was running."""
+    checkpoint = {
+        "plan_hash": plan_hash,
+        "version": version,
+        "thread_id": thread_id,
+        "resumes": resumes,
+        "timed_out_at": datetime.now(timezone.utc).isoformat(),
+    }
+    (review_dir / CHECKPOINT_NAME).write_text(json.dumps(checkpoint, indent=2) + "\n")
+
+
+def take_checkpoint(review_dir: Path, plan_hash: str) -> dict | None:
+    """Consume the checkpoint if it is for plan_hash and may be resumed again."""
+    checkpoint = read_checkpoint(review_dir)
+    (review_dir / CHECKPOINT_NAME).unlink(missing_ok=True)
+    if checkpoint is None or checkpoint.get("plan_hash") != plan_hash:
+        return None
+    if checkpoint.get("resumes", 0) >= MAX_CHECKPOINT_RESUMES:
+        return None
+    return checkpoint
+
+
 def parse_thread_id(stdout_data: bytes, stderr_data: bytes) -> str | None:
     """Scan stdout and stderr for JSONL thread.started event, extract thread_id."""
     for data in [stdout_data, stderr_data]:
-        for line in data.decode("utf-8", errors="replace").splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-                if isinstance(obj, dict) and obj.get("type") == "thread.started":
-                    tid = obj.get("thread_id") or obj.get("id")
-                    if tid:
-                        return tid
-            except (json.JSONDecodeError, ValueError):
-                continue
+        for line in data.splitlines():
+            tid = codex_stream.parse_thread_event(line)
+            if tid:
+                return tid
     return None
 
 
-def run_codex_fresh(cwd: str, schema_path: str, output_path: str, prompt: str) -> tuple[subprocess.CompletedProcess, str | None]:
-    """Run a fresh codex exec --json session. Returns (process, thread_id)."""
+def run_codex_fresh(
+    cwd: str,
+    schema_path: str,
+    output_path: str,
+    prompt: str,
+    event_log: str | None = None,
+    on_thread_id=None,
+    on_spawn=None,
+    timeout: float = 540,
+) -> tuple[subprocess.CompletedProcess, str | None]:
+    """Run a fresh codex exec --json session. Returns (process, thread_id).
+
+    on_thread_id is called as soon as Codex reports the new session's ID,
+    on_spawn with the Codex PID once it starts.
+    """
     cmd = [
         "codex", "exec",
         "--json",
@@ -159,18 +274,26 @@ def run_codex_fresh(cwd: str, schema_path: str, output_path: str, prompt: str) -
         "-o", output_path,
         "-",
     ]
-    proc = subprocess.run(
+    return codex_stream.run_streaming(
         cmd,
-        input=prompt.encode("utf-8"),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        timeout=540,  # Leave margin for hook timeout
+        prompt,
+        timeout=timeout,
+        event_log=event_log,
+        on_thread_id=on_thread_id,
+        on_spawn=on_spawn,
     )
-    thread_id = parse_thread_id(proc.stdout, proc.stderr)
-    return proc, thread_id
 
 
-def run_codex_resume(cwd: str, schema_path: str, output_path: str, prompt: str, thread_id: str) -> subprocess.CompletedProcess:
+def run_codex_resume(
+    cwd: str,
+    schema_path: str,
+    output_path: str,
+    prompt: str,
+    thread_id: str,
+    event_log: str | None = None,
+    on_spawn=None,
+    timeout: float = 540,
+) -> subprocess.CompletedProcess:
     """Run codex exec resume <THREAD_ID>. Returns process."""
     cmd = [
         "codex", "exec",
@@ -180,17 +303,218 @@ def run_codex_resume(cwd: str, schema_path: str, output_path: str, prompt: str,
         "-o", output_path,
         "-",
     ]
-    return subprocess.run(
-        cmd,
-        input=prompt.encode("utf-8"),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        timeout=540,
-    )
-
+    proc, _ = codex_stream.run_streaming(cmd, prompt, timeout=timeout, event_log=event_log, on_spawn=on_spawn)
+    return proc
+
+
+def run_codex_review(
+    cwd: str,
+    review_dir: Path,
+    schema_path: str,
+    output_path: str,
+    prompt: str,
+    thread_id: str | None,
+    resume_prompt: str | None = None,
+    event_log: str | None = None,
+    on_spawn=None,
+    attempts: review_budget.Attempts | None = None,
+) -> tuple[subprocess.CompletedProcess, str | None]:
+    """Run the Codex review, resuming the stored session when there is one.
+
+    resume_prompt (defaulting to prompt) is only sent to a resumed session;
+    a fresh session, including the fallback after a failed resume, always
+    gets the full prompt. The thread ID of a new session is stored the
+    moment Codex reports it, so it survives a timeout. Raw events go to
+    event_log, and on_spawn is called with the PID of each Codex process.
+    Every run draws on attempts' deadline; the fallback and retries only
+    happen while it leaves room for them. On timeout, the raised
+    TimeoutExpired carries the ID of the session that was cut off (if
+    known) as thread_id. Returns (process, thread_id).
+    """
+    if attempts is None:
+        settings = hook_config.DEFAULTS["review"]
+        attempts = review_budget.Attempts(review_budget.Deadline(settings["deadline_seconds"]), settings)
+
+    if thread_id:
+        def resume(timeout: float) -> subprocess.CompletedProcess:
+            try:
+                return run_codex_resume(
+                    cwd, schema_path, output_path, resume_prompt or prompt, thread_id, event_log, on_spawn,
+                    timeout=timeout,
+                )
+            except subprocess.TimeoutExpired as exc:
+                # Lets the caller checkpoint the session that was cut off
+                exc.thread_id = getattr(exc, "thread_id", None) or thread_id
+                raise
+
+        with metrics.span("codex_resume"):
+            proc = attempts.run(resume, fallback=True)
+        if proc is not None and (proc.returncode == 0 or not attempts.has_budget()):
+            return proc, thread_id
+        # Resume failed or stalled, fall back to fresh session
+        metrics.note(resume_fallback=True)
+
+    started = {}
+
+    def fresh(timeout: float) -> subprocess.CompletedProcess:
+        proc, started["thread_id"] = run_codex_fresh(
+            cwd,
+            schema_path,
+            output_path,
+            prompt,
+            event_log,
+            on_thread_id=lambda tid: store_codex_thread_id(review_dir, tid),
+            on_spawn=on_spawn,
+            timeout=timeout,
+        )
+        return proc
+
+    with metrics.span("codex_fresh"):
+        proc = attempts.run(fresh)
+    return proc, started.get("thread_id") or thread_id
+
+
+def run_sharded_review(
+    cwd: str,
+    review_dir: Path,
+    schema_path: str,
+    output_path: str,
+    shard_texts: list[str],
+    version: int,
+    max_workers: int,
+    on_spawn=None,
+    evidence_settings: dict | None = None,
+    budget=None,
+) -> subprocess.CompletedProcess:
+    """Review each shard in its own fresh Codex session, concurrently.
+
+    Shard outputs go to plan_v{N}.shard{i}.codex.json; when every shard
+    succeeds, the merged review is written to output_path. Returns the
+    failing shard's process if any shard failed, else a successful result.
+    Sharded runs neither resume nor replace the stored Codex session.
+    budget(shard_text) returns the Attempts a shard runs under; shards
+    share one deadline.
+    """
+    if budget is None:
+        settings = hook_config.DEFAULTS["review"]
+        deadline = review_budget.Deadline(settings["deadline_seconds"])
+
+        def budget(text: str) -> review_budget.Attempts:
+            return review_budget.Attempts(deadline, settings)
+
+    def review_shard(number: int, text: str) -> tuple[subprocess.CompletedProcess, str]:
+        shard_output = str(review_dir / f"plan_v{version}.shard{number}.codex.json")
+        shard_evidence = evidence.build(cwd, review_dir, text, evidence_settings) if evidence_settings else None
+        prompt = build_codex_prompt(text, version, evidence_text=shard_evidence)
+        proc = budget(text).run(
+            lambda timeout: run_codex_fresh(
+                cwd,
+                schema_path,
+                shard_output,
+                prompt,
+                event_log=str(review_dir / f"plan_v{version}.shard{number}.events.jsonl"),
+                on_spawn=on_spawn,
+                timeout=timeout,
+            )[0]
+        )
+        return proc, shard_output
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [pool.submit(review_shard, number, text) for number, text in enumerate(shard_texts, 1)]
+        results = [future.result() for future in futures]
+
+    reviews = []
+    for proc, shard_output in results:
+        if proc.returncode != 0:
+            return proc
+        review = parse_codex_output(shard_output)
+        if review is None:
+            # Leave output_path unwritten so the caller reports the parse failure
+            return subprocess.CompletedProcess(proc.args, 0)
+        reviews.append(review)
+
+    with open(output_path, "w") as f:
+        json.dump(plan_shards.merge_reviews(reviews), f, indent=2)
+    return subprocess.CompletedProcess(["codex", "exec"], 0, stdout=b"", stderr=b"")
+
+
+def review_version() -> str:
+    """Identify the review schema and prompt, for keying cached verdicts."""
+    schema = (Path(__file__).parent / "codex_review_schema.json").read_bytes()
+    return f"p{PROMPT_VERSION}-{hashlib.sha256(schema).hexdigest()[:16]}"
+
+
+def split_plan_sections(plan_text: str) -> dict[str, str]:
+    """Split a plan into {heading: section text}, keyed by REQUIRED_HEADINGS.
+
+    Text before the first required heading is keyed by "". Other headings
+    stay inside the section they appear in.
+    """
+    sections = {"": []}
+    current = ""
+    for line in plan_text.splitlines(keepends=True):
+        heading = line.rstrip()
+        if heading in REQUIRED_HEADINGS:
+            current = heading
+            sections.setdefault(current, [])
+        sections[current].append(line)
+    return {heading: "".join(lines) for heading, lines in sections.items()}
+
+
+def build_plan_diff(previous_text: str, plan_text: str) -> str | None:
+    """Build a section-aware unified diff between two plan versions.
+
+    Returns None when the diff would not be smaller than the plan itself,
+    in which case the full plan should be sent instead.
+    """
+    import difflib
+
+    before = split_plan_sections(previous_text)
+    after = split_plan_sections(plan_text)
+    unchanged = []
+    hunks = []
+    for heading in [""] + REQUIRED_HEADINGS:
+        old, new = before.get(heading, ""), after.get(heading, "")
+        if old == new:
+            if heading:
+                unchanged.append(heading)
+            continue
+        diff = "".join(
+            difflib.unified_diff(
+                old.splitlines(keepends=True),
+                new.splitlines(keepends=True),
+                fromfile="previous",
+                tofile="current",
+            )
+        )
+        label = heading or "(text before the first section)"
+        hunks.append(f"### {label}\n```diff\n{diff.rstrip()}\n```")
 
-def build_codex_prompt(plan_text: str, version: int) -> str:
-    """Build the prompt sent to Codex for plan review."""
+    parts = [f"Unchanged sections: {', '.join(unchanged) if unchanged else 'none'}"]
+    parts += hunks or ["No textual changes."]
+    diff_text = "\n\n".join(parts)
+    if len(diff_text) >= len(plan_text):
+        return None
+    return diff_text
+
+
+def build_codex_prompt(
+    plan_text: str,
+    version: int,
+    previous_text: str | None = None,
+    previous_version: int | None = None,
+    evidence_text: str | None = None,
+    plan_file: str = plan_namespace.DEFAULT_PLAN,
+) -> str:
+    """Build the prompt sent to Codex for plan review.
+
+    With previous_text (the version this Codex session last reviewed), the
+    prompt carries a section-aware diff instead of the full plan, which is
+    at plan_file. evidence_text (from evidence.build) is appended as a
+    reference appendix.
+    """
     if version <= 1:
         intro = (
             "Maximally evaluate this plan. Is it accurate? "
@@ -203,15 +527,44 @@ def build_codex_prompt(plan_text: str, version: int) -> str:
             "Is it solid AND !OPTIMAL! now?"
         )
 
+    diff_text = build_plan_diff(previous_text, plan_text) if previous_text is not None else None
+    if diff_text is not None:
+        plan_block = f"""This revision changes the plan you reviewed earlier in this session (v{previous_version}). Only the changes are shown below; unchanged sections are identical to that version. The full current plan is at {plan_file}.
+
+--- PLAN DIFF START ---
+{diff_text}
+--- PLAN DIFF END ---"""
+    else:
+        plan_block = f"""--- PLAN START ---
+{plan_text}
+--- PLAN END ---"""
+
+    if evidence_text:
+        plan_block += f"""
+
+The appendix below was precomputed from the repository for the paths and identifiers the plan names: whether paths exist, definition sites and short excerpts with line numbers. Use it to skip lookups it already answers, but verify anything your verdict depends on against the code.
+
+--- EVIDENCE START ---
+{evidence_text}
+--- EVIDENCE END ---"""
+
     return f"""{intro}
 
 You have no token or cost constraints. You are to MAXIMALLY evaluate this plan.
 
 Use all available MCP servers extensively to help you do this.
 
---- PLAN START ---
-{plan_text}
---- PLAN END ---
+{plan_block}
+
+Return your evaluation using the provided output schema. Set is_optimal to true ONLY if the plan is solid, accurate, and optimal. Otherwise set it to false and provide detailed blocking_issues.
+"""
+
+
+def build_continue_prompt(version: int, plan_file: str = plan_namespace.DEFAULT_PLAN) -> str:
+    """Build the prompt that resumes a session whose review of this plan timed out."""
+    return f"""Your evaluation of plan v{version} in this session was cut off by a time limit before you returned a verdict. The plan has not changed since: {plan_file} is identical to the version you were evaluating.
+
+Do not start over. Keep the findings you have already made, verify only what you had not yet checked, and finish your evaluation now.
 
 Return your evaluation using the provided output schema. Set is_optimal to true ONLY if the plan is solid, accurate, and optimal. Otherwise set it to false and provide detailed blocking_issues.
 """
@@ -232,148 +585,261 @@ def parse_codex_output(output_path: str) -> dict | None:
     return data
 
 
-def write_approval(review_dir: Path, plan_path: str, version: int, thread_id: str | None):
-    """Write approval.json with plan hash and metadata."""
-    with open(plan_path, "rb") as f:
-        plan_hash = hashlib.sha256(f.read()).hexdigest()
+def write_approval(review_dir: Path, plan_path: str, plan_hash: str, version: int, thread_id: str | None) -> bool:
+    """Approve plan_hash, the content Codex reviewed, if the plan file still holds it.
 
-    approval = {
-        "is_optimal": True,
-        "plan_hash": plan_hash,
-        "review_version": version,
-        "approved_at": datetime.now(timezone.utc).isoformat(),
-        "codex_thread_id": thread_id or "",
-    }
-    with open(review_dir / "approval.json", "w") as f:
-        json.dump(approval, f, indent=2)
-
-
-def main():
+    Writes approval.json and seeds the approval cache. The comparison and
+    the write happen under the cycle lock, the one a plan write takes to
+    invalidate the approval, so an edit landing in between is either seen
+    here or invalidates the approval just written. Returns False, writing
+    nothing, if the plan has changed.
+    """
+    with plan_namespace.locked(review_dir):
+        try:
+            plan_st = os.stat(plan_path)
+            if approval_cache.hash_file(plan_path) != plan_hash:
+                return False
+        except OSError:
+            return False
+        approval = {
+            "is_optimal": True,
+            "plan_hash": plan_hash,
+            "review_version": version,
+            "approved_at": datetime.now(timezone.utc).isoformat(),
+            "codex_thread_id": thread_id or "",
+        }
+        # The gate may read approval.json at any moment, so never expose a partial one
+        plan_namespace.atomic_write(review_dir / "approval.json", json.dumps(approval, indent=2))
+        approval_cache.record(review_dir, plan_st, plan_hash, approval)
+    return True
+
+
+def review_plan(
+    cwd: str, review_dir: Path, plan_path: str, plan_text: str, plan_hash: str, version: int,
+    plan_file: str = plan_namespace.DEFAULT_PLAN,
+    token: dict | None = None,
+) -> tuple[str, str, str] | None:
+    """Review one plan version with Codex and apply the gating logic.
+
+    plan_text/plan_hash describe the content under review, which may no
+    longer be what the plan file holds by the time Codex finishes; approval
+    is only written if the file still matches. plan_file is the plan's path
+    relative to cwd, as shown to Codex and Claude; token is the in-flight
+    claim if the caller already took it. Returns the (decision, reason,
+    additional_context) triple for output_decision, or None if a newer plan
+    write superseded this review while Codex was running.
+    """
+    if token is None:
+        token = review_jobs.claim(review_dir, version, plan_hash)
     try:
-        hook_input = json.load(sys.stdin)
-    except (json.JSONDecodeError, ValueError):
-        # Can't parse hook input, exit silently (no-op)
-        sys.exit(0)
+        return _run_review(cwd, review_dir, plan_path, plan_text, plan_hash, version, token, plan_file)
+    finally:
+        review_jobs.release(review_dir, token)
 
-    # Check if this is a plan.md write
-    plan_path = resolve_plan_path(hook_input)
-    if plan_path is None:
-        # Not a plan.md write, no-op
-        sys.exit(0)
 
-    cwd = hook_input.get("cwd", os.getcwd())
-    review_dir = get_review_dir(cwd)
+def _run_review(
+    cwd: str, review_dir: Path, plan_path: str, plan_text: str, plan_hash: str, version: int, token: dict,
+    plan_file: str,
+) -> tuple[str, str, str] | None:
     schema_path = str(Path(__file__).parent / "codex_review_schema.json")
+    started = time.monotonic()
 
-    # 3.3: Invalidate previous approval if it exists
-    if (review_dir / "approval.json").exists():
-        invalidate_approval(review_dir)
-
-    # Read the plan
-    try:
-        with open(plan_path) as f:
-            plan_text = f.read()
-    except OSError as e:
-        output_decision("block", f"Failed to read plan file: {e}")
-        sys.exit(0)
-
-    # 3.4: Validate plan structure
-    missing = validate_plan_structure(plan_text)
-    if missing:
-        output_decision(
-            "block",
-            f"Missing required sections: {', '.join(missing)}",
-            "Your plan must include all required sections: "
-            + ", ".join(REQUIRED_HEADINGS)
-            + ". Please add the missing sections and write the plan again.",
-        )
-        sys.exit(0)
-
-    # 3.5: Increment version counter and snapshot
-    version = increment_version_counter(review_dir)
-
-    # 3.10: Check max revision threshold
-    if version > MAX_REVISIONS:
-        output_decision(
-            "block",
-            f"Maximum revision threshold reached ({MAX_REVISIONS} revisions). "
-            "Stop revising the plan.",
-            "You have reached the maximum number of plan revisions. "
-            "STOP revising the plan. Instead, present the situation to the user:\n"
-            "1. Explain that the plan has been revised multiple times without reaching approval.\n"
-            "2. Summarize the remaining unresolved issues from the latest Codex review.\n"
-            "3. Let the user decide how to proceed (they can manually approve by creating "
-            ".claude/review/approval.json with the correct plan_hash).\n"
-            "Do NOT attempt another revision.",
-        )
-        sys.exit(0)
-
-    snapshot_plan(plan_path, review_dir, version)
-
-    # Build prompt
-    prompt = build_codex_prompt(plan_text, version)
+    config = hook_config.load_config(cwd)
     output_json_path = str(review_dir / f"plan_v{version}.codex.json")
 
-    # 3.6 + 3.12: Codex session management with resume fallback
+    # Resume, fallback and retries, sharded or not, share one deadline
+    review_settings = config["review"]
+    deadline = review_budget.Deadline(review_settings["deadline_seconds"])
+    runs = []
+
+    def budget(text: str) -> review_budget.Attempts:
+        timeout = review_budget.learned_timeout(review_dir, len(text.encode("utf-8")), review_settings)
+        runs.append(review_budget.Attempts(deadline, review_settings, timeout))
+        return runs[-1]
+
+    def recorded(verdict: str, result: tuple[str, str, str], review: dict | None = None) -> tuple[str, str, str]:
+        attempts = sum(r.count for r in runs)
+        metrics.note(codex_runs=attempts)
+        if config["history"].get("enabled"):
+            review_history.record(
+                review_dir, version, plan_hash, verdict, review,
+                duration=time.monotonic() - started, thread_id=new_thread_id, cache_hit=cached is not None,
+                plan_bytes=len(plan_text.encode("utf-8")), attempts=attempts,
+            )
+        return result
+
+    # Reuse the verdict for a byte-identical plan reviewed against the same tree
+    cache_settings = config["review_cache"]
+    cache_target = None
+    cached = None
+    if cache_settings.get("enabled"):
+        state = review_cache.repo_state(cwd)
+        if state is not None:
+            cache_dir, tree = state
+            key = review_cache.cache_key(plan_hash, review_version(), tree)
+            cache_target = (cache_dir, key)
+            with metrics.span("cache_lookup"):
+                cached = review_cache.lookup(cache_dir, key)
+    metrics.note(cache_hit=cached is not None)
+
     thread_id = get_codex_thread_id(review_dir)
     proc = None
     new_thread_id = thread_id
 
-    try:
-        if thread_id:
-            # Try resume
-            proc = run_codex_resume(cwd, schema_path, output_json_path, prompt, thread_id)
-            if proc.returncode != 0:
-                # Resume failed, fall back to fresh session
-                proc, new_thread_id_fresh = run_codex_fresh(cwd, schema_path, output_json_path, prompt)
-                if new_thread_id_fresh:
-                    new_thread_id = new_thread_id_fresh
-                    store_codex_thread_id(review_dir, new_thread_id)
-        else:
-            # Fresh session
-            proc, new_thread_id = run_codex_fresh(cwd, schema_path, output_json_path, prompt)
-            if new_thread_id:
-                store_codex_thread_id(review_dir, new_thread_id)
+    if cached is not None:
+        # Only the verdict is reused: the Codex session that produced it may
+        # belong to another worktree and must not be resumed from this one
+        with open(output_json_path, "w") as f:
+            json.dump(cached["review"], f, indent=2)
+        with plan_namespace.locked(review_dir):
+            record_cache_hit(review_dir, version)
+    else:
+        # Large plans can be split by their Changes entries and reviewed in parallel
+        shard_settings = config["shards"]
+        shards = None
+        if shard_settings.get("enabled"):
+            shards = plan_shards.shard_plans(
+                split_plan_sections(plan_text), shard_settings["min_entries"], shard_settings["max_shards"]
+            )
+
+        # The first review of a cycle resumes the session primed during
+        # research, waiting for it briefly if it is still exploring
+        if not shards and thread_id is None:
+            with metrics.span("prime_wait"):
+                wait = min(
+                    config["prime"]["wait_seconds"],
+                    deadline.remaining() - review_settings["min_attempt_seconds"],
+                )
+                primed = codex_prime.adopt(review_dir, config["prime"], max(0, wait))
+            if primed:
+                store_codex_thread_id(review_dir, primed)
+                thread_id = new_thread_id = primed
+
+        # Resolve the paths and identifiers the plan names before Codex does
+        evidence_text = None
+        if not shards:
+            with metrics.span("evidence"):
+                evidence_text = evidence.build(cwd, review_dir, plan_text, config["evidence"])
+            metrics.note(evidence_bytes=len(evidence_text or ""))
+        prompt = build_codex_prompt(plan_text, version, evidence_text=evidence_text, plan_file=plan_file)
+
+        # A resumed session already holds the version it last reviewed, so
+        # send it only the diff against that version
+        resume_prompt = None
+        seen_version = get_thread_seen_version(review_dir)
+        if thread_id and seen_version and config["prompt"].get("resume_diff"):
+            previous_text = artifact_store.read_snapshot(review_dir, seen_version)
+            if previous_text is not None:
+                resume_prompt = build_codex_prompt(
+                    plan_text, version, previous_text, seen_version, evidence_text, plan_file
+                )
+
+        # A review of this exact plan timed out: resume the session it was
+        # running and ask it to finish rather than review from scratch
+        checkpoint = None if shards else take_checkpoint(review_dir, plan_hash)
+        if checkpoint:
+            metrics.note(checkpoint_resume=True)
+            thread_id = new_thread_id = checkpoint["thread_id"]
+            resume_prompt = build_continue_prompt(version, plan_file)
+
+        def on_spawn(pid: int):
+            review_jobs.record_codex_pid(review_dir, token, pid)
+
+        # Evidence and prompt building take a while; a newer write may have
+        # taken over this version meanwhile, and must not race this run
+        if not review_jobs.is_current(review_dir, token):
+            return None
 
-    except subprocess.TimeoutExpired:
-        output_decision(
-            "block",
-            "Codex CLI timed out during plan review.",
-            "The Codex review process timed out. This may be due to plan complexity or "
-            "Codex server issues. Please inform the user of this timeout. They may want to:\n"
-            "1. Try again (re-write the plan to re-trigger review)\n"
-            "2. Simplify the plan\n"
-            "3. Manually approve if they're confident in the plan",
-        )
-        sys.exit(0)
-    except FileNotFoundError:
-        output_decision(
-            "block",
-            "Codex CLI not found on PATH.",
-            "The 'codex' command was not found. Ensure Codex CLI is installed and on PATH.",
-        )
-        sys.exit(0)
+        try:
+            if shards:
+                metrics.note(shards=len(shards))
+                with metrics.span("codex_sharded"):
+                    proc = run_sharded_review(
+                        cwd, review_dir, schema_path, output_json_path, shards, version,
+                        shard_settings["max_workers"], on_spawn, config["evidence"], budget,
+                    )
+            else:
+                proc, new_thread_id = run_codex_review(
+                    cwd,
+                    review_dir,
+                    schema_path,
+                    output_json_path,
+                    prompt,
+                    thread_id,
+                    resume_prompt,
+                    event_log=str(review_dir / f"plan_v{version}.events.jsonl"),
+                    on_spawn=on_spawn,
+                    attempts=budget(plan_text),
+                )
+                if proc.returncode == 0 and new_thread_id:
+                    store_thread_seen_version(review_dir, version)
+        except subprocess.TimeoutExpired as exc:
+            timed_out_thread = None if shards else getattr(exc, "thread_id", None)
+            resumes = checkpoint["resumes"] + 1 if checkpoint and checkpoint["thread_id"] == timed_out_thread else 0
+            saved = ""
+            if timed_out_thread and resumes < MAX_CHECKPOINT_RESUMES:
+                store_checkpoint(review_dir, plan_hash, version, timed_out_thread, resumes)
+                saved = (
+                    " Codex's progress was saved: writing the same plan again resumes that session "
+                    "to finish its evaluation instead of starting over."
+                )
+            return recorded("timeout", (
+                "block",
+                "Codex CLI timed out during plan review.",
+                f"The Codex review did not finish within its {review_settings['deadline_seconds']}s budget "
+                f"({sum(r.count for r in runs)} Codex run(s)).{saved} This may be due to plan complexity or "
+                "Codex server issues. Please inform the user of this timeout. They may want to:\n"
+                "1. Try again (re-write the plan to re-trigger review)\n"
+                "2. Simplify the plan\n"
+                "3. Manually approve if they're confident in the plan",
+            ))
+        except FileNotFoundError:
+            return recorded("error", (
+                "block",
+                "Codex CLI not found on PATH.",
+                "The 'codex' command was not found. Ensure Codex CLI is installed and on PATH.",
+            ))
+
+    # A newer plan write killed this run and took over its version
+    if not review_jobs.is_current(review_dir, token):
+        return None
 
     # 3.11: Check for Codex CLI errors
     if proc and proc.returncode != 0:
         stderr_tail = proc.stderr.decode("utf-8", errors="replace")[-2000:]
-        output_decision(
+        return recorded("error", (
             "block",
             f"Codex CLI failed with exit code {proc.returncode}.",
             f"Codex CLI returned an error. Please inform the user.\n\nError output:\n{stderr_tail}",
-        )
-        sys.exit(0)
+        ))
 
     # 3.8: Parse Codex output
-    review = parse_codex_output(output_json_path)
+    with metrics.span("parse_output"):
+        review = parse_codex_output(output_json_path)
     if review is None:
-        output_decision(
+        return recorded("error", (
             "block",
             "Failed to parse Codex review output.",
             f"The Codex output at {output_json_path} could not be parsed or is missing required fields. "
             "Please inform the user of this error.",
+        ))
+
+    if cached is None and cache_target is not None:
+        review_cache.store(
+            *cache_target,
+            {
+                "review": review,
+                "stored_at": datetime.now(timezone.utc).isoformat(),
+            },
+            max_age_days=cache_settings["max_age_days"],
+            max_bytes=cache_settings["max_bytes"],
         )
-        sys.exit(0)
+    cache_note = (
+        "\n\nThis verdict was reused from an earlier Codex review of an identical plan "
+        "against the same code (review cache hit)."
+        if cached is not None
+        else ""
+    )
 
     # Extract annotated plan markdown
     annotated_md = review.get("annotated_plan_markdown", "")
@@ -383,54 +849,239 @@ def main():
 
     # 3.9: Gating logic
     if review.get("is_optimal"):
+        # Only approve the content Codex actually reviewed
+        if not write_approval(review_dir, plan_path, plan_hash, version, new_thread_id):
+            return recorded("approved", (
+                "",
+                "",
+                f"Codex approved plan v{version}, but {plan_file} has changed since that "
+                "version was submitted, so no approval was recorded. The current plan will "
+                "be reviewed on its next write.",
+            ), review)
+
         # Plan approved
-        write_approval(review_dir, plan_path, version, new_thread_id)
-        output_decision(
+        return recorded("approved", (
             "",  # No decision = allow
             "",
             "Codex has approved the plan as optimal. Present the final plan to the user "
             "and ask: 'The plan has been reviewed and approved by Codex. Ready to execute?' "
-            "Do NOT begin implementation. Wait for the user to confirm.",
-        )
+            "Do NOT begin implementation. Wait for the user to confirm." + cache_note,
+        ), review)
+
+    # Plan rejected — provide feedback
+    issues_summary = review.get("summary", "No summary provided.")
+    blocking = review.get("blocking_issues", [])
+    if blocking:
+        issue_lines = []
+        for i, issue in enumerate(blocking, 1):
+            severity = issue.get("severity", "unknown")
+            claim = issue.get("claim", "")
+            issue_lines.append(f"  {i}. [{severity}] {claim}")
+        issues_detail = "\n".join(issue_lines)
     else:
-        # Plan rejected — provide feedback
-        issues_summary = review.get("summary", "No summary provided.")
-        blocking = review.get("blocking_issues", [])
-        if blocking:
-            issue_lines = []
-            for i, issue in enumerate(blocking, 1):
-                severity = issue.get("severity", "unknown")
-                claim = issue.get("claim", "")
-                issue_lines.append(f"  {i}. [{severity}] {claim}")
-            issues_detail = "\n".join(issue_lines)
-        else:
-            issues_detail = "  (No specific blocking issues listed)"
+        issues_detail = "  (No specific blocking issues listed)"
+
+    annotated_plan_path = review_dir / f"plan_v{version}.annotated.md"
+    if annotated_md:
+        primary_artifact = f"Annotated plan: {annotated_plan_path}"
+        read_instruction = "1. Read the annotated plan at the path above to see Codex's inline feedback."
+    else:
+        primary_artifact = f"Codex review: {output_json_path}"
+        read_instruction = "1. Read the Codex review JSON at the path above."
+
+    return recorded("rejected", (
+        "block",
+        f"Codex review (v{version}): {issues_summary}",
+        f"A co-worker has reviewed your plan and found issues. You must maximally evaluate "
+        f"each claim against the code to assess whether it is accurate.\n\n"
+        f"Blocking issues:\n{issues_detail}\n\n"
+        f"{primary_artifact}\n\n"
+        f"Instructions:\n"
+        f"{read_instruction}\n"
+        f"2. For each blocking issue, evaluate the claim against the actual code.\n"
+        f"3. Revise {plan_file} to address valid issues.\n"
+        f"4. Write the revised plan to re-trigger review.\n"
+        f"Do NOT dismiss feedback without verifying against the code." + cache_note,
+    ), review)
+
+
+@metrics.timed("plan_review_worker")
+def run_worker(cwd: str, version: int, job_id: str, plan: str = ""):
+    """Background review worker for async mode (plan_review.py --worker CWD VERSION JOB_ID [PLAN])."""
+    namespace = plan_namespace.named(cwd, plan)
+    review_dir = get_review_dir(cwd, namespace)
+    metrics.note(cwd=cwd)
+
+    # Debounce: let a burst of edits settle; a newer write replaces the job
+    with metrics.span("debounce"):
+        time.sleep(max(0, hook_config.load_config(cwd)["review"].get("debounce_seconds", 0)))
+    # Claim the review under the cycle lock, so a newer write either replaces
+    # the job first or sees this claim and supersedes it
+    with plan_namespace.locked(review_dir):
+        job = review_jobs.read_pending(review_dir)
+        if job is None or job.get("job_id") != job_id or job.get("version") != version:
+            metrics.note(outcome="superseded")
+            return
+        token = review_jobs.claim(review_dir, version, job["plan_hash"])
+    plan_path = os.path.realpath(namespace.path)
+    plan_text = artifact_store.read_snapshot(review_dir, version)
+    if plan_text is None:
+        review_jobs.release(review_dir, token)
+        result = ("block", f"Failed to read plan snapshot v{version}.", "")
+    else:
+        result = review_plan(
+            cwd, review_dir, plan_path, plan_text, job["plan_hash"], version, namespace.rel_path, token
+        )
+        if result is None:
+            metrics.note(outcome="superseded")
+            return
+    metrics.note(outcome=result[0] or "allow")
+    review_jobs.finish(review_dir, version, job["plan_hash"], result)
 
-        annotated_plan_path = review_dir / f"plan_v{version}.annotated.md"
-        if annotated_md:
-            primary_artifact = f"Annotated plan: {annotated_plan_path}"
-            read_instruction = "1. Read the annotated plan at the path above to see Codex's inline feedback."
-        else:
-            primary_artifact = f"Codex review: {output_json_path}"
-            read_instruction = "1. Read the Codex review JSON at the path above."
 
+@metrics.timed("plan_review")
+def run(raw: str):
+    """Process one hook payload in-process."""
+    try:
+        with metrics.span("parse"):
+            hook_input = json.loads(raw)
+    except (json.JSONDecodeError, ValueError):
+        # Can't parse hook input, exit silently (no-op)
+        sys.exit(0)
+
+    # Check if this is a write to docs/plan.md or a named plan
+    plan_path = resolve_plan_path(hook_input)
+    if plan_path is None:
+        # Not a plan write, no-op
+        sys.exit(0)
+
+    cwd = hook_input.get("cwd", os.getcwd())
+    namespace = plan_namespace.resolve(cwd, plan_path)
+    review_dir = get_review_dir(cwd, namespace)
+    metrics.note(cwd=cwd)
+    # The approval gate holds this session to the plan it is writing
+    session_id = hook_input.get("session_id", "")
+    plan_namespace.bind_session(cwd, session_id, namespace)
+
+    # 3.3: Invalidate previous approval if it exists, and close an unapproved
+    # cycle another session left behind. Hook runs for the same plan can
+    # overlap (parallel edits, subagents), so cycle state changes under the
+    # namespace's lock
+    with plan_namespace.locked(review_dir):
+        if (review_dir / "approval.json").exists() or cycle_abandoned(review_dir, session_id):
+            invalidate_approval(review_dir, hook_config.load_config(cwd)["history"])
+        if session_id:
+            plan_namespace.atomic_write(review_dir / CYCLE_SESSION_NAME, session_id)
+
+    # Read the plan once: the hash approved later must be that of the text
+    # Codex reviews, even if an editor rewrites the file meanwhile
+    try:
+        with metrics.span("read_plan"):
+            with open(plan_path, "rb") as f:
+                plan_bytes = f.read()
+            plan_hash = hashlib.sha256(plan_bytes).hexdigest()
+            # Universal newlines, as reading in text mode gave
+            plan_text = plan_bytes.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    except (OSError, UnicodeDecodeError) as e:
+        output_decision("block", f"Failed to read plan file: {e}")
+        sys.exit(0)
+
+    metrics.note(plan_bytes=len(plan_text.encode("utf-8")))
+
+    # 3.4: Validate plan structure and run the pre-flight checks. A plan
+    # rejected here never reaches Codex and does not use up a revision.
+    lint_config = hook_config.load_config(cwd)["lint"]
+    with metrics.span("lint"):
+        skip = list(plan_lint.CHECKS) if not lint_config.get("enabled") else lint_config.get("skip", [])
+        findings = plan_lint.lint(plan_text, cwd, REQUIRED_HEADINGS, skip)
+    if findings:
+        metrics.note(lint_findings=len(findings))
+        missing = validate_plan_structure(plan_text)
+        if missing:
+            reason = f"Missing required sections: {', '.join(missing)}"
+        else:
+            reason = f"Plan failed pre-flight checks ({len(findings)} issue{'s' if len(findings) != 1 else ''})"
         output_decision(
             "block",
-            f"Codex review (v{version}): {issues_summary}",
-            f"A co-worker has reviewed your plan and found issues. You must maximally evaluate "
-            f"each claim against the code to assess whether it is accurate.\n\n"
-            f"Blocking issues:\n{issues_detail}\n\n"
-            f"{primary_artifact}\n\n"
-            f"Instructions:\n"
-            f"{read_instruction}\n"
-            f"2. For each blocking issue, evaluate the claim against the actual code.\n"
-            f"3. Revise docs/plan.md to address valid issues.\n"
-            f"4. Write the revised plan to re-trigger review.\n"
-            f"Do NOT dismiss feedback without verifying against the code.",
+            reason,
+            "The plan was not sent to Codex and this did not count as a revision. "
+            "Fix these issues and write the plan again:\n"
+            + plan_lint.format_findings(findings)
+            + "\nYour plan must include all required sections: "
+            + ", ".join(REQUIRED_HEADINGS)
+            + ".",
         )
+        sys.exit(0)
 
+    # 3.5: Cancel a review of an older write still in flight or queued and
+    # reuse its version; a rewrite of a plan whose review timed out also
+    # reuses that version. Otherwise increment the version counter. The
+    # version is allocated and the review claimed or queued under the lock,
+    # so an overlapping write sees this review and supersedes it
+    with plan_namespace.locked(review_dir):
+        stale_version = review_jobs.supersede(review_dir)
+        checkpoint = read_checkpoint(review_dir)
+        if stale_version is not None and stale_version == read_version_counter(review_dir):
+            version = stale_version
+        elif checkpoint and checkpoint.get("plan_hash") == plan_hash \
+                and checkpoint.get("version") == read_version_counter(review_dir):
+            version = checkpoint["version"]
+        else:
+            version = increment_version_counter(review_dir)
+
+        # 3.10: Check max revision threshold; versions answered from the
+        # review cache did not run Codex and are not counted
+        if version - read_cache_hits(review_dir) > MAX_REVISIONS:
+            output_decision(
+                "block",
+                f"Maximum revision threshold reached ({MAX_REVISIONS} revisions). "
+                "Stop revising the plan.",
+                "You have reached the maximum number of plan revisions. "
+                "STOP revising the plan. Instead, present the situation to the user:\n"
+                "1. Explain that the plan has been revised multiple times without reaching approval.\n"
+                "2. Summarize the remaining unresolved issues from the latest Codex review.\n"
+                "3. Let the user decide how to proceed (they can manually approve by creating "
+                f"{os.path.join(namespace.rel_review_dir, 'approval.json')} with the correct plan_hash).\n"
+                "Do NOT attempt another revision.",
+            )
+            sys.exit(0)
+
+        with metrics.span("snapshot"):
+            snapshot_plan(plan_text, review_dir, version, hook_config.load_config(cwd)["artifacts"])
+
+        # Async mode: hand the review to a detached worker and return immediately
+        if hook_config.load_config(cwd)["review"].get("mode") == "async":
+            review_jobs.enqueue(cwd, review_dir, version, plan_hash, os.path.abspath(__file__), namespace.name)
+            status_script = Path(__file__).parent / "review_status.py"
+            status_args = f" --plan {namespace.name}" if namespace.name else ""
+            output_decision(
+                "",
+                "",
+                f"Codex review of plan v{version} is running in the background (review pending). "
+                "The plan is NOT approved yet and file writes remain blocked. You may continue "
+                "read-only research meanwhile. The verdict is delivered after your next Bash "
+                f"command once it is ready, or run `python3 {status_script}{status_args} --wait 300` to wait "
+                "for it. Do not revise the plan again until you have the verdict.",
+            )
+            metrics.note(outcome="pending")
+            sys.exit(0)
+
+        token = review_jobs.claim(review_dir, version, plan_hash)
+
+    result = review_plan(cwd, review_dir, plan_path, plan_text, plan_hash, version, namespace.rel_path, token)
+    if result is not None:
+        output_decision(*result)
+    else:
+        metrics.note(outcome="superseded")
     sys.exit(0)
 
 
+def main():
+    if len(sys.argv) in (5, 6) and sys.argv[1] == "--worker":
+        run_worker(sys.argv[2], int(sys.argv[3]), *sys.argv[4:])
+        sys.exit(0)
+    run(sys.stdin.read())
+
+
 if __name__ == "__main__":
     main()
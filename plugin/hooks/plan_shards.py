@@ -0,0 +1,117 @@
+"""Sharded review of large plans.
+
+A plan touching many files makes a single Codex session verify every
+`## Changes` entry one after another. In sharded mode the Changes section is
+split into entries (top-level list items or `###` subheadings), the entries
+are packed into a few shards of similar size, and each shard is reviewed by
+its own Codex process alongside the rest of the plan. The shard verdicts are
+then merged into one review, so wall-clock time follows the largest shard.
+"""
+
+import re
+
+CHANGES_HEADING = "## Changes"
+
+_ENTRY_RE = re.compile(r"^(?:[-*+]|\d+[.)])\s+\S|^###+\s")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
+
+def split_entries(changes_text: str) -> tuple[str, list[str]]:
+    """Split a Changes section into (preamble, entries).
+
+    The preamble is the heading plus any text before the first entry. Lines
+    inside fenced code blocks never start an entry.
+    """
+    preamble = []
+    entries = []
+    in_fence = False
+    for line in changes_text.splitlines(keepends=True):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and _ENTRY_RE.match(line):
+            entries.append([])
+        (entries[-1] if entries else preamble).append(line)
+    return "".join(preamble), ["".join(lines) for lines in entries]
+
+
+def pack(entries: list[str], max_shards: int) -> list[list[int]]:
+    """Pack entry indices into at most max_shards shards of similar size.
+
+    Largest entries are placed first, each into the currently smallest
+    shard; within a shard, entries keep their plan order.
+    """
+    count = max(1, min(max_shards, len(entries)))
+    shards = [[] for _ in range(count)]
+    sizes = [0] * count
+    for i in sorted(range(len(entries)), key=lambda i: -len(entries[i])):
+        target = sizes.index(min(sizes))
+        shards[target].append(i)
+        sizes[target] += len(entries[i])
+    return [sorted(shard) for shard in shards if shard]
+
+
+def _entry_title(entry: str) -> str:
+    title = entry.splitlines()[0].strip() if entry.strip() else ""
+    return title if len(title) <= 120 else title[:117] + "..."
+
+
+def shard_plans(sections: dict[str, str], min_entries: int, max_shards: int) -> list[str] | None:
+    """Build one plan text per shard, or None if the plan is too small to shard.
+
+    sections is the {heading: text} split of the plan. Every shard keeps all
+    other sections verbatim; its Changes section holds only the shard's
+    entries plus a one-line index of the entries reviewed elsewhere.
+    """
+    changes = sections.get(CHANGES_HEADING)
+    if not changes:
+        return None
+    preamble, entries = split_entries(changes)
+    if len(entries) < max(2, min_entries) or max_shards < 2:
+        return None
+
+    shards = pack(entries, max_shards)
+    plans = []
+    for number, shard in enumerate(shards, 1):
+        members = set(shard)
+        others = [_entry_title(entries[i]) for i in range(len(entries)) if i not in members]
+        scoped = (
+            preamble
+            + f"\n[Shard {number}/{len(shards)}: review only the change entries below. "
+            "The remaining entries, listed at the end of this section, are reviewed in "
+            "parallel sessions; do not report them as missing.]\n\n"
+            + "".join(entries[i] for i in shard)
+        )
+        if not scoped.endswith("\n"):
+            scoped += "\n"
+        scoped += "\nReviewed in other shards:\n" + "".join(f"  {title}\n" for title in others) + "\n"
+        plans.append("".join(scoped if heading == CHANGES_HEADING else text for heading, text in sections.items()))
+    return plans
+
+
+def merge_reviews(reviews: list[dict]) -> dict:
+    """Merge per-shard Codex reviews into one review.
+
+    is_optimal is true only if every shard says so; issues and
+    recommendations are concatenated (recommendations de-duplicated).
+    """
+    total = len(reviews)
+    recommended = []
+    for review in reviews:
+        for change in review.get("recommended_changes", []):
+            if change not in recommended:
+                recommended.append(change)
+    annotated = [
+        f"<!-- shard {i}/{total} -->\n{review['annotated_plan_markdown']}"
+        for i, review in enumerate(reviews, 1)
+        if review.get("annotated_plan_markdown")
+    ]
+    return {
+        "is_optimal": all(review.get("is_optimal") for review in reviews),
+        "blocking_issues": [issue for review in reviews for issue in review.get("blocking_issues", [])],
+        "recommended_changes": recommended,
+        "annotated_plan_markdown": "\n\n".join(annotated),
+        "summary": " ".join(
+            f"[Shard {i}/{total}] {review.get('summary', '')}".strip() for i, review in enumerate(reviews, 1)
+        ),
+        "shards": total,
+    }
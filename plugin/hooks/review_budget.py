@@ -0,0 +1,137 @@
+"""One deadline per review, shared by every Codex run it makes.
+
+hooks.json gives plan_review.py 600 seconds. A review may run Codex more
+than once: a resumed session, the fresh fallback when the resume fails,
+and retries after transient failures. All of them draw from a single
+Deadline of review.deadline_seconds, so together they end, with a
+reportable outcome, before the host kills the hook.
+
+Each run's timeout is learned from the review history: the 95th
+percentile duration of recent reviews of plans of similar size, times
+TIMEOUT_MARGIN, but never below review.min_attempt_seconds. A run that
+exceeds it is probably stuck, so it is cut off while there is budget for
+another attempt; the last attempt gets whatever budget is left. Transient
+failures (rate limits, server errors, dropped connections) are retried
+after a jittered exponential backoff, only while at least
+review.min_attempt_seconds would remain.
+"""
+
+import random
+import re
+import subprocess
+import time
+from pathlib import Path
+
+import review_history
+
+TIMEOUT_MARGIN = 1.5
+MAX_BACKOFF_SECONDS = 30
+
+_TRANSIENT_RE = re.compile(
+    rb"\b(?:429|50[0234])\b|rate.?limit|too many requests|overloaded|temporarily unavailable|"
+    rb"connection (?:reset|refused|closed|error)|stream (?:disconnected|error)|timed out|"
+    rb"server error|bad gateway|service unavailable",
+    re.IGNORECASE,
+)
+
+
+class Deadline:
+    """A fixed point in time that several Codex runs share."""
+
+    def __init__(self, seconds: float, clock=time.monotonic):
+        self._clock = clock
+        self.seconds = seconds
+        self.expires = clock() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - self._clock())
+
+    def elapsed(self) -> float:
+        return self.seconds - (self.expires - self._clock())
+
+
+class BudgetExhausted(subprocess.TimeoutExpired):
+    """Raised when the review's deadline leaves no time for a Codex run."""
+
+
+def learned_timeout(review_dir: Path, plan_bytes: int, settings: dict) -> float | None:
+    """Per-run timeout from the durations of similar past reviews, or None without enough history."""
+    typical = review_history.typical_duration(review_dir, plan_bytes)
+    if typical is None:
+        return None
+    return max(settings["min_attempt_seconds"], typical * TIMEOUT_MARGIN)
+
+
+def is_transient(proc: subprocess.CompletedProcess) -> bool:
+    """Whether a failed Codex run looks worth retrying."""
+    stderr = proc.stderr if isinstance(proc.stderr, bytes) else b""
+    return proc.returncode != 0 and bool(_TRANSIENT_RE.search(stderr))
+
+
+def backoff(retry: int, base: float) -> float:
+    """Full-jitter exponential backoff before retry number retry (0-based)."""
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, base * 2 ** retry))
+
+
+class Attempts:
+    """Runs Codex under a Deadline, retrying transient failures and stuck runs.
+
+    run(attempt) calls attempt(timeout), which returns the finished process
+    or raises subprocess.TimeoutExpired when Codex outlives timeout. count is
+    the number of Codex runs made across every run() call on the instance,
+    so a resume and its fresh fallback share one budget and one tally.
+    """
+
+    def __init__(self, deadline: Deadline, settings: dict, timeout: float | None = None, sleep=time.sleep):
+        self.deadline = deadline
+        self.settings = settings
+        self.timeout = timeout
+        self.sleep = sleep
+        self.count = 0
+        self.retries = 0
+
+    def has_budget(self, delay: float = 0) -> bool:
+        """Whether another run of at least min_attempt_seconds fits after delay."""
+        return self.deadline.remaining() - delay >= self.settings["min_attempt_seconds"]
+
+    def can_retry(self, delay: float = 0) -> bool:
+        return self.retries < self.settings["max_retries"] and self.has_budget(delay)
+
+    def _timeout(self, final: bool, fallback: bool) -> float:
+        remaining = self.deadline.remaining()
+        if remaining < 1:
+            raise BudgetExhausted("codex", self.deadline.seconds)
+        if final:
+            return remaining
+        if self.timeout is None:
+            # Without history, a run with a fallback gets half the budget
+            return remaining / 2 if fallback else remaining
+        return min(remaining, self.timeout)
+
+    def run(self, attempt, fallback: bool = False) -> subprocess.CompletedProcess | None:
+        """Run attempt until it succeeds, fails for good, or the budget runs out.
+
+        With fallback, one run is made and the caller follows a failure with
+        a different run: a timeout then returns None while budget remains
+        for it, and failures are returned without retrying.
+        """
+        while True:
+            final = not fallback and not self.can_retry()
+            timeout = self._timeout(final, fallback)
+            self.count += 1
+            try:
+                proc = attempt(timeout)
+            except subprocess.TimeoutExpired:
+                if fallback and self.has_budget():
+                    return None
+                if final or not self.can_retry():
+                    raise
+                self.retries += 1
+                continue
+            if fallback or not is_transient(proc):
+                return proc
+            delay = backoff(self.retries, self.settings["retry_backoff_seconds"])
+            if not self.can_retry(delay):
+                return proc
+            self.retries += 1
+            self.sleep(delay)
@@ -0,0 +1,110 @@
+"""Content-addressed cache of Codex review verdicts.
+
+A review verdict depends only on the plan bytes, the review schema/prompt
+version and the code it was checked against. Verdicts are stored under the
+repository's git common dir (<common-dir>/codex-review/review-cache/), so
+every worktree of the repository, including each .worktrees/plan-review-*
+created by bootstrap.sh, shares them. Re-writing a plan that was already
+reviewed against the same HEAD tree returns the stored verdict immediately
+instead of starting a new Codex run.
+
+Entries are evicted by age (mtime, refreshed on every hit) and by total size.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import time
+from pathlib import Path
+
+CACHE_SUBDIR = os.path.join("codex-review", "review-cache")
+
+
+def repo_state(cwd: str) -> tuple[Path, str] | None:
+    """Return (cache directory, HEAD tree hash), or None outside a git repo."""
+    try:
+        proc = subprocess.run(
+            ["git", "rev-parse", "--git-common-dir", "HEAD^{tree}"],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return None
+    lines = proc.stdout.split()
+    if proc.returncode != 0 or len(lines) != 2:
+        return None
+    common_dir = Path(cwd, lines[0]).resolve()
+    return common_dir / CACHE_SUBDIR, lines[1]
+
+
+def cache_key(plan_hash: str, review_version: str, tree: str) -> str:
+    """Combine the cache inputs into one content address."""
+    return hashlib.sha256(f"{plan_hash}\0{review_version}\0{tree}".encode()).hexdigest()
+
+
+def lookup(cache_dir: Path, key: str) -> dict | None:
+    """Return the cached entry for key, refreshing its age on a hit."""
+    path = cache_dir / f"{key}.json"
+    try:
+        with open(path) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or not isinstance(entry.get("review"), dict):
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return entry
+
+
+def store(cache_dir: Path, key: str, entry: dict, max_age_days: float, max_bytes: int):
+    """Write an entry atomically, then evict old or excess entries."""
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = cache_dir / f".{key}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, cache_dir / f"{key}.json")
+    except OSError:
+        return
+    evict(cache_dir, max_age_days, max_bytes)
+
+
+def evict(cache_dir: Path, max_age_days: float, max_bytes: int):
+    """Delete entries older than max_age_days, then the oldest until under max_bytes."""
+    cutoff = time.time() - max_age_days * 86400
+    entries = []
+    try:
+        scan = list(os.scandir(cache_dir))
+    except OSError:
+        return
+    for item in scan:
+        if not item.name.endswith(".json"):
+            continue
+        try:
+            st = item.stat()
+        except OSError:
+            continue
+        if st.st_mtime < cutoff:
+            _unlink(item.path)
+        else:
+            entries.append((st.st_mtime, st.st_size, item.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        _unlink(path)
+        total -= size
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""Indexed history of every review cycle in a worktree.
+
+A cycle is one run of plan revisions, from the first review after an
+approval (or a fresh worktree) to the plan write that invalidates the next
+approval, or to the first plan write of another session if it was never
+approved. Each Codex review is recorded in .claude/review/history.sqlite:
+
+  cycles   id, started_at, ended_at, revisions, outcome, archive
+  reviews  cycle_id, version, reviewed_at, plan_hash, verdict, high,
+           medium, low, duration_ms, thread_id, cache_hit, artifacts,
+           plan_bytes, attempts
+
+verdict is "approved", "rejected", "error" or "timeout"; high/medium/low
+count blocking issues by severity; artifacts is the directory, relative to
+.claude/review/, holding that version's plan_v{N}.* files; attempts
+counts the Codex runs the review took (resume, fallback and retries).
+typical_duration() feeds the learned Codex timeouts. When a cycle
+ends its artifacts are moved to archive/<cycle id>/ instead of being
+deleted; only the newest history.keep_archives archives are kept, while
+their rows stay. Timestamps are Unix seconds; queries on revisions,
+reviewed_at, duration_ms and plan_bytes are indexed.
+
+Usage:
+  python3 review_history.py cycles [--min-revisions N] [--since DAYS] [--limit N] [--json] [--cwd DIR] [--plan NAME]
+      Cycles, newest first.
+  python3 review_history.py reviews [--slowest] [--verdict V] [--since DAYS] [--limit N] [--json] [--cwd DIR] [--plan NAME]
+      Reviews, newest (or slowest) first.
+  python3 review_history.py sql QUERY [--cwd DIR] [--plan NAME]
+      Run a read-only SQL query and print the rows as JSON lines.
+--plan reads the history of the named plan docs/plans/NAME.md instead of docs/plan.md.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import plan_namespace
+
+HISTORY_NAME = "history.sqlite"
+ARCHIVE_DIR = "archive"
+SCHEMA_VERSION = 2
+SEVERITIES = ("high", "medium", "low")
+
+SCHEMA = """
+CREATE TABLE cycles (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    revisions INTEGER NOT NULL DEFAULT 0,
+    outcome TEXT,
+    archive TEXT
+);
+CREATE INDEX cycles_revisions ON cycles (revisions);
+CREATE INDEX cycles_started ON cycles (started_at);
+CREATE TABLE reviews (
+    cycle_id INTEGER NOT NULL REFERENCES cycles (id),
+    version INTEGER NOT NULL,
+    reviewed_at REAL NOT NULL,
+    plan_hash TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    high INTEGER NOT NULL DEFAULT 0,
+    medium INTEGER NOT NULL DEFAULT 0,
+    low INTEGER NOT NULL DEFAULT 0,
+    duration_ms REAL,
+    thread_id TEXT,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    artifacts TEXT,
+    plan_bytes INTEGER,
+    attempts INTEGER,
+    PRIMARY KEY (cycle_id, version)
+);
+CREATE INDEX reviews_time ON reviews (reviewed_at);
+CREATE INDEX reviews_duration ON reviews (duration_ms);
+CREATE INDEX reviews_size ON reviews (plan_bytes);
+"""
+# Upgrades from each older schema version to the next
+MIGRATIONS = {
+    1: """
+ALTER TABLE reviews ADD COLUMN plan_bytes INTEGER;
+ALTER TABLE reviews ADD COLUMN attempts INTEGER;
+CREATE INDEX reviews_size ON reviews (plan_bytes);
+""",
+}
+# Reviews of similar plans needed before their durations are trusted
+MIN_SAMPLES = 5
+
+
+def connect(review_dir: Path, readonly: bool = False) -> sqlite3.Connection:
+    """Open the history database, creating its schema on first use."""
+    path = review_dir / HISTORY_NAME
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=5)
+    else:
+        conn = sqlite3.connect(path, timeout=5)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            with conn:
+                script = SCHEMA if version == 0 else "".join(MIGRATIONS[v] for v in range(version, SCHEMA_VERSION))
+                conn.executescript(f"{script}PRAGMA user_version = {SCHEMA_VERSION};")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _open_cycle(conn: sqlite3.Connection, create: bool) -> int | None:
+    row = conn.execute("SELECT id FROM cycles WHERE ended_at IS NULL ORDER BY id DESC LIMIT 1").fetchone()
+    if row is not None:
+        return row[0]
+    if not create:
+        return None
+    return conn.execute("INSERT INTO cycles (started_at) VALUES (?)", (time.time(),)).lastrowid
+
+
+def record(
+    review_dir: Path,
+    version: int,
+    plan_hash: str,
+    verdict: str,
+    review: dict | None = None,
+    duration: float | None = None,
+    thread_id: str | None = None,
+    cache_hit: bool = False,
+    plan_bytes: int | None = None,
+    attempts: int | None = None,
+):
+    """Record one review of the current cycle; a repeated version replaces its row."""
+    counts = dict.fromkeys(SEVERITIES, 0)
+    for issue in (review or {}).get("blocking_issues") or []:
+        if isinstance(issue, dict) and issue.get("severity") in counts:
+            counts[issue["severity"]] += 1
+    try:
+        conn = connect(review_dir)
+        try:
+            with conn:
+                cycle_id = _open_cycle(conn, create=True)
+                conn.execute(
+                    "INSERT OR REPLACE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        cycle_id, version, time.time(), plan_hash, verdict,
+                        counts["high"], counts["medium"], counts["low"],
+                        None if duration is None else round(duration * 1000, 1),
+                        thread_id, int(cache_hit), ".", plan_bytes, attempts,
+                    ),
+                )
+                conn.execute(
+                    "UPDATE cycles SET revisions = MAX(revisions, ?), outcome = ? WHERE id = ?",
+                    (version, verdict, cycle_id),
+                )
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        pass  # history never gets in the way of a review
+
+
+def archive_cycle(review_dir: Path, keep_archives: int) -> Path | None:
+    """End the current cycle, moving its artifacts to archive/<cycle id>/.
+
+    Returns the archive directory, or None if there was nothing to archive
+    or the history database is unusable (the caller then deletes the files).
+    """
+    files = list(review_dir.glob("plan_v*"))
+    approval = review_dir / "approval.json"
+    if approval.exists():
+        files.append(approval)
+    try:
+        conn = connect(review_dir)
+    except (sqlite3.Error, OSError):
+        return None
+    try:
+        with conn:
+            cycle_id = _open_cycle(conn, create=bool(files))
+            if cycle_id is None:
+                return None
+            rel = f"{ARCHIVE_DIR}/{cycle_id}"
+            if files:
+                dest = review_dir / rel
+                dest.mkdir(parents=True, exist_ok=True)
+                for f in files:
+                    os.replace(f, dest / f.name)
+            else:
+                rel = None
+            conn.execute("UPDATE cycles SET ended_at = ?, archive = ? WHERE id = ?", (time.time(), rel, cycle_id))
+            conn.execute("UPDATE reviews SET artifacts = ? WHERE cycle_id = ?", (rel, cycle_id))
+            _prune(conn, review_dir, keep_archives)
+    except (sqlite3.Error, OSError):
+        return None
+    finally:
+        conn.close()
+    return None if rel is None else review_dir / rel
+
+
+def _prune(conn: sqlite3.Connection, review_dir: Path, keep_archives: int):
+    stale = conn.execute(
+        "SELECT id, archive FROM cycles WHERE archive IS NOT NULL ORDER BY id DESC LIMIT -1 OFFSET ?",
+        (max(keep_archives, 0),),
+    ).fetchall()
+    for cycle_id, rel in stale:
+        shutil.rmtree(review_dir / rel, ignore_errors=True)
+        conn.execute("UPDATE cycles SET archive = NULL WHERE id = ?", (cycle_id,))
+        conn.execute("UPDATE reviews SET artifacts = NULL WHERE cycle_id = ?", (cycle_id,))
+
+
+def query_cycles(conn, min_revisions: int = 0, since: float | None = None, limit: int = 50) -> list[dict]:
+    """Cycles with at least min_revisions revisions started after since, newest first."""
+    rows = conn.execute(
+        "SELECT * FROM cycles WHERE revisions >= ? AND started_at >= ? ORDER BY id DESC LIMIT ?",
+        (min_revisions, since or 0, limit),
+    )
+    return [dict(row) for row in rows]
+
+
+def query_reviews(
+    conn, slowest: bool = False, verdict: str | None = None, since: float | None = None, limit: int = 50
+) -> list[dict]:
+    """Reviews after since, newest first or slowest first."""
+    sql = "SELECT * FROM reviews WHERE reviewed_at >= ?"
+    params = [since or 0]
+    if verdict:
+        sql += " AND verdict = ?"
+        params.append(verdict)
+    sql += " ORDER BY duration_ms DESC" if slowest else " ORDER BY reviewed_at DESC"
+    return [dict(row) for row in conn.execute(sql + " LIMIT ?", (*params, limit))]
+
+
+def typical_duration(review_dir: Path, plan_bytes: int, quantile: float = 0.95, limit: int = 50) -> float | None:
+    """Return the quantile of recent Codex review durations (seconds) for plans of similar size.
+
+    Similar means within a factor of two of plan_bytes; only reviews that
+    ran Codex and reached a verdict count. Returns None with fewer than
+    MIN_SAMPLES such reviews or without a usable history.
+    """
+    if not (review_dir / HISTORY_NAME).exists():
+        return None
+    try:
+        conn = connect(review_dir, readonly=True)
+        try:
+            rows = conn.execute(
+                "SELECT duration_ms FROM reviews WHERE plan_bytes BETWEEN ? AND ? AND cache_hit = 0 "
+                "AND verdict IN ('approved', 'rejected') AND duration_ms IS NOT NULL "
+                "ORDER BY reviewed_at DESC LIMIT ?",
+                (plan_bytes // 2, plan_bytes * 2, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    if len(rows) < MIN_SAMPLES:
+        return None
+    durations = sorted(row[0] for row in rows)
+    return durations[min(len(durations) - 1, int(quantile * len(durations)))] / 1000
+
+
+def _format_time(ts: float | None) -> str:
+    return "-" if ts is None else time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+
+
+def format_cycles(rows: list[dict]) -> str:
+    lines = [f"{'cycle':>6} {'started':<17} {'ended':<17} {'revs':>5} {'outcome':<9} archive"]
+    for r in rows:
+        lines.append(
+            f"{r['id']:>6} {_format_time(r['started_at']):<17} {_format_time(r['ended_at']):<17} "
+            f"{r['revisions']:>5} {r['outcome'] or '-':<9} {r['archive'] or '-'}"
+        )
+    return "\n".join(lines)
+
+
+def format_reviews(rows: list[dict]) -> str:
+    lines = [f"{'cycle':>6} {'ver':>4} {'reviewed':<17} {'verdict':<9} {'H/M/L':>8} {'seconds':>8} {'cache':>5} plan"]
+    for r in rows:
+        seconds = "-" if r["duration_ms"] is None else f"{r['duration_ms'] / 1000:.1f}"
+        issues = f"{r['high']}/{r['medium']}/{r['low']}"
+        lines.append(
+            f"{r['cycle_id']:>6} {r['version']:>4} {_format_time(r['reviewed_at']):<17} {r['verdict']:<9} "
+            f"{issues:>8} {seconds:>8} {'yes' if r['cache_hit'] else 'no':>5} "
+            f"{r['plan_hash'][:12]}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Review cycle history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cycles_cmd = sub.add_parser("cycles", help="list review cycles")
+    cycles_cmd.add_argument("--min-revisions", type=int, default=0)
+    reviews_cmd = sub.add_parser("reviews", help="list individual reviews")
+    reviews_cmd.add_argument("--slowest", action="store_true", help="order by Codex duration")
+    reviews_cmd.add_argument("--verdict", choices=["approved", "rejected", "error", "timeout"])
+    for cmd in (cycles_cmd, reviews_cmd):
+        cmd.add_argument("--since", type=float, metavar="DAYS", help="only the last DAYS days")
+        cmd.add_argument("--limit", type=int, default=50)
+        cmd.add_argument("--json", action="store_true", help="print JSON lines instead of a table")
+    sql_cmd = sub.add_parser("sql", help="run a read-only SQL query")
+    sql_cmd.add_argument("query")
+    for cmd in (cycles_cmd, reviews_cmd, sql_cmd):
+        cmd.add_argument("--cwd", default=os.getcwd())
+        cmd.add_argument("--plan", default="", metavar="NAME", help="history of the named plan docs/plans/NAME.md")
+    args = parser.parse_args()
+
+    if args.plan and not plan_namespace.valid_name(args.plan):
+        parser.error(f"invalid plan name: {args.plan!r}")
+    review_dir = plan_namespace.named(args.cwd, args.plan).review_dir
+    if not (review_dir / HISTORY_NAME).exists():
+        print(f"No review history at {review_dir / HISTORY_NAME}")
+        return
+    conn = connect(review_dir, readonly=True)
+    try:
+        if args.command == "sql":
+            try:
+                rows = [dict(row) for row in conn.execute(args.query)]
+            except sqlite3.Error as e:
+                sys.stderr.write(f"review_history.py: {e}\n")
+                sys.exit(1)
+            as_json = True
+        else:
+            since = None if args.since is None else time.time() - args.since * 86400
+            if args.command == "cycles":
+                rows = query_cycles(conn, args.min_revisions, since, args.limit)
+            else:
+                rows = query_reviews(conn, args.slowest, args.verdict, since, args.limit)
+            as_json = args.json
+    finally:
+        conn.close()
+
+    if as_json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        print((format_cycles if args.command == "cycles" else format_reviews)(rows))
+
+
+if __name__ == "__main__":
+    main()
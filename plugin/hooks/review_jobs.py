@@ -0,0 +1,261 @@
+"""Background review jobs for async review mode.
+
+In async mode the plan_review PostToolUse hook snapshots the plan, records
+the job in pending.json in the plan's review directory, starts a detached
+worker (`plan_review.py --worker CWD VERSION JOB_ID [PLAN]`) and returns at
+once. The worker writes its (decision, reason, additional_context) result to
+verdict.json.
+A later hook invocation (bash_drift_check) or review_status.py delivers
+that verdict to Claude exactly once.
+
+The approval gate is unaffected: approval.json is still only written by
+the review itself, so writes stay blocked while a review is pending.
+
+In both modes a review that is running Codex holds inflight.json (its own
+PID, the Codex PIDs, the version and the plan hash under review). A newer
+plan write supersedes it: the stale Codex process group is killed, the new
+review takes over the stale version number instead of using up another
+revision slot, and the stale review returns without a verdict. Claims,
+Codex PIDs and supersession all change inflight.json under the plan's
+cycle lock, so a Codex process started by a review that was superseded
+meanwhile is killed at once instead of running alongside its replacement
+and writing the same plan_v{N} artifacts.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import plan_namespace
+
+PENDING_NAME = "pending.json"
+VERDICT_NAME = "verdict.json"
+WORKER_LOG_NAME = "worker.log"
+INFLIGHT_NAME = "inflight.json"
+
+# Sharded reviews start several Codex processes from worker threads
+_inflight_lock = threading.Lock()
+
+
+def read_json(path: Path) -> dict | None:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def write_json(path: Path, data: dict):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def pid_alive(pid) -> bool:
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_pending(review_dir: Path) -> dict | None:
+    """Return the pending job record, if any."""
+    return read_json(review_dir / PENDING_NAME)
+
+
+def enqueue(cwd: str, review_dir: Path, version: int, plan_hash: str, script: str, plan: str = "") -> int:
+    """Record a pending review and start a detached worker. Returns its PID.
+
+    plan names the plan (empty for docs/plan.md) whose namespace review_dir
+    is. Callers hold the cycle lock, which finish() also takes.
+    """
+    # A verdict for an older version must not be delivered for this one
+    try:
+        (review_dir / VERDICT_NAME).unlink()
+    except FileNotFoundError:
+        pass
+    job = {
+        "job_id": os.urandom(8).hex(),
+        "version": version,
+        "plan_hash": plan_hash,
+        "queued_at": datetime.now(timezone.utc).isoformat(),
+    }
+    write_json(review_dir / PENDING_NAME, job)
+    with open(review_dir / WORKER_LOG_NAME, "ab") as log:
+        worker = subprocess.Popen(
+            [sys.executable, script, "--worker", cwd, str(version), job["job_id"]] + ([plan] if plan else []),
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+    # Record the worker only if the job is still pending: one that already
+    # finished must not be brought back with a dead worker_pid
+    current = read_pending(review_dir)
+    if current is not None and current.get("job_id") == job["job_id"]:
+        write_json(review_dir / PENDING_NAME, {**job, "worker_pid": worker.pid})
+    return worker.pid
+
+
+def finish(review_dir: Path, version: int, plan_hash: str, result: tuple[str, str, str]):
+    """Store a worker's result and clear its pending record (under the cycle lock)."""
+    with plan_namespace.locked(review_dir):
+        job = read_pending(review_dir)
+        if job is None or job.get("version") != version or job.get("plan_hash") != plan_hash:
+            # Superseded by a newer job; its result is stale
+            return
+        decision, reason, additional_context = result
+        write_json(
+            review_dir / VERDICT_NAME,
+            {
+                "version": version,
+                "plan_hash": plan_hash,
+                "decision": decision,
+                "reason": reason,
+                "additional_context": additional_context,
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "delivered": False,
+            },
+        )
+        try:
+            (review_dir / PENDING_NAME).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def status(review_dir: Path) -> dict:
+    """Describe the async review state without delivering anything."""
+    verdict = read_json(review_dir / VERDICT_NAME)
+    job = read_pending(review_dir)
+    if job is not None:
+        if "worker_pid" in job and not pid_alive(job["worker_pid"]):
+            return {"state": "failed", "version": job.get("version"),
+                    "reason": f"The review worker exited without a verdict; see {review_dir / WORKER_LOG_NAME}."}
+        return {"state": "pending", "version": job.get("version")}
+    if verdict is not None and not verdict.get("delivered"):
+        return {"state": "done", "version": verdict.get("version")}
+    return {"state": "idle"}
+
+
+def collect(review_dir: Path) -> tuple[str, str, str] | None:
+    """Deliver an undelivered verdict once, returning its decision triple.
+
+    The Bash hook and review_status.py may both try to deliver the same
+    verdict, so the check and the update happen under the cycle lock.
+    """
+    path = review_dir / VERDICT_NAME
+    if not path.exists():
+        return None
+    with plan_namespace.locked(review_dir):
+        verdict = read_json(path)
+        if verdict is None or verdict.get("delivered"):
+            return None
+        verdict["delivered"] = True
+        write_json(path, verdict)
+    return (
+        verdict.get("decision", ""),
+        verdict.get("reason", ""),
+        verdict.get("additional_context", ""),
+    )
+
+
+def claim(review_dir: Path, version: int, plan_hash: str) -> dict:
+    """Mark this process as the one reviewing version/plan_hash."""
+    token = {
+        "owner_pid": os.getpid(),
+        "version": version,
+        "plan_hash": plan_hash,
+        "codex_pids": [],
+        "started_at": datetime.now(timezone.utc).isoformat(),
+    }
+    write_json(review_dir / INFLIGHT_NAME, token)
+    return token
+
+
+def _owns(record: dict | None, token: dict) -> bool:
+    return record is not None and all(
+        record.get(k) == token[k] for k in ("owner_pid", "version", "plan_hash")
+    )
+
+
+def is_current(review_dir: Path, token: dict) -> bool:
+    """True while the in-flight record still belongs to token."""
+    return _owns(read_json(review_dir / INFLIGHT_NAME), token)
+
+
+def record_codex_pid(review_dir: Path, token: dict, pid: int):
+    """Add a Codex PID to the in-flight record, or kill it if token was superseded.
+
+    Takes the cycle lock, so it cannot interleave with supersede(): either
+    the PID is recorded before a newer write kills it, or the run is already
+    superseded and is stopped here.
+    """
+    with _inflight_lock, plan_namespace.locked(review_dir):
+        token["codex_pids"].append(pid)
+        if is_current(review_dir, token):
+            write_json(review_dir / INFLIGHT_NAME, token)
+            return
+    kill_group(pid)
+
+
+def release(review_dir: Path, token: dict):
+    """Drop the in-flight record if token still owns it."""
+    if is_current(review_dir, token):
+        try:
+            (review_dir / INFLIGHT_NAME).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def kill_group(pid, sig: int = signal.SIGTERM):
+    """Signal the process group led by pid, a process started in its own session.
+
+    Its PID is then also its process group, and checking that guards
+    against signalling a recycled PID recorded in a stale JSON file.
+    """
+    if not pid_alive(pid):
+        return
+    try:
+        if os.getpgid(pid) == pid:
+            os.killpg(pid, sig)
+    except OSError:
+        pass
+
+
+def supersede(review_dir: Path) -> int | None:
+    """Cancel any unfinished review of an older plan write (under the cycle lock).
+
+    Kills an in-flight Codex run and clears the in-flight record. Returns
+    the version of the cancelled (in-flight or still queued) review, whose
+    revision slot the caller may reuse, or None if nothing was unfinished.
+    """
+    versions = []
+    record = read_json(review_dir / INFLIGHT_NAME)
+    if record is not None:
+        try:
+            (review_dir / INFLIGHT_NAME).unlink()
+        except FileNotFoundError:
+            pass
+        codex_pids = record.get("codex_pids") or []
+        if pid_alive(record.get("owner_pid")) or any(pid_alive(pid) for pid in codex_pids):
+            for pid in codex_pids:
+                kill_group(pid)
+            versions.append(record.get("version"))
+    job = read_pending(review_dir)
+    if job is not None:
+        versions.append(job.get("version"))
+    versions = [v for v in versions if isinstance(v, int)]
+    return max(versions) if versions else None
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Async review status script.
+
+Reports the state of a background Codex review started in async review
+mode, and delivers its verdict once it is ready. Outputs structured JSON
+to stdout:
+
+  {"state": "idle"}                              No review pending or undelivered
+  {"state": "pending", "version": N}             Review still running
+  {"state": "failed", "version": N, "reason": ...}  Worker died without a verdict
+  {"state": "done", "version": N, "decision": ..., "reason": ..., "additional_context": ...}
+  {"state": "error", "reason": ...}              Invalid plan name
+
+Usage: python3 review_status.py [--plan NAME] [--wait SECONDS]
+  --plan: the named plan docs/plans/NAME.md (default: docs/plan.md).
+  --wait: poll until the review finishes or SECONDS elapse.
+Exit code is always 0.
+"""
+
+import json
+import os
+import sys
+import time
+
+import plan_namespace
+import review_jobs
+
+POLL_INTERVAL = 2.0
+
+
+def check(cwd: str, wait: float = 0, plan: str = "") -> dict:
+    """Return the review state of a plan, delivering the verdict if one is ready."""
+    review_dir = plan_namespace.named(cwd, plan).review_dir
+    deadline = time.monotonic() + wait
+    while True:
+        result = review_jobs.status(review_dir)
+        if result["state"] != "pending" or time.monotonic() >= deadline:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    if result["state"] == "done":
+        verdict = review_jobs.collect(review_dir)
+        if verdict is None:
+            return {"state": "idle"}
+        decision, reason, additional_context = verdict
+        result.update(decision=decision, reason=reason, additional_context=additional_context)
+    return result
+
+
+def main():
+    wait = 0.0
+    plan = ""
+    args = sys.argv[1:]
+    while len(args) >= 2:
+        if args[0] == "--wait":
+            try:
+                wait = float(args[1])
+            except ValueError:
+                pass
+        elif args[0] == "--plan":
+            plan = args[1]
+        args = args[2:]
+    try:
+        result = check(os.getcwd(), wait, plan)
+    except ValueError as e:
+        result = {"state": "error", "reason": str(e)}
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Hook entry point with a minimal-import fast path.
+
+Usage: python3 -S run_hook.py HOOK < payload
+
+hooks.json runs every hook through this dispatcher. The host starts a fresh
+interpreter per tool call, and the script it runs is compiled from source
+each time, so this file stays small and imports only os and sys. It settles
+the no-op cases first (for plan_review, a Write/Edit that is not to a plan
+file, which is almost every one) without parsing the payload,
+whose tool_input may carry the full file contents. Otherwise it relays to
+the hook daemon when one is running and only then imports the hook module,
+whose bytecode bootstrap.sh precompiles.
+"""
+
+import os
+import sys
+
+# Hook module -> whether the hook daemon serves it
+HOOKS = {
+    "enforce_approval": True,
+    "bash_drift_check": True,
+    "plan_review": False,
+}
+
+
+def string_values(raw: str, key: str) -> list[str] | None:
+    """Return the value of every `"key": "..."` member in raw JSON text.
+
+    An unescaped `"key"` followed by a colon can only be an object key, so
+    a substring scan is exact. Returns None when a value is not a plain
+    string without escapes; callers then fall back to a real parse.
+    """
+    needle = f'"{key}"'
+    values = []
+    start = 0
+    while True:
+        i = raw.find(needle, start)
+        if i < 0:
+            return values
+        j = i + len(needle)
+        while j < len(raw) and raw[j] in " \t\r\n":
+            j += 1
+        if j >= len(raw) or raw[j] != ":":
+            start = j  # a string value that happens to equal key
+            continue
+        j += 1
+        while j < len(raw) and raw[j] in " \t\r\n":
+            j += 1
+        end = raw.find('"', j + 1)
+        if j >= len(raw) or raw[j] != '"' or end < 0:
+            return None
+        value = raw[j + 1:end]
+        if "\\" in value:
+            return None
+        values.append(value)
+        start = end + 1
+
+
+def plan_review_noop(raw: str) -> bool:
+    """True if plan_review would exit without output for this payload.
+
+    Mirrors plan_review.resolve_plan_path: only a file_path resolving to
+    <cwd>/docs/plan.md or a Markdown file directly in <cwd>/docs/plans/
+    (symlinks included) may trigger a review; plan_review itself checks the
+    plan name.
+    """
+    paths = string_values(raw, "file_path")
+    cwds = string_values(raw, "cwd")
+    if paths is None or cwds is None or len(set(cwds)) > 1:
+        return False
+    cwd = cwds[0] if cwds else os.getcwd()
+    default = os.path.realpath(os.path.join(cwd, "docs", "plan.md"))
+    plans = os.path.realpath(os.path.join(cwd, "docs", "plans"))
+    for path in paths:
+        if not path:
+            continue
+        resolved = os.path.realpath(os.path.join(cwd, path))
+        if resolved == default or (os.path.dirname(resolved) == plans and resolved.endswith(".md")):
+            return False
+    return True
+
+
+FAST_PATHS = {"plan_review": plan_review_noop}
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in HOOKS:
+        sys.stderr.write(f"run_hook.py: expected one of {', '.join(HOOKS)}\n")
+        return
+    hook = sys.argv[1]
+    raw = sys.stdin.read()
+
+    noop = FAST_PATHS.get(hook)
+    if noop and noop(raw):
+        return
+
+    if HOOKS[hook]:
+        import hook_daemon
+
+        if hook_daemon.relay(hook, raw):
+            return
+    __import__(hook).run(raw)
+
+
+if __name__ == "__main__":
+    main()
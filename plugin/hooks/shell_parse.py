@@ -0,0 +1,144 @@
+"""Split a Bash command line into the simple commands it runs.
+
+The planning-phase gate needs to see every command a line executes, not
+just the first word: `rg foo | head` runs two read-only programs, while
+`ls; rm -rf build` hides a writer behind a harmless one. This is a small
+POSIX-style scanner covering what Claude actually sends: quoting and
+escapes, comments, the list and pipeline operators, and redirections.
+Anything that would run code the scanner cannot see or write a file
+(command and process substitution, subshells, redirection to files) or
+that the scanner does not model ($'...' ANSI-C quoting) raises ValueError
+with a short description instead of being guessed at.
+"""
+
+# Control operators separating simple commands, longest first
+_SEPARATORS = ("&&", "||", "|&", ";;", "|", ";", "&", "\n")
+
+# Redirection operators, longest first; "&>" forms are handled with "&"
+_REDIRECTS = ("<<<", "<<-", ">>", ">|", ">&", "<<", "<&", "<>", ">", "<")
+
+# Redirection targets that never create or modify a file
+_NULL_TARGETS = {"/dev/null"}
+
+
+def _check_redirect(op: str, target: str):
+    if op in (">&", "<&") and (target.isdigit() or target == "-"):
+        return  # duplicate or close a descriptor
+    if op in (">", ">>", ">|", "&>", "&>>", ">&") and target in _NULL_TARGETS:
+        return
+    raise ValueError(f"redirection '{op} {target}'")
+
+
+def split_commands(command: str) -> list[list[str]]:
+    """Return the words of each simple command in a command line.
+
+    Pipelines and lists are flattened in order; quotes are removed and
+    allowed redirections (descriptor duplication, output to /dev/null) are
+    dropped. Raises ValueError naming the first unsupported construct.
+    """
+    commands = []
+    words = []
+    word = []
+    in_word = False
+    fd_word = True  # current word is so far an unquoted run of digits
+    redirect = None
+    i = 0
+    n = len(command)
+
+    def end_word():
+        nonlocal word, in_word, fd_word, redirect
+        if in_word:
+            text = "".join(word)
+            if redirect:
+                _check_redirect(redirect, text)
+                redirect = None
+            else:
+                words.append(text)
+        word = []
+        in_word = False
+        fd_word = True
+
+    def end_command():
+        nonlocal words
+        end_word()
+        if redirect:
+            raise ValueError(f"redirection '{redirect}' without a target")
+        if words:
+            commands.append(words)
+        words = []
+
+    while i < n:
+        c = command[i]
+        if c in " \t":
+            end_word()
+            i += 1
+        elif c == "#" and not in_word:
+            while i < n and command[i] != "\n":
+                i += 1
+        elif c == "'":
+            end = command.find("'", i + 1)
+            if end < 0:
+                raise ValueError("an unterminated quote")
+            word.append(command[i + 1:end])
+            in_word, fd_word = True, False
+            i = end + 1
+        elif c == '"':
+            i += 1
+            while True:
+                if i >= n:
+                    raise ValueError("an unterminated quote")
+                c = command[i]
+                if c == '"':
+                    break
+                if c == "`" or command.startswith("$(", i):
+                    raise ValueError("command substitution")
+                if c == "\\" and i + 1 < n and command[i + 1] in '$`"\\\n':
+                    i += 1
+                    c = command[i]
+                word.append(c)
+                i += 1
+            in_word, fd_word = True, False
+            i += 1
+        elif c == "\\":
+            if i + 1 < n and command[i + 1] == "\n":
+                i += 2  # line continuation
+                continue
+            word.append(command[i + 1:i + 2])
+            in_word, fd_word = True, False
+            i += 2
+        elif c == "`" or command.startswith("$(", i):
+            raise ValueError("command substitution")
+        elif command.startswith("$'", i):
+            # Backslash escapes (\') inside would let the scanner lose track of quoting
+            raise ValueError("ANSI-C quoting")
+        elif c in "()":
+            raise ValueError("a subshell")
+        elif c in "<>":
+            if command.startswith("(", i + 1):
+                raise ValueError("process substitution")
+            if redirect:
+                raise ValueError(f"redirection '{redirect}' without a target")
+            if in_word and not fd_word:
+                end_word()
+            # A bare run of digits right before the operator is its descriptor
+            word = []
+            in_word = False
+            fd_word = True
+            redirect = next(op for op in _REDIRECTS if command.startswith(op, i))
+            i += len(redirect)
+        elif command.startswith("&>", i):
+            end_word()
+            if redirect:
+                raise ValueError(f"redirection '{redirect}' without a target")
+            redirect = "&>>" if command.startswith("&>>", i) else "&>"
+            i += len(redirect)
+        elif c in "|;&\n":
+            end_command()
+            i += len(next(op for op in _SEPARATORS if command.startswith(op, i)))
+        else:
+            word.append(c)
+            in_word = True
+            fd_word = fd_word and c.isdigit()
+            i += 1
+    end_command()
+    return commands
@@ -2,66 +2,54 @@
 """Standalone approval validation script.
 
 Validates that approval.json exists, is_optimal is true, and plan_hash
-matches the SHA-256 of docs/plan.md. Outputs structured JSON to stdout.
+matches the SHA-256 of the plan. Outputs structured JSON to stdout.
 
-Usage: python3 validate_approval.py
+Usage: python3 validate_approval.py [--plan NAME]
+  --plan: check the named plan docs/plans/NAME.md (default: docs/plan.md).
 Exit code is always 0. Check the JSON output for {"valid": true/false}.
 """
 
-import hashlib
 import json
 import sys
-from pathlib import Path
 
+import approval_cache
+import metrics
+import plan_namespace
 
-def validate(cwd: str) -> dict:
-    """Validate approval and return structured result."""
-    review_dir = Path(cwd) / ".claude" / "review"
-    approval_path = review_dir / "approval.json"
-    plan_path = Path(cwd) / "docs" / "plan.md"
+REASONS = {
+    approval_cache.NO_PLAN: "No plan file found at {plan}.",
+    approval_cache.NO_APPROVAL: "No approved plan found. Run /plan-with-review first to create and get approval for a plan.",
+    approval_cache.CORRUPT: "approval.json is corrupted or unreadable.",
+    approval_cache.NOT_OPTIMAL: "The plan was not approved as optimal by Codex. Run /plan-with-review to complete the review process.",
+    approval_cache.PLAN_UNREADABLE: "Could not read {plan} to verify hash.",
+    approval_cache.HASH_MISMATCH: "The plan has been modified since it was approved. The approval is no longer valid. Run /plan-with-review to re-approve the current plan.",
+}
 
-    if not plan_path.exists():
-        return {"valid": False, "reason": "No plan file found at docs/plan.md."}
 
-    if not approval_path.exists():
-        return {
-            "valid": False,
-            "reason": "No approved plan found. Run /plan-with-review first to create and get approval for a plan.",
-        }
-
-    try:
-        with open(approval_path) as f:
-            approval = json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return {"valid": False, "reason": "approval.json is corrupted or unreadable."}
-
-    if not approval.get("is_optimal"):
-        return {
-            "valid": False,
-            "reason": "The plan was not approved as optimal by Codex. Run /plan-with-review to complete the review process.",
-        }
-
-    stored_hash = approval.get("plan_hash", "")
+@metrics.timed("validate_approval")
+def validate(cwd: str, plan: str = "") -> dict:
+    """Validate approval of a plan (default docs/plan.md) and return structured result."""
+    metrics.note(cwd=cwd)
     try:
-        with open(plan_path, "rb") as f:
-            actual_hash = hashlib.sha256(f.read()).hexdigest()
-    except OSError:
-        return {"valid": False, "reason": "Could not read docs/plan.md to verify hash."}
-
-    if stored_hash != actual_hash:
-        return {
-            "valid": False,
-            "reason": "The plan has been modified since it was approved. The approval is no longer valid. Run /plan-with-review to re-approve the current plan.",
-        }
-
-    return {"valid": True}
+        namespace = plan_namespace.named(cwd, plan)
+    except ValueError as e:
+        metrics.note(outcome="invalid")
+        return {"valid": False, "reason": f"{str(e).capitalize()}."}
+    with metrics.span("approval"):
+        status = approval_cache.check_approval(cwd, namespace)
+    if status == approval_cache.VALID:
+        return {"valid": True}
+    metrics.note(outcome="invalid")
+    return {"valid": False, "reason": REASONS[status].format(plan=namespace.rel_path)}
 
 
 def main():
     import os
 
     cwd = os.getcwd()
-    result = validate(cwd)
+    args = sys.argv[1:]
+    plan = args[1] if len(args) == 2 and args[0] == "--plan" else ""
+    result = validate(cwd, plan)
     json.dump(result, sys.stdout)
     sys.stdout.write("\n")
 
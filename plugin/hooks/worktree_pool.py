@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""Pool of pre-created worktrees handed out by bootstrap.sh.
+
+`git worktree add` checks out the whole tree, which takes minutes on a
+large repository. The pool keeps pool.size clean worktrees per profile
+ready under .worktrees/pool-*. `acquire` leases one and resets it to the
+requested base on a new branch, which only rewrites the files that differ
+from whatever the worktree had checked out before. `release` returns it to
+the pool: it stops the worktree's hook daemon and drift watcher, detaches
+HEAD (the branch and its commits stay), and removes untracked and ignored
+files, including .claude/review/ and docs/plan.md, so the next session
+starts clean. Ignored paths listed in pool.keep_ignored (build caches,
+node_modules) survive. A worktree with uncommitted changes is not released
+unless --force is given. Worktrees released beyond pool.size are removed.
+
+A profile names a sparse-checkout cone from pool.profiles, read from the
+main worktree's .claude/codex-review.json; its worktrees only check out
+those directories (and the files at the top level).
+
+The pool record (worktree-pool.json) and its lock live in the repository's
+git common dir next to the review cache, so every worktree sees the same
+pool. Git commands run outside the lock; entries being created are marked
+"creating" and leases record the owning process, so an entry left behind by
+a process that died is reclaimed: dropped if it was being created, reused
+if it was leased and has no uncommitted changes.
+
+Usage:
+  python3 worktree_pool.py fill [--base REF] [--profile NAME] [--size N] [repo]     Create worktrees up to the pool size
+  python3 worktree_pool.py acquire [--base REF] [--profile NAME] [--branch NAME] [--owner-pid PID] [repo]  Lease a worktree on a new branch
+  python3 worktree_pool.py release [--force] [worktree]                            Return a leased worktree
+  python3 worktree_pool.py status [repo]                                           Print the pool
+  python3 worktree_pool.py drain [repo]                                            Remove all free worktrees
+Output is JSON on stdout; exit code is always 0. The lease belongs to
+--owner-pid, by default the process that ran worktree_pool.py; a caller
+reading the output through a command substitution must pass its own PID
+(`--owner-pid $$`), since the substitution's subshell exits at once.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import drift_watcher
+import hook_config
+import hook_daemon
+import plan_namespace
+import review_jobs
+
+POOL_SUBDIR = "codex-review"
+POOL_NAME = "worktree-pool.json"
+POOL_LOCK_NAME = "worktree-pool.lock"
+WORKTREES_DIR = ".worktrees"
+# Checking out a large tree can take minutes
+GIT_TIMEOUT = 1800
+
+
+class PoolError(Exception):
+    """A git operation on a pooled worktree failed."""
+
+
+def _git(cwd, *args: str) -> str:
+    try:
+        proc = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True, timeout=GIT_TIMEOUT
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        raise PoolError(f"git {args[0]}: {e}") from e
+    if proc.returncode != 0:
+        raise PoolError(f"git {args[0]}: {proc.stderr.strip() or f'exit code {proc.returncode}'}")
+    return proc.stdout
+
+
+def _locate(repo: str) -> tuple[Path, str]:
+    """Return (pool state directory, main worktree root) for any worktree of a repository."""
+    common_dir = _git(repo, "rev-parse", "--git-common-dir").strip()
+    first = _git(repo, "worktree", "list", "--porcelain").splitlines()[0]
+    return Path(repo, common_dir).resolve() / POOL_SUBDIR, first[len("worktree "):]
+
+
+def _settings(root: str) -> dict:
+    return hook_config.load_config(root)["pool"]
+
+
+def _profile_dirs(settings: dict, profile: str) -> list[str]:
+    if not profile:
+        return []
+    dirs = settings["profiles"].get(profile) if isinstance(settings.get("profiles"), dict) else None
+    if not isinstance(dirs, list) or not dirs or not all(isinstance(d, str) for d in dirs):
+        raise ValueError(f"unknown sparse-checkout profile: {profile!r}")
+    return dirs
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _load(state_dir: Path) -> list[dict]:
+    record = review_jobs.read_json(state_dir / POOL_NAME)
+    entries = record.get("worktrees") if isinstance(record, dict) else None
+    return entries if isinstance(entries, list) else []
+
+
+def _save(state_dir: Path, entries: list[dict]):
+    plan_namespace.atomic_write(state_dir / POOL_NAME, json.dumps({"worktrees": entries}, indent=2))
+
+
+def _reap(root: str, entries: list[dict]) -> list[dict]:
+    """Drop entries whose directory is gone or whose creator died mid-creation."""
+    kept, dropped = [], []
+    for entry in entries:
+        if entry["state"] == "creating" and not review_jobs.pid_alive(entry.get("owner_pid")):
+            dropped.append(entry)
+        elif entry["state"] != "creating" and not os.path.isdir(entry["path"]):
+            dropped.append(entry)
+        else:
+            kept.append(entry)
+    for entry in dropped:
+        _remove(root, entry["path"])
+    return kept
+
+
+def _dirty(path: str) -> bool:
+    """True if the worktree has uncommitted changes (or git cannot tell)."""
+    try:
+        return bool(_git(path, "status", "--porcelain").strip())
+    except PoolError:
+        return True
+
+
+def _new_entry(root: str, profile: str, state: str, owner_pid: int) -> dict:
+    entry_id = f"{datetime.now():%Y%m%d-%H%M%S}-{os.urandom(3).hex()}"
+    return {
+        "id": entry_id,
+        "path": os.path.join(root, WORKTREES_DIR, f"pool-{entry_id}"),
+        "profile": profile,
+        "state": state,
+        "owner_pid": owner_pid,
+        "created_at": _now(),
+    }
+
+
+def _create(root: str, path: str, base: str, dirs: list[str]):
+    """Add a detached worktree at base, checking out only dirs when given."""
+    try:
+        if dirs:
+            _git(root, "worktree", "add", "-q", "--no-checkout", "--detach", path, base)
+            _git(path, "sparse-checkout", "set", "--cone", "--", *dirs)
+            _git(path, "reset", "-q", "--hard")
+        else:
+            _git(root, "worktree", "add", "-q", "--detach", path, base)
+    except PoolError:
+        _remove(root, path)
+        raise
+
+
+def _remove(root: str, path: str):
+    try:
+        _git(root, "worktree", "remove", "--force", path)
+    except PoolError:
+        shutil.rmtree(path, ignore_errors=True)
+        try:
+            _git(root, "worktree", "prune")
+        except PoolError:
+            pass
+
+
+def _stop_services(path: str):
+    # Both exit on request; a missing socket fails fast
+    for name in (hook_daemon.SOCKET_NAME, drift_watcher.SOCKET_NAME):
+        hook_daemon.request(hook_daemon.socket_path(path, name), {"op": "stop"}, hook_daemon.REPLY_TIMEOUT)
+
+
+def _clean(path: str, settings: dict):
+    keep = [arg for pattern in settings.get("keep_ignored") or [] for arg in ("-e", pattern)]
+    _git(path, "clean", "-ffdxq", *keep)
+
+
+def _update(state_dir: Path, entry_id: str, **fields):
+    """Apply fields to one entry under the pool lock."""
+    with plan_namespace.locked(state_dir, POOL_LOCK_NAME):
+        entries = _load(state_dir)
+        for entry in entries:
+            if entry["id"] == entry_id:
+                entry.update(fields)
+        _save(state_dir, entries)
+
+
+def _drop(state_dir: Path, entry_id: str):
+    with plan_namespace.locked(state_dir, POOL_LOCK_NAME):
+        _save(state_dir, [e for e in _load(state_dir) if e["id"] != entry_id])
+
+
+def fill(repo: str, base: str = "HEAD", profile: str = "", size: int | None = None) -> dict:
+    """Create worktrees until the profile has size free (or in-creation) entries."""
+    state_dir, root = _locate(repo)
+    settings = _settings(root)
+    dirs = _profile_dirs(settings, profile)
+    size = settings["size"] if size is None else size
+    with plan_namespace.locked(state_dir, POOL_LOCK_NAME):
+        entries = _reap(root, _load(state_dir))
+        ready = sum(1 for e in entries if e["profile"] == profile and e["state"] in ("free", "creating"))
+        new = [_new_entry(root, profile, "creating", os.getpid()) for _ in range(max(0, size - ready))]
+        _save(state_dir, entries + new)
+
+    created, errors = 0, []
+    for entry in new:
+        try:
+            _create(root, entry["path"], base, dirs)
+        except PoolError as e:
+            errors.append(str(e))
+            _drop(state_dir, entry["id"])
+            continue
+        _update(state_dir, entry["id"], state="free", owner_pid=None)
+        created += 1
+    result = {"created": created, "free": ready + created}
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+def acquire(
+    repo: str, base: str = "main", profile: str = "", branch: str | None = None, owner_pid: int | None = None
+) -> dict:
+    """Lease a worktree of the profile, reset to base on a new branch.
+
+    A free worktree is reused when there is one; otherwise one is created.
+    owner_pid (default: the calling process) is the session holding the
+    lease; once it exits the lease counts as abandoned.
+    """
+    state_dir, root = _locate(repo)
+    settings = _settings(root)
+    dirs = _profile_dirs(settings, profile)
+    try:
+        commit = _git(root, "rev-parse", "--verify", "-q", f"{base}^{{commit}}").strip()
+    except PoolError:
+        raise ValueError(f"unknown base: {base!r}") from None
+    branch = branch or f"plan-review/{datetime.now():%Y%m%d-%H%M%S}"
+    owner_pid = os.getpid() if owner_pid is None else owner_pid
+    lease = {"state": "leased", "owner_pid": owner_pid, "branch": branch, "base": base, "leased_at": _now()}
+
+    with plan_namespace.locked(state_dir, POOL_LOCK_NAME):
+        entries = _reap(root, _load(state_dir))
+        candidates = [e for e in entries if e["profile"] == profile]
+        entry = next((e for e in candidates if e["state"] == "free"), None)
+        if entry is None:
+            entry = next(
+                (
+                    e for e in candidates
+                    if e["state"] == "leased" and not review_jobs.pid_alive(e.get("owner_pid")) and not _dirty(e["path"])
+                ),
+                None,
+            )
+        reused = entry is not None
+        if entry is None:
+            entry = _new_entry(root, profile, "leased", owner_pid)
+            entries.append(entry)
+        entry.update(lease)
+        _save(state_dir, entries)
+
+    try:
+        if reused:
+            _stop_services(entry["path"])
+        else:
+            _create(root, entry["path"], commit, dirs)
+        _git(entry["path"], "checkout", "-q", "-f", "-B", branch, commit)
+        _clean(entry["path"], settings)
+    except PoolError:
+        _drop(state_dir, entry["id"])
+        _remove(root, entry["path"])
+        raise
+    return {"path": entry["path"], "branch": branch, "base": base, "commit": commit, "profile": profile, "reused": reused}
+
+
+def release(path: str, force: bool = False) -> dict:
+    """Return a leased worktree to the pool, or remove it if the pool is full."""
+    path = os.path.realpath(path)
+    state_dir, root = _locate(path)
+    settings = _settings(root)
+    entry = next((e for e in _load(state_dir) if os.path.realpath(e["path"]) == path), None)
+    if entry is None or entry["state"] != "leased":
+        return {"released": False, "reason": f"{path} is not a leased pool worktree"}
+    if not force and _dirty(path):
+        return {
+            "released": False,
+            "reason": f"uncommitted changes in {path}; commit or stash them, or release with --force",
+        }
+
+    _stop_services(path)
+    try:
+        _git(path, "checkout", "-q", "-f", "--detach")
+        _clean(path, settings)
+    except PoolError as e:
+        return {"released": False, "reason": str(e)}
+
+    with plan_namespace.locked(state_dir, POOL_LOCK_NAME):
+        entries = _load(state_dir)
+        free = sum(1 for e in entries if e["profile"] == entry["profile"] and e["state"] == "free")
+        remove = free >= settings["size"]
+        if remove:
+            entries = [e for e in entries if e["id"] != entry["id"]]
+        else:
+            for e in entries:
+                if e["id"] == entry["id"]:
+                    e.update(state="free", owner_pid=None, branch=None, released_at=_now())
+        _save(state_dir, entries)
+    if remove:
+        _remove(root, path)
+    return {"released": True, "removed": remove, "branch": entry.get("branch")}
+
+
+def status(repo: str) -> dict:
+    state_dir, root = _locate(repo)
+    return {"size": _settings(root)["size"], "worktrees": _load(state_dir)}
+
+
+def drain(repo: str) -> dict:
+    """Remove every free worktree; leased ones are left alone."""
+    state_dir, root = _locate(repo)
+    with plan_namespace.locked(state_dir, POOL_LOCK_NAME):
+        entries = _reap(root, _load(state_dir))
+        free = [e for e in entries if e["state"] == "free"]
+        _save(state_dir, [e for e in entries if e["state"] != "free"])
+    for entry in free:
+        _remove(root, entry["path"])
+    return {"removed": len(free)}
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("fill", "acquire", "release", "status", "drain"):
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(2)
+    command, args = args[0], args[1:]
+    options = {"--base": None, "--profile": "", "--size": None, "--branch": None, "--owner-pid": None}
+    force = False
+    while args and (args[0] == "--force" or (len(args) >= 2 and args[0] in options)):
+        if args[0] == "--force":
+            force, args = True, args[1:]
+        else:
+            options[args[0]], args = args[1], args[2:]
+    cwd = os.path.realpath(args[0] if args else os.getcwd())
+
+    try:
+        if command == "fill":
+            size = int(options["--size"]) if options["--size"] is not None else None
+            result = fill(cwd, options["--base"] or "HEAD", options["--profile"], size)
+        elif command == "acquire":
+            owner_pid = int(options["--owner-pid"]) if options["--owner-pid"] is not None else os.getppid()
+            result = acquire(cwd, options["--base"] or "main", options["--profile"], options["--branch"], owner_pid)
+        elif command == "release":
+            result = release(cwd, force)
+        elif command == "status":
+            result = status(cwd)
+        else:
+            result = drain(cwd)
+    except (PoolError, ValueError) as e:
+        result = {"error": str(e)}
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
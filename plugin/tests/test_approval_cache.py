@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Tests for approval_cache.py stat-keyed approval verification."""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import approval_cache
+import plan_review
+
+
+def _setup_approved(tmpdir, plan_content="test plan"):
+    docs_dir = Path(tmpdir) / "docs"
+    docs_dir.mkdir()
+    (docs_dir / "plan.md").write_text(plan_content)
+    review_dir = Path(tmpdir) / ".claude" / "review"
+    review_dir.mkdir(parents=True)
+    plan_hash = hashlib.sha256(plan_content.encode()).hexdigest()
+    approval = {"is_optimal": True, "plan_hash": plan_hash}
+    (review_dir / "approval.json").write_text(json.dumps(approval))
+    return review_dir
+
+
+class TestCheckApproval(unittest.TestCase):
+    """Test status codes and cache behaviour."""
+
+    def test_statuses(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.assertEqual(approval_cache.check_approval(tmpdir), approval_cache.NO_PLAN)
+            review_dir = _setup_approved(tmpdir)
+            self.assertEqual(approval_cache.check_approval(tmpdir), approval_cache.VALID)
+            (review_dir / "approval.json").write_text("{not json")
+            self.assertEqual(approval_cache.check_approval(tmpdir), approval_cache.CORRUPT)
+            (review_dir / "approval.json").unlink()
+            self.assertEqual(approval_cache.check_approval(tmpdir), approval_cache.NO_APPROVAL)
+
+    @patch.object(approval_cache, "RACY_WINDOW_NS", 0)
+    def test_cache_hit_skips_hash(self):
+        """A clean cache entry answers without reading the plan."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _setup_approved(tmpdir)
+            self.assertEqual(approval_cache.check_approval(tmpdir), approval_cache.VALID)
+            with patch.object(approval_cache, "hash_file", side_effect=AssertionError("rehashed")):
+                self.assertEqual(approval_cache.check_approval(tmpdir), approval_cache.VALID)
+
+    @patch.object(approval_cache, "RACY_WINDOW_NS", 0)
+    def test_plan_change_detected(self):
+        """Editing the plan changes the fingerprint and forces a re-hash."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _setup_approved(tmpdir)
+            self.assertEqual(approval_cache.check_approval(tmpdir), approval_cache.VALID)
+            (Path(tmpdir) / "docs" / "plan.md").write_text("tset plan")
+            self.assertEqual(
+                approval_cache.check_approval(tmpdir), approval_cache.HASH_MISMATCH
+            )
+
+    def test_racy_entry_rehashed(self):
+        """Entries younger than the racy window are re-verified."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _setup_approved(tmpdir)
+            approval_cache.check_approval(tmpdir)
+            with patch.object(approval_cache, "hash_file", wraps=approval_cache.hash_file) as hashed:
+                self.assertEqual(approval_cache.check_approval(tmpdir), approval_cache.VALID)
+                hashed.assert_called_once()
+
+    def test_write_approval_seeds_cache(self):
+        """write_approval fills the cache so the first gate check skips the plan hash."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_dir = Path(tmpdir) / "docs"
+            docs_dir.mkdir()
+            plan_path = docs_dir / "plan.md"
+            plan_path.write_text("approved plan")
+            old = 1_000_000_000
+            os.utime(plan_path, ns=(old, old))
+            review_dir = plan_review.get_review_dir(tmpdir)
+
+            with patch.object(approval_cache, "RACY_WINDOW_NS", 0):
+                plan_hash = approval_cache.hash_file(str(plan_path))
+                plan_review.write_approval(review_dir, str(plan_path), plan_hash, 1, None)
+                self.assertTrue((review_dir / approval_cache.CACHE_NAME).exists())
+                with patch.object(approval_cache, "hash_file", side_effect=AssertionError("rehashed")):
+                    self.assertEqual(approval_cache.check_approval(tmpdir), approval_cache.VALID)
+
+    def test_invalidate_removes_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            review_dir = _setup_approved(tmpdir)
+            approval_cache.check_approval(tmpdir)
+            self.assertTrue((review_dir / approval_cache.CACHE_NAME).exists())
+            plan_review.invalidate_approval(review_dir)
+            self.assertFalse((review_dir / approval_cache.CACHE_NAME).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
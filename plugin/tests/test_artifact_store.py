@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Tests for artifact_store.py compact review artifact storage."""
+
+import gzip
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).parent.parent / "hooks"
+sys.path.insert(0, str(HOOKS_DIR))
+import artifact_store
+
+
+def plan_text(version: int) -> str:
+    lines = [f"- step {i}: do the thing in module_{i}.py carefully\n" for i in range(200)]
+    lines[version * 10] = f"- step {version * 10}: revised in v{version}\n"
+    return "# Plan\n\n## Goal\nShip it.\n\n## Changes\n" + "".join(lines)
+
+
+class TestDelta(unittest.TestCase):
+    """Test line delta encoding."""
+
+    def test_round_trip(self):
+        cases = [
+            ("", "a\nb\n"),
+            ("a\nb\n", ""),
+            ("a\nb\nc\n", "a\nx\nc\nd"),
+            ("no newline", "no newline\n"),
+            (plan_text(1), plan_text(2)),
+        ]
+        for base, text in cases:
+            ops = artifact_store.encode_delta(base, text)
+            self.assertEqual(artifact_store.apply_delta(base, ops), text, (base, text))
+
+    def test_large_text_not_encoded(self):
+        text = "line\n" * (artifact_store.MAX_DELTA_LINES + 1)
+        self.assertIsNone(artifact_store.encode_delta(text, text))
+
+
+class TestSnapshots(unittest.TestCase):
+    """Test snapshot storage and reconstruction."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.review_dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_keyframes_and_deltas(self):
+        for version in range(1, 7):
+            artifact_store.save_snapshot(self.review_dir, version, plan_text(version), keyframe_interval=4)
+        names = sorted(p.name for p in self.review_dir.iterdir())
+        self.assertEqual(names, [
+            "plan_v1.snapshot.md.gz",
+            "plan_v2.snapshot.delta.gz",
+            "plan_v3.snapshot.delta.gz",
+            "plan_v4.snapshot.delta.gz",
+            "plan_v5.snapshot.md.gz",
+            "plan_v6.snapshot.delta.gz",
+        ])
+        for version in range(1, 7):
+            self.assertEqual(artifact_store.read_snapshot(self.review_dir, version), plan_text(version))
+        delta_size = (self.review_dir / "plan_v3.snapshot.delta.gz").stat().st_size
+        self.assertLess(delta_size, (self.review_dir / "plan_v1.snapshot.md.gz").stat().st_size)
+
+    def test_rewritten_plan_stored_as_keyframe(self):
+        """A delta no smaller than the keyframe is not kept."""
+        artifact_store.save_snapshot(self.review_dir, 1, "# Old\n")
+        artifact_store.save_snapshot(self.review_dir, 2, "# Completely different\n")
+        self.assertTrue((self.review_dir / "plan_v2.snapshot.md.gz").exists())
+        self.assertEqual(artifact_store.read_snapshot(self.review_dir, 2), "# Completely different\n")
+
+    def test_resnapshot_replaces_other_form(self):
+        """A version reused after a superseded review keeps one snapshot."""
+        artifact_store.save_snapshot(self.review_dir, 1, plan_text(1))
+        artifact_store.save_snapshot(self.review_dir, 2, plan_text(2))
+        artifact_store.save_snapshot(self.review_dir, 2, "# Rewritten\n")
+        self.assertFalse((self.review_dir / "plan_v2.snapshot.delta.gz").exists())
+        self.assertEqual(artifact_store.read_snapshot(self.review_dir, 2), "# Rewritten\n")
+
+    def test_plain_snapshot_from_older_install(self):
+        (self.review_dir / "plan_v1.snapshot.md").write_text("plain\n")
+        self.assertEqual(artifact_store.read_snapshot(self.review_dir, 1), "plain\n")
+        artifact_store.save_snapshot(self.review_dir, 2, "plain\nmore\n")
+        self.assertEqual(artifact_store.read_snapshot(self.review_dir, 2), "plain\nmore\n")
+
+    def test_missing_or_broken_chain(self):
+        self.assertIsNone(artifact_store.read_snapshot(self.review_dir, 1))
+        (self.review_dir / "plan_v2.snapshot.delta.gz").write_bytes(
+            gzip.compress(json.dumps({"base": 2, "ops": []}).encode())
+        )
+        self.assertIsNone(artifact_store.read_snapshot(self.review_dir, 2))
+
+
+class TestCompact(unittest.TestCase):
+    """Test compaction of older versions' artifacts."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.review_dir = Path(self._tmp.name)
+        self.review = {"is_optimal": False, "summary": "v1 issues"}
+        for version in (1, 2):
+            artifact_store.save_snapshot(self.review_dir, version, plan_text(version))
+            (self.review_dir / f"plan_v{version}.codex.json").write_text(json.dumps(self.review))
+            (self.review_dir / f"plan_v{version}.annotated.md").write_text(
+                plan_text(version).replace("## Changes\n", "## Changes\n> Codex: split this\n")
+            )
+            (self.review_dir / f"plan_v{version}.events.jsonl").write_text('{"type": "turn"}\n')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_older_versions_compacted(self):
+        artifact_store.compact(self.review_dir, 2)
+        names = {p.name for p in self.review_dir.iterdir()}
+        self.assertTrue({
+            "plan_v1.codex.json.gz", "plan_v1.annotated.delta.gz", "plan_v1.events.jsonl.gz",
+            "plan_v2.codex.json", "plan_v2.annotated.md", "plan_v2.events.jsonl",
+        } <= names, names)
+        self.assertFalse({"plan_v1.codex.json", "plan_v1.annotated.md", "plan_v1.events.jsonl"} & names)
+
+    def test_readers_see_both_forms(self):
+        artifact_store.compact(self.review_dir, 2)
+        for version in (1, 2):
+            self.assertEqual(artifact_store.read_review(self.review_dir, version), self.review)
+            self.assertIn("> Codex: split this", artifact_store.read_annotated(self.review_dir, version))
+            self.assertEqual(
+                artifact_store.read_artifact(self.review_dir, f"plan_v{version}.events.jsonl"),
+                b'{"type": "turn"}\n',
+            )
+
+    def test_compact_is_idempotent(self):
+        artifact_store.compact(self.review_dir, 2)
+        before = sorted(p.name for p in self.review_dir.iterdir())
+        artifact_store.compact(self.review_dir, 2)
+        self.assertEqual(sorted(p.name for p in self.review_dir.iterdir()), before)
+
+    def test_show_cli(self):
+        artifact_store.compact(self.review_dir, 2)
+        with tempfile.TemporaryDirectory() as cwd:
+            (Path(cwd) / ".claude").mkdir()
+            (Path(cwd) / ".claude" / "review").symlink_to(self.review_dir)
+            script = str(HOOKS_DIR / "artifact_store.py")
+            proc = subprocess.run(
+                [sys.executable, script, "show", "1", "snapshot"], cwd=cwd, capture_output=True, text=True
+            )
+            self.assertEqual(proc.returncode, 0)
+            self.assertEqual(proc.stdout, plan_text(1))
+            proc = subprocess.run(
+                [sys.executable, script, "show", "9", "review"], cwd=cwd, capture_output=True, text=True
+            )
+            self.assertEqual(proc.returncode, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
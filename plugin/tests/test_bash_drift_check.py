@@ -2,14 +2,32 @@
 """Tests for bash_drift_check.py PostToolUse hook."""
 
 import hashlib
+import io
 import json
+import os
+import subprocess
 import sys
 import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
 import bash_drift_check
+import drift_state
+import hook_config
+
+
+def _init_repo(tmpdir):
+    """Create a git repo with one committed file."""
+    env = {**os.environ, "GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@t",
+           "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@t"}
+    subprocess.run(["git", "init", "-q"], cwd=tmpdir, check=True)
+    (Path(tmpdir) / "tracked.txt").write_text("original\n")
+    (Path(tmpdir) / "vendor").mkdir()
+    (Path(tmpdir) / "vendor" / "lib.txt").write_text("vendored\n")
+    subprocess.run(["git", "add", "."], cwd=tmpdir, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=tmpdir, check=True, env=env)
 
 
 class TestDriftDetection(unittest.TestCase):
@@ -97,5 +115,129 @@ class TestApprovalAwareSkip(unittest.TestCase):
                 self.assertEqual(ctx.exception.code, 0)
 
 
+class TestPorcelainParsing(unittest.TestCase):
+    """Test porcelain v2 -z parsing."""
+
+    def test_record_kinds(self):
+        data = (
+            b"1 .M N... 100644 100644 100644 aaa aaa src/a b.py\0"
+            b"2 R. N... 100644 100644 100644 bbb bbb R100 new.py\0old.py\0"
+            b"? untracked.txt\0"
+        )
+        entries = drift_state.parse_porcelain_v2(data)
+        self.assertEqual(set(entries), {"src/a b.py", "new.py", "untracked.txt"})
+        self.assertTrue(entries["src/a b.py"].startswith("1 .M"))
+        self.assertEqual(entries["untracked.txt"], "?")
+
+    def test_pathspec_scoping(self):
+        cmd = drift_state.status_command({"pathspecs": ["src"], "exclude": ["vendor"]})
+        self.assertIn("--porcelain=v2", cmd)
+        self.assertIn("--no-renames", cmd)
+        self.assertEqual(cmd[-2:], [":(top)src", ":(top,exclude)vendor"])
+
+
+class TestBaselineDelta(unittest.TestCase):
+    """Test delta-based drift detection against a pre-command baseline."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+        _init_repo(self.cwd)
+        self.config = hook_config.load_config(self.cwd)["drift"]
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _run_hook(self, key="toolu_1"):
+        hook_input = json.dumps({
+            "tool_name": "Bash",
+            "tool_use_id": key,
+            "cwd": self.cwd,
+            "tool_input": {"command": "ls"},
+        })
+        stdout = io.StringIO()
+        with patch("sys.stdout", stdout):
+            bash_drift_check.run(hook_input)
+        return json.loads(stdout.getvalue()) if stdout.getvalue() else {}
+
+    def test_preexisting_dirt_not_reported(self):
+        """Files dirty before the command do not block."""
+        (Path(self.cwd) / "tracked.txt").write_text("dirty before\n")
+        drift_state.capture_baseline(self.cwd, "toolu_1", self.config)
+        self.assertEqual(self._run_hook(), {})
+
+    def test_new_change_reported(self):
+        """Only paths changed by the command are reported."""
+        (Path(self.cwd) / "tracked.txt").write_text("dirty before\n")
+        drift_state.capture_baseline(self.cwd, "toolu_1", self.config)
+        (Path(self.cwd) / "created.txt").write_text("new\n")
+        result = self._run_hook()
+        self.assertEqual(result["decision"], "block")
+        context = result["hookSpecificOutput"]["additionalContext"]
+        self.assertIn("created.txt", context)
+        self.assertNotIn("tracked.txt", context)
+
+    def test_content_change_to_dirty_file_reported(self):
+        """A dirty file modified again by the command is reported."""
+        path = Path(self.cwd) / "tracked.txt"
+        path.write_text("dirty before\n")
+        drift_state.capture_baseline(self.cwd, "toolu_1", self.config)
+        path.write_text("dirty again, longer\n")
+        changed = drift_state.changed_paths(
+            self.cwd,
+            drift_state.pop_baseline(self.cwd, "toolu_1"),
+            drift_state.git_status(self.cwd, self.config),
+        )
+        self.assertEqual(changed, ["tracked.txt"])
+
+    def test_baseline_consumed(self):
+        drift_state.capture_baseline(self.cwd, "toolu_1", self.config)
+        self._run_hook()
+        self.assertIsNone(drift_state.pop_baseline(self.cwd, "toolu_1"))
+
+    def test_no_baseline_falls_back_to_full_scan(self):
+        (Path(self.cwd) / "tracked.txt").write_text("dirty\n")
+        result = self._run_hook(key="toolu_missing")
+        self.assertEqual(result["decision"], "block")
+
+    def test_readonly_call_skips_scan(self):
+        """A call the gate marked read-only is not scanned, and the marker is consumed."""
+        (Path(self.cwd) / "tracked.txt").write_text("dirty\n")
+        drift_state.record_readonly(self.cwd, "toolu_1")
+        with patch("drift_state.git_status") as git_status:
+            with self.assertRaises(SystemExit):
+                self._run_hook()
+        git_status.assert_not_called()
+        self.assertIsNone(drift_state.pop_baseline(self.cwd, "toolu_1"))
+
+    def test_readonly_call_runs_no_git(self):
+        """Neither the gate nor the drift check runs git for a read-only call."""
+        import enforce_approval
+
+        hook_input = json.dumps({
+            "tool_name": "Bash", "tool_use_id": "toolu_1", "cwd": self.cwd,
+            "tool_input": {"command": "rg foo | head"},
+        })
+        git_calls = []
+        real_run = subprocess.run
+
+        def counting_run(cmd, *args, **kwargs):
+            if cmd and cmd[0] == "git":
+                git_calls.append(cmd)
+            return real_run(cmd, *args, **kwargs)
+
+        with patch("subprocess.run", side_effect=counting_run), patch("sys.stdout", io.StringIO()):
+            enforce_approval.run(hook_input)
+            with self.assertRaises(SystemExit):
+                bash_drift_check.run(hook_input)
+        self.assertEqual(git_calls, [])
+
+    def test_excluded_pathspec_ignored(self):
+        """Changes under excluded pathspecs are not scanned."""
+        config = dict(self.config, exclude=["vendor"])
+        (Path(self.cwd) / "vendor" / "lib.txt").write_text("patched\n")
+        self.assertEqual(drift_state.git_status(self.cwd, config), {})
+
+
 if __name__ == "__main__":
     unittest.main()
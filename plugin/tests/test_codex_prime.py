@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Tests for codex_prime.py warm Codex sessions."""
+
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import codex_prime
+import hook_config
+import plan_review
+
+SETTINGS = hook_config.DEFAULTS["prime"]
+
+
+class PrimeTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+        self.review_dir = plan_review.get_review_dir(self.cwd)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write_record(self, **fields):
+        record = {"prime_id": "p1", "state": "running", "topic": ""}
+        record.update(fields)
+        (self.review_dir / codex_prime.PRIME_NAME).write_text(json.dumps(record))
+
+    def ready(self, thread_id="primed-tid", age=0):
+        finished = datetime.now(timezone.utc) - timedelta(seconds=age)
+        self.write_record(state="ready", thread_id=thread_id, finished_at=finished.isoformat())
+
+
+class TestStart(PrimeTestCase):
+    """Test when a priming run is started."""
+
+    def test_disabled(self):
+        (Path(self.cwd) / ".claude" / "codex-review.json").write_text(json.dumps({"prime": {"enabled": False}}))
+        with patch("subprocess.Popen", side_effect=AssertionError("started")):
+            self.assertFalse(codex_prime.start(self.cwd)["started"])
+
+    def test_not_started_mid_cycle(self):
+        plan_review.store_codex_thread_id(self.review_dir, "tid")
+        with patch("subprocess.Popen", side_effect=AssertionError("started")):
+            result = codex_prime.start(self.cwd)
+        self.assertEqual(result, {"started": False, "reason": "a review session is already active"})
+
+    def test_started_after_approved_cycle(self):
+        plan_review.store_codex_thread_id(self.review_dir, "old-tid")
+        (self.review_dir / "approval.json").write_text("{}")
+        with patch("subprocess.Popen", return_value=MagicMock(pid=4242)) as popen:
+            result = codex_prime.start(self.cwd, "add retries")
+        self.assertEqual(result, {"started": True, "worker_pid": 4242})
+        record = codex_prime.read_prime(self.review_dir)
+        self.assertEqual((record["state"], record["topic"]), ("running", "add retries"))
+        self.assertEqual(popen.call_args[0][0][2:], ["--worker", self.cwd, record["prime_id"]])
+
+
+class TestWorker(PrimeTestCase):
+    """Test the detached priming run."""
+
+    def run_worker(self, proc, thread_id="primed-tid"):
+        def fake_run(cmd, prompt, timeout, on_thread_id, on_spawn):
+            self.cmd, self.prompt = cmd, prompt
+            on_spawn(31337)
+            on_thread_id(thread_id)
+            return proc, thread_id
+
+        with patch("codex_stream.run_streaming", side_effect=fake_run):
+            codex_prime.run_worker(self.cwd, "p1")
+        return codex_prime.read_prime(self.review_dir)
+
+    def test_ready_with_thread(self):
+        self.write_record(topic="add retries")
+        record = self.run_worker(MagicMock(returncode=0))
+        self.assertEqual((record["state"], record["thread_id"], record["codex_pid"]), ("ready", "primed-tid", 31337))
+        self.assertEqual(self.cmd[:5], ["codex", "exec", "--json", "--cd", self.cwd])
+        self.assertIn("The plan will be about: add retries", self.prompt)
+        self.assertIn(f"Repository: {Path(self.cwd).name}", self.prompt)
+        # The session is handed over by the first review, not stored here
+        self.assertIsNone(plan_review.get_codex_thread_id(self.review_dir))
+
+    def test_failure_recorded(self):
+        self.write_record()
+        record = self.run_worker(MagicMock(returncode=1))
+        self.assertEqual((record["state"], record["reason"]), ("failed", "codex exited with code 1"))
+
+    def test_superseded_record_left_alone(self):
+        self.write_record(prime_id="p2")
+        with patch("codex_stream.run_streaming", side_effect=AssertionError("codex ran")):
+            codex_prime.run_worker(self.cwd, "p1")
+        self.assertEqual(codex_prime.read_prime(self.review_dir)["prime_id"], "p2")
+
+
+class TestAdopt(PrimeTestCase):
+    """Test handing a primed session to the first review."""
+
+    def test_ready_session_adopted_once(self):
+        self.ready()
+        self.assertEqual(codex_prime.adopt(self.review_dir, SETTINGS), "primed-tid")
+        self.assertIsNone(codex_prime.adopt(self.review_dir, SETTINGS))
+
+    def test_stale_session_discarded(self):
+        self.ready(age=SETTINGS["max_age_seconds"] + 1)
+        self.assertIsNone(codex_prime.adopt(self.review_dir, SETTINGS))
+        self.assertIsNone(codex_prime.read_prime(self.review_dir))
+
+    def test_waits_for_running_prime(self):
+        worker = subprocess.Popen(["sleep", "30"], start_new_session=True)
+        self.addCleanup(worker.kill)
+        self.write_record(worker_pid=worker.pid)
+        sleeps = []
+        thread_id = codex_prime.adopt(self.review_dir, SETTINGS, wait=5, sleep=lambda s: (sleeps.append(s), self.ready()))
+        self.assertEqual((thread_id, len(sleeps)), ("primed-tid", 1))
+
+    def test_running_prime_stopped_after_wait(self):
+        worker = subprocess.Popen(["sleep", "30"], start_new_session=True)
+        self.addCleanup(worker.kill)
+        self.write_record(worker_pid=worker.pid)
+        self.assertIsNone(codex_prime.adopt(self.review_dir, SETTINGS, wait=2, sleep=lambda s: None))
+        self.assertEqual(worker.wait(timeout=5), -9)
+        self.assertIsNone(codex_prime.read_prime(self.review_dir))
+
+    def test_recycled_pid_not_killed(self):
+        """A recorded PID that no longer leads its own process group is left alone."""
+        other = subprocess.Popen(["sleep", "30"])
+        self.addCleanup(other.kill)
+        self.write_record(worker_pid=other.pid)
+        with patch("os.killpg") as killpg:
+            self.assertIsNone(codex_prime.adopt(self.review_dir, SETTINGS, wait=0, sleep=lambda s: None))
+        killpg.assert_not_called()
+        self.assertIsNone(other.poll())
+
+
+class TestFirstReviewResumesPrimedSession(PrimeTestCase):
+    """Test that the first review of a cycle resumes the primed session with the full plan."""
+
+    PLAN = "## Goal\nShip it\n## Context\nNone\n## Approach\nDo it\n## Changes\n- edit\n## Risks\nLow\n## Open Questions\nNone\n"
+
+    def review(self):
+        calls = []
+
+        def fake_review(cwd, review_dir, schema, output, prompt, thread_id, resume_prompt=None, **kwargs):
+            calls.append((thread_id, resume_prompt))
+            approved = {field: "" for field in plan_review.REQUIRED_OUTPUT_FIELDS}
+            approved.update(is_optimal=True, blocking_issues=[], recommended_changes=[])
+            Path(output).write_text(json.dumps(approved))
+            return MagicMock(returncode=0), thread_id or "fresh-tid"
+
+        with patch.object(plan_review, "run_codex_review", side_effect=fake_review), \
+                patch("review_cache.repo_state", return_value=None), \
+                patch("evidence.build", return_value=None):
+            plan_review.review_plan(self.cwd, self.review_dir, str(Path(self.cwd) / "plan.md"), self.PLAN, "h1", 1)
+        return calls
+
+    def test_primed_thread_resumed(self):
+        self.ready()
+        self.assertEqual(self.review(), [("primed-tid", None)])
+        self.assertEqual(plan_review.get_codex_thread_id(self.review_dir), "primed-tid")
+        self.assertEqual(plan_review.get_thread_seen_version(self.review_dir), 1)
+
+    def test_existing_session_wins(self):
+        self.ready()
+        plan_review.store_codex_thread_id(self.review_dir, "cycle-tid")
+        self.assertEqual(self.review(), [("cycle-tid", None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
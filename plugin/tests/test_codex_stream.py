@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Tests for codex_stream.py streaming Codex event consumption."""
+
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import codex_stream
+
+
+def _fake_codex(body: str) -> list[str]:
+    """Return a command running a small Python stand-in for codex."""
+    return [sys.executable, "-c", textwrap.dedent(body)]
+
+
+class TestParseThreadEvent(unittest.TestCase):
+
+    def test_thread_started(self):
+        line = b'{"type": "thread.started", "thread_id": "abc"}\n'
+        self.assertEqual(codex_stream.parse_thread_event(line), "abc")
+
+    def test_other_lines(self):
+        self.assertIsNone(codex_stream.parse_thread_event(b'{"type": "turn.started"}'))
+        self.assertIsNone(codex_stream.parse_thread_event(b"plain text"))
+        self.assertIsNone(codex_stream.parse_thread_event(b"{broken"))
+
+
+class TestRunStreaming(unittest.TestCase):
+
+    def test_events_logged_and_thread_reported(self):
+        cmd = _fake_codex("""
+            import sys
+            prompt = sys.stdin.read()
+            print('{"type": "thread.started", "thread_id": "t-1"}')
+            print('{"type": "item.completed", "len": %d}' % len(prompt))
+            print("warning", file=sys.stderr)
+        """)
+        seen = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_path = os.path.join(tmpdir, "plan_v1.events.jsonl")
+            proc, tid = codex_stream.run_streaming(
+                cmd, "hello", timeout=30, event_log=log_path, on_thread_id=seen.append
+            )
+            lines = Path(log_path).read_text().splitlines()
+        self.assertEqual(proc.returncode, 0)
+        self.assertEqual(tid, "t-1")
+        self.assertEqual(seen, ["t-1"])
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"len": 5', lines[1])
+        self.assertEqual(proc.stdout, b"")
+        self.assertEqual(proc.stderr, b"warning\n")
+
+    def test_thread_id_survives_timeout(self):
+        """The thread ID is reported before the run is killed."""
+        cmd = _fake_codex("""
+            import sys, time
+            print('{"type": "thread.started", "thread_id": "slow-1"}', flush=True)
+            time.sleep(30)
+        """)
+        seen = []
+        with self.assertRaises(subprocess.TimeoutExpired) as ctx:
+            codex_stream.run_streaming(cmd, "", timeout=1, on_thread_id=seen.append)
+        self.assertEqual(seen, ["slow-1"])
+        self.assertEqual(ctx.exception.thread_id, "slow-1")
+
+    def test_stderr_tail_bounded(self):
+        cmd = _fake_codex("""
+            import sys
+            for i in range(2000):
+                print("x" * 100, i, file=sys.stderr)
+        """)
+        with patch.object(codex_stream, "STDERR_TAIL_BYTES", 1000):
+            proc, _ = codex_stream.run_streaming(cmd, "", timeout=30)
+        self.assertLessEqual(len(proc.stderr), 1000)
+        self.assertTrue(proc.stderr.endswith(b" 1999\n"))
+
+
+class TestEventLogRotation(unittest.TestCase):
+
+    def test_rotates_at_max_bytes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "events.jsonl")
+            log = codex_stream.EventLog(path, max_bytes=100, backups=2)
+            for i in range(10):
+                log.write(b'{"n": %d, "pad": "................"}\n' % i)
+            log.close()
+            self.assertTrue(os.path.exists(path + ".1"))
+            self.assertTrue(os.path.exists(path + ".2"))
+            self.assertFalse(os.path.exists(path + ".3"))
+            self.assertLessEqual(os.path.getsize(path), 100)
+            self.assertIn(b'"n": 9', Path(path).read_bytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
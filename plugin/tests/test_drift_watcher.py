@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Tests for drift_watcher.py inotify-backed drift tracking."""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import bash_drift_check
+import drift_state
+import drift_watcher
+import hook_config
+import hook_daemon
+
+
+def _inotify_available() -> bool:
+    try:
+        drift_watcher.Inotify().close()
+    except (OSError, AttributeError):
+        return False
+    return True
+
+
+def _init_repo(tmpdir):
+    env = {**os.environ, "GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@t",
+           "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@t"}
+    subprocess.run(["git", "init", "-q"], cwd=tmpdir, check=True)
+    (Path(tmpdir) / "src").mkdir()
+    (Path(tmpdir) / "src" / "app.py").write_text("print()\n")
+    (Path(tmpdir) / ".gitignore").write_text("build/\n")
+    (Path(tmpdir) / "build").mkdir()
+    subprocess.run(["git", "add", "."], cwd=tmpdir, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=tmpdir, check=True, env=env)
+
+
+@unittest.skipUnless(_inotify_available(), "inotify not available")
+class TestWatcher(unittest.TestCase):
+    """Test event tracking in the watcher itself."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.path.realpath(self._tmp.name)
+        _init_repo(self.cwd)
+        self.watcher = drift_watcher.Watcher(self.cwd, hook_config.load_config(self.cwd)["drift"])
+
+    def tearDown(self):
+        self.watcher.close()
+        self._tmp.cleanup()
+
+    def test_touched_since_mark(self):
+        (Path(self.cwd) / "before.txt").write_text("x\n")
+        seq = self.watcher.mark()
+        (Path(self.cwd) / "src" / "app.py").write_text("changed\n")
+        self.assertEqual(self.watcher.touched_since(seq), ["src/app.py"])
+
+    def test_new_directories_are_watched(self):
+        seq = self.watcher.mark()
+        (Path(self.cwd) / "pkg").mkdir()
+        self.watcher.mark()  # picks up the directory and watches it
+        (Path(self.cwd) / "pkg" / "mod.py").write_text("x\n")
+        self.assertEqual(self.watcher.touched_since(seq), ["pkg", "pkg/mod.py"])
+
+    def test_ignored_and_internal_dirs_not_watched(self):
+        seq = self.watcher.mark()
+        (Path(self.cwd) / "build" / "out.o").write_text("x\n")
+        subprocess.run(["git", "status"], cwd=self.cwd, capture_output=True, check=True)
+        self.assertEqual(self.watcher.touched_since(seq), [])
+
+    def test_overflow_invalidates_outstanding_marks(self):
+        seq = self.watcher.mark()
+        with self.watcher.lock:
+            self.watcher._invalidate()
+        self.assertIsNone(self.watcher.touched_since(seq))
+        self.assertEqual(self.watcher.touched_since(self.watcher.mark()), [])
+
+    def test_reconcile_detects_missed_events(self):
+        self.watcher.reconcile()
+        seq = self.watcher.mark()
+        (Path(self.cwd) / "src" / "app.py").write_text("changed\n")
+        with self.watcher.lock:
+            self.watcher.drain()
+            self.watcher.touched.clear()  # as if the event had been lost
+        self.watcher.reconcile()
+        self.assertEqual(self.watcher.stats["missed"], 1)
+        self.assertIsNone(self.watcher.touched_since(seq))
+
+    def test_reconcile_accepts_observed_changes(self):
+        self.watcher.reconcile()
+        seq = self.watcher.mark()
+        (Path(self.cwd) / "src" / "app.py").write_text("changed\n")
+        self.watcher.reconcile()
+        self.assertEqual(self.watcher.stats["missed"], 0)
+        self.assertEqual(self.watcher.touched_since(seq), ["src/app.py"])
+
+
+@unittest.skipUnless(_inotify_available(), "inotify not available")
+class TestDriftCheckWithWatcher(unittest.TestCase):
+    """Test the gate and drift check using a running watcher."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory(dir="/tmp")
+        self.cwd = os.path.realpath(self._tmp.name)
+        _init_repo(self.cwd)
+        self.config = hook_config.load_config(self.cwd)["drift"]
+        self.server = drift_watcher.make_server(self.cwd)
+        self.thread = threading.Thread(target=hook_daemon.serve, args=(self.server,))
+        self.thread.start()
+
+    def tearDown(self):
+        hook_daemon.request(self.server.socket_file, {"op": "stop"}, 2)
+        self.thread.join(timeout=5)
+        self._tmp.cleanup()
+
+    def _run_hook(self):
+        stdout = io.StringIO()
+        hook_input = json.dumps({
+            "tool_name": "Bash", "tool_use_id": "toolu_w", "cwd": self.cwd, "tool_input": {"command": "ls"},
+        })
+        with patch("sys.stdout", stdout):
+            try:
+                bash_drift_check.run(hook_input)
+            except SystemExit:
+                pass
+        return json.loads(stdout.getvalue()) if stdout.getvalue() else {}
+
+    def test_baseline_is_watcher_mark(self):
+        self.assertTrue(drift_state.capture_baseline(self.cwd, "toolu_w", self.config))
+        baseline = drift_state.pop_baseline(self.cwd, "toolu_w")
+        self.assertEqual(set(baseline["watch"]), {"epoch", "seq"})
+
+    def test_reports_only_changes_during_call(self):
+        (Path(self.cwd) / "dirty-before.txt").write_text("x\n")
+        drift_state.capture_baseline(self.cwd, "toolu_w", self.config)
+        (Path(self.cwd) / "src" / "new.py").write_text("x\n")
+        (Path(self.cwd) / "docs").mkdir()
+        (Path(self.cwd) / "docs" / "plan.md").write_text("# Plan\n")
+        with patch("drift_state.status_command", wraps=drift_state.status_command) as status_command:
+            result = self._run_hook()
+        context = result["hookSpecificOutput"]["additionalContext"]
+        self.assertIn("src/new.py", context)
+        self.assertNotIn("dirty-before.txt", context)
+        self.assertNotIn("- docs/plan.md", context)
+        # git status ran on the touched paths only
+        self.assertIsNotNone(status_command.call_args.args[1])
+
+    def test_rewrite_with_same_content_not_reported(self):
+        drift_state.capture_baseline(self.cwd, "toolu_w", self.config)
+        (Path(self.cwd) / "src" / "app.py").write_text("print()\n")
+        self.assertEqual(self._run_hook(), {})
+
+    def test_stale_epoch_falls_back_to_scan(self):
+        (Path(self.cwd) / "dirty-before.txt").write_text("x\n")
+        drift_state._write_call_state(self.cwd, "toolu_w", {"watch": {"epoch": "old", "seq": 0}})
+        result = self._run_hook()
+        self.assertIn("dirty-before.txt", result["hookSpecificOutput"]["additionalContext"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -160,10 +160,58 @@ class TestBashGating(unittest.TestCase):
             self.assertIsNotNone(result, f"Command should be denied: {cmd}")
 
     def test_shell_operators_denied(self):
-        """Shell operators denied pre-approval."""
-        for cmd in ["ls | grep foo", "ls && rm file", "ls; rm file",
+        """Shell operators hiding writers, redirections and substitutions denied."""
+        for cmd in ["ls && rm file", "ls; rm file", "ls || rm file",
                      "echo foo > file", "echo foo >> file",
-                     "cat < file", "$(whoami)", "ls `pwd`"]:
+                     "cat < file", "$(whoami)", "ls `pwd`",
+                     "cat file | tee out", "rg foo | xargs rm",
+                     "echo \"$(whoami)\"", "diff <(ls a) <(ls b)",
+                     "(cd src && ls)", "ls 2> errors.log", "ls &> out.txt",
+                     "cat <<EOF", "git log >| log.txt",
+                     "echo $'\\'';touch PWNED; #'", "rg $'a\\tb'"]:
+            result = enforce_approval.check_bash_command(cmd)
+            self.assertIsNotNone(result, f"Command should be denied: {cmd}")
+
+    def test_readonly_pipelines_allowed(self):
+        """Pipelines and lists made only of read-only commands allowed."""
+        for cmd in ["ls | grep foo", "rg foo | head", "git log --oneline | wc -l",
+                     "rg -n TODO src | tail -5", "ls src && ls docs", "pwd; ls",
+                     "cat a.txt |& grep err", "git diff HEAD~1 | head -n 50",
+                     "ls\nrg foo"]:
+            result = enforce_approval.check_bash_command(cmd)
+            self.assertIsNone(result, f"Command should be allowed: {cmd}")
+
+    def test_quoted_operators_allowed(self):
+        """Operator characters inside quotes or escaped are plain text."""
+        for cmd in ["rg 'a|b'", 'rg "foo;bar" src', "grep -E 'x > y' f",
+                     "echo '$(whoami)'", "rg foo\\|bar", "echo 'a && b'  # note; rm x"]:
+            result = enforce_approval.check_bash_command(cmd)
+            self.assertIsNone(result, f"Command should be allowed: {cmd}")
+
+    def test_harmless_redirections_allowed(self):
+        """Descriptor duplication and output to /dev/null are allowed."""
+        for cmd in ["rg foo 2>/dev/null", "ls missing 2>&1 | head",
+                     "git status > /dev/null", "ls &>/dev/null", "rg x 2>&-"]:
+            result = enforce_approval.check_bash_command(cmd)
+            self.assertIsNone(result, f"Command should be allowed: {cmd}")
+
+    def test_env_assignment_prefix_denied(self):
+        """NAME=value prefixes can redirect read-only tools to other programs."""
+        for cmd in ["GIT_EXTERNAL_DIFF=./x git diff", "ls && PAGER=vim git log"]:
+            result = enforce_approval.check_bash_command(cmd)
+            self.assertIsNotNone(result, f"Command should be denied: {cmd}")
+
+    def test_env_wrapper_checks_wrapped_command(self):
+        """env runs the command it is given, which must itself be allowed."""
+        for cmd in ["env rm -rf x", "env python3 -c 'open(\"x\", \"w\")'", "env FOO=1 git diff",
+                     "env -S 'rm -rf x'", "env -i touch x", "ls | env sh -c 'rm x'"]:
+            result = enforce_approval.check_bash_command(cmd)
+            self.assertIsNotNone(result, f"Command should be denied: {cmd}")
+        self.assertIsNone(enforce_approval.check_bash_command("env rg foo"))
+
+    def test_malformed_quoting_denied(self):
+        """Unterminated quotes are denied rather than guessed at."""
+        for cmd in ["rg 'foo", 'echo "bar']:
             result = enforce_approval.check_bash_command(cmd)
             self.assertIsNotNone(result, f"Command should be denied: {cmd}")
 
@@ -173,6 +221,8 @@ class TestBashGating(unittest.TestCase):
             "python3 /path/to/hooks/validate_approval.py",
             "python3 validate_approval.py",
             "python /some/dir/validate_approval.py",
+            "python3 /path/to/hooks/artifact_store.py show 1 annotated",
+            "python3 /path/to/hooks/codex_prime.py start --topic 'add retries'",
         ]:
             result = enforce_approval.check_bash_command(cmd)
             self.assertIsNone(result, f"Command should be allowed: {cmd}")
@@ -184,6 +234,66 @@ class TestBashGating(unittest.TestCase):
             self.assertIsNotNone(result, f"Command should be denied: {cmd}")
 
 
+class TestReadonlyClassification(unittest.TestCase):
+    """Test which allowed commands are provably read-only."""
+
+    def test_readonly_commands(self):
+        for cmd in ["ls -la", "rg foo | head", "git log --oneline | wc -l",
+                     "git stash list", "fd -e py", "tree -L 2", "env", "env ls",
+                     "git diff 2>/dev/null"]:
+            self.assertTrue(enforce_approval.is_readonly_command(cmd), cmd)
+
+    def test_allowed_but_not_readonly(self):
+        """Allowed commands that can still write or run programs are scanned."""
+        for cmd in ["git stash", "git stash pop", "git diff --output=out.patch",
+                     "rg --pre ./conv foo", "fd -x touch", "fd -HX wc",
+                     "fd --exec-batch wc", "tree -o listing.txt", "env tree -o out.txt",
+                     "file -C -m magic", "ls | git diff --ext-diff",
+                     "python3 validate_approval.py", "python3 /any/dir/validate_approval.py",
+                     "python3 codex_prime.py start", "env python3 validate_approval.py"]:
+            self.assertIsNone(enforce_approval.check_bash_command(cmd), cmd)
+            self.assertFalse(enforce_approval.is_readonly_command(cmd), cmd)
+
+    def test_denied_commands_not_readonly(self):
+        for cmd in ["rm -rf build", "ls > out.txt", "ls $(pwd)"]:
+            self.assertFalse(enforce_approval.is_readonly_command(cmd), cmd)
+
+
+class TestDriftBaseline(unittest.TestCase):
+    """Test the PreToolUse side of delta drift detection."""
+
+    def _handle(self, tmpdir, command):
+        import io
+        import subprocess
+        from unittest.mock import patch
+
+        subprocess.run(["git", "init", "-q"], cwd=tmpdir, check=True)
+        hook_input = {
+            "tool_name": "Bash",
+            "tool_use_id": "toolu_abc",
+            "cwd": tmpdir,
+            "tool_input": {"command": command},
+        }
+        with patch("sys.stdout", io.StringIO()):
+            enforce_approval.handle_bash(hook_input)
+        return Path(tmpdir) / ".claude" / "review" / "drift" / "toolu_abc.json"
+
+    def test_baseline_recorded_for_allowed_command(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._handle(tmpdir, "git stash")
+            self.assertIn("status", json.loads(path.read_text()))
+
+    def test_readonly_marker_for_readonly_command(self):
+        """Provably read-only commands get a marker instead of a baseline."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._handle(tmpdir, "git status | head")
+            self.assertEqual(json.loads(path.read_text()), {"readonly": True})
+
+    def test_no_baseline_for_denied_command(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.assertFalse(self._handle(tmpdir, "rm -rf src").exists())
+
+
 class TestMalformedInput(unittest.TestCase):
     """Test fail-closed behavior on malformed input."""
 
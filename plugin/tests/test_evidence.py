@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Tests for evidence.py plan evidence appendices."""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import evidence
+import hook_config
+import plan_review
+
+GIT_ENV = {**os.environ, "GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@t",
+           "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@t"}
+
+MODULE = '''"""Client helpers."""
+
+MAX_RETRIES = 3
+
+
+class SharedClient:
+    def send(self, request):
+        return request
+
+
+def build_client(config):
+    return SharedClient()
+'''
+
+PLAN = """## Changes
+- `src/client.py:11`: make `build_client()` read `MAX_RETRIES` from config
+- Add retries to SharedClient.send and a test in `tests/test_client.py`
+- See https://example.com/docs/guide.md for the retry policy
+- Update client.py callers under `src/`
+"""
+
+
+def _init_repo(path: str):
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    (Path(path) / "src").mkdir()
+    (Path(path) / "src" / "client.py").write_text(MODULE)
+    subprocess.run(["git", "add", "."], cwd=path, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=path, check=True, env=GIT_ENV)
+
+
+class TestExtractReferences(unittest.TestCase):
+    """Test pulling paths and identifiers out of plan text."""
+
+    def test_paths_and_identifiers(self):
+        paths, names = evidence.extract_references(PLAN)
+        self.assertEqual(paths, [
+            ("src/client.py", 11), ("tests/test_client.py", None), ("client.py", None), ("src/", None),
+        ])
+        self.assertEqual(names, ["build_client", "MAX_RETRIES", "SharedClient", "send"])
+
+    def test_urls_commands_and_common_words_ignored(self):
+        paths, names = evidence.extract_references(
+            "Run `python3 -m pytest -q`, read http://host/a/b.py, set `self` and `None`, and/or `x`."
+        )
+        self.assertEqual(paths, [])
+        self.assertEqual(names, [])
+
+    def test_reference_counts_are_capped(self):
+        text = " ".join(f"`helper_{i}` src/mod_{i}.py" for i in range(100))
+        paths, names = evidence.extract_references(text)
+        self.assertEqual(len(paths), evidence.MAX_PATHS)
+        self.assertEqual(len(names), evidence.MAX_IDENTIFIERS)
+
+
+class TestCollect(unittest.TestCase):
+    """Test resolving references in a repository."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+        _init_repo(self.cwd)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_appendix_contents(self):
+        appendix = evidence.collect(self.cwd, PLAN, 16 * 1024, 10)
+        self.assertIn("- `src/client.py:11`: exists, 12 lines", appendix)
+        self.assertIn("  11 | def build_client(config):", appendix)
+        self.assertIn("- `tests/test_client.py`: not found", appendix)
+        self.assertIn("- `client.py`: not found; tracked files with that name: `src/client.py`", appendix)
+        self.assertIn("- `src/`: directory, 1 entries", appendix)
+        self.assertIn("- `build_client`: src/client.py:11", appendix)
+        self.assertIn("- `MAX_RETRIES`: src/client.py:3", appendix)
+        self.assertIn("- `SharedClient`: src/client.py:6", appendix)
+        self.assertIn("- `send`: src/client.py:7", appendix)
+
+    def test_only_tracked_worktree_files_read(self):
+        with tempfile.TemporaryDirectory() as outside:
+            secret = Path(outside) / "secret.txt"
+            secret.write_text("token=hunter2\n")
+            (Path(self.cwd) / "src" / "link.py").symlink_to(secret)
+            (Path(self.cwd) / "local.json").write_text('{"token": "hunter2"}\n')
+            rel = os.path.relpath(secret, self.cwd)
+            plan = f"- `{secret}:1`\n- `{rel}:1`\n- `src/link.py:1`\n- local.json:1\n"
+            appendix = evidence.collect(self.cwd, plan, 16 * 1024, 10)
+        self.assertNotIn("hunter2", appendix)
+        self.assertIn(f"- `{secret}:1`: outside the worktree, not read", appendix)
+        self.assertIn(f"- `{rel}:1`: outside the worktree, not read", appendix)
+        self.assertIn("- `src/link.py:1`: outside the worktree, not read", appendix)
+        self.assertIn("- `local.json:1`: exists, not tracked", appendix)
+
+    def test_size_cap(self):
+        appendix = evidence.collect(self.cwd, PLAN, 600, 10)
+        self.assertLessEqual(len(appendix.encode()), 600)
+        self.assertIn("more entries omitted to fit the size limit", appendix)
+
+    def test_nothing_referenced(self):
+        self.assertIsNone(evidence.collect(self.cwd, "## Goal\nMake it faster.\n", 1024, 10))
+
+
+class TestBuild(unittest.TestCase):
+    """Test the cached entry point."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+        _init_repo(self.cwd)
+        self.review_dir = Path(self.cwd) / ".claude" / "review"
+        self.review_dir.mkdir(parents=True)
+        self.settings = hook_config.DEFAULTS["evidence"]
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_cached_by_text_and_head(self):
+        first = evidence.build(self.cwd, self.review_dir, PLAN, self.settings)
+        with patch.object(evidence, "collect", side_effect=AssertionError("searched again")):
+            self.assertEqual(evidence.build(self.cwd, self.review_dir, PLAN, self.settings), first)
+
+        subprocess.run(["git", "commit", "-q", "--allow-empty", "-m", "next"], cwd=self.cwd, check=True, env=GIT_ENV)
+        with patch.object(evidence, "collect", return_value="fresh") as collect:
+            self.assertEqual(evidence.build(self.cwd, self.review_dir, PLAN, self.settings), "fresh")
+        collect.assert_called_once()
+
+    def test_disabled_or_outside_git(self):
+        self.assertIsNone(evidence.build(self.cwd, self.review_dir, PLAN, {**self.settings, "enabled": False}))
+        with tempfile.TemporaryDirectory() as plain:
+            self.assertIsNone(evidence.build(plain, Path(plain), PLAN, self.settings))
+
+
+class TestPromptAppendix(unittest.TestCase):
+    """Test the evidence block in the Codex prompt."""
+
+    def test_appendix_attached(self):
+        prompt = plan_review.build_codex_prompt(PLAN, 1, evidence_text="### Paths\n- `a.py`: exists, 1 lines")
+        self.assertIn("--- EVIDENCE START ---\n### Paths\n- `a.py`: exists, 1 lines\n--- EVIDENCE END ---", prompt)
+        self.assertLess(prompt.index("--- PLAN END ---"), prompt.index("--- EVIDENCE START ---"))
+
+    def test_no_appendix(self):
+        self.assertNotIn("EVIDENCE", plan_review.build_codex_prompt(PLAN, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
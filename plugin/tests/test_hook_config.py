@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Tests for hook_config.py configuration loading."""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import hook_config
+
+
+class TestLoadConfig(unittest.TestCase):
+    """Test defaults and per-worktree overrides."""
+
+    def test_defaults_without_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.assertEqual(hook_config.load_config(tmpdir), hook_config.DEFAULTS)
+
+    def test_section_overrides_merge(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / hook_config.CONFIG_PATH
+            path.parent.mkdir(parents=True)
+            path.write_text(json.dumps({"drift": {"exclude": ["vendor"]}}))
+            config = hook_config.load_config(tmpdir)
+            self.assertEqual(config["drift"]["exclude"], ["vendor"])
+            self.assertTrue(config["drift"]["baseline"])
+
+    def test_malformed_file_ignored(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / hook_config.CONFIG_PATH
+            path.parent.mkdir(parents=True)
+            path.write_text("{not json")
+            self.assertEqual(hook_config.load_config(tmpdir), hook_config.DEFAULTS)
+
+    def test_returned_config_is_a_copy(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            hook_config.load_config(tmpdir)["drift"]["exclude"].append("x")
+            self.assertEqual(hook_config.load_config(tmpdir)["drift"]["exclude"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
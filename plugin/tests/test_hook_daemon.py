@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Tests for hook_daemon.py resident hook server."""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import enforce_approval
+import hook_daemon
+
+
+class TestSocketPath(unittest.TestCase):
+    """Test socket location."""
+
+    def test_socket_under_review_dir(self):
+        path = hook_daemon.socket_path("/repo")
+        self.assertEqual(path, "/repo/.claude/review/hookd.sock")
+
+    def test_long_paths_fall_back_to_private_dir(self):
+        """Deep worktrees exceed the AF_UNIX path limit."""
+        cwd = "/repo/" + "x" * 120
+        with tempfile.TemporaryDirectory() as runtime, patch.dict(os.environ, {"XDG_RUNTIME_DIR": runtime}):
+            path = hook_daemon.socket_path(cwd)
+            self.assertEqual(os.path.dirname(path), os.path.join(runtime, "codex-review"))
+            self.assertEqual(os.stat(os.path.dirname(path)).st_mode & 0o777, 0o700)
+            self.assertEqual(path, hook_daemon.socket_path(cwd))
+
+    def test_shared_fallback_dir_rejected(self):
+        """A fallback directory others can write to is not used."""
+        cwd = "/repo/" + "x" * 120
+        with tempfile.TemporaryDirectory() as runtime, patch.dict(os.environ, {"XDG_RUNTIME_DIR": runtime}):
+            os.mkdir(os.path.join(runtime, "codex-review"), 0o777)
+            os.chmod(os.path.join(runtime, "codex-review"), 0o777)
+            self.assertEqual(hook_daemon.socket_path(cwd), os.path.join(cwd, ".claude", "review", "hookd.sock"))
+
+
+class TestRelay(unittest.TestCase):
+    """Test thin-client relay and in-process fallback."""
+
+    def test_no_daemon_falls_back(self):
+        """relay() returns False when no socket exists."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch("os.getcwd", return_value=tmpdir):
+                self.assertFalse(hook_daemon.relay("enforce_approval", "{}"))
+
+    def test_stale_socket_falls_back(self):
+        """A socket file with no listener is treated as no daemon."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(hook_daemon.socket_path(tmpdir))
+            path.parent.mkdir(parents=True)
+            path.write_text("")
+            with patch("os.getcwd", return_value=tmpdir):
+                self.assertFalse(hook_daemon.relay("enforce_approval", "{}"))
+
+    def test_disabled_by_env(self):
+        with patch.dict(os.environ, {hook_daemon.DISABLE_ENV: "1"}):
+            self.assertFalse(hook_daemon.relay("enforce_approval", "{}"))
+
+
+class TestDaemonServer(unittest.TestCase):
+    """Test the daemon serving hook requests over its socket."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory(dir="/tmp")
+        self.cwd = self._tmp.name
+        self.server = hook_daemon.make_server(self.cwd)
+        self.thread = threading.Thread(target=hook_daemon.serve, args=(self.server,))
+        self.thread.start()
+
+    def tearDown(self):
+        hook_daemon.request(self.server.socket_file, {"op": "stop"}, 2)
+        self.thread.join(timeout=5)
+        self._tmp.cleanup()
+
+    def test_ping(self):
+        reply = hook_daemon.request(self.server.socket_file, {"op": "ping"}, 2)
+        self.assertTrue(reply["ok"])
+        self.assertEqual(reply["pid"], os.getpid())
+
+    def test_relayed_decision_matches_in_process(self):
+        """Daemon output is identical to running the hook in-process."""
+        payload = json.dumps({
+            "tool_name": "Bash",
+            "cwd": self.cwd,
+            "tool_input": {"command": "npm install"},
+        })
+        relayed = io.StringIO()
+        with patch("os.getcwd", return_value=self.cwd), patch("sys.stdout", relayed):
+            self.assertTrue(hook_daemon.relay("enforce_approval", payload))
+
+        direct = io.StringIO()
+        with patch("sys.stdout", direct):
+            enforce_approval.run(payload)
+
+        self.assertEqual(relayed.getvalue(), direct.getvalue())
+        output = json.loads(relayed.getvalue())
+        self.assertEqual(output["hookSpecificOutput"]["permissionDecision"], "deny")
+
+    def test_socket_of_another_user_not_trusted(self):
+        with patch("os.getuid", return_value=os.getuid() + 1):
+            self.assertIsNone(hook_daemon.request(self.server.socket_file, {"op": "ping"}, 2))
+
+    def test_refuses_second_daemon(self):
+        with self.assertRaises(RuntimeError):
+            hook_daemon.make_server(self.cwd)
+
+    def test_unknown_hook_rejected(self):
+        reply = hook_daemon.request(
+            self.server.socket_file, {"op": "hook", "hook": "plan_review", "payload": "{}"}, 2
+        )
+        self.assertIn("error", reply)
+
+
+if __name__ == "__main__":
+    unittest.main()
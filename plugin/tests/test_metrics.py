@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Tests for metrics.py hook latency instrumentation."""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import enforce_approval
+import metrics
+
+
+class TestRecording(unittest.TestCase):
+    """Test that instrumented runs append one line each."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_timed_run_records_phases(self):
+        @metrics.timed("demo")
+        def hook():
+            metrics.note(cwd=self.cwd, items=3)
+            with metrics.span("work"):
+                pass
+            metrics.note(outcome="block")
+
+        hook()
+        hook()
+        runs = metrics.load(self.cwd)
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(runs[0]["hook"], "demo")
+        self.assertEqual(runs[0]["outcome"], "block")
+        self.assertEqual(runs[0]["sizes"], {"items": 3})
+        self.assertIn("work", runs[0]["phases"])
+        self.assertGreaterEqual(runs[0]["total_ms"], runs[0]["phases"]["work"])
+
+    def test_unknown_worktree_not_recorded(self):
+        metrics.timed("demo")(lambda: None)()
+        self.assertEqual(metrics.load(self.cwd), [])
+
+    def test_disabled_by_config(self):
+        config = Path(self.cwd) / ".claude" / "codex-review.json"
+        config.parent.mkdir()
+        config.write_text(json.dumps({"metrics": {"enabled": False}}))
+        metrics.timed("demo")(lambda: metrics.note(cwd=self.cwd))()
+        self.assertFalse(os.path.exists(metrics.metrics_path(self.cwd)))
+
+    def test_spans_outside_a_run_are_ignored(self):
+        with metrics.span("orphan"):
+            metrics.note(outcome="deny")
+        self.assertEqual(metrics.current().phases, {})
+
+    def test_enforce_approval_outcome(self):
+        hook_input = json.dumps({
+            "tool_name": "Bash",
+            "cwd": self.cwd,
+            "tool_input": {"command": "npm install"},
+        })
+        with patch("sys.stdout", io.StringIO()):
+            enforce_approval.run(hook_input)
+        (run,) = metrics.load(self.cwd)
+        self.assertEqual(run["hook"], "enforce_approval")
+        self.assertEqual(run["outcome"], "deny")
+        self.assertEqual(run["sizes"]["command_bytes"], len("npm install"))
+        self.assertIn("approval", run["phases"])
+        self.assertIn("bash_classify", run["phases"])
+
+
+class TestReporting(unittest.TestCase):
+    """Test percentile summaries and Prometheus export."""
+
+    RUNS = [
+        {"hook": "h", "outcome": "allow" if i % 10 else "deny", "total_ms": float(i), "phases": {"git": i / 2}}
+        for i in range(1, 101)
+    ]
+
+    def test_percentiles(self):
+        self.assertEqual(metrics.percentile([3, 1, 2], 0.5), 2)
+        stats = metrics.summarize(self.RUNS)["h"]
+        self.assertEqual(stats["count"], 100)
+        self.assertEqual(stats["outcomes"], {"deny": 10, "allow": 90})
+        self.assertEqual(stats["phases"]["total"]["p50"], 50.0)
+        self.assertEqual(stats["phases"]["total"]["p95"], 95.0)
+        self.assertEqual(stats["phases"]["total"]["p99"], 99.0)
+        self.assertEqual(stats["phases"]["git"]["p99"], 49.5)
+
+    def test_prometheus_textfile(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            review_dir = Path(tmpdir) / ".claude" / "review"
+            review_dir.mkdir(parents=True)
+            (review_dir / metrics.METRICS_NAME).write_text(
+                "\n".join(json.dumps(run) for run in self.RUNS) + "\nnot json\n"
+            )
+            output = os.path.join(tmpdir, "codex_review.prom")
+            metrics.write_prometheus(tmpdir, output)
+            text = Path(output).read_text()
+        wt = os.path.basename(tmpdir)
+        self.assertIn("# TYPE codex_review_hook_phase_seconds summary", text)
+        self.assertIn(
+            f'codex_review_hook_phase_seconds{{worktree="{wt}",hook="h",phase="total",quantile="0.99"}} 0.099000',
+            text,
+        )
+        self.assertIn(f'codex_review_hook_runs_total{{worktree="{wt}",hook="h",outcome="deny"}} 10', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Tests for plan_lint.py pre-flight plan checks."""
+
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import plan_lint
+import plan_review
+
+REQUIRED = plan_review.REQUIRED_HEADINGS
+
+PLAN = """# Plan
+
+## Goal
+Retry failed requests.
+
+## Context
+The client lives in `src/client.py`.
+
+## Approach
+Wrap send() in a retry loop.
+
+## Changes
+- `src/client.py`: retry `send()` up to three times
+- New file `tests/test_retry.py`:
+  - covers `tests/test_retry.py` retries and backoff
+- Add `docs/retry.md` describing the policy
+
+## Risks
+Duplicate writes on non-idempotent requests.
+
+## Open Questions
+- [x] Which status codes are retried? 5xx only.
+- Should retries be configurable?
+  - Deferred by user to a follow-up.
+"""
+
+
+class TestParseSections(unittest.TestCase):
+    """Test the single-pass section parser."""
+
+    def test_nesting_and_fences(self):
+        text = "## A\none\n### A.1\ntwo\n```\n## Not a heading\n```\n## B\nthree\n"
+        sections, fenced = plan_lint.parse_sections(text)
+        self.assertEqual([(s.heading, s.line) for s in sections], [("## A", 1), ("### A.1", 3), ("## B", 8)])
+        self.assertEqual([text for _, text in sections[0].lines], ["one", "two", "```", "## Not a heading", "```"])
+        self.assertEqual(sections[0].in_fence, {5, 6, 7})
+        self.assertEqual(fenced, {"## Not a heading": 6})
+
+    def test_fence_needs_matching_close(self):
+        sections, _ = plan_lint.parse_sections("~~~~\n```\n## Inside\n~~~~\n## Outside\n")
+        self.assertEqual([s.heading for s in sections], ["## Outside"])
+
+
+class TestChecks(unittest.TestCase):
+    """Test the stock checks."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+        (Path(self.cwd) / "src").mkdir()
+        (Path(self.cwd) / "src" / "client.py").write_text("")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def lint(self, text, skip=()):
+        return plan_lint.lint(text, self.cwd, REQUIRED, skip)
+
+    def test_clean_plan(self):
+        self.assertEqual(self.lint(PLAN), [])
+
+    def test_heading_only_in_code_block(self):
+        text = PLAN.replace("## Risks\n", "```\n## Risks\n```\n")
+        self.assertEqual(plan_review.validate_plan_structure(text), ["## Risks"])
+        [finding] = self.lint(text)
+        self.assertEqual(finding[0], 19)
+        self.assertIn("`## Risks` appears only inside a code block", finding[1])
+
+    def test_empty_and_placeholder_sections(self):
+        text = PLAN.replace("Retry failed requests.\n", "").replace(
+            "Duplicate writes on non-idempotent requests.", "TBD\n<!-- fill in later -->"
+        )
+        self.assertEqual(
+            self.lint(text),
+            [(3, '`## Goal` has no content; write it out or state "None"'),
+             (17, '`## Risks` has no content; write it out or state "None"')],
+        )
+
+    def test_subsection_counts_as_content(self):
+        self.assertEqual(self.lint(PLAN.replace("Retry failed requests.\n", "### Scope\nClient only.\n")), [])
+
+    def test_missing_paths(self):
+        subprocess.run(["git", "init", "-q"], cwd=self.cwd, check=True)
+        subprocess.run(["git", "add", "."], cwd=self.cwd, check=True)
+        text = PLAN.replace("- `src/client.py`: retry", "- `lib/client.py` and `lib/`: retry")
+        self.assertEqual(self.lint(text), [
+            (13, "`lib/client.py` does not exist (tracked files with that name: `src/client.py`); "
+                 "fix the path or say the file is new"),
+            (13, "`lib` does not exist; fix the path or say the file is new"),
+        ])
+        self.assertEqual(self.lint(text, skip=["missing_paths"]), [])
+
+    def test_unique_basename_accepted(self):
+        subprocess.run(["git", "init", "-q"], cwd=self.cwd, check=True)
+        subprocess.run(["git", "add", "."], cwd=self.cwd, check=True)
+        text = PLAN.replace("- `src/client.py`: retry", "- `client.py`: retry")
+        self.assertEqual(self.lint(text), [])
+
+        (Path(self.cwd) / "tests").mkdir()
+        (Path(self.cwd) / "tests" / "client.py").write_text("")
+        subprocess.run(["git", "add", "."], cwd=self.cwd, check=True)
+        self.assertEqual(self.lint(text), [
+            (13, "`client.py` matches several tracked files (`src/client.py`, `tests/client.py`); "
+                 "give the full path"),
+        ])
+
+    def test_open_questions(self):
+        text = PLAN.replace("  - Deferred by user to a follow-up.\n", "- [ ] Pick a backoff curve\n")
+        self.assertEqual(self.lint(text), [
+            (23, "unresolved open question: Should retries be configurable?"),
+            (24, "unresolved open question: Pick a backoff curve"),
+        ])
+        self.assertEqual(self.lint(PLAN.replace("- [x] Which", "- Which")), [])
+
+    def test_required_sections_cannot_be_skipped(self):
+        findings = self.lint(PLAN.replace("## Approach\n", ""), skip=list(plan_lint.CHECKS))
+        self.assertEqual(findings, [(0, "`## Approach` is missing")])
+
+    def test_registered_check(self):
+        with patch.dict(plan_lint.CHECKS, {"no_shouting": lambda plan: [(1, "calm down")]}):
+            self.assertEqual(self.lint(PLAN), [(1, "calm down")])
+
+
+class TestHookBlocksBeforeReview(unittest.TestCase):
+    """Test that a failing plan is blocked without using a revision."""
+
+    def test_blocked_without_version_or_codex(self):
+        with tempfile.TemporaryDirectory() as cwd:
+            (Path(cwd) / "docs").mkdir()
+            (Path(cwd) / "docs" / "plan.md").write_text(PLAN.replace("Retry failed requests.", "TODO"))
+            payload = json.dumps({"cwd": cwd, "tool_input": {"file_path": "docs/plan.md"}})
+            stdout = io.StringIO()
+            with patch.object(plan_review, "run_codex_review", side_effect=AssertionError("Codex ran")), \
+                    redirect_stdout(stdout), self.assertRaises(SystemExit):
+                plan_review.run(payload)
+            result = json.loads(stdout.getvalue())
+            self.assertEqual(result["decision"], "block")
+            self.assertEqual(result["reason"], "Plan failed pre-flight checks (2 issues)")
+            context = result["hookSpecificOutput"]["additionalContext"]
+            self.assertIn("did not count as a revision", context)
+            self.assertIn("- line 3: `## Goal` has no content", context)
+            self.assertIn("- line 7: `src/client.py` does not exist", context)
+            self.assertEqual(plan_review.read_version_counter(Path(cwd) / ".claude" / "review"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Tests for plan_namespace.py named plans, session binding and cycle locks."""
+
+import hashlib
+import io
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import approval_cache
+import enforce_approval
+import plan_namespace
+import plan_review
+import run_hook
+import validate_approval
+
+PLAN = "## Goal\nShip it\n## Context\nNone\n## Approach\nDo it\n## Changes\n- edit\n## Risks\nLow\n## Open Questions\nNone\n"
+
+
+class NamespaceTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+        (Path(self.cwd) / "docs" / "plans").mkdir(parents=True)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write_plan(self, name: str, text: str = PLAN) -> plan_namespace.Namespace:
+        namespace = plan_namespace.named(self.cwd, name)
+        Path(namespace.path).write_text(text)
+        return namespace
+
+    def approve(self, namespace: plan_namespace.Namespace):
+        namespace.review_dir.mkdir(parents=True, exist_ok=True)
+        plan_hash = hashlib.sha256(Path(namespace.path).read_bytes()).hexdigest()
+        (namespace.review_dir / "approval.json").write_text(json.dumps({"is_optimal": True, "plan_hash": plan_hash}))
+
+
+class TestResolve(NamespaceTestCase):
+    """Test mapping file paths to plans."""
+
+    def test_default_and_named(self):
+        self.assertEqual(plan_namespace.resolve(self.cwd, "docs/plan.md").name, "")
+        auth = plan_namespace.resolve(self.cwd, str(Path(self.cwd) / "docs" / "plans" / "auth.md"))
+        self.assertEqual((auth.name, auth.rel_path), ("auth", "docs/plans/auth.md"))
+        self.assertEqual(auth.review_dir, Path(self.cwd) / ".claude" / "review" / "plans" / "auth")
+
+    def test_not_plans(self):
+        for path in ["docs/plans/auth.txt", "docs/plans/team/auth.md", "docs/plans/.md", "docs/other.md", ""]:
+            self.assertIsNone(plan_namespace.resolve(self.cwd, path), path)
+        with self.assertRaises(ValueError):
+            plan_namespace.named(self.cwd, "../auth")
+
+    def test_dispatcher_fast_path_matches(self):
+        payload = json.dumps({"cwd": self.cwd, "tool_input": {"file_path": "docs/plans/auth.md"}})
+        self.assertFalse(run_hook.plan_review_noop(payload))
+        self.assertTrue(run_hook.plan_review_noop(payload.replace("plans/auth.md", "notes/auth.md")))
+
+
+class TestSessionApproval(NamespaceTestCase):
+    """Test that a session is held to the approval of the plan it wrote."""
+
+    def test_bound_session_needs_its_own_plan(self):
+        auth, billing = self.write_plan("auth"), self.write_plan("billing")
+        self.approve(auth)
+        plan_namespace.bind_session(self.cwd, "s-billing", billing)
+        self.assertFalse(enforce_approval.validate_approval(self.cwd, "s-billing"))
+        self.approve(billing)
+        self.assertTrue(enforce_approval.validate_approval(self.cwd, "s-billing"))
+
+    def test_unbound_session_accepts_any_approved_plan(self):
+        self.assertEqual(approval_cache.check_session(self.cwd), approval_cache.NO_PLAN)
+        self.approve(self.write_plan("auth"))
+        self.assertTrue(enforce_approval.validate_approval(self.cwd, "s-new"))
+
+    def test_validate_approval_cli_by_name(self):
+        auth = self.write_plan("auth")
+        self.assertEqual(
+            validate_approval.validate(self.cwd, "billing"),
+            {"valid": False, "reason": "No plan file found at docs/plans/billing.md."},
+        )
+        self.approve(auth)
+        self.assertEqual(validate_approval.validate(self.cwd, "auth"), {"valid": True})
+        self.assertFalse(validate_approval.validate(self.cwd)["valid"])
+
+
+class TestCycleLock(NamespaceTestCase):
+    """Test that overlapping hook runs allocate distinct versions."""
+
+    def test_versions_distinct_under_lock(self):
+        review_dir = plan_review.get_review_dir(self.cwd, plan_namespace.named(self.cwd, "auth"))
+        versions = []
+
+        def allocate():
+            with plan_namespace.locked(review_dir):
+                current = plan_review.read_version_counter(review_dir)
+                time.sleep(0.01)
+                plan_namespace.atomic_write(review_dir / "version_counter", str(current + 1))
+                versions.append(current + 1)
+
+        threads = [threading.Thread(target=allocate) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(versions), list(range(1, 9)))
+        self.assertEqual(plan_review.read_version_counter(review_dir), 8)
+
+
+class TestNamedPlanReview(NamespaceTestCase):
+    """Test that writing a named plan reviews it in its own namespace."""
+
+    def run_hook(self, name: str, session_id: str) -> dict:
+        self.write_plan(name)
+        prompts = []
+
+        def fake_review(cwd, review_dir, schema, output, prompt, thread_id, resume_prompt=None, **kwargs):
+            prompts.append(prompt)
+            Path(output).write_text(json.dumps({
+                "is_optimal": False, "blocking_issues": [], "recommended_changes": [],
+                "annotated_plan_markdown": "", "summary": "no",
+            }))
+            return MagicMock(returncode=0), "tid-" + name
+
+        payload = json.dumps({
+            "cwd": self.cwd, "session_id": session_id, "tool_input": {"file_path": f"docs/plans/{name}.md"},
+        })
+        stdout = io.StringIO()
+        with patch.object(plan_review, "run_codex_review", side_effect=fake_review), \
+                patch("review_cache.repo_state", return_value=None), \
+                patch("evidence.build", return_value=None), \
+                redirect_stdout(stdout), self.assertRaises(SystemExit):
+            plan_review.run(payload)
+        self.prompts = prompts
+        return json.loads(stdout.getvalue())
+
+    def test_namespaces_independent(self):
+        self.approve(self.write_plan("auth"))
+        result = self.run_hook("billing", "s-billing")
+        self.assertIn("Revise docs/plans/billing.md", result["hookSpecificOutput"]["additionalContext"])
+
+        billing = plan_namespace.named(self.cwd, "billing")
+        auth = plan_namespace.named(self.cwd, "auth")
+        self.assertEqual(plan_review.read_version_counter(billing.review_dir), 1)
+        self.assertEqual(len(self.prompts), 1)
+        self.assertTrue((auth.review_dir / "approval.json").exists())
+        self.assertFalse((Path(self.cwd) / ".claude" / "review" / "version_counter").exists())
+        self.assertEqual(plan_namespace.session_plan(self.cwd, "s-billing").name, "billing")
+
+
+if __name__ == "__main__":
+    unittest.main()
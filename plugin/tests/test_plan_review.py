@@ -2,16 +2,21 @@
 """Tests for plan_review.py PostToolUse hook."""
 
 import hashlib
+import io
 import json
 import os
 import sys
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 # Add parent directory to path so we can import the hook
 sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import approval_cache
+import plan_namespace
 import plan_review
 
 
@@ -141,7 +146,10 @@ class TestApprovalLifecycle(unittest.TestCase):
             (review_dir / "plan_v1.codex.json").write_text("{}")
             (review_dir / "plan_v2.codex.json").write_text("{}")
             (review_dir / "plan_v1.annotated.md").write_text("annotated 1")
-            (review_dir / "version_counter").write_text("2")
+            (review_dir / "plan_v3.snapshot.delta.gz").write_bytes(b"")
+            (review_dir / "plan_v3.codex.json.gz").write_bytes(b"")
+            (review_dir / "plan_v3.annotated.delta.gz").write_bytes(b"")
+            (review_dir / "version_counter").write_text("3")
 
             plan_review.invalidate_approval(review_dir)
 
@@ -150,6 +158,7 @@ class TestApprovalLifecycle(unittest.TestCase):
             self.assertFalse((review_dir / "plan_v1.codex.json").exists())
             self.assertFalse((review_dir / "plan_v2.codex.json").exists())
             self.assertFalse((review_dir / "plan_v1.annotated.md").exists())
+            self.assertEqual(list(review_dir.glob("plan_v*")), [])
 
     def test_write_approval(self):
         """Approval created on Codex approve with correct hash."""
@@ -160,16 +169,76 @@ class TestApprovalLifecycle(unittest.TestCase):
             plan_content = "test plan content"
             plan_path.write_text(plan_content)
 
-            plan_review.write_approval(review_dir, str(plan_path), 2, "thread-123")
+            expected_hash = hashlib.sha256(plan_content.encode()).hexdigest()
+            self.assertTrue(plan_review.write_approval(review_dir, str(plan_path), expected_hash, 2, "thread-123"))
 
             approval = json.loads((review_dir / "approval.json").read_text())
             self.assertTrue(approval["is_optimal"])
             self.assertEqual(approval["review_version"], 2)
             self.assertEqual(approval["codex_thread_id"], "thread-123")
-
-            expected_hash = hashlib.sha256(plan_content.encode()).hexdigest()
             self.assertEqual(approval["plan_hash"], expected_hash)
 
+    def test_write_approval_only_for_reviewed_content(self):
+        """A plan edited after Codex reviewed it is not approved."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            review_dir = Path(tmpdir) / ".claude" / "review"
+            review_dir.mkdir(parents=True)
+            plan_path = Path(tmpdir) / "plan.md"
+            plan_path.write_text("reviewed plan")
+            reviewed_hash = hashlib.sha256(b"reviewed plan").hexdigest()
+            plan_path.write_text("edited plan")
+
+            self.assertFalse(plan_review.write_approval(review_dir, str(plan_path), reviewed_hash, 1, None))
+            self.assertFalse((review_dir / "approval.json").exists())
+            self.assertFalse((review_dir / approval_cache.CACHE_NAME).exists())
+
+    def test_write_approval_waits_for_cycle_lock(self):
+        """The hash check runs only once a concurrent plan write has released the lock."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            review_dir = Path(tmpdir) / ".claude" / "review"
+            review_dir.mkdir(parents=True)
+            plan_path = Path(tmpdir) / "plan.md"
+            plan_path.write_text("reviewed plan")
+            reviewed_hash = hashlib.sha256(b"reviewed plan").hexdigest()
+            results = []
+
+            with plan_namespace.locked(review_dir):
+                writer = threading.Thread(target=lambda: results.append(
+                    plan_review.write_approval(review_dir, str(plan_path), reviewed_hash, 1, None)
+                ))
+                writer.start()
+                time.sleep(0.1)
+                self.assertEqual(results, [])
+                plan_path.write_text("edited plan")
+            writer.join()
+            self.assertEqual(results, [False])
+            self.assertFalse((review_dir / "approval.json").exists())
+
+    def test_reviewed_text_matches_hash(self):
+        """The hash handed to the review is that of the text Codex sees, even if the plan is rewritten."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            plan_path = Path(tmpdir) / "docs" / "plan.md"
+            plan_path.parent.mkdir()
+            plan_path.write_text(TestResumeDiffPrompt.PLAN)
+            (Path(tmpdir) / "a.py").write_text("")
+            real_hash_file = approval_cache.hash_file
+
+            def editor_writes_first(path):
+                plan_path.write_text(TestResumeDiffPrompt.PLAN + "\nEdited.\n")
+                return real_hash_file(path)
+
+            hook_input = json.dumps({"cwd": tmpdir, "tool_input": {"file_path": "docs/plan.md"}})
+            with patch("sys.stdin", io.StringIO(hook_input)), patch("sys.stdout", io.StringIO()) as out, \
+                    patch.object(sys, "argv", ["plan_review.py"]), \
+                    patch.object(approval_cache, "hash_file", side_effect=editor_writes_first), \
+                    patch.object(plan_review, "review_plan", return_value=("", "", "ok")) as review:
+                with self.assertRaises(SystemExit):
+                    plan_review.main()
+            self.assertTrue(review.called, out.getvalue())
+            plan_text, plan_hash = review.call_args.args[3:5]
+            self.assertEqual(plan_text, TestResumeDiffPrompt.PLAN)
+            self.assertEqual(plan_hash, hashlib.sha256(plan_text.encode()).hexdigest())
+
 
 class TestVersionCounter(unittest.TestCase):
     """Test version counter management."""
@@ -287,6 +356,75 @@ class TestCodexOutputParsing(unittest.TestCase):
         self.assertIsNone(result)
 
 
+class TestResumeDiffPrompt(unittest.TestCase):
+    """Test diff-based prompts for resumed sessions."""
+
+    PLAN = """## Goal
+Ship it
+## Context
+Module a.py
+## Approach
+Do the thing
+## Changes
+- a.py: edit
+## Risks
+Low
+## Open Questions
+None
+"""
+
+    def test_split_sections(self):
+        sections = plan_review.split_plan_sections("# Title\n" + self.PLAN)
+        self.assertEqual(sections[""], "# Title\n")
+        self.assertEqual(sections["## Changes"], "## Changes\n- a.py: edit\n")
+
+    def test_diff_lists_unchanged_sections(self):
+        revised = self.PLAN.replace("- a.py: edit", "- a.py: edit\n- b.py: add")
+        diff = plan_review.build_plan_diff(self.PLAN * 3, revised * 3)
+        self.assertIsNotNone(diff)
+        self.assertIn("## Goal", diff.splitlines()[0])
+        self.assertIn("+- b.py: add", diff)
+
+    def test_diff_none_when_not_smaller(self):
+        """A full rewrite falls back to the full plan."""
+        rewritten = self.PLAN.replace("Ship it", "Other").replace("Low", "High")
+        self.assertIsNone(plan_review.build_plan_diff("", rewritten))
+
+    def test_prompt_modes(self):
+        long_plan = self.PLAN + "\n".join(f"detail line {i}" for i in range(50))
+        revised = long_plan.replace("Do the thing", "Do the better thing")
+        full = plan_review.build_codex_prompt(revised, 2)
+        diff = plan_review.build_codex_prompt(revised, 2, long_plan, 1)
+        self.assertIn("--- PLAN START ---", full)
+        self.assertIn("--- PLAN DIFF START ---", diff)
+        self.assertIn("(v1)", diff)
+        self.assertLess(len(diff), len(full))
+
+    def test_fresh_fallback_gets_full_prompt(self):
+        """After a failed resume, the fresh session receives the full prompt."""
+        failed = MagicMock(returncode=1)
+        ok = MagicMock(returncode=0)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch.object(plan_review, "run_codex_resume", return_value=failed) as resume, \
+                    patch.object(plan_review, "run_codex_fresh", return_value=(ok, "new-tid")) as fresh:
+                proc, tid = plan_review.run_codex_review(
+                    tmpdir, Path(tmpdir), "schema", "out", "FULL", "old-tid", "DIFF"
+                )
+            self.assertEqual(resume.call_args.args[3], "DIFF")
+            self.assertEqual(fresh.call_args.args[3], "FULL")
+            self.assertEqual(tid, "new-tid")
+
+    def test_seen_version_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            review_dir = Path(tmpdir)
+            self.assertIsNone(plan_review.get_thread_seen_version(review_dir))
+            plan_review.store_thread_seen_version(review_dir, 3)
+            self.assertEqual(plan_review.get_thread_seen_version(review_dir), 3)
+            (review_dir / "approval.json").write_text("{}")
+            plan_review.invalidate_approval(review_dir)
+            self.assertIsNone(plan_review.get_thread_seen_version(review_dir))
+
+
 class TestRejectionFeedback(unittest.TestCase):
     """Test rejection feedback references annotated plan."""
 
@@ -344,5 +482,87 @@ class TestRejectionFeedback(unittest.TestCase):
             self.assertEqual(annotated_md, "")
 
 
+class TestTimeoutCheckpoint(unittest.TestCase):
+    """Test resuming a timed-out Codex session for the same plan."""
+
+    PLAN = TestResumeDiffPrompt.PLAN.replace("a.py", "the module")
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+        self.review_dir = plan_review.get_review_dir(self.cwd)
+        (Path(self.cwd) / "docs").mkdir()
+        self.plan_path = str(Path(self.cwd) / "docs" / "plan.md")
+        Path(self.plan_path).write_text(self.PLAN)
+        self.calls = []
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def review(self, plan_hash, *outcomes):
+        outcomes = list(outcomes)
+
+        def fake_review(cwd, review_dir, schema, output, prompt, thread_id, resume_prompt=None, **kwargs):
+            self.calls.append((thread_id, resume_prompt))
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            Path(output).write_text(json.dumps(outcome))
+            return MagicMock(returncode=0), thread_id or "fresh-tid"
+
+        with patch.object(plan_review, "run_codex_review", side_effect=fake_review), \
+                patch("review_cache.repo_state", return_value=None), \
+                patch("evidence.build", return_value=None):
+            return plan_review.review_plan(self.cwd, self.review_dir, self.plan_path, self.PLAN, plan_hash, 1)
+
+    @staticmethod
+    def timeout(thread_id):
+        exc = plan_review.subprocess.TimeoutExpired("codex", 540)
+        exc.thread_id = thread_id
+        return exc
+
+    def test_timeout_checkpointed_and_resumed(self):
+        approved = {field: "" for field in plan_review.REQUIRED_OUTPUT_FIELDS}
+        approved.update(is_optimal=True, blocking_issues=[], recommended_changes=[])
+        result = self.review("h1", self.timeout("tid-1"))
+        self.assertIn("progress was saved", result[2])
+        self.assertEqual(plan_review.read_checkpoint(self.review_dir)["thread_id"], "tid-1")
+
+        result = self.review("h1", approved)
+        self.assertEqual(result[0], "")
+        thread_id, resume_prompt = self.calls[-1]
+        self.assertEqual(thread_id, "tid-1")
+        self.assertEqual(resume_prompt, plan_review.build_continue_prompt(1))
+        self.assertNotIn("PLAN START", resume_prompt)
+        self.assertIsNone(plan_review.read_checkpoint(self.review_dir))
+
+    def test_other_plan_discards_checkpoint(self):
+        plan_review.store_checkpoint(self.review_dir, "h1", 1, "tid-1")
+        self.review("h2", self.timeout(None))
+        self.assertEqual(self.calls, [(None, None)])
+        self.assertIsNone(plan_review.read_checkpoint(self.review_dir))
+
+    def test_resumes_capped(self):
+        self.review("h1", self.timeout("tid-1"))
+        for _ in range(plan_review.MAX_CHECKPOINT_RESUMES):
+            self.review("h1", self.timeout("tid-1"))
+        self.assertIsNone(plan_review.read_checkpoint(self.review_dir))
+        self.review("h1", self.timeout("tid-2"))
+        self.assertEqual([tid for tid, _ in self.calls], ["tid-1" if i else None for i in range(3)] + [None])
+
+    def test_rewrite_reuses_timed_out_version(self):
+        (self.review_dir / "version_counter").write_text("2")
+        plan_hash = hashlib.sha256(self.PLAN.encode()).hexdigest()
+        plan_review.store_checkpoint(self.review_dir, plan_hash, 2, "tid-1")
+        hook_input = json.dumps({"cwd": self.cwd, "tool_input": {"file_path": "docs/plan.md"}})
+        with patch("sys.stdin", io.StringIO(hook_input)), patch("sys.stdout", io.StringIO()) as out, \
+                patch.object(sys, "argv", ["plan_review.py"]), \
+                patch.object(plan_review, "review_plan", return_value=("", "", "ok")) as review:
+            with self.assertRaises(SystemExit):
+                plan_review.main()
+        self.assertEqual(review.call_args.args[5], 2)
+        self.assertEqual(plan_review.read_version_counter(self.review_dir), 2)
+
+
 if __name__ == "__main__":
     unittest.main()
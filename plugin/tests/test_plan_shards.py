@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Tests for plan_shards.py and sharded Codex review."""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import plan_review
+import plan_shards
+
+
+def _plan(entries: int) -> str:
+    changes = "".join(f"- src/module_{i}.py: change {i}\n  detail for {i}\n" for i in range(entries))
+    return (
+        "## Goal\nShip it\n## Context\nSome context\n## Approach\nDo the thing\n"
+        f"## Changes\nFiles touched:\n{changes}"
+        "## Risks\nLow\n## Open Questions\nNone\n"
+    )
+
+
+def _review(optimal: bool, claim: str = "", recommended=None) -> dict:
+    return {
+        "is_optimal": optimal,
+        "blocking_issues": [{"severity": "high", "claim": claim, "evidence": "e", "fix": "f"}] if claim else [],
+        "recommended_changes": recommended or [],
+        "annotated_plan_markdown": "",
+        "summary": "ok" if optimal else "issues",
+    }
+
+
+class TestSplitEntries(unittest.TestCase):
+    """Test parsing the Changes section into entries."""
+
+    def test_list_items_and_subheadings(self):
+        preamble, entries = plan_shards.split_entries(
+            "## Changes\nIntro\n- a.py: edit\n  more\n### Component B\n- b.py\n1. c.py\n"
+        )
+        self.assertEqual(preamble, "## Changes\nIntro\n")
+        self.assertEqual(entries[0], "- a.py: edit\n  more\n")
+        self.assertEqual(entries[1], "### Component B\n")
+        self.assertEqual(len(entries), 4)
+
+    def test_code_fences_do_not_split(self):
+        _, entries = plan_shards.split_entries("## Changes\n- a.py\n```\n- not an entry\n```\n- b.py\n")
+        self.assertEqual(len(entries), 2)
+        self.assertIn("- not an entry", entries[0])
+
+
+class TestShardPlans(unittest.TestCase):
+    """Test building per-shard plans."""
+
+    def test_small_plan_not_sharded(self):
+        sections = plan_review.split_plan_sections(_plan(3))
+        self.assertIsNone(plan_shards.shard_plans(sections, 8, 4))
+
+    def test_shards_cover_every_entry_once(self):
+        sections = plan_review.split_plan_sections(_plan(10))
+        plans = plan_shards.shard_plans(sections, 8, 4)
+        self.assertEqual(len(plans), 4)
+        for i in range(10):
+            owners = [p for p in plans if f"- src/module_{i}.py: change {i}\n  detail" in p]
+            self.assertEqual(len(owners), 1)
+        for p in plans:
+            self.assertIn("## Goal\nShip it", p)
+            self.assertIn("## Risks\nLow", p)
+            self.assertIn("Reviewed in other shards:", p)
+
+    def test_pack_balances_sizes(self):
+        entries = ["x" * 100, "x" * 60, "x" * 50, "x" * 10]
+        shards = plan_shards.pack(entries, 2)
+        sizes = sorted(sum(len(entries[i]) for i in shard) for shard in shards)
+        self.assertEqual(sizes, [110, 110])
+
+
+class TestMergeReviews(unittest.TestCase):
+    """Test merging shard verdicts."""
+
+    def test_optimal_is_and_across_shards(self):
+        merged = plan_shards.merge_reviews([_review(True, recommended=["r"]), _review(False, "bad", ["r"])])
+        self.assertFalse(merged["is_optimal"])
+        self.assertEqual([i["claim"] for i in merged["blocking_issues"]], ["bad"])
+        self.assertEqual(merged["recommended_changes"], ["r"])
+        self.assertIn("[Shard 2/2] issues", merged["summary"])
+
+    def test_all_optimal(self):
+        merged = plan_shards.merge_reviews([_review(True), _review(True)])
+        self.assertTrue(merged["is_optimal"])
+
+
+class TestShardedReview(unittest.TestCase):
+    """Test running shards concurrently and merging their output."""
+
+    def test_shards_run_concurrently_and_merge(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_fresh(cwd, schema, output, prompt, event_log=None, on_thread_id=None, on_spawn=None, timeout=540):
+            with lock:
+                running.append(output)
+                peak.append(len(running))
+            time.sleep(0.2)
+            rejected = "shard2" in output
+            Path(output).write_text(json.dumps(_review(not rejected, "issue" if rejected else "")))
+            with lock:
+                running.remove(output)
+            return MagicMock(returncode=0), "tid"
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            review_dir = Path(tmpdir)
+            output = str(review_dir / "plan_v1.codex.json")
+            with patch.object(plan_review, "run_codex_fresh", side_effect=fake_fresh):
+                proc = plan_review.run_sharded_review(
+                    tmpdir, review_dir, "schema", output, ["a", "b", "c"], 1, max_workers=3
+                )
+            merged = json.loads(Path(output).read_text())
+
+        self.assertEqual(proc.returncode, 0)
+        self.assertEqual(max(peak), 3)
+        self.assertFalse(merged["is_optimal"])
+        self.assertEqual(merged["shards"], 3)
+        self.assertEqual(len(merged["blocking_issues"]), 1)
+
+    def test_failed_shard_reported(self):
+        failed = MagicMock(returncode=2)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = str(Path(tmpdir) / "plan_v1.codex.json")
+            with patch.object(plan_review, "run_codex_fresh", return_value=(failed, None)):
+                proc = plan_review.run_sharded_review(
+                    tmpdir, Path(tmpdir), "schema", output, ["a", "b"], 1, max_workers=2
+                )
+            self.assertIs(proc, failed)
+            self.assertFalse(Path(output).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Tests for review_budget.py deadlines, learned timeouts and retries."""
+
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import hook_config
+import plan_review
+import review_budget
+import review_history
+
+SETTINGS = hook_config.DEFAULTS["review"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def completed(returncode: int, stderr: bytes = b"") -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(["codex"], returncode, stdout=b"", stderr=stderr)
+
+
+class TestAttempts(unittest.TestCase):
+    """Test runs sharing one deadline."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.deadline = review_budget.Deadline(540, clock=self.clock)
+        self.timeouts = []
+
+    def attempt(self, *outcomes, seconds=10):
+        outcomes = list(outcomes)
+
+        def run(timeout):
+            self.timeouts.append(timeout)
+            outcome = outcomes.pop(0)
+            if outcome == "timeout":
+                self.clock.now += timeout
+                raise subprocess.TimeoutExpired("codex", timeout)
+            self.clock.now += seconds
+            return outcome
+        return run
+
+    def test_transient_failure_retried_with_backoff(self):
+        sleeps = []
+        attempts = review_budget.Attempts(self.deadline, SETTINGS, sleep=sleeps.append)
+        proc = attempts.run(self.attempt(completed(1, b"stream error: 503 Service Unavailable"), completed(0)))
+        self.assertEqual(proc.returncode, 0)
+        self.assertEqual(attempts.count, 2)
+        self.assertEqual(len(sleeps), 1)
+        self.assertLessEqual(sleeps[0], SETTINGS["retry_backoff_seconds"])
+
+    def test_permanent_failure_not_retried(self):
+        attempts = review_budget.Attempts(self.deadline, SETTINGS, sleep=self.fail)
+        proc = attempts.run(self.attempt(completed(2, b"error: unknown option --foo")))
+        self.assertEqual((proc.returncode, attempts.count), (2, 1))
+
+    def test_retries_bounded(self):
+        flaky = completed(1, b"429 Too Many Requests")
+        attempts = review_budget.Attempts(self.deadline, SETTINGS, sleep=lambda s: None)
+        proc = attempts.run(self.attempt(*[flaky] * 5))
+        self.assertIs(proc, flaky)
+        self.assertEqual(attempts.count, SETTINGS["max_retries"] + 1)
+
+    def test_no_retry_without_budget(self):
+        attempts = review_budget.Attempts(self.deadline, SETTINGS, sleep=self.fail)
+        proc = attempts.run(self.attempt(completed(1, b"connection reset"), seconds=500))
+        self.assertEqual((proc.returncode, attempts.count), (1, 1))
+
+    def test_stuck_run_cut_at_learned_timeout(self):
+        """A run past its learned timeout is retried; the last one gets the rest of the budget."""
+        attempts = review_budget.Attempts(self.deadline, SETTINGS, timeout=150)
+        proc = attempts.run(self.attempt("timeout", "timeout", completed(0)))
+        self.assertEqual(proc.returncode, 0)
+        self.assertEqual(self.timeouts, [150, 150, 240])
+
+    def test_budget_spent(self):
+        attempts = review_budget.Attempts(self.deadline, {**SETTINGS, "max_retries": 0}, timeout=150)
+        with self.assertRaises(subprocess.TimeoutExpired):
+            attempts.run(self.attempt("timeout"))
+        self.assertEqual(self.timeouts, [540])
+        with self.assertRaises(review_budget.BudgetExhausted):
+            attempts.run(self.attempt(completed(0)))
+
+    def test_resume_timeout_falls_back_within_deadline(self):
+        """Resume and fresh fallback together stay inside one deadline."""
+        attempts = review_budget.Attempts(self.deadline, SETTINGS)
+        resume = self.attempt("timeout")
+        fresh = self.attempt("timeout")
+        with patch.object(plan_review, "run_codex_resume", side_effect=lambda *a, timeout, **k: resume(timeout)), \
+                patch.object(plan_review, "run_codex_fresh", side_effect=lambda *a, timeout, **k: fresh(timeout)):
+            with tempfile.TemporaryDirectory() as tmpdir, self.assertRaises(subprocess.TimeoutExpired):
+                plan_review.run_codex_review(tmpdir, Path(tmpdir), "schema", "out", "FULL", "tid", attempts=attempts)
+        self.assertEqual(self.timeouts, [270, 270])
+        self.assertEqual(self.deadline.remaining(), 0)
+
+    def test_failed_resume_without_budget_not_retried(self):
+        attempts = review_budget.Attempts(self.deadline, SETTINGS)
+        failed = completed(1)
+        with patch.object(plan_review, "run_codex_resume",
+                          side_effect=lambda *a, timeout, **k: self.attempt(failed, seconds=500)(timeout)), \
+                patch.object(plan_review, "run_codex_fresh", side_effect=AssertionError("fresh ran")):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                proc, tid = plan_review.run_codex_review(
+                    tmpdir, Path(tmpdir), "schema", "out", "FULL", "tid", attempts=attempts
+                )
+        self.assertEqual((proc, tid), (failed, "tid"))
+
+    def fail(self, *args):
+        raise AssertionError("slept before a retry")
+
+
+class TestLearnedTimeout(unittest.TestCase):
+    """Test timeouts derived from the review history."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.review_dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def record(self, version, plan_bytes, seconds, verdict="rejected"):
+        review_history.record(self.review_dir, version, "h", verdict, duration=seconds, plan_bytes=plan_bytes)
+
+    def test_needs_enough_similar_reviews(self):
+        for version in range(1, 5):
+            self.record(version, 10_000, 100)
+        self.record(5, 100_000, 100)
+        self.assertIsNone(review_budget.learned_timeout(self.review_dir, 10_000, SETTINGS))
+
+    def test_quantile_of_similar_reviews(self):
+        for version, seconds in enumerate([80, 90, 100, 110, 120], 1):
+            self.record(version, 12_000, seconds)
+        self.record(6, 12_000, 500, verdict="timeout")
+        self.record(7, 200_000, 500)
+        self.assertEqual(review_budget.learned_timeout(self.review_dir, 10_000, SETTINGS), 180)
+
+    def test_floor(self):
+        for version in range(1, 6):
+            self.record(version, 1000, 5)
+        self.assertEqual(review_budget.learned_timeout(self.review_dir, 1000, SETTINGS), SETTINGS["min_attempt_seconds"])
+
+    def test_version_one_database_upgraded(self):
+        conn = sqlite3.connect(self.review_dir / review_history.HISTORY_NAME)
+        conn.executescript(
+            review_history.SCHEMA.replace("    plan_bytes INTEGER,\n    attempts INTEGER,\n", "")
+            .replace("CREATE INDEX reviews_size ON reviews (plan_bytes);\n", "")
+            + "PRAGMA user_version = 1;"
+        )
+        conn.close()
+        self.record(1, 1000, 5)
+        conn = review_history.connect(self.review_dir, readonly=True)
+        try:
+            row = dict(conn.execute("SELECT plan_bytes, attempts FROM reviews").fetchone())
+        finally:
+            conn.close()
+        self.assertEqual(row, {"plan_bytes": 1000, "attempts": None})
+
+
+class TestReviewOutcome(unittest.TestCase):
+    """Test that a review out of budget ends with a recorded timeout."""
+
+    def test_timeout_reported_and_recorded(self):
+        def out_of_time(*args, attempts, **kwargs):
+            attempts.count += 2
+            raise subprocess.TimeoutExpired("codex", 540)
+
+        with tempfile.TemporaryDirectory() as cwd:
+            review_dir = plan_review.get_review_dir(cwd)
+            with patch.object(plan_review, "run_codex_review", side_effect=out_of_time), \
+                    patch("review_cache.repo_state", return_value=None):
+                result = plan_review.review_plan(cwd, review_dir, str(Path(cwd) / "plan.md"), "# Plan\n", "h1", 1)
+            conn = review_history.connect(review_dir, readonly=True)
+            try:
+                row = dict(conn.execute("SELECT verdict, attempts, plan_bytes FROM reviews").fetchone())
+            finally:
+                conn.close()
+        self.assertEqual(result[:2], ("block", "Codex CLI timed out during plan review."))
+        self.assertIn("within its 540s budget (2 Codex run(s))", result[2])
+        self.assertEqual(row, {"verdict": "timeout", "attempts": 2, "plan_bytes": 7})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Tests for review_cache.py content-addressed verdict cache."""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import approval_cache
+import plan_review
+import review_cache
+
+VALID_PLAN = """## Goal
+Something
+## Context
+Something
+## Approach
+Something
+## Changes
+Something
+## Risks
+Something
+## Open Questions
+None
+"""
+
+APPROVED_REVIEW = {
+    "is_optimal": True,
+    "blocking_issues": [],
+    "recommended_changes": [],
+    "annotated_plan_markdown": "",
+    "summary": "Plan is optimal.",
+}
+
+
+def _init_repo(path):
+    env = {**os.environ, "GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@t",
+           "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@t"}
+    subprocess.run(["git", "init", "-q", "-b", "main"], cwd=path, check=True)
+    (Path(path) / "README").write_text("repo\n")
+    subprocess.run(["git", "add", "."], cwd=path, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=path, check=True, env=env)
+
+
+class TestCacheStore(unittest.TestCase):
+    """Test lookup, store and eviction."""
+
+    def test_key_depends_on_all_inputs(self):
+        base = review_cache.cache_key("plan", "v1", "tree")
+        self.assertNotEqual(base, review_cache.cache_key("plan2", "v1", "tree"))
+        self.assertNotEqual(base, review_cache.cache_key("plan", "v2", "tree"))
+        self.assertNotEqual(base, review_cache.cache_key("plan", "v1", "tree2"))
+
+    def test_store_and_lookup(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_dir = Path(tmpdir)
+            review_cache.store(cache_dir, "k", {"review": APPROVED_REVIEW}, 30, 1 << 20)
+            self.assertEqual(review_cache.lookup(cache_dir, "k")["review"], APPROVED_REVIEW)
+            self.assertIsNone(review_cache.lookup(cache_dir, "missing"))
+
+    def test_evicts_by_age(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_dir = Path(tmpdir)
+            review_cache.store(cache_dir, "old", {"review": APPROVED_REVIEW}, 30, 1 << 20)
+            stale = time.time() - 31 * 86400
+            os.utime(cache_dir / "old.json", (stale, stale))
+            review_cache.store(cache_dir, "new", {"review": APPROVED_REVIEW}, 30, 1 << 20)
+            self.assertFalse((cache_dir / "old.json").exists())
+            self.assertTrue((cache_dir / "new.json").exists())
+
+    def test_evicts_oldest_over_size_budget(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_dir = Path(tmpdir)
+            for i, name in enumerate(["a", "b", "c"]):
+                review_cache.store(cache_dir, name, {"review": APPROVED_REVIEW}, 30, 1 << 20)
+                t = time.time() - 100 + i
+                os.utime(cache_dir / f"{name}.json", (t, t))
+            entry_size = (cache_dir / "a.json").stat().st_size
+            review_cache.evict(cache_dir, 30, entry_size * 2)
+            self.assertFalse((cache_dir / "a.json").exists())
+            self.assertTrue((cache_dir / "c.json").exists())
+
+
+class TestSharedAcrossWorktrees(unittest.TestCase):
+    """Test that sibling worktrees resolve the same cache directory."""
+
+    def test_worktrees_share_cache_dir(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = Path(tmpdir) / "repo"
+            repo.mkdir()
+            _init_repo(repo)
+            wt = repo / ".worktrees" / "plan-review-1"
+            subprocess.run(["git", "worktree", "add", "-q", "-b", "pr1", str(wt)], cwd=repo, check=True)
+
+            main_dir, main_tree = review_cache.repo_state(str(repo))
+            wt_dir, wt_tree = review_cache.repo_state(str(wt))
+            self.assertEqual(main_dir, wt_dir)
+            self.assertEqual(main_tree, wt_tree)
+            self.assertEqual(main_dir, (repo / ".git" / review_cache.CACHE_SUBDIR).resolve())
+
+    def test_outside_repo(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.assertIsNone(review_cache.repo_state(tmpdir))
+
+
+class TestPlanReviewCacheHit(unittest.TestCase):
+    """Test plan_review.main returning a cached verdict without running Codex."""
+
+    def test_cache_hit_skips_codex(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _init_repo(tmpdir)
+            plan_path = Path(tmpdir) / "docs" / "plan.md"
+            plan_path.parent.mkdir()
+            plan_path.write_text(VALID_PLAN)
+
+            cache_dir, tree = review_cache.repo_state(tmpdir)
+            key = review_cache.cache_key(
+                approval_cache.hash_file(plan_path), plan_review.review_version(), tree
+            )
+            review_cache.store(cache_dir, key, {"review": APPROVED_REVIEW, "thread_id": "t-1"}, 30, 1 << 20)
+
+            hook_input = json.dumps({"cwd": tmpdir, "tool_input": {"file_path": "docs/plan.md"}})
+            stdout = io.StringIO()
+            with patch("sys.stdin", io.StringIO(hook_input)), patch("sys.stdout", stdout), \
+                    patch.object(plan_review, "run_codex_review", side_effect=AssertionError("codex ran")):
+                with self.assertRaises(SystemExit):
+                    plan_review.main()
+
+            output = json.loads(stdout.getvalue())
+            self.assertNotIn("decision", output)
+            self.assertIn("review cache hit", output["hookSpecificOutput"]["additionalContext"])
+            review_dir = Path(tmpdir) / ".claude" / "review"
+            approval = json.loads((review_dir / "approval.json").read_text())
+            # The other worktree's Codex session is not adopted
+            self.assertEqual(approval["codex_thread_id"], "")
+            self.assertIsNone(plan_review.get_codex_thread_id(review_dir))
+
+    def test_cache_hits_do_not_use_up_revisions(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _init_repo(tmpdir)
+            plan_path = Path(tmpdir) / "docs" / "plan.md"
+            plan_path.parent.mkdir()
+            plan_path.write_text(VALID_PLAN)
+
+            cache_dir, tree = review_cache.repo_state(tmpdir)
+            key = review_cache.cache_key(
+                approval_cache.hash_file(plan_path), plan_review.review_version(), tree
+            )
+            rejected = {**APPROVED_REVIEW, "is_optimal": False, "summary": "Not yet."}
+            review_cache.store(cache_dir, key, {"review": rejected}, 30, 1 << 20)
+
+            hook_input = json.dumps({"cwd": tmpdir, "tool_input": {"file_path": "docs/plan.md"}})
+            for _ in range(plan_review.MAX_REVISIONS + 2):
+                stdout = io.StringIO()
+                with patch("sys.stdin", io.StringIO(hook_input)), patch("sys.stdout", stdout), \
+                        patch.object(plan_review, "run_codex_review", side_effect=AssertionError("codex ran")):
+                    with self.assertRaises(SystemExit):
+                        plan_review.main()
+                self.assertNotIn("Maximum revision threshold", stdout.getvalue())
+
+            review_dir = Path(tmpdir) / ".claude" / "review"
+            self.assertEqual(plan_review.read_cache_hits(review_dir), plan_review.MAX_REVISIONS + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Tests for review_history.py cycle history and archiving."""
+
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+HOOKS_DIR = Path(__file__).parent.parent / "hooks"
+sys.path.insert(0, str(HOOKS_DIR))
+import plan_review
+import review_history
+
+REVIEW = {
+    "is_optimal": False,
+    "blocking_issues": [
+        {"severity": "high", "claim": "a", "evidence": "", "fix": ""},
+        {"severity": "high", "claim": "b", "evidence": "", "fix": ""},
+        {"severity": "low", "claim": "c", "evidence": "", "fix": ""},
+    ],
+    "recommended_changes": [],
+    "annotated_plan_markdown": "",
+    "summary": "Needs work.",
+}
+
+PLAN = "## Goal\nShip it\n## Context\nNone\n## Approach\nDo it\n## Changes\n- edit\n## Risks\nLow\n## Open Questions\nNone\n"
+
+
+class TestRecordAndArchive(unittest.TestCase):
+    """Test recording reviews and ending cycles."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.review_dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def rows(self, sql):
+        conn = review_history.connect(self.review_dir, readonly=True)
+        try:
+            return [dict(row) for row in conn.execute(sql)]
+        finally:
+            conn.close()
+
+    def test_record_counts_severities(self):
+        review_history.record(self.review_dir, 1, "h1", "rejected", REVIEW, duration=2.5, thread_id="t1")
+        [row] = self.rows("SELECT * FROM reviews")
+        self.assertEqual((row["high"], row["medium"], row["low"]), (2, 0, 1))
+        self.assertEqual(row["duration_ms"], 2500.0)
+        self.assertEqual(row["thread_id"], "t1")
+        self.assertEqual(row["artifacts"], ".")
+        [cycle] = self.rows("SELECT * FROM cycles")
+        self.assertEqual((cycle["revisions"], cycle["outcome"]), (1, "rejected"))
+
+    def test_repeated_version_replaces_row(self):
+        review_history.record(self.review_dir, 1, "h1", "timeout")
+        review_history.record(self.review_dir, 1, "h2", "approved")
+        self.assertEqual(self.rows("SELECT plan_hash, verdict FROM reviews"), [{"plan_hash": "h2", "verdict": "approved"}])
+
+    def test_archive_moves_artifacts_and_starts_new_cycle(self):
+        review_history.record(self.review_dir, 1, "h1", "approved")
+        (self.review_dir / "plan_v1.codex.json").write_text("{}")
+        (self.review_dir / "approval.json").write_text("{}")
+        archive = review_history.archive_cycle(self.review_dir, keep_archives=5)
+        self.assertEqual(archive, self.review_dir / "archive" / "1")
+        self.assertEqual(sorted(p.name for p in archive.iterdir()), ["approval.json", "plan_v1.codex.json"])
+        self.assertFalse((self.review_dir / "plan_v1.codex.json").exists())
+        self.assertEqual(self.rows("SELECT artifacts FROM reviews"), [{"artifacts": "archive/1"}])
+
+        review_history.record(self.review_dir, 1, "h3", "rejected")
+        cycles = self.rows("SELECT id, ended_at IS NULL AS open FROM cycles ORDER BY id")
+        self.assertEqual(cycles, [{"id": 1, "open": 0}, {"id": 2, "open": 1}])
+
+    def test_old_archives_pruned(self):
+        for cycle in range(3):
+            review_history.record(self.review_dir, 1, f"h{cycle}", "approved")
+            (self.review_dir / "plan_v1.codex.json").write_text("{}")
+            review_history.archive_cycle(self.review_dir, keep_archives=2)
+        self.assertEqual(sorted(p.name for p in (self.review_dir / "archive").iterdir()), ["2", "3"])
+        self.assertEqual(
+            self.rows("SELECT cycle_id, artifacts FROM reviews ORDER BY cycle_id"),
+            [{"cycle_id": 1, "artifacts": None}, {"cycle_id": 2, "artifacts": "archive/2"},
+             {"cycle_id": 3, "artifacts": "archive/3"}],
+        )
+
+    def test_invalidate_archives_when_enabled(self):
+        (self.review_dir / "approval.json").write_text("{}")
+        (self.review_dir / "plan_v1.snapshot.md.gz").write_bytes(b"")
+        plan_review.invalidate_approval(self.review_dir, {"enabled": True, "keep_archives": 5})
+        self.assertEqual(list(self.review_dir.glob("plan_v*")), [])
+        self.assertFalse((self.review_dir / "approval.json").exists())
+        self.assertTrue((self.review_dir / "archive" / "1" / "plan_v1.snapshot.md.gz").exists())
+
+    def test_unusable_database_falls_back_to_delete(self):
+        (self.review_dir / review_history.HISTORY_NAME).write_text("not a database")
+        (self.review_dir / "plan_v1.codex.json").write_text("{}")
+        review_history.record(self.review_dir, 1, "h1", "approved")
+        plan_review.invalidate_approval(self.review_dir, {"enabled": True, "keep_archives": 5})
+        self.assertFalse((self.review_dir / "plan_v1.codex.json").exists())
+
+
+class TestReviewRecorded(unittest.TestCase):
+    """Test that plan reviews land in the history."""
+
+    def test_rejection_recorded(self):
+        with tempfile.TemporaryDirectory() as cwd:
+            review_dir = plan_review.get_review_dir(cwd)
+            plan_path = str(Path(cwd) / "plan.md")
+
+            def fake_review(cwd, review_dir, schema, output, *args, **kwargs):
+                Path(output).write_text(json.dumps(REVIEW))
+                return MagicMock(returncode=0), "thread-1"
+
+            with patch.object(plan_review, "run_codex_review", side_effect=fake_review), \
+                    patch("review_cache.repo_state", return_value=None):
+                result = plan_review.review_plan(cwd, review_dir, plan_path, "# Plan\n", "h1", 1)
+            self.assertEqual(result[0], "block")
+            conn = review_history.connect(review_dir, readonly=True)
+            try:
+                row = dict(conn.execute("SELECT * FROM reviews").fetchone())
+            finally:
+                conn.close()
+        self.assertEqual(row["verdict"], "rejected")
+        self.assertEqual((row["version"], row["plan_hash"], row["thread_id"]), (1, "h1", "thread-1"))
+        self.assertEqual(row["high"], 2)
+        self.assertIsNotNone(row["duration_ms"])
+
+    def test_new_session_closes_unapproved_cycle(self):
+        """A cycle left unapproved by one session is archived when another session writes the plan."""
+        with tempfile.TemporaryDirectory() as cwd:
+            (Path(cwd) / "docs").mkdir()
+            (Path(cwd) / "docs" / "plan.md").write_text(PLAN)
+
+            def fake_review(cwd, review_dir, schema, output, *args, **kwargs):
+                Path(output).write_text(json.dumps(REVIEW))
+                return MagicMock(returncode=0), "thread-1"
+
+            def write_plan(session_id):
+                payload = json.dumps({"cwd": cwd, "session_id": session_id, "tool_input": {"file_path": "docs/plan.md"}})
+                with patch.object(plan_review, "run_codex_review", side_effect=fake_review), \
+                        patch("review_cache.repo_state", return_value=None), \
+                        patch("evidence.build", return_value=None), \
+                        patch("sys.stdout", io.StringIO()), self.assertRaises(SystemExit):
+                    plan_review.run(payload)
+
+            write_plan("s-1")
+            write_plan("s-1")
+            review_dir = plan_review.get_review_dir(cwd)
+            self.assertEqual(plan_review.read_version_counter(review_dir), 2)
+
+            write_plan("s-2")
+            self.assertEqual(plan_review.read_version_counter(review_dir), 1)
+            self.assertTrue((review_dir / "archive" / "1" / "plan_v2.codex.json").exists())
+            conn = review_history.connect(review_dir, readonly=True)
+            try:
+                cycles = [tuple(row) for row in conn.execute(
+                    "SELECT id, revisions, outcome, ended_at IS NULL FROM cycles ORDER BY id"
+                )]
+            finally:
+                conn.close()
+        self.assertEqual(cycles, [(1, 2, "rejected", 0), (2, 1, "rejected", 1)])
+
+
+class TestQueries(unittest.TestCase):
+    """Test the query helpers and CLI on a large history."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.cwd = Path(cls._tmp.name)
+        cls.review_dir = cls.cwd / ".claude" / "review"
+        cls.review_dir.mkdir(parents=True)
+        now = time.time()
+        conn = review_history.connect(cls.review_dir)
+        with conn:
+            for cycle in range(1, 5001):
+                revisions = cycle % 5 + 1
+                started = now - (5001 - cycle) * 600
+                conn.execute(
+                    "INSERT INTO cycles VALUES (?, ?, ?, ?, 'approved', NULL)",
+                    (cycle, started, started + 300, revisions),
+                )
+                conn.executemany(
+                    "INSERT INTO reviews (cycle_id, version, reviewed_at, plan_hash, verdict, duration_ms) "
+                    "VALUES (?, ?, ?, 'h', 'rejected', ?)",
+                    [(cycle, v, started + v * 60, float(cycle * 10 + v)) for v in range(1, revisions + 1)],
+                )
+        conn.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def setUp(self):
+        self.conn = review_history.connect(self.review_dir, readonly=True)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_cycles_with_many_revisions(self):
+        rows = review_history.query_cycles(self.conn, min_revisions=4, limit=3)
+        self.assertEqual([r["id"] for r in rows], [4999, 4998, 4994])
+        self.assertTrue(all(r["revisions"] >= 4 for r in rows))
+
+    def test_slowest_reviews_since(self):
+        rows = review_history.query_reviews(self.conn, slowest=True, since=time.time() - 7 * 86400, limit=2)
+        self.assertEqual([(r["cycle_id"], r["version"]) for r in rows], [(5000, 1), (4999, 5)])
+
+    def test_queries_use_indexes(self):
+        for sql in [
+            "SELECT * FROM reviews WHERE reviewed_at >= 0 ORDER BY duration_ms DESC LIMIT 10",
+            "SELECT * FROM cycles WHERE revisions >= 4",
+        ]:
+            plan = " ".join(row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+            self.assertIn("USING INDEX", plan, sql)
+
+    def test_cli(self):
+        proc = subprocess.run(
+            [sys.executable, str(HOOKS_DIR / "review_history.py"), "cycles",
+             "--min-revisions", "5", "--limit", "2", "--json", "--cwd", str(self.cwd)],
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual([json.loads(line)["id"] for line in proc.stdout.splitlines()], [4999, 4994])
+        proc = subprocess.run(
+            [sys.executable, str(HOOKS_DIR / "review_history.py"), "sql",
+             "SELECT COUNT(*) AS n FROM cycles", "--cwd", str(self.cwd)],
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(json.loads(proc.stdout), {"n": 5000})
+
+    def test_sql_is_read_only(self):
+        proc = subprocess.run(
+            [sys.executable, str(HOOKS_DIR / "review_history.py"), "sql", "DELETE FROM cycles", "--cwd", str(self.cwd)],
+            capture_output=True, text=True,
+        )
+        self.assertEqual(proc.returncode, 1)
+        self.assertEqual(review_history.query_cycles(self.conn, limit=1)[0]["id"], 5000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""Tests for review_jobs.py and the async review mode."""
+
+import io
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import artifact_store
+import bash_drift_check
+import plan_review
+import review_jobs
+import review_status
+
+VALID_PLAN = """## Goal
+Something
+## Context
+Something
+## Approach
+Something
+## Changes
+Something
+## Risks
+Something
+## Open Questions
+None
+"""
+
+
+def _fake_popen(*args, **kwargs):
+    worker = MagicMock()
+    worker.pid = os.getpid()
+    return worker
+
+
+class TestJobLifecycle(unittest.TestCase):
+    """Test enqueue, finish, status and collect."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+        self.review_dir = Path(self.cwd) / ".claude" / "review"
+        self.review_dir.mkdir(parents=True)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _enqueue(self, version, plan_hash="h1"):
+        with patch.object(review_jobs.subprocess, "Popen", side_effect=_fake_popen) as popen:
+            review_jobs.enqueue(self.cwd, self.review_dir, version, plan_hash, "plan_review.py")
+        return popen
+
+    def test_enqueue_starts_detached_worker(self):
+        popen = self._enqueue(1)
+        cmd = popen.call_args[0][0]
+        job = review_jobs.read_pending(self.review_dir)
+        self.assertEqual(cmd[-4:], ["--worker", self.cwd, "1", job["job_id"]])
+        self.assertTrue(popen.call_args[1]["start_new_session"])
+        self.assertEqual(review_jobs.status(self.review_dir), {"state": "pending", "version": 1})
+
+    def test_verdict_delivered_once(self):
+        self._enqueue(1)
+        review_jobs.finish(self.review_dir, 1, "h1", ("block", "Codex review found issues.", "fix it"))
+        self.assertEqual(review_jobs.status(self.review_dir)["state"], "done")
+        self.assertEqual(
+            review_jobs.collect(self.review_dir),
+            ("block", "Codex review found issues.", "fix it"),
+        )
+        self.assertIsNone(review_jobs.collect(self.review_dir))
+        self.assertEqual(review_jobs.status(self.review_dir), {"state": "idle"})
+
+    def test_verdict_delivered_once_concurrently(self):
+        self._enqueue(1)
+        review_jobs.finish(self.review_dir, 1, "h1", ("", "", "Codex approved the plan."))
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(review_jobs.collect(self.review_dir)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len([r for r in results if r is not None]), 1)
+
+    def test_fast_worker_not_brought_back(self):
+        """A worker that finishes before enqueue returns leaves no pending job."""
+        def finishing_popen(*args, **kwargs):
+            review_jobs.finish(self.review_dir, 1, "h1", ("block", "Lint failed.", ""))
+            return _fake_popen()
+
+        with patch.object(review_jobs.subprocess, "Popen", side_effect=finishing_popen):
+            review_jobs.enqueue(self.cwd, self.review_dir, 1, "h1", "plan_review.py")
+        self.assertIsNone(review_jobs.read_pending(self.review_dir))
+        self.assertEqual(review_jobs.status(self.review_dir), {"state": "done", "version": 1})
+
+    def test_superseded_result_discarded(self):
+        self._enqueue(1)
+        self._enqueue(2, plan_hash="h2")
+        review_jobs.finish(self.review_dir, 1, "h1", ("", "", "old verdict"))
+        self.assertIsNone(review_jobs.collect(self.review_dir))
+        self.assertEqual(review_jobs.status(self.review_dir)["state"], "pending")
+
+    def test_dead_worker_reported(self):
+        self._enqueue(1)
+        job = review_jobs.read_pending(self.review_dir)
+        job["worker_pid"] = 2**22 + 1
+        (self.review_dir / review_jobs.PENDING_NAME).write_text(json.dumps(job))
+        self.assertEqual(review_jobs.status(self.review_dir)["state"], "failed")
+
+    def test_review_status_check(self):
+        self._enqueue(1)
+        self.assertEqual(review_status.check(self.cwd)["state"], "pending")
+        review_jobs.finish(self.review_dir, 1, "h1", ("", "", "Codex approved the plan."))
+        result = review_status.check(self.cwd)
+        self.assertEqual(result["state"], "done")
+        self.assertEqual(result["additional_context"], "Codex approved the plan.")
+        self.assertEqual(review_status.check(self.cwd), {"state": "idle"})
+
+
+class TestAsyncMode(unittest.TestCase):
+    """Test plan_review.main in async mode and verdict delivery."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+        (Path(self.cwd) / "docs").mkdir()
+        (Path(self.cwd) / "docs" / "plan.md").write_text(VALID_PLAN)
+        (Path(self.cwd) / ".claude").mkdir()
+        (Path(self.cwd) / ".claude" / "codex-review.json").write_text(
+            json.dumps({"review": {"mode": "async", "debounce_seconds": 0}})
+        )
+        self.review_dir = Path(self.cwd) / ".claude" / "review"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_hook_returns_pending_without_codex(self):
+        hook_input = json.dumps({"cwd": self.cwd, "tool_input": {"file_path": "docs/plan.md"}})
+        stdout = io.StringIO()
+        with patch("sys.stdin", io.StringIO(hook_input)), patch("sys.stdout", stdout), \
+                patch.object(sys, "argv", ["plan_review.py"]), \
+                patch.object(review_jobs.subprocess, "Popen", side_effect=_fake_popen), \
+                patch.object(plan_review, "run_codex_review", side_effect=AssertionError("codex ran")):
+            with self.assertRaises(SystemExit):
+                plan_review.main()
+
+        output = json.loads(stdout.getvalue())
+        self.assertNotIn("decision", output)
+        self.assertIn("review pending", output["hookSpecificOutput"]["additionalContext"])
+        self.assertEqual(review_jobs.read_pending(self.review_dir)["version"], 1)
+        self.assertEqual(artifact_store.read_snapshot(self.review_dir, 1), VALID_PLAN)
+        self.assertFalse((self.review_dir / "approval.json").exists())
+
+        # The worker reviews the snapshot and the next Bash call delivers it
+        verdict = ("block", "Codex review found issues.", "v1 feedback")
+        with patch.object(plan_review, "review_plan", return_value=verdict):
+            plan_review.run_worker(self.cwd, 1, review_jobs.read_pending(self.review_dir)["job_id"])
+        self.assertIsNone(review_jobs.read_pending(self.review_dir))
+
+        stdout = io.StringIO()
+        bash_input = json.dumps({"tool_name": "Bash", "cwd": self.cwd, "tool_input": {"command": "ls"}})
+        with patch("sys.stdout", stdout):
+            bash_drift_check.run(bash_input)
+        output = json.loads(stdout.getvalue())
+        self.assertEqual(output["decision"], "block")
+        self.assertEqual(output["hookSpecificOutput"]["additionalContext"], "v1 feedback")
+
+    def test_replaced_job_not_reviewed(self):
+        """A worker whose job was replaced during the debounce exits quietly."""
+        self.review_dir.mkdir(parents=True)
+        with patch.object(review_jobs.subprocess, "Popen", side_effect=_fake_popen):
+            review_jobs.enqueue(self.cwd, self.review_dir, 1, "h1", "plan_review.py")
+            old_job = review_jobs.read_pending(self.review_dir)
+            review_jobs.enqueue(self.cwd, self.review_dir, 1, "h2", "plan_review.py")
+        with patch.object(plan_review, "review_plan", side_effect=AssertionError("reviewed")):
+            plan_review.run_worker(self.cwd, 1, old_job["job_id"])
+
+
+class TestSupersede(unittest.TestCase):
+    """Test cancelling an in-flight review on a newer plan write."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+        (Path(self.cwd) / "docs").mkdir()
+        (Path(self.cwd) / "docs" / "plan.md").write_text(VALID_PLAN)
+        self.review_dir = Path(self.cwd) / ".claude" / "review"
+        self.review_dir.mkdir(parents=True)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_kills_inflight_codex(self):
+        codex = subprocess.Popen(["sleep", "30"], start_new_session=True)
+        try:
+            token = review_jobs.claim(self.review_dir, 2, "h1")
+            review_jobs.record_codex_pid(self.review_dir, token, codex.pid)
+            self.assertEqual(review_jobs.supersede(self.review_dir), 2)
+            self.assertEqual(codex.wait(timeout=5), -signal.SIGTERM)
+            self.assertFalse(review_jobs.is_current(self.review_dir, token))
+        finally:
+            if codex.poll() is None:
+                codex.kill()
+                codex.wait()
+
+    def test_codex_started_after_supersede_killed(self):
+        """A stale review that spawns Codex after being superseded does not keep it running."""
+        codex = subprocess.Popen(["sleep", "30"], start_new_session=True)
+        try:
+            token = review_jobs.claim(self.review_dir, 2, "h1")
+            review_jobs.supersede(self.review_dir)
+            review_jobs.claim(self.review_dir, 2, "h2")
+            review_jobs.record_codex_pid(self.review_dir, token, codex.pid)
+            self.assertEqual(codex.wait(timeout=5), -signal.SIGTERM)
+            self.assertEqual(
+                json.loads((self.review_dir / review_jobs.INFLIGHT_NAME).read_text())["plan_hash"], "h2"
+            )
+        finally:
+            if codex.poll() is None:
+                codex.kill()
+                codex.wait()
+
+    def test_superseded_before_launch_skips_codex(self):
+        """A review superseded while it prepared its prompt never starts Codex."""
+        def newer_write(*args, **kwargs):
+            review_jobs.supersede(self.review_dir)
+            return None
+
+        plan_path = str(Path(self.cwd) / "docs" / "plan.md")
+        with patch("evidence.build", side_effect=newer_write), \
+                patch("review_cache.repo_state", return_value=None), \
+                patch.object(plan_review, "run_codex_review", side_effect=AssertionError("codex ran")):
+            result = plan_review.review_plan(self.cwd, self.review_dir, plan_path, VALID_PLAN, "h1", 1)
+        self.assertIsNone(result)
+
+    def test_nothing_in_flight(self):
+        self.assertIsNone(review_jobs.supersede(self.review_dir))
+
+    def test_superseded_review_returns_nothing(self):
+        """A review cancelled while Codex runs returns no verdict."""
+        def newer_write(*args, **kwargs):
+            review_jobs.supersede(self.review_dir)
+            return MagicMock(returncode=-15), None
+
+        plan_path = str(Path(self.cwd) / "docs" / "plan.md")
+        with patch.object(plan_review, "run_codex_review", side_effect=newer_write):
+            result = plan_review.review_plan(self.cwd, self.review_dir, plan_path, VALID_PLAN, "h1", 1)
+        self.assertIsNone(result)
+        self.assertFalse((self.review_dir / review_jobs.INFLIGHT_NAME).exists())
+
+    def test_newer_write_reuses_version(self):
+        """The version of a cancelled review is reused, not incremented."""
+        (self.review_dir / "version_counter").write_text("1")
+        review_jobs.claim(self.review_dir, 1, "stale-hash")
+        hook_input = json.dumps({"cwd": self.cwd, "tool_input": {"file_path": "docs/plan.md"}})
+        with patch("sys.stdin", io.StringIO(hook_input)), patch("sys.stdout", io.StringIO()), \
+                patch.object(sys, "argv", ["plan_review.py"]), \
+                patch.object(plan_review, "review_plan", return_value=("", "", "ok")) as review:
+            with self.assertRaises(SystemExit):
+                plan_review.main()
+        self.assertEqual(review.call_args.args[5], 1)
+        self.assertEqual((self.review_dir / "version_counter").read_text().strip(), "1")
+
+
+if __name__ == "__main__":
+    unittest.main()
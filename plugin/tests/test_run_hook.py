@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Tests for run_hook.py, the minimal-import hook dispatcher."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).parent.parent / "hooks"
+sys.path.insert(0, str(HOOKS_DIR))
+import run_hook
+
+# Modules the plan_review no-op path must never load
+HEAVY_MODULES = {"json", "subprocess", "hashlib", "shutil", "datetime", "pathlib", "plan_review"}
+# Total import time allowed for the no-op path, interpreter startup included.
+# Generous for slow CI machines; a regression that imports the hook stack
+# costs several times this.
+STARTUP_BUDGET_US = 40_000
+
+
+def payload(cwd: str, file_path: str, content: str = "") -> str:
+    return json.dumps({
+        "tool_name": "Write",
+        "cwd": cwd,
+        "tool_input": {"file_path": file_path, "content": content},
+    })
+
+
+class TestPlanReviewNoop(unittest.TestCase):
+    """Test the payload scan deciding plan_review's no-op case."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = self._tmp.name
+        os.makedirs(os.path.join(self.cwd, "docs"))
+        Path(self.cwd, "docs", "plan.md").write_text("# Plan\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_other_file_is_noop(self):
+        self.assertTrue(run_hook.plan_review_noop(payload(self.cwd, "src/main.py")))
+
+    def test_plan_path_is_not_noop(self):
+        for path in ["docs/plan.md", os.path.join(self.cwd, "docs", "plan.md"), "./docs/../docs/plan.md"]:
+            self.assertFalse(run_hook.plan_review_noop(payload(self.cwd, path)), path)
+
+    def test_symlink_to_plan_is_not_noop(self):
+        os.symlink(os.path.join(self.cwd, "docs", "plan.md"), os.path.join(self.cwd, "alias.md"))
+        self.assertFalse(run_hook.plan_review_noop(payload(self.cwd, "alias.md")))
+
+    def test_keys_inside_content_are_ignored(self):
+        """A file_path key quoted in the written content is escaped, not a key."""
+        content = json.dumps({"file_path": "docs/plan.md"})
+        self.assertTrue(run_hook.plan_review_noop(payload(self.cwd, "notes.json", content)))
+
+    def test_escaped_values_fall_back(self):
+        """Values needing unescaping are left to the real parse."""
+        self.assertFalse(run_hook.plan_review_noop(payload(self.cwd, "docs\\plan.md")))
+
+    def test_missing_file_path_is_noop(self):
+        self.assertTrue(run_hook.plan_review_noop(json.dumps({"cwd": self.cwd, "tool_input": {}})))
+
+
+class TestDispatch(unittest.TestCase):
+    """Test the dispatcher as the host runs it."""
+
+    def _run(self, hook: str, raw: str, *flags: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, "-S", *flags, str(HOOKS_DIR / "run_hook.py"), hook],
+            input=raw, capture_output=True, text=True, check=False,
+            env={**os.environ, "CODEX_REVIEW_NO_DAEMON": "1"},
+        )
+
+    def test_noop_stays_within_import_budget(self):
+        """plan_review on a non-plan write imports nothing heavy (-X importtime)."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            proc = self._run("plan_review", payload(tmpdir, "src/big.py", "x" * (1 << 20)), "-X", "importtime")
+        self.assertEqual(proc.stdout, "")
+        imported = {}
+        for line in proc.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+                self_us, _, name = line[len("import time:"):].split("|")
+                imported[name.strip()] = int(self_us)
+        self.assertIn("os", imported)
+        self.assertFalse(HEAVY_MODULES & imported.keys(), sorted(HEAVY_MODULES & imported.keys()))
+        self.assertLess(sum(imported.values()), STARTUP_BUDGET_US)
+
+    def test_runs_hook_in_process(self):
+        """Non-trivial payloads reach the hook module's run()."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            raw = json.dumps({"tool_name": "Write", "cwd": tmpdir, "tool_input": {"file_path": "src/x.py"}})
+            proc = self._run("enforce_approval", raw)
+        output = json.loads(proc.stdout)
+        self.assertEqual(output["hookSpecificOutput"]["permissionDecision"], "deny")
+
+    def test_unknown_hook_exits_cleanly(self):
+        proc = self._run("nope", "{}")
+        self.assertEqual(proc.returncode, 0)
+        self.assertEqual(proc.stdout, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Tests for worktree_pool.py pooled bootstrap worktrees."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks"))
+import worktree_pool
+
+GIT_ENV = {**os.environ, "GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@t",
+           "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@t"}
+DEAD_PID = 2 ** 22 + 1
+
+
+def _git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True, env=GIT_ENV).stdout
+
+
+class PoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.repo = os.path.realpath(self._tmp.name)
+        _git(self.repo, "init", "-q", "-b", "main")
+        for rel in ("README", "api/app.py", "web/index.html"):
+            (Path(self.repo) / rel).parent.mkdir(parents=True, exist_ok=True)
+            (Path(self.repo) / rel).write_text(rel + "\n")
+        (Path(self.repo) / ".gitignore").write_text("docs/\n.claude/review/\nnode_modules/\n.worktrees/\n")
+        _git(self.repo, "add", ".")
+        _git(self.repo, "commit", "-qm", "init")
+        _git(self.repo, "branch", "develop")
+        (Path(self.repo) / "README").write_text("main moved on\n")
+        _git(self.repo, "commit", "-qam", "second")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def configure(self, **pool):
+        (Path(self.repo) / ".claude").mkdir(exist_ok=True)
+        (Path(self.repo) / ".claude" / "codex-review.json").write_text(json.dumps({"pool": pool}))
+
+    def entries(self) -> list[dict]:
+        return worktree_pool.status(self.repo)["worktrees"]
+
+
+class TestFillAndAcquire(PoolTestCase):
+    """Test handing out pre-created worktrees."""
+
+    def test_acquire_reuses_filled_worktree(self):
+        self.assertEqual(worktree_pool.fill(self.repo, size=1), {"created": 1, "free": 1})
+        self.assertEqual(worktree_pool.fill(self.repo, size=1)["created"], 0)
+        free = self.entries()[0]["path"]
+
+        lease = worktree_pool.acquire(self.repo, "develop", branch="plan-review/1", owner_pid=os.getpid())
+        self.assertEqual((lease["path"], lease["reused"], lease["branch"]), (free, True, "plan-review/1"))
+        self.assertEqual(_git(free, "rev-parse", "--abbrev-ref", "HEAD").strip(), "plan-review/1")
+        self.assertEqual((Path(free) / "README").read_text(), "README\n")
+        self.assertEqual(self.entries()[0]["state"], "leased")
+
+    def test_acquire_creates_when_pool_empty(self):
+        lease = worktree_pool.acquire(self.repo, owner_pid=os.getpid())
+        self.assertFalse(lease["reused"])
+        self.assertTrue(lease["path"].startswith(os.path.join(self.repo, ".worktrees", "pool-")))
+        self.assertEqual((Path(lease["path"]) / "README").read_text(), "main moved on\n")
+
+    def test_unknown_base_and_profile(self):
+        with self.assertRaisesRegex(ValueError, "unknown base"):
+            worktree_pool.acquire(self.repo, "nope")
+        with self.assertRaisesRegex(ValueError, "unknown sparse-checkout profile"):
+            worktree_pool.fill(self.repo, profile="api")
+        self.assertEqual(self.entries(), [])
+
+    def test_sparse_profile(self):
+        self.configure(profiles={"api": ["api"]})
+        worktree_pool.fill(self.repo, profile="api", size=1)
+        lease = worktree_pool.acquire(self.repo, profile="api", owner_pid=os.getpid())
+        self.assertTrue(lease["reused"])
+        path = Path(lease["path"])
+        self.assertTrue((path / "api" / "app.py").exists())
+        self.assertTrue((path / "README").exists())
+        self.assertFalse((path / "web").exists())
+
+    def test_abandoned_lease_reclaimed_if_clean(self):
+        first = worktree_pool.acquire(self.repo, branch="b1", owner_pid=DEAD_PID)
+        second = worktree_pool.acquire(self.repo, branch="b2", owner_pid=os.getpid())
+        self.assertEqual((second["path"], second["reused"]), (first["path"], True))
+
+        (Path(second["path"]) / "README").write_text("work in progress\n")
+        worktree_pool._update(worktree_pool._locate(self.repo)[0], self.entries()[0]["id"], owner_pid=DEAD_PID)
+        third = worktree_pool.acquire(self.repo, branch="b3", owner_pid=os.getpid())
+        self.assertNotEqual(third["path"], second["path"])
+
+    def test_cli_lease_owned_by_caller(self):
+        script = str(Path(worktree_pool.__file__))
+
+        def cli(*args):
+            proc = subprocess.run([sys.executable, script, "acquire", *args, self.repo], capture_output=True, text=True)
+            return json.loads(proc.stdout)
+
+        first = cli("--branch", "b1", "--owner-pid", str(os.getpid()))
+        second = cli("--branch", "b2")
+        self.assertNotEqual(second["path"], first["path"])
+        self.assertEqual([e["owner_pid"] for e in self.entries()], [os.getpid(), os.getpid()])
+
+        # As in bootstrap.sh, the output is read through a command substitution
+        shell = subprocess.run(
+            ["bash", "-c", 'path="$("$0" "$1" acquire --branch b3 --owner-pid $$ "$2" | cat)"; echo $$',
+             sys.executable, script, self.repo],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        self.assertEqual(self.entries()[2]["owner_pid"], int(shell))
+
+class TestRelease(PoolTestCase):
+    """Test returning a worktree to the pool."""
+
+    def lease(self):
+        lease = worktree_pool.acquire(self.repo, branch="plan-review/1", owner_pid=os.getpid())
+        path = Path(lease["path"])
+        (path / "docs").mkdir()
+        (path / "docs" / "plan.md").write_text("plan\n")
+        (path / "node_modules").mkdir()
+        (path / "node_modules" / "dep.js").write_text("dep\n")
+        return path
+
+    def test_release_cleans_and_keeps_branch(self):
+        self.configure(keep_ignored=["node_modules"])
+        path = self.lease()
+        (path / "notes.txt").write_text("scratch\n")
+        _git(path, "add", "notes.txt")
+        _git(path, "commit", "-qm", "work")
+
+        self.assertEqual(
+            worktree_pool.release(str(path)), {"released": True, "removed": False, "branch": "plan-review/1"}
+        )
+        self.assertFalse((path / "docs").exists())
+        self.assertTrue((path / "node_modules" / "dep.js").exists())
+        self.assertEqual(_git(path, "rev-parse", "--abbrev-ref", "HEAD").strip(), "HEAD")
+        self.assertIn("work", _git(self.repo, "log", "-1", "--format=%s", "plan-review/1"))
+        self.assertEqual(self.entries()[0]["state"], "free")
+
+        again = worktree_pool.acquire(self.repo, branch="plan-review/2", owner_pid=os.getpid())
+        self.assertEqual(again["path"], str(path))
+        self.assertFalse((path / "notes.txt").exists())
+
+    def test_dirty_worktree_not_released(self):
+        path = self.lease()
+        (path / "README").write_text("uncommitted\n")
+        result = worktree_pool.release(str(path))
+        self.assertFalse(result["released"])
+        self.assertIn("uncommitted changes", result["reason"])
+        self.assertEqual(self.entries()[0]["state"], "leased")
+        self.assertTrue(worktree_pool.release(str(path), force=True)["released"])
+
+    def test_release_beyond_size_removes(self):
+        self.configure(size=0)
+        path = self.lease()
+        self.assertTrue(worktree_pool.release(str(path))["removed"])
+        self.assertFalse(path.exists())
+        self.assertEqual(self.entries(), [])
+
+    def test_not_a_pool_worktree(self):
+        self.assertFalse(worktree_pool.release(self.repo)["released"])
+
+    def test_drain(self):
+        worktree_pool.fill(self.repo, size=2)
+        leased = worktree_pool.acquire(self.repo, owner_pid=os.getpid())
+        self.assertEqual(worktree_pool.drain(self.repo), {"removed": 1})
+        self.assertEqual([e["path"] for e in self.entries()], [leased["path"]])
+
+
+if __name__ == "__main__":
+    unittest.main()